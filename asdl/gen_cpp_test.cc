@@ -58,14 +58,14 @@ TEST misc_test() {
   PrintTag(v);
 
   auto u = Alloc<arith_expr__Unary>(StrFromC("-"), v);
-  log("u->op = %s", u->op->data_);
+  log("u->op = %s", u->op->data());
 
   auto v1 = Alloc<arith_expr__Var>(StrFromC("v1"));
   auto v2 = Alloc<arith_expr__Var>(StrFromC("v2"));
   auto args = NewList<arith_expr_t*>({v1, v2});
 
   auto f = Alloc<arith_expr__FuncCall>(StrFromC("f"), args);
-  log("f->name = %s", f->name->data_);
+  log("f->name = %s", f->name->data());
 
   auto p = Alloc<pipeline>(true);
   log("p->negated = %d", p->negated);
@@ -75,7 +75,7 @@ TEST misc_test() {
     hnode__Leaf* t2 = static_cast<hnode__Leaf*>(t);
     log("%s", hnode_str(t2->tag()));
     log("%s", color_str(t2->color));
-    log("%s", t2->s->data_);
+    log("%s", t2->s->data());
   }
 #endif
 
@@ -85,7 +85,7 @@ TEST misc_test() {
     hnode__Leaf* t = static_cast<hnode__Leaf*>(t);
     log("%s", hnode_str(t->tag));
     log("%s", color_str(t->color));
-    log("%s", t->s->data_);
+    log("%s", t->s->data());
   }
   */
 
@@ -144,7 +144,7 @@ TEST pretty_print_test() {
   format::PrintTree(t1, ast_f);
   printf("\n");
 
-  log("bool_expr_str = %s", bool_expr_str(b->tag())->data_);
+  log("bool_expr_str = %s", bool_expr_str(b->tag())->data());
   ASSERT(str_equals0("bool_expr.Binary", bool_expr_str(b->tag())));
 
   ASSERT(str_equals0("Binary", bool_expr_str(b->tag(), false)));
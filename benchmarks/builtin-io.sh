@@ -57,4 +57,53 @@ for line in sys.stdin:
 }
 
 
+#
+# Builtin output.  Each echo is a write() unless shopt -s buffer_output.
+#
+
+readonly ECHO_OUT=_tmp/echo-loop.txt
+
+echo-loop() {
+  local sh=${1:-bin/osh}
+  local n=${2:-100000}
+  shift 2 || true  # rest are flags, like -O buffer_output
+
+  time $sh "$@" -c '
+  for (( i = 0; i < $1; ++i )); do
+    echo "line $i"
+  done > $2
+  ' dummy $n $ECHO_OUT
+
+  wc -l $ECHO_OUT  # verify length
+}
+
+echo-loop-syscall() {
+  local sh=${1:-bin/osh}
+  shift || true
+
+  strace -c -e write -- $sh "$@" -c '
+  for (( i = 0; i < 1000; ++i )); do
+    echo "line $i"
+  done > /dev/null
+  '
+}
+
+compare-echo-loop() {
+  local n=${1:-100000}
+
+  for sh in bash bin/osh _bin/cxx-opt/osh; do
+    if ! command -v $sh > /dev/null; then
+      continue
+    fi
+    echo "--- $sh"
+    echo-loop $sh $n
+    case $sh in
+      */osh)
+        echo "--- $sh -O buffer_output"
+        echo-loop $sh $n -O buffer_output
+        ;;
+    esac
+  done
+}
+
 "$@"
@@ -0,0 +1,72 @@
+#!/usr/bin/env bash
+#
+# Time tab completion in a huge directory.
+#
+# Usage:
+#   benchmarks/completion.sh <function name>
+#
+# Example:
+#   benchmarks/completion.sh make-big-dir
+#   benchmarks/completion.sh run-all
+
+set -o nounset
+set -o pipefail
+set -o errexit
+
+readonly BASE_DIR=_tmp/completion
+readonly BIG_DIR=$BASE_DIR/big
+
+# 200K entries.  Every 10th one is a directory, so the trailing / costs a
+# stat().
+make-big-dir() {
+  local n=${1:-200000}
+
+  rm -r -f $BIG_DIR
+  mkdir -p $BIG_DIR
+
+  pushd $BIG_DIR > /dev/null
+  seq $n | awk '$1 % 10 != 0 { print "file" $1 }' | xargs touch
+  seq $n | awk '$1 % 10 == 0 { print "dir" $1 }' | xargs mkdir
+  popd > /dev/null
+
+  ls $BIG_DIR | wc -l
+}
+
+# Complete the same word twice in one process.  The second time should hit the
+# directory listing cache.
+complete-twice() {
+  local sh=$1
+  local word=$2
+  local budget_ms=${3:-100}
+
+  OILS_COMP_BUDGET_MS=$budget_ms $sh -c '
+  compexport -c "$1" | wc -l
+  compexport -c "$1" | wc -l
+  ' dummy "ls $BIG_DIR/$word"
+}
+
+compare() {
+  local sh=$1
+
+  # file1 matches about 100K entries; '' matches all of them
+  for word in file199 file1 dir ''; do
+    for budget_ms in 100 0; do
+      echo "--- $sh  word=$word  budget_ms=$budget_ms"
+      time complete-twice $sh "$word" $budget_ms
+    done
+  done
+}
+
+run-all() {
+  if ! test -d $BIG_DIR; then
+    make-big-dir
+  fi
+
+  for sh in bin/osh _bin/cxx-opt/osh; do
+    if test -f $sh; then
+      compare $sh
+    fi
+  done
+}
+
+"$@"
@@ -113,9 +113,10 @@ bubble_sort-tasks() {
 array_ref-tasks() {
   local provenance=$1
 
-  cat $provenance | filter-provenance bash |
+  # OSH for the sparse mode, which exercises value.SparseArray
+  cat $provenance | filter-provenance bash "$OSH_CPP_REGEX" |
   while read fields; do
-    for mode in seq random; do
+    for mode in seq random sparse; do
       for n in 10000 20000 30000 40000; do
         echo "array_ref $mode $n" | xargs -n 3 -- echo "$fields"
       done
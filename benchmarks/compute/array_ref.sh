@@ -31,6 +31,27 @@ main() {
         sum=$((sum + array[array[i]]))
       done
       ;;
+
+    sparse)
+      # Spread the items out, so most indices are holes.  Then do the ops
+      # that have to know the order of the keys: slicing, unset of the max
+      # index, append, and ${!a[@]}.
+      local -a sp=()
+      for (( i = 0; i < n; ++i )); do
+        sp[array[i]*100]=${array[i]}
+      done
+
+      for (( i = 0; i < 100; ++i )); do
+        local -a part=( "${sp[@]:i * 100:10}" )
+        sum=$((sum + ${#sp[@]} + ${#part[@]}))
+
+        sp+=( $i )
+        unset 'sp[-1]'
+      done
+
+      local -a keys=( "${!sp[@]}" )
+      sum=$((sum + ${#keys[@]}))
+      ;;
   esac
 
   echo sum=$sum
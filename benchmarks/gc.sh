@@ -675,6 +675,24 @@ gc-run-big() {
   popd
 }
 
+gc-profile() {
+  ### Write the live objects by type and call site, and summarize them
+
+  local variant=${1:-opt}
+  local file=${2:-benchmarks/testdata/configure-coreutils}
+
+  local bin=_bin/cxx-$variant/osh
+  ninja $bin
+
+  local dir=_tmp/gc-profile
+  mkdir -p $dir
+
+  OILS_GC_PROFILE=$dir/profile.tsv OILS_GC_PROFILE_SAMPLE=100 \
+    $bin --ast-format none -n $file
+
+  benchmarks/report.R gc-profile $dir $dir
+}
+
 run-verbose() {
   _OILS_GC_VERBOSE=1 OILS_GC_STATS=1 \
     /usr/bin/time --format '*** MAX RSS KiB = %M' -- \
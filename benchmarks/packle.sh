@@ -0,0 +1,72 @@
+#!/usr/bin/env bash
+#
+# Compare saving and loading YSH data with packle and json.
+#
+# Usage:
+#   benchmarks/packle.sh <function name>
+
+set -o nounset
+set -o pipefail
+set -o errexit
+
+YSH=${YSH:-_bin/cxx-opt/ysh}
+BASE_DIR=_tmp/packle
+
+make-data() {
+  ### A list of records, which have repeated keys and values
+
+  local n=$1
+
+  $YSH -c '
+  var records = []
+  for i in (0 ..< $1) {
+    call records->append({id: i, name: "user-$[i % 100]", score: i / 7,
+                          active: i % 3 === 0, tags: ["a", "b"]})
+  }
+  json write (records) > $2/data.json
+  packle write (records) > $2/data.packle
+  ' dummy $n $BASE_DIR
+}
+
+read-write() {
+  local format=$1
+
+  echo "    $format read then write"
+
+  time $YSH -c '
+  $1 read (&x) < $2
+  $1 write (x) > /dev/null
+  echo "len = $[len(x)]"
+  ' dummy $format $BASE_DIR/data.$format
+}
+
+read-part() {
+  echo "    packle read of the last record"
+
+  time $YSH -c '
+  packle read (&x, at=[$1 - 1]) < $2
+  echo "id = $[x.id]"
+  ' dummy $1 $BASE_DIR/data.packle
+}
+
+compare() {
+  local n=${1:-100000}
+
+  ninja $YSH
+  mkdir -p $BASE_DIR
+
+  make-data $n
+  ls -l $BASE_DIR
+  echo
+
+  read-write json
+  echo
+
+  read-write packle
+  echo
+
+  read-part $n
+  echo
+}
+
+"$@"
@@ -0,0 +1,80 @@
+#!/usr/bin/env bash
+#
+# Benchmarks for appending to a string in a loop: s+=x and setvar s = s ++ x
+#
+# Usage:
+#   benchmarks/str-append.sh <function name>
+
+set -o nounset
+set -o pipefail
+set -o errexit
+
+YSH=_bin/cxx-opt/ysh
+OSH=_bin/cxx-opt/osh
+
+append-ysh() {
+  echo "    YSH setvar s = s ++ x"
+
+  time $YSH -c '
+  var s = ""
+  for i in (0 ..< $1) {
+    setvar s = s ++ "ab"
+  }
+  echo "len = $[len(s)]"
+  ' dummy "$@"
+}
+
+append-sh() {
+  local sh=$1
+  local n=$2
+
+  echo "    $sh s+=x"
+  time $sh -c '
+n=$1
+s=
+i=0
+while test $i -lt $n; do
+  s+=ab
+  i=$(( i + 1 ))
+done
+echo "len = ${#s}"
+  ' "$@"
+}
+
+append-py() {
+  echo '    PY'
+  time python3 -c '
+import sys
+n = int(sys.argv[1])
+s = ""
+for i in range(n):
+  s += "ab"
+print(f"len = {len(s)}")
+  ' "$@"
+}
+
+compare() {
+  local n=${1:-1000000}
+
+  ninja $OSH $YSH
+
+  append-py $n
+  echo
+
+  append-ysh $n
+  echo
+
+  append-sh $OSH $n
+  echo
+
+  append-sh bash $n
+  echo
+
+  append-sh zsh $n
+  echo
+
+  append-sh mksh $n
+  echo
+}
+
+"$@"
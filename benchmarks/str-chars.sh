@@ -0,0 +1,51 @@
+#!/usr/bin/env bash
+#
+# Benchmarks for looping over the characters of a UTF-8 string with ${s:i:1},
+# and measuring each one with ${#c}.  Alternating between the long string and
+# each short one used to throw away the character offsets of the long one.
+#
+# Usage:
+#   benchmarks/str-chars.sh <function name>
+#
+# Example:
+#   benchmarks/str-chars.sh compare 4000
+
+set -o nounset
+set -o pipefail
+set -o errexit
+
+OSH=_bin/cxx-opt/osh
+
+chars-sh() {
+  local sh=$1
+  local n=$2
+
+  echo "    $sh c=\${s:i:1}; n=\${#c}"
+  time $sh -c '
+n=$1
+s=
+for (( i = 0; i < n; ++i )); do
+  s+=μ
+done
+
+total=0
+for (( i = 0; i < n; ++i )); do
+  c=${s:i:1}
+  total=$(( total + ${#c} ))
+done
+echo "total = $total"
+  ' dummy "$n"
+}
+
+compare() {
+  local n=${1:-4000}
+
+  for sh in bin/osh $OSH bash; do
+    if test -f $sh || command -v $sh > /dev/null; then
+      chars-sh $sh $n
+      echo
+    fi
+  done
+}
+
+"$@"
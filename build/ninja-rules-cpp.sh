@@ -237,6 +237,9 @@ setglobal_link_flags() {
       ;;
   esac
 
+  # The GC marks big heaps with threads (OILS_GC_THREADS)
+  link_flags="$link_flags -pthread"
+
   if test -n "${STRIP_FLAGS:-}"; then
     link_flags="$link_flags -Wl,$STRIP_FLAGS"
   fi
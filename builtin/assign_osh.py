@@ -11,6 +11,7 @@ from _devbuild.gen.runtime_asdl import (
 from _devbuild.gen.value_asdl import (value, value_e, value_t, LeftName)
 from _devbuild.gen.syntax_asdl import loc, loc_t, word_t
 
+from core import bash_impl
 from core import error
 from core.error import e_usage
 from core import state
@@ -131,7 +132,8 @@ def _PrintVariables(mem, cmd_val, attrs, print_flags, builtin=_OTHER):
         if flag_x == '+' and cell.exported:
             continue
 
-        if flag_a and val.tag() != value_e.BashArray:
+        if flag_a and val.tag() not in (value_e.BashArray,
+                                        value_e.SparseArray):
             continue
         if flag_A and val.tag() != value_e.BashAssoc:
             continue
@@ -145,7 +147,7 @@ def _PrintVariables(mem, cmd_val, attrs, print_flags, builtin=_OTHER):
                 flags.append('r')
             if cell.exported:
                 flags.append('x')
-            if val.tag() == value_e.BashArray:
+            if val.tag() in (value_e.BashArray, value_e.SparseArray):
                 flags.append('a')
             elif val.tag() == value_e.BashAssoc:
                 flags.append('A')
@@ -193,6 +195,29 @@ def _PrintVariables(mem, cmd_val, attrs, print_flags, builtin=_OTHER):
                     body.append(j8_lite.MaybeShellEncode(element))
                 decl.extend(["=(", ''.join(body), ")"])
 
+        elif val.tag() == value_e.SparseArray:
+            sparse_val = cast(value.SparseArray, val)
+            values = bash_impl.SparseArray_GetValues(sparse_val)
+
+            if bash_impl.SparseArray_IsDense(sparse_val):
+                body = []
+                for element in values:
+                    if len(body) > 0:
+                        body.append(" ")
+                    body.append(j8_lite.MaybeShellEncode(element))
+                decl.extend(["=(", ''.join(body), ")"])
+            else:
+                # Same form as a BashArray with holes
+                decl.append("=()")
+                keys = bash_impl.SparseArray_GetKeys(sparse_val)
+                for i, key in enumerate(keys):
+                    if i == 0:
+                        decl.append(";")
+                    decl.extend([
+                        " ", name, "[", key, "]=",
+                        j8_lite.MaybeShellEncode(values[i])
+                    ])
+
         elif val.tag() == value_e.BashAssoc:
             assoc_val = cast(value.BashAssoc, val)
             body = []
@@ -465,7 +490,8 @@ class NewVar(vm._AssignBuiltin):
             if rval is None and (arg.a or arg.A):
                 old_val = self.mem.GetValue(pair.var_name)
                 if arg.a:
-                    if old_val.tag() != value_e.BashArray:
+                    if old_val.tag() not in (value_e.BashArray,
+                                             value_e.SparseArray):
                         rval = value.BashArray([])
                 elif arg.A:
                     if old_val.tag() != value_e.BashAssoc:
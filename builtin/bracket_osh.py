@@ -3,23 +3,26 @@ from __future__ import print_function
 
 from _devbuild.gen.id_kind_asdl import Id
 from _devbuild.gen.syntax_asdl import loc, word, word_e, word_t, bool_expr
-from _devbuild.gen.types_asdl import lex_mode_e
+from _devbuild.gen.types_asdl import bool_arg_type_e, lex_mode_e
 from _devbuild.gen.value_asdl import value
 
 from core import error
 from core.error import e_usage, p_die
 from core import vm
+from frontend import consts
 from frontend import match
 from frontend import typed_args
-from mycpp.mylib import log
+from mycpp import mops
+from mycpp.mylib import log, str_cmp
 from osh import bool_parse
+from osh import bool_stat
 from osh import sh_expr_eval
 from osh import word_parse
 from osh import word_eval
 
 _ = log
 
-from typing import cast, TYPE_CHECKING
+from typing import cast, List, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from _devbuild.gen.runtime_asdl import cmd_value
@@ -174,6 +177,99 @@ def _ThreeArgs(w_parser):
     p_die('Expected binary operator, got %r (3 args)' % w1.s, loc.Word(w1))
 
 
+# Returned by _FastTest() when the parser has to handle the args
+NOT_FAST = -1
+
+
+def _FastInt(s):
+    # type: (str) -> Tuple[bool, mops.BigInt]
+    """Like BoolEvaluator._StringToBigIntOrError, but doesn't fail."""
+    if not match.LooksLikeInteger(s):
+        return False, mops.MINUS_ONE
+    return mops.FromStr2(s)
+
+
+def _FastTest(argv, n):
+    # type: (List[str], int) -> int
+    """Evaluate common forms like [ -f x ] and [ $x -lt 3 ] without a tree.
+
+    This is the same as _TwoArgs() and _ThreeArgs() followed by EvalB().
+    Returns the exit status, or NOT_FAST for long flags, ! ( ) -a -o, the
+    'Other' unary operators, and errors, which the parser reports.
+    """
+    if n == 1:
+        return 0 if len(argv[1]) else 1
+
+    if n == 2:
+        s0 = argv[1]
+        s1 = argv[2]
+        if s0 == '!':
+            return 1 if len(s1) else 0
+
+        unary_id = match.BracketUnary(s0)
+        if unary_id == Id.Undefined_Tok:
+            return NOT_FAST  # including --dir and friends
+
+        arg_type = consts.BoolArgType(unary_id)
+        if arg_type == bool_arg_type_e.Path:
+            b = bool_stat.DoUnaryOp(unary_id, s1)
+        elif unary_id == Id.BoolUnary_z:
+            b = len(s1) == 0
+        elif unary_id == Id.BoolUnary_n:
+            b = len(s1) != 0
+        else:
+            return NOT_FAST
+        return 0 if b else 1
+
+    if n == 3:
+        s0 = argv[1]
+        s2 = argv[3]
+        binary_id = match.BracketBinary(argv[2])
+        if binary_id == Id.Undefined_Tok:
+            return NOT_FAST
+
+        arg_type = consts.BoolArgType(binary_id)
+        if arg_type == bool_arg_type_e.Path:
+            b = bool_stat.DoBinaryOp(binary_id, s0, s2)
+
+        elif arg_type == bool_arg_type_e.Int:
+            ok, i1 = _FastInt(s0)
+            if not ok:
+                return NOT_FAST
+            ok, i2 = _FastInt(s2)
+            if not ok:
+                return NOT_FAST
+
+            if binary_id == Id.BoolBinary_eq:
+                b = mops.Equal(i1, i2)
+            elif binary_id == Id.BoolBinary_ne:
+                b = not mops.Equal(i1, i2)
+            elif binary_id == Id.BoolBinary_gt:
+                b = mops.Greater(i1, i2)
+            elif binary_id == Id.BoolBinary_ge:
+                b = not mops.Greater(i2, i1)
+            elif binary_id == Id.BoolBinary_lt:
+                b = mops.Greater(i2, i1)
+            elif binary_id == Id.BoolBinary_le:
+                b = not mops.Greater(i1, i2)
+            else:
+                return NOT_FAST
+
+        elif binary_id in (Id.BoolBinary_Equal, Id.BoolBinary_DEqual):
+            b = s0 == s2
+        elif binary_id == Id.BoolBinary_NEqual:
+            b = s0 != s2
+        elif binary_id == Id.Op_Less:
+            b = str_cmp(s0, s2) < 0
+        elif binary_id == Id.Op_Great:
+            b = str_cmp(s0, s2) > 0
+        else:
+            return NOT_FAST
+        return 0 if b else 1
+
+    return NOT_FAST
+
+
 class Test(vm._Builtin):
 
     def __init__(self, need_right_bracket, exec_opts, mem, errfmt):
@@ -206,10 +302,6 @@ class Test(vm._Builtin):
             cmd_val.argv.pop()
             cmd_val.arg_locs.pop()
 
-        w_parser = _StringWordEmitter(cmd_val)
-        w_parser.Read()  # dummy: advance past argv[0]
-        b_parser = bool_parse.BoolParser(w_parser)
-
         # There is a fundamental ambiguity due to poor language design, in cases like:
         # [ -z ]
         # [ -z -a ]
@@ -232,10 +324,24 @@ class Test(vm._Builtin):
                 "should only have 3 arguments or fewer (simple_test_builtin)",
                 loc.Missing)
 
+        if n == 0:
+            return 1  # [ ] is False
+
+        # Most tests have 1 to 3 args, and don't need a parser or evaluator
+        try:
+            status = _FastTest(cmd_val.argv, n)
+        except error._ErrorWithLocation as e:  # e.g. operator not implemented
+            self.errfmt.PrettyPrintError(e, prefix='(test) ')
+            return 2
+        if status != NOT_FAST:
+            return status
+
+        w_parser = _StringWordEmitter(cmd_val)
+        w_parser.Read()  # dummy: advance past argv[0]
+        b_parser = bool_parse.BoolParser(w_parser)
+
         try:
-            if n == 0:
-                return 1  # [ ] is False
-            elif n == 1:
+            if n == 1:
                 w = w_parser.Read()
                 bool_node = bool_expr.WordTest(w)
             elif n == 2:
@@ -21,6 +21,36 @@ class BracketTest(unittest.TestCase):
             if w.id == Id.Eof_Real:
                 break
 
+    def testFastTest(self):
+        for argv, status in [
+            (['[', ''], 1),
+            (['[', '!'], 0),
+            (['[', '!', ''], 0),
+            (['[', '-z', ''], 0),
+            (['[', '-n', ''], 1),
+            (['[', '-d', '/'], 0),
+            (['[', '-f', '/'], 1),
+            (['[', 'a', '<', 'b'], 0),
+            (['[', 'a', '!=', 'a'], 1),
+            (['[', '3', '-ge', '3'], 0),
+            (['[', '-2', '-gt', '1'], 1),
+        ]:
+            self.assertEqual(status, bracket_osh._FastTest(argv,
+                                                           len(argv) - 1),
+                             argv)
+
+        # The parser handles these, and reports errors
+        for argv in [
+            ['[', '--dir', '/'],
+            ['[', '-t', '1'],
+            ['[', 'x', '-a', 'y'],
+            ['[', '!', '-z', 'x'],
+            ['[', 'a', '-eq', '3'],
+            ['[', '-q', 'x'],
+        ]:
+            self.assertEqual(bracket_osh.NOT_FAST,
+                             bracket_osh._FastTest(argv, len(argv) - 1), argv)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -34,13 +34,12 @@ class _FixedWordsAction(completion.CompletionAction):
 
     def __init__(self, d):
         # type: (List[str]) -> None
-        self.d = d
+        self.index = completion.PrefixIndex(d)
 
     def Matches(self, comp):
         # type: (Api) -> Iterator[str]
-        for name in sorted(self.d):
-            if name.startswith(comp.to_complete):
-                yield name
+        for name in self.index.Matches(comp.to_complete):
+            yield name
 
     def Print(self, f):
         # type: (mylib.BufWriter) -> None
@@ -74,9 +73,16 @@ class _DynamicStrDictAction(completion.CompletionAction):
 
     def Matches(self, comp):
         # type: (Api) -> Iterator[str]
-        for name in sorted(self.d):
+
+        # The dict can change between completions, so filter it each time, but
+        # only sort the matches
+        matches = []  # type: List[str]
+        for name in self.d:
             if name.startswith(comp.to_complete):
-                yield name
+                matches.append(name)
+        matches.sort()
+        for name in matches:
+            yield name
 
     def Print(self, f):
         # type: (mylib.BufWriter) -> None
@@ -6,6 +6,7 @@ from __future__ import print_function
 
 from _devbuild.gen.value_asdl import (value, value_e, value_t, value_str, Obj)
 
+from core import bash_impl
 from core import error
 from core import num
 from display import pp_value
@@ -21,6 +22,7 @@ from ysh import val_ops
 
 from typing import TYPE_CHECKING, Dict, List, Optional, cast
 if TYPE_CHECKING:
+    from core import state
     from osh import glob_
     from osh import split
 
@@ -396,9 +398,10 @@ class List_(vm._Callable):
 
 class DictFunc(vm._Callable):
 
-    def __init__(self):
-        # type: () -> None
-        pass
+    def __init__(self, mem):
+        # type: (state.Mem) -> None
+        vm._Callable.__init__(self)
+        self.mem = mem
 
     def Call(self, rd):
         # type: (typed_args.Reader) -> value_t
@@ -434,6 +437,7 @@ class DictFunc(vm._Callable):
 
             elif case(value_e.Frame):
                 val = cast(value.Frame, UP_val)
+                self.mem.FlushAppend()  # the frame may have a pending s+=x
                 d = NewDict()
                 for k, cell in iteritems(val.frame):
                     d[k] = cell.val
@@ -621,16 +625,7 @@ class BashArrayToSparse(vm._Callable):
         strs = rd.PosBashArray()
         rd.Done()
 
-        d = {}  # type: Dict[mops.BigInt, str]
-        max_index = mops.MINUS_ONE  # max index for empty array
-        for i, s in enumerate(strs):
-            if s is not None:
-                big_i = mops.IntWiden(i)
-                d[big_i] = s
-                if mops.Greater(big_i, max_index):
-                    max_index = big_i
-
-        return value.SparseArray(d, max_index)
+        return bash_impl.SparseArray_FromList(strs)
 
 
 class SparseOp(vm._Callable):
@@ -646,21 +641,18 @@ class SparseOp(vm._Callable):
         # type: (typed_args.Reader) -> value_t
 
         sp = rd.PosSparseArray()
-        d = sp.d
         #i = mops.BigTruncate(rd.PosInt())
         op_name = rd.PosStr()
 
-        no_str = None  # type: str
-
         if op_name == 'len':  # ${#a[@]}
             rd.Done()
-            return num.ToBig(len(d))
+            return num.ToBig(bash_impl.SparseArray_Count(sp))
 
         elif op_name == 'get':  # ${a[42]}
             index = rd.PosInt()
             rd.Done()
 
-            s = d.get(index)
+            s = bash_impl.SparseArray_Get(sp, index)
             if s is None:
                 return value.Null
             else:
@@ -671,122 +663,38 @@ class SparseOp(vm._Callable):
             s = rd.PosStr()
             rd.Done()
 
-            d[index] = s
-
-            if mops.Greater(index, sp.max_index):
-                sp.max_index = index
-
+            bash_impl.SparseArray_Set(sp, index, s)
             return value.Int(mops.ZERO)
 
         elif op_name == 'unset':  # unset 'a[1]'
             index = rd.PosInt()
             rd.Done()
 
-            mylib.dict_erase(d, index)
-
-            max_index = mops.MINUS_ONE  # Note: this works if d is not empty
-            for i1 in d:
-                if mops.Greater(i1, max_index):  # i1 > max_index
-                    max_index = i1
-            sp.max_index = max_index
-
+            bash_impl.SparseArray_Unset(sp, index)
             return value.Int(mops.ZERO)
 
         elif op_name == 'subst':  # "${a[@]}"
-            # Algorithm to expand a Dict[BigInt, Str]
-            #
-            # 1. Copy the integer keys into a new List
-            # 2. Sort them in numeric order
-            # 3. Create a List[str] that's the same size as the keys
-            # 4. Loop through sorted keys, look up value, and populate list
-            #
-            # There is another possible algorithm:
-            #
-            # 1. Copy the VALUES into a new list
-            # 2. Somehow sort them by the CORRESPONDING key, which depends on
-            #    Slab<> POSITION.  I think this does not fit within the
-            #    std::sort() model.  I think we would have to write a little custom
-            #    sort algorithm.
-
-            keys = d.keys()
-            mylib.BigIntSort(keys)
-            # Pre-allocate
-            items = [no_str] * len(d)  # type: List[str]
-            j = 0
-            for i in keys:
-                s = d.get(i)
-                assert s is not None
-                items[j] = s
-                j += 1
-            return value.BashArray(items)
+            rd.Done()
+            return value.BashArray(bash_impl.SparseArray_GetValues(sp))
 
         elif op_name == 'keys':  # "${!a[@]}"
-            keys = d.keys()
-            mylib.BigIntSort(keys)
-            items = [mops.ToStr(k) for k in keys]
-
+            rd.Done()
             # TODO: return SparseArray
-            return value.BashArray(items)
+            return value.BashArray(bash_impl.SparseArray_GetKeys(sp))
 
         elif op_name == 'slice':  # "${a[@]:0:5}"
             start = rd.PosInt()
             end = rd.PosInt()
             rd.Done()
 
-            n = mops.BigTruncate(mops.Sub(end, start))
-            #log('start %d - end %d', start.i, end.i)
-
-            # Pre-allocate
-            items2 = [no_str] * n  # type: List[str]
-
-            # Iterate from start to end.  Note that this algorithm is
-            # theoretically slower than bash in the case where the array is
-            # sparse (in the part selected by the slice)
-            #
-            # e.g. if you do ${a[@]:1:1000} e.g. to SHIFT, and there are only 3
-            # elements, OSH will iterate through 999 integers and do 999 dict
-            # lookups, while bash will follow 3 pointers.
-            #
-            # However, in practice, I think iterating through integers is
-            # cheap.
-
-            j = 0
-            i = start
-            while mops.Greater(end, i):  # i < end
-                s = d.get(i)
-                #log('s %s', s)
-                if s is not None:
-                    items2[j] = s
-                    j += 1
-
-                i = mops.Add(i, mops.ONE)  # i += 1
-
             # TODO: return SparseArray
-            return value.BashArray(items2)
+            return value.BashArray(bash_impl.SparseArray_Slice(sp, start, end))
 
         elif op_name == 'append':  # a+=(x y)
             strs = rd.PosBashArray()
+            rd.Done()
 
-            # TODO: We can maintain the max index in the value.SparseArray(),
-            # so that it's O(1) to append rather than O(n)
-            # - Update on 'set' is O(1)
-            # - Update on 'unset' is potentially O(n)
-
-            if 0:
-                max_index = mops.MINUS_ONE  # Note: this works for empty arrays
-                for i1 in d:
-                    if mops.Greater(i1, max_index):  # i1 > max_index
-                        max_index = i1
-            else:
-                max_index = sp.max_index
-
-            i2 = mops.Add(max_index, mops.ONE)  # i2 = max_index + 1
-            for s in strs:
-                d[i2] = s
-                i2 = mops.Add(i2, mops.ONE)  # i2 += 1
-
-            # sp.max_index += len(strs)
-            sp.max_index = mops.Add(sp.max_index, mops.IntWiden(len(strs)))
+            bash_impl.SparseArray_Append(sp, strs)
             return value.Int(mops.ZERO)
 
         else:
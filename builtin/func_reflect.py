@@ -79,7 +79,7 @@ class GetFrame(vm._Callable):
         if index < 0:
             index += length
         if 0 <= index and index < length:
-            return value.Frame(self.mem.var_stack[index])
+            return value.Frame(self.mem.FrameAt(index))
         else:
             raise error.Structured(3, "Invalid frame %d" % index,
                                    rd.LeftParenToken())
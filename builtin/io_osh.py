@@ -1,19 +1,18 @@
 from __future__ import print_function
 
-from errno import EINTR
-
 from _devbuild.gen import arg_types
 from _devbuild.gen.id_kind_asdl import Id
 from _devbuild.gen.value_asdl import (value, value_t)
 from builtin import read_osh
-from core.error import e_die_status
 from frontend import flag_util
 from frontend import match
 from frontend import typed_args
 from core import optview
 from core import pyos
+from core import pyutil
 from core import state
 from core import vm
+from mycpp import mops
 from mycpp import mylib
 from mycpp.mylib import log
 from osh import word_compile
@@ -123,60 +122,38 @@ class MapFile(vm._Builtin):
         attrs, arg_r = flag_util.ParseCmdVal('mapfile', cmd_val)
         arg = arg_types.mapfile(attrs.attrs)
 
+        vm.FlushBufferedStdout()  # like read, for shopt -s buffer_output
+
         var_name, _ = arg_r.Peek2()
         if var_name is None:
             var_name = 'MAPFILE'
 
-        lines = []  # type: List[str]
-        while True:
-            # bash uses this slow algorithm; YSH could provide read --all-lines
-            try:
-                line = read_osh.ReadLineSlowly(self.cmd_ev, with_eol=not arg.t)
-            except pyos.ReadError as e:
-                self.errfmt.PrintMessage("mapfile: read() error: %s" %
-                                         posix.strerror(e.err_num))
-                return 1
-            if len(line) == 0:
-                break
-            lines.append(line)
+        if arg.d is not None:
+            if len(arg.d):
+                delim_byte = ord(arg.d[0])
+            else:
+                delim_byte = 0  # -d '' delimits by NUL
+        else:
+            delim_byte = pyos.NEWLINE_CH
+
+        # Like bash, never keep a NUL delimiter
+        with_eol = not arg.t and delim_byte != 0
+
+        max_lines = mops.BigTruncate(arg.n)  # -n 0 copies all lines
+        skip_lines = mops.BigTruncate(arg.s)
+
+        try:
+            lines = read_osh.ReadLines(self.cmd_ev, delim_byte, with_eol,
+                                       max_lines, skip_lines)
+        except pyos.ReadError as e:
+            self.errfmt.PrintMessage("mapfile: read() error: %s" %
+                                     posix.strerror(e.err_num))
+            return 1
+        except (IOError, OSError) as e:  # lseek() failed
+            self.errfmt.PrintMessage("mapfile: I/O error: %s" %
+                                     pyutil.strerror(e))
+            return 1
 
         state.BuiltinSetArray(self.mem, var_name, lines)
         return 0
 
-
-class Cat(vm._Builtin):
-    """Internal implementation detail for $(< file).
-
-    Maybe expose this as 'builtin cat' ?
-    """
-
-    def __init__(self):
-        # type: () -> None
-        """Empty constructor for mycpp."""
-        vm._Builtin.__init__(self)
-
-    def Run(self, cmd_val):
-        # type: (cmd_value.Argv) -> int
-        chunks = []  # type: List[str]
-        while True:
-            n, err_num = pyos.Read(0, 4096, chunks)
-
-            if n < 0:
-                if err_num == EINTR:
-                    pass  # retry
-                else:
-                    # Like the top level IOError handler
-                    e_die_status(2,
-                                 'osh I/O error: %s' % posix.strerror(err_num))
-                    # TODO: Maybe just return 1?
-
-            elif n == 0:  # EOF
-                break
-
-            else:
-                # Stream it to stdout
-                assert len(chunks) == 1
-                mylib.Stdout().write(chunks[0])
-                chunks.pop()
-
-        return 0
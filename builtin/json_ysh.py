@@ -3,7 +3,7 @@ from __future__ import print_function
 from _devbuild.gen import arg_types
 from _devbuild.gen.runtime_asdl import cmd_value
 from _devbuild.gen.syntax_asdl import loc, loc_t
-from _devbuild.gen.value_asdl import value, LeftName
+from _devbuild.gen.value_asdl import value, value_e, LeftName
 from builtin import read_osh
 from core import error
 from core.error import e_usage
@@ -11,6 +11,7 @@ from core import pyos
 from core import state
 from core import vm
 from data_lang import j8
+from data_lang import packle
 from frontend import flag_util
 from frontend import args
 from frontend import typed_args
@@ -20,7 +21,7 @@ from mycpp.mylib import log
 
 import posix_ as posix
 
-from typing import TYPE_CHECKING
+from typing import Optional, Tuple, TYPE_CHECKING
 if TYPE_CHECKING:
     from display import ui
 
@@ -29,6 +30,24 @@ _ = log
 _JSON_ACTION_ERROR = "builtin expects 'read' or 'write'"
 
 
+def _ReadPlace(mem, cmd_val):
+    # type: (state.Mem, cmd_value.Argv) -> Tuple[value.Place, loc_t]
+    """The place for 'json read (&x)', or _reply for 'json read'."""
+    if cmd_val.proc_args:  # json read (&x)
+        rd = typed_args.ReaderForProc(cmd_val)
+        place = rd.PosPlace()
+        rd.Done()
+
+        blame_loc = cmd_val.proc_args.typed_args.left  # type: loc_t
+
+    else:  # json read
+        var_name = '_reply'
+        blame_loc = cmd_val.arg_locs[0]
+        place = value.Place(LeftName(var_name, blame_loc), mem.CurrentFrame())
+
+    return place, blame_loc
+
+
 class Json(vm._Builtin):
     """JSON read and write.
 
@@ -96,20 +115,7 @@ class Json(vm._Builtin):
             attrs = flag_util.Parse('json_read', arg_r)
             #arg_jr = arg_types.json_read(attrs.attrs)
 
-            if cmd_val.proc_args:  # json read (&x)
-                rd = typed_args.ReaderForProc(cmd_val)
-                place = rd.PosPlace()
-                rd.Done()
-
-                blame_loc = cmd_val.proc_args.typed_args.left  # type: loc_t
-
-            else:  # json read
-                var_name = '_reply'
-
-                #log('VAR %s', var_name)
-                blame_loc = cmd_val.arg_locs[0]
-                place = value.Place(LeftName(var_name, blame_loc),
-                                    self.mem.CurrentFrame())
+            place, blame_loc = _ReadPlace(self.mem, cmd_val)
 
             if not arg_r.AtEnd():
                 e_usage('read got too many args', arg_r.Location())
@@ -137,3 +143,120 @@ class Json(vm._Builtin):
             raise error.Usage(_JSON_ACTION_ERROR, action_loc)
 
         return 0
+
+
+class Packle(vm._Builtin):
+    """Binary read and write, for saving and loading state quickly.
+
+    packle write (x) > state.bin
+    packle read (&x) < state.bin
+    packle read (&x, at=['users', 42]) < state.bin  # decode part of it
+    """
+
+    def __init__(self, mem, errfmt):
+        # type: (state.Mem, ui.ErrorFormatter) -> None
+        self.mem = mem
+        self.errfmt = errfmt
+
+        self.stdout_ = mylib.Stdout()
+
+    def _ReadStdin(self):
+        # type: () -> Optional[pyos.ByteBuffer]
+        """Map stdin into memory if it's a file, so we only read the parts we
+        decode.  Otherwise read all of it.
+
+        Returns None on error.  The caller must Close() the buffer.
+        """
+        buf, err_num = pyos.MapFile(0)
+        if err_num != 0:
+            self.errfmt.PrintMessage("read error: %s" %
+                                     posix.strerror(err_num))
+            return None
+        if buf is not None:
+            return buf
+
+        try:
+            contents = read_osh.ReadAll()
+        except pyos.ReadError as e:
+            self.errfmt.PrintMessage("read error: %s" %
+                                     posix.strerror(e.err_num))
+            return None
+        return pyos.BufferFromStr(contents)
+
+    def Run(self, cmd_val):
+        # type: (cmd_value.Argv) -> int
+        arg_r = args.Reader(cmd_val.argv, locs=cmd_val.arg_locs)
+        arg_r.Next()  # skip 'packle'
+
+        action, action_loc = arg_r.Peek2()
+        if action is None:
+            raise error.Usage(_JSON_ACTION_ERROR, loc.Missing)
+        arg_r.Next()
+
+        if action == 'write':
+            if not arg_r.AtEnd():
+                e_usage('write got too many args', arg_r.Location())
+
+            rd = typed_args.ReaderForProc(cmd_val)
+            val = rd.PosValue()
+            rd.Done()
+
+            buf = mylib.BufWriter()
+            try:
+                packle.Encoder(buf).Encode(val)
+            except error.Encode as e:
+                self.errfmt.PrintMessage('packle write: %s' % e.Message(),
+                                         action_loc)
+                return 1
+
+            # No newline, since the output is binary
+            self.stdout_.write(buf.getvalue())
+
+        elif action == 'read':
+            rd = typed_args.ReaderForProc(cmd_val)
+            place = rd.OptionalPlace()
+            path = rd.NamedList('at', None)
+            rd.Done()
+
+            if not arg_r.AtEnd():
+                e_usage('read got too many args', arg_r.Location())
+
+            if cmd_val.proc_args:
+                blame_loc = cmd_val.proc_args.typed_args.left  # type: loc_t
+            else:
+                blame_loc = cmd_val.arg_locs[0]
+
+            if place is None:  # packle read
+                place = value.Place(LeftName('_reply', blame_loc),
+                                    self.mem.CurrentFrame())
+
+            if path is not None:
+                for part in path:
+                    if part.tag() not in (value_e.Str, value_e.Int):
+                        raise error.TypeErr(
+                            part, 'Expected at= to be a List of Str and Int',
+                            blame_loc)
+
+            buf = self._ReadStdin()
+            if buf is None:
+                return 1
+
+            decoder = packle.Decoder(buf)
+            try:
+                if path is None:
+                    val = decoder.Decode()
+                else:
+                    val = decoder.DecodePart(path)
+            except error.Decode as err:
+                buf.Close()
+                self.errfmt.Print_('packle read: %s' % err.Message(),
+                                   blame_loc=action_loc)
+                return 1
+            buf.Close()
+
+            self.mem.SetPlace(place, val, blame_loc)
+
+        else:
+            raise error.Usage(_JSON_ACTION_ERROR, action_loc)
+
+        return 0
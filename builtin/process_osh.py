@@ -6,6 +6,9 @@ This is sort of the opposite of builtin_pure.py.
 """
 from __future__ import print_function
 
+from errno import EINTR
+import fcntl as fcntl_
+from fcntl import F_SETFD, FD_CLOEXEC
 import resource
 from resource import (RLIM_INFINITY, RLIMIT_CORE, RLIMIT_CPU, RLIMIT_DATA,
                       RLIMIT_FSIZE, RLIMIT_NOFILE, RLIMIT_STACK, RLIMIT_AS)
@@ -15,12 +18,15 @@ from _devbuild.gen import arg_types
 from _devbuild.gen.syntax_asdl import loc
 from _devbuild.gen.runtime_asdl import (cmd_value, job_state_e, wait_status,
                                         wait_status_e)
+from _devbuild.gen.value_asdl import value, value_t
 from core import dev
 from core import error
+from core import num
 from core.error import e_usage, e_die_status
 from core import process  # W1_OK, W1_ECHILD
 from core import pyos
 from core import pyutil
+from core import state
 from core import vm
 from frontend import flag_util
 from frontend import match
@@ -33,13 +39,17 @@ import posix_ as posix
 
 from typing import TYPE_CHECKING, List, Tuple, Optional, cast
 if TYPE_CHECKING:
+    from _devbuild.gen.syntax_asdl import command_t
     from core.process import Waiter, ExternalProgram, FdState
     from core import executor
-    from core import state
     from display import ui
 
 _ = log
 
+# How often forkeach -k checks for a child that closed its pipe, but hasn't
+# been reaped yet
+_REAP_POLL_MS = 10
+
 
 class Jobs(vm._Builtin):
     """List jobs."""
@@ -183,6 +193,196 @@ class ForkWait(vm._Builtin):
         return self.shell_ex.RunSubshell(cmd_frag)
 
 
+class ForkEach(vm._Builtin):
+    """Run a block once for each arg, with at most N processes at once.
+
+    forkeach -j 4 -k -- a b c (&statuses) {
+      echo "item $1"
+    }
+    """
+
+    def __init__(self, shell_ex, waiter, mem, errfmt):
+        # type: (vm._Executor, Waiter, state.Mem, ui.ErrorFormatter) -> None
+        self.shell_ex = shell_ex
+        self.waiter = waiter
+        self.mem = mem
+        self.errfmt = errfmt
+        self.stdout_ = mylib.Stdout()
+
+        # Errors writing to our stdout, for -k
+        self.io_errors = []  # type: List[error.IOError_OSError]
+
+    def _Start(self, cmd_frag, item, keep_order):
+        # type: (command_t, str, bool) -> Tuple[process.Process, int]
+        if keep_order:
+            r, w = posix.pipe()
+            # Programs that later children exec shouldn't get the read end
+            fcntl_.fcntl(r, F_SETFD, FD_CLOEXEC)
+        else:
+            r = -1
+            w = -1
+
+        # The child sees the arg as $1
+        with state.ctx_Eval(self.mem, None, [item], None):
+            p = self.shell_ex.StartChildProcess(cmd_frag, r, w)
+
+        if w != -1:
+            posix.close(w)  # not going to write
+        return p, r
+
+    def _ReadChunk(self, r, chunks):
+        # type: (int, List[str]) -> bool
+        """Read what a child wrote to its pipe.  Returns True at EOF."""
+        n, err_num = pyos.Read(r, 4096, chunks)
+        if n < 0:
+            if err_num == EINTR:
+                return False  # retry
+            # Like the top level IOError handler
+            e_die_status(2,
+                         'Oils I/O error (read): %s' % posix.strerror(err_num))
+        return n == 0
+
+    def _Write(self, s):
+        # type: (str) -> None
+        if len(self.io_errors):
+            return  # already reported, e.g. EPIPE
+
+        try:
+            self.stdout_.write(s)
+        except (IOError, OSError) as e:
+            self.io_errors.append(e)
+            return
+
+        # Write it now, and don't let children we fork later inherit it
+        err = pyos.FlushStdout()
+        if err is not None:
+            self.io_errors.append(err)
+
+    def _WriteInOrder(self, pipes, outputs, num_written):
+        # type: (List[int], List[List[str]], int) -> int
+        """Write the output of the oldest children, and return how many
+        children's output is completely written."""
+        while num_written < len(outputs):
+            chunks = outputs[num_written]
+            if len(chunks):
+                self._Write(''.join(chunks))
+                del chunks[:]
+            if pipes[num_written] != -1:
+                break  # it may write more
+            num_written += 1
+        return num_written
+
+    def Run(self, cmd_val):
+        # type: (cmd_value.Argv) -> int
+        attrs, arg_r = flag_util.ParseCmdVal('forkeach',
+                                             cmd_val,
+                                             accept_typed_args=True)
+        arg = arg_types.forkeach(attrs.attrs)
+        items = arg_r.Rest()
+
+        rd = typed_args.ReaderForProc(cmd_val)
+        place = rd.OptionalPlace()
+        cmd_frag = rd.RequiredBlockAsFrag()
+        rd.Done()
+
+        max_jobs = mops.BigTruncate(arg.j)
+        if max_jobs < 0:  # not passed
+            max_jobs = 1  # like xargs -P
+        elif max_jobs == 0:
+            max_jobs = len(items)
+
+        procs = []  # type: List[process.Process]
+        # For -k, the read end of each child's pipe, or -1 after EOF
+        pipes = []  # type: List[int]
+        # For -k, output of each child that we haven't written yet
+        outputs = []  # type: List[List[str]]
+        running = []  # type: List[process.Process]
+        num_items = len(items)
+        num_written = 0
+        sig_status = -1
+        del self.io_errors[:]
+
+        # One loop starts children, reads their pipes, and reaps them with
+        # waitpid().  With -k, the output of a child is held until the output
+        # of older children is written, but it's read right away, so a child
+        # that finished is reaped and replaced while older ones still run.
+        while True:
+            while len(running) < max_jobs and len(procs) < num_items:
+                p, r = self._Start(cmd_frag, items[len(procs)], arg.k)
+                chunks = []  # type: List[str]
+                procs.append(p)
+                pipes.append(r)
+                outputs.append(chunks)
+                running.append(p)
+
+            num_written = self._WriteInOrder(pipes, outputs, num_written)
+
+            pending = []  # type: List[int]
+            # A child closed its pipe, but we haven't reaped it yet
+            unreaped = False
+            for i in xrange(num_written, len(procs)):
+                if pipes[i] != -1:
+                    pending.append(pipes[i])
+                elif procs[i].state == job_state_e.Running:
+                    unreaped = True
+
+            if len(pending):
+                # Don't block on the other pipes when a slot is about to free up
+                timeout_ms = _REAP_POLL_MS if unreaped else -1
+                ready = []  # type: List[int]
+                err_num = pyos.WaitForInput(pending, timeout_ms, ready)
+                if err_num != 0 and err_num != EINTR:
+                    e_die_status(
+                        2,
+                        'Oils I/O error (poll): %s' % posix.strerror(err_num))
+
+                for i in xrange(num_written, len(procs)):
+                    r = pipes[i]
+                    if r != -1 and r in ready:
+                        if self._ReadChunk(r, outputs[i]):
+                            posix.close(r)
+                            pipes[i] = -1
+                self.waiter.PollNotifications()
+
+            elif len(running) == 0:
+                break
+
+            else:
+                result = self.waiter.WaitForOne()
+                if result == process.W1_ECHILD:
+                    break  # nothing to wait for; shouldn't happen
+                elif result >= 0:  # signal
+                    # Like 'wait', report it, but reap what we started
+                    sig_status = 128 + result
+                    num_items = len(procs)
+
+            still_running = []  # type: List[process.Process]
+            for p in running:
+                if p.state == job_state_e.Running:
+                    still_running.append(p)
+            running = still_running
+
+        # Status of the first failure, in arg order
+        status = 0
+        statuses = []  # type: List[value_t]
+        for p in procs:
+            if status == 0:
+                status = p.status
+            statuses.append(num.ToBig(p.status))
+
+        if place is not None:
+            self.mem.SetPlace(place, value.List(statuses), cmd_val.arg_locs[0])
+
+        if sig_status != -1:
+            return sig_status
+        if len(self.io_errors):
+            self.errfmt.PrintMessage(
+                'forkeach: I/O error writing output: %s' %
+                pyutil.strerror(self.io_errors[0]), cmd_val.arg_locs[0])
+            return 2
+        return status
+
+
 class Exec(vm._Builtin):
 
     def __init__(
@@ -22,6 +22,7 @@ from mycpp import mylib
 from mycpp.mylib import log, STDIN_FILENO
 
 import posix_ as posix
+from posix_ import SEEK_CUR
 
 from typing import Tuple, List, Any, TYPE_CHECKING
 if TYPE_CHECKING:
@@ -185,8 +186,8 @@ def _ReadPortion(delim_byte, max_chars, cmd_ev):
     return pyutil.ChArrayToString(ch_array), eof
 
 
-def ReadLineSlowly(cmd_ev, with_eol=True):
-    # type: (CommandEvaluator, bool) -> str
+def ReadLineSlowly(cmd_ev, delim_byte, with_eol=True):
+    # type: (CommandEvaluator, int, bool) -> str
     """Read a line from stdin, unbuffered 
 
     Used by mapfile and read --raw-line.
@@ -212,7 +213,7 @@ def ReadLineSlowly(cmd_ev, with_eol=True):
         else:
             ch_array.append(ch)
 
-        if ch == pyos.NEWLINE_CH:
+        if ch == delim_byte:
             if not with_eol:
                 ch_array.pop()
             break
@@ -220,6 +221,116 @@ def ReadLineSlowly(cmd_ev, with_eol=True):
     return pyutil.ChArrayToString(ch_array)
 
 
+# mapfile consumes all of stdin, so it can read much more than a byte at a time
+_BLOCK_SIZE = 64 * 1024
+
+
+def _CanSeek(fd):
+    # type: (int) -> bool
+    try:
+        pyos.LSeek(fd, mops.ZERO, SEEK_CUR)
+    except (IOError, OSError):
+        return False  # e.g. ESPIPE for a pipe
+    return True
+
+
+def _ReadLinesSlowly(cmd_ev, delim_byte, with_eol, max_lines, skip_lines,
+                     lines):
+    # type: (CommandEvaluator, int, bool, int, int, List[str]) -> None
+    num_seen = 0  # including skipped lines
+    while max_lines <= 0 or len(lines) < max_lines:
+        # Always read the delimiter, so an empty line isn't mistaken for EOF
+        line = ReadLineSlowly(cmd_ev, delim_byte, with_eol=True)
+        if len(line) == 0:
+            break
+
+        num_seen += 1
+        if num_seen <= skip_lines:
+            continue
+
+        if not with_eol and ord(line[-1]) == delim_byte:
+            line = line[:-1]
+        lines.append(line)
+
+
+def _ReadLinesInBlocks(cmd_ev, delim_byte, with_eol, max_lines, skip_lines,
+                       lines):
+    # type: (CommandEvaluator, int, bool, int, int, List[str]) -> None
+    delim = chr(delim_byte)
+    num_seen = 0  # including skipped lines
+    partial = []  # type: List[str]  # pieces of a line that spans blocks
+
+    chunks = []  # type: List[str]
+    while True:
+        n, err_num = pyos.Read(STDIN_FILENO, _BLOCK_SIZE, chunks)
+
+        if n < 0:
+            if err_num == EINTR:
+                cmd_ev.RunPendingTraps()
+                continue  # retry after running traps
+            else:
+                raise pyos.ReadError(err_num)
+
+        elif n == 0:  # EOF
+            break
+
+        block = chunks.pop()
+        start = 0
+        while True:
+            pos = block.find(delim, start)
+            if pos == -1:
+                if start < n:
+                    partial.append(block[start:])
+                break
+
+            end = pos + 1
+            num_seen += 1
+            if num_seen <= skip_lines:
+                del partial[:]
+                start = end
+                continue
+
+            piece = block[start:end] if with_eol else block[start:pos]
+            start = end
+            if len(partial):
+                partial.append(piece)
+                lines.append(''.join(partial))
+                del partial[:]
+            else:
+                lines.append(piece)
+
+            if len(lines) == max_lines:
+                # Leave the rest of the input for the next command
+                if start < n:
+                    pyos.LSeek(STDIN_FILENO, mops.IntWiden(start - n),
+                               SEEK_CUR)
+                return
+
+    if len(partial):  # last line has no delimiter
+        num_seen += 1
+        if num_seen > skip_lines:
+            lines.append(''.join(partial))
+
+
+def ReadLines(cmd_ev, delim_byte, with_eol, max_lines, skip_lines):
+    # type: (CommandEvaluator, int, bool, int, int) -> List[str]
+    """Read lines from stdin, for mapfile.
+
+    Lines are read in large blocks and split on delim_byte.  If max_lines is
+    positive, we seek back to the end of the last line, leaving the rest for
+    the next command.  That's impossible on a pipe, so we read one byte at a
+    time instead.
+    """
+    lines = []  # type: List[str]
+    if max_lines > 0 and not _CanSeek(STDIN_FILENO):
+        _ReadLinesSlowly(cmd_ev, delim_byte, with_eol, max_lines, skip_lines,
+                         lines)
+    else:
+        _ReadLinesInBlocks(cmd_ev, delim_byte, with_eol, max_lines,
+                           skip_lines, lines)
+    return lines
+
+
 def ReadAll():
     # type: () -> str
     """Read all of stdin.
@@ -321,6 +432,10 @@ class Read(vm._Builtin):
 
     def Run(self, cmd_val):
         # type: (cmd_value.Argv) -> int
+
+        # With shopt -s buffer_output, the writer we're waiting on may be
+        # waiting for buffered output, e.g. a prompt
+        vm.FlushBufferedStdout()
         try:
             status = self._Run(cmd_val)
         except pyos.ReadError as e:  # different paths for read -d, etc.
@@ -374,7 +489,9 @@ class Read(vm._Builtin):
             status = 0
 
         elif arg.raw_line:  # read --raw-line is unbuffered
-            contents = ReadLineSlowly(self.cmd_ev, with_eol=arg.with_eol)
+            contents = ReadLineSlowly(self.cmd_ev,
+                                      pyos.NEWLINE_CH,
+                                      with_eol=arg.with_eol)
             #log('EOF %s', eof)
             #status = 1 if eof else 0
             status = 0 if len(contents) else 1
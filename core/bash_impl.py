@@ -0,0 +1,335 @@
+"""bash_impl.py - Operations on bash arrays.
+
+An indexed array has one of two representations:
+
+- value.BashArray is a List[str], where holes are None.  a=(1 2 3) creates
+  one, and most arrays stay dense.
+- value.SparseArray stores its items in a Dict[BigInt, str], so an array
+  like a[1000000]=x doesn't need a million None placeholders.
+
+The shell switches between them based on density:
+
+- Assigning far past the end of a BashArray, so that most of it would be
+  holes, makes a SparseArray.  See BashArray_ShouldGrowSparse().
+- Unsetting an item in the middle of a big BashArray makes a SparseArray.  A
+  List doesn't know how many holes it has, but a SparseArray keeps an exact
+  count.  See BashArray_ShouldUnsetSparse().
+- Appending to a SparseArray with no holes makes a BashArray again.
+
+Lookups and assignments on a SparseArray are O(1).  Ordered operations like
+"${a[@]}", "${!a[@]}" and slicing also need the keys in order, so we keep
+them in a List[BigInt]:
+
+- Appending past the max index keeps the list sorted, so it's O(1).
+- Assigning to a new index in the middle sets the list to None, and it's
+  rebuilt with one sort the next time it's needed.
+- unset only pops dead keys off the end of the list.  The others are skipped
+  when iterating, and removed when they outnumber the live ones (lazy
+  compaction).
+"""
+from __future__ import print_function
+
+from _devbuild.gen.value_asdl import value
+from mycpp import mops
+from mycpp import mylib
+from mycpp.mylib import iteritems, log
+
+from typing import Dict, List, Optional
+
+_ = log
+
+# Arrays with up to this many slots stay dense, even with holes.  This keeps
+# small arrays like 'a[3]=x' cheap and easy to inspect.
+_SMALL_ARRAY = 16
+
+#
+# BashArray
+#
+
+
+def BashArray_Count(strs):
+    # type: (List[str]) -> int
+    """${#a[@]} - the number of items that aren't holes."""
+    count = 0
+    for s in strs:
+        if s is not None:
+            count += 1
+    return count
+
+
+def BashArray_GetValues(strs):
+    # type: (List[str]) -> List[str]
+    """"${a[@]}" without the holes."""
+    return [s for s in strs if s is not None]
+
+
+def BashArray_GetKeys(strs):
+    # type: (List[str]) -> List[str]
+    """"${!a[@]}" """
+    # translation issue: tuple indices not supported in list comprehensions
+    keys = []  # type: List[str]
+    for i, s in enumerate(strs):
+        if s is not None:
+            keys.append(str(i))
+    return keys
+
+
+def BashArray_ShouldGrowSparse(strs, index):
+    # type: (List[str], int) -> bool
+    """Would a[index]=x past the end leave the array mostly holes?"""
+    new_len = index + 1
+    # Even if every slot of strs has an item, less than half would be filled
+    return new_len > 2 * (len(strs) + 1) + _SMALL_ARRAY
+
+
+def BashArray_ShouldUnsetSparse(strs, index):
+    # type: (List[str], int) -> bool
+    """Should unset 'a[index]' switch to a SparseArray?
+
+    True when it makes a hole in a big array.  Unsetting the last item
+    shortens the List instead.
+    """
+    return len(strs) > _SMALL_ARRAY and 0 <= index and index < len(strs) - 1
+
+
+def BashArray_Unset(strs, index):
+    # type: (List[str], int) -> None
+    """unset 'a[index]', where index is already non-negative."""
+    n = len(strs)
+    if index == n - 1:
+        # Special case: The array SHORTENS if you unset from the end.  You can
+        # tell with a+=(3 4).  Like bash, we also drop any holes before it.
+        strs.pop()
+        while len(strs) and strs[-1] is None:
+            strs.pop()
+    elif 0 <= index and index < n - 1:
+        strs[index] = None
+    else:
+        # If it's not found, it's not an error.  In other words, 'unset'
+        # ensures that a value doesn't exist, regardless of whether it
+        # existed.  It's idempotent.
+        # (Ousterhout specifically argues that the strict behavior was a
+        # mistake for Tcl!)
+        pass
+
+
+#
+# SparseArray
+#
+
+
+def SparseArray_New():
+    # type: () -> value.SparseArray
+    """Return an empty SparseArray."""
+    d = {}  # type: Dict[mops.BigInt, str]
+    keys = []  # type: List[mops.BigInt]
+    return value.SparseArray(d, mops.MINUS_ONE, keys)
+
+
+def SparseArray_FromList(strs):
+    # type: (List[str]) -> value.SparseArray
+    """Convert a BashArray's List[str], where holes are None."""
+    sp = SparseArray_New()
+    for i, s in enumerate(strs):
+        if s is not None:
+            big_i = mops.IntWiden(i)
+            sp.d[big_i] = s
+            sp.keys.append(big_i)  # already in order
+            sp.max_index = big_i
+    return sp
+
+
+def SparseArray_Copy(sp):
+    # type: (value.SparseArray) -> value.SparseArray
+    d = {}  # type: Dict[mops.BigInt, str]
+    for k, s in iteritems(sp.d):
+        d[k] = s
+
+    keys = None  # type: Optional[List[mops.BigInt]]
+    if sp.keys is not None:
+        keys = []
+        keys.extend(sp.keys)
+
+    return value.SparseArray(d, sp.max_index, keys)
+
+
+def SparseArray_IsDense(sp):
+    # type: (value.SparseArray) -> bool
+    """Does every index from 0 to max_index have an item?"""
+    return mops.Equal(mops.IntWiden(len(sp.d)),
+                      mops.Add(sp.max_index, mops.ONE))
+
+
+def SparseArray_Count(sp):
+    # type: (value.SparseArray) -> int
+    """${#a[@]}"""
+    return len(sp.d)
+
+
+def SparseArray_Length(sp):
+    # type: (value.SparseArray) -> mops.BigInt
+    """max_index + 1, which negative indices are relative to."""
+    return mops.Add(sp.max_index, mops.ONE)
+
+
+def SparseArray_ResolveIndex(sp, index):
+    # type: (value.SparseArray, mops.BigInt) -> mops.BigInt
+    """Turn a[-1] into a[max_index].  The result may still be negative."""
+    if mops.Greater(mops.ZERO, index):  # index < 0
+        return mops.Add(index, SparseArray_Length(sp))
+    return index
+
+
+def SparseArray_Get(sp, index):
+    # type: (value.SparseArray, mops.BigInt) -> Optional[str]
+    """${a[42]}, where a negative index counts from the end."""
+    return sp.d.get(SparseArray_ResolveIndex(sp, index))
+
+
+def _LowerBound(keys, index):
+    # type: (List[mops.BigInt], mops.BigInt) -> int
+    """Return the position of the first key that's >= index."""
+    lo = 0
+    hi = len(keys)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if mops.Greater(index, keys[mid]):  # keys[mid] < index
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _SortedKeys(sp):
+    # type: (value.SparseArray) -> List[mops.BigInt]
+    """Return the sorted keys, which may include unset ones."""
+    if sp.keys is None:
+        keys = sp.d.keys()
+        mylib.BigIntSort(keys)
+        sp.keys = keys
+
+    elif len(sp.keys) > 2 * len(sp.d) + 8:
+        # Remove unset keys once they're the majority
+        live = []  # type: List[mops.BigInt]
+        for k in sp.keys:
+            if k in sp.d:
+                live.append(k)
+        sp.keys = live
+
+    return sp.keys
+
+
+def SparseArray_Set(sp, index, s):
+    # type: (value.SparseArray, mops.BigInt, str) -> None
+    """a[42]=foo, where index is already non-negative."""
+    if sp.keys is not None and index not in sp.d:
+        if mops.Greater(index, sp.max_index):
+            sp.keys.append(index)  # still sorted
+        else:
+            pos = _LowerBound(sp.keys, index)
+            if pos == len(sp.keys) or not mops.Equal(sp.keys[pos], index):
+                sp.keys = None  # sort again when needed
+
+    sp.d[index] = s
+
+    if mops.Greater(index, sp.max_index):
+        sp.max_index = index
+
+
+def SparseArray_Unset(sp, index):
+    # type: (value.SparseArray, mops.BigInt) -> None
+    """unset 'a[42]', where index is already non-negative."""
+    mylib.dict_erase(sp.d, index)
+
+    if not mops.Equal(index, sp.max_index):
+        return
+
+    # We removed the last item, so find the new max.  Popping the dead keys
+    # off the end keeps them sorted, and is amortized O(1).
+    keys = _SortedKeys(sp)
+    while len(keys) and keys[-1] not in sp.d:
+        keys.pop()
+
+    if len(keys):
+        sp.max_index = keys[-1]
+    else:
+        sp.max_index = mops.MINUS_ONE
+
+
+def SparseArray_Append(sp, strs):
+    # type: (value.SparseArray, List[str]) -> None
+    """a+=(x y)"""
+    i = mops.Add(sp.max_index, mops.ONE)  # i = max_index + 1
+    for s in strs:
+        sp.d[i] = s
+        if sp.keys is not None:
+            sp.keys.append(i)  # still sorted
+        i = mops.Add(i, mops.ONE)  # i += 1
+
+    sp.max_index = mops.Add(sp.max_index, mops.IntWiden(len(strs)))
+
+
+def SparseArray_GetValues(sp):
+    # type: (value.SparseArray) -> List[str]
+    """"${a[@]}" """
+    values = []  # type: List[str]
+    for k in _SortedKeys(sp):
+        s = sp.d.get(k)
+        if s is not None:
+            values.append(s)
+    return values
+
+
+def SparseArray_GetKeys(sp):
+    # type: (value.SparseArray) -> List[str]
+    """"${!a[@]}" """
+    keys = []  # type: List[str]
+    for k in _SortedKeys(sp):
+        if k in sp.d:
+            keys.append(mops.ToStr(k))
+    return keys
+
+
+def SparseArray_Slice(sp, start, end):
+    # type: (value.SparseArray, mops.BigInt, mops.BigInt) -> List[str]
+    """Values with start <= index < end.
+
+    Unlike a loop over the integers from start to end, this is
+    O(log n + number of items).
+    """
+    keys = _SortedKeys(sp)
+    values = []  # type: List[str]
+
+    n = len(keys)
+    i = _LowerBound(keys, start)
+    while i < n:
+        k = keys[i]
+        if not mops.Greater(end, k):  # k >= end
+            break
+        s = sp.d.get(k)
+        if s is not None:
+            values.append(s)
+        i += 1
+    return values
+
+
+def SparseArray_SliceCount(sp, start, count):
+    # type: (value.SparseArray, mops.BigInt, int) -> List[str]
+    """"${a[@]:start:count}" - up to count values with index >= start.
+
+    A negative count means no limit.  Like SparseArray_Slice(), it starts with
+    a binary search.
+    """
+    keys = _SortedKeys(sp)
+    values = []  # type: List[str]
+
+    n = len(keys)
+    i = _LowerBound(keys, start)
+    while i < n:
+        if len(values) == count:  # count could be 0
+            break
+        s = sp.d.get(keys[i])
+        if s is not None:
+            values.append(s)
+        i += 1
+    return values
@@ -0,0 +1,187 @@
+#!/usr/bin/env python2
+"""bash_impl_test.py: Tests for bash_impl.py."""
+
+import unittest
+
+from core import bash_impl  # module under test
+from mycpp import mops
+
+
+def _Big(i):
+    return mops.IntWiden(i)
+
+
+class BashArrayTest(unittest.TestCase):
+
+    def testGetValuesAndKeys(self):
+        strs = ['a', None, 'c']
+        self.assertEqual(2, bash_impl.BashArray_Count(strs))
+        self.assertEqual(['a', 'c'], bash_impl.BashArray_GetValues(strs))
+        self.assertEqual(['0', '2'], bash_impl.BashArray_GetKeys(strs))
+
+    def testShouldGrowSparse(self):
+        # Small arrays stay dense
+        self.assertEqual(False, bash_impl.BashArray_ShouldGrowSparse([], 3))
+        self.assertEqual(True, bash_impl.BashArray_ShouldGrowSparse([], 100))
+
+        strs = ['x'] * 1000
+        self.assertEqual(False,
+                         bash_impl.BashArray_ShouldGrowSparse(strs, 1500))
+        self.assertEqual(True,
+                         bash_impl.BashArray_ShouldGrowSparse(strs, 5000))
+
+    def testShouldUnsetSparse(self):
+        strs = ['x'] * 100
+        self.assertEqual(True, bash_impl.BashArray_ShouldUnsetSparse(strs, 5))
+        # The last item shortens the list
+        self.assertEqual(False,
+                         bash_impl.BashArray_ShouldUnsetSparse(strs, 99))
+        self.assertEqual(False,
+                         bash_impl.BashArray_ShouldUnsetSparse(strs, 100))
+
+        self.assertEqual(False,
+                         bash_impl.BashArray_ShouldUnsetSparse(['x'] * 3, 1))
+
+    def testUnset(self):
+        strs = ['a', 'b', 'c', 'd']
+        bash_impl.BashArray_Unset(strs, 1)
+        self.assertEqual(['a', None, 'c', 'd'], strs)
+
+        bash_impl.BashArray_Unset(strs, 2)
+        bash_impl.BashArray_Unset(strs, 3)
+        # The hole before the last item goes too
+        self.assertEqual(['a'], strs)
+
+        bash_impl.BashArray_Unset(strs, 5)
+        self.assertEqual(['a'], strs)
+
+
+class SparseArrayTest(unittest.TestCase):
+
+    def testFromList(self):
+        sp = bash_impl.SparseArray_FromList(['a', None, 'c'])
+        self.assertEqual(2, bash_impl.SparseArray_Count(sp))
+        self.assertEqual(['a', 'c'], bash_impl.SparseArray_GetValues(sp))
+        self.assertEqual(['0', '2'], bash_impl.SparseArray_GetKeys(sp))
+        self.assertEqual(2, mops.BigTruncate(sp.max_index))
+
+    def testSetOutOfOrder(self):
+        sp = bash_impl.SparseArray_New()
+        bash_impl.SparseArray_Set(sp, _Big(10), 'x')
+        bash_impl.SparseArray_Set(sp, _Big(20), 'y')
+        self.assertEqual(2, len(sp.keys))
+
+        # Inserting in the middle means we have to sort again
+        bash_impl.SparseArray_Set(sp, _Big(5), 'w')
+        self.assertEqual(None, sp.keys)
+        self.assertEqual(['w', 'x', 'y'], bash_impl.SparseArray_GetValues(sp))
+        self.assertEqual(['5', '10', '20'], bash_impl.SparseArray_GetKeys(sp))
+
+        # Overwriting doesn't
+        bash_impl.SparseArray_Set(sp, _Big(10), 'X')
+        self.assertEqual(3, len(sp.keys))
+        self.assertEqual('X', bash_impl.SparseArray_Get(sp, _Big(10)))
+
+    def testUnset(self):
+        sp = bash_impl.SparseArray_FromList(['a', 'b', 'c', 'd'])
+
+        bash_impl.SparseArray_Unset(sp, _Big(1))
+        self.assertEqual(['a', 'c', 'd'], bash_impl.SparseArray_GetValues(sp))
+        self.assertEqual(3, mops.BigTruncate(sp.max_index))
+
+        # Setting a dead key again doesn't invalidate the order
+        bash_impl.SparseArray_Set(sp, _Big(1), 'B')
+        self.assertEqual(4, len(sp.keys))
+        self.assertEqual(['a', 'B', 'c', 'd'],
+                         bash_impl.SparseArray_GetValues(sp))
+
+        bash_impl.SparseArray_Unset(sp, _Big(2))
+        bash_impl.SparseArray_Unset(sp, _Big(3))
+        self.assertEqual(1, mops.BigTruncate(sp.max_index))
+        self.assertEqual(['0', '1'], bash_impl.SparseArray_GetKeys(sp))
+
+        bash_impl.SparseArray_Unset(sp, _Big(0))
+        bash_impl.SparseArray_Unset(sp, _Big(1))
+        self.assertEqual(-1, mops.BigTruncate(sp.max_index))
+        self.assertEqual([], bash_impl.SparseArray_GetValues(sp))
+
+    def testAppend(self):
+        sp = bash_impl.SparseArray_FromList(['a', 'b', 'c'])
+        bash_impl.SparseArray_Unset(sp, _Big(2))
+
+        # Appends after the max index, not after the dead key
+        bash_impl.SparseArray_Append(sp, ['x', 'y'])
+        self.assertEqual(['0', '1', '2', '3'],
+                         bash_impl.SparseArray_GetKeys(sp))
+        self.assertEqual(['a', 'b', 'x', 'y'],
+                         bash_impl.SparseArray_GetValues(sp))
+
+    def testSlice(self):
+        sp = bash_impl.SparseArray_New()
+        for i in [1, 10, 100, 1000, 10000]:
+            bash_impl.SparseArray_Set(sp, _Big(i), str(i))
+
+        self.assertEqual(['10', '100'],
+                         bash_impl.SparseArray_Slice(sp, _Big(2), _Big(1000)))
+        self.assertEqual(['1000', '10000'],
+                         bash_impl.SparseArray_Slice(sp, _Big(1000),
+                                                     _Big(99999)))
+        self.assertEqual([],
+                         bash_impl.SparseArray_Slice(sp, _Big(11), _Big(99)))
+
+        bash_impl.SparseArray_Unset(sp, _Big(100))
+        self.assertEqual(['10', '1000'],
+                         bash_impl.SparseArray_Slice(sp, _Big(2), _Big(9999)))
+
+    def testSliceCount(self):
+        sp = bash_impl.SparseArray_New()
+        for i in [1, 10, 100, 1000, 10000]:
+            bash_impl.SparseArray_Set(sp, _Big(i), str(i))
+
+        self.assertEqual(['10', '100'],
+                         bash_impl.SparseArray_SliceCount(sp, _Big(2), 2))
+        self.assertEqual(['1000', '10000'],
+                         bash_impl.SparseArray_SliceCount(sp, _Big(1000), -1))
+        self.assertEqual([], bash_impl.SparseArray_SliceCount(sp, _Big(2), 0))
+        self.assertEqual([],
+                         bash_impl.SparseArray_SliceCount(sp, _Big(10001), 5))
+
+    def testNegativeIndex(self):
+        sp = bash_impl.SparseArray_FromList(['a', None, 'c'])
+        self.assertEqual('c', bash_impl.SparseArray_Get(sp, _Big(-1)))
+        self.assertEqual(None, bash_impl.SparseArray_Get(sp, _Big(-2)))
+        self.assertEqual('a', bash_impl.SparseArray_Get(sp, _Big(-3)))
+        self.assertEqual(None, bash_impl.SparseArray_Get(sp, _Big(-4)))
+
+    def testIsDense(self):
+        sp = bash_impl.SparseArray_FromList(['a', None, 'c'])
+        self.assertEqual(False, bash_impl.SparseArray_IsDense(sp))
+
+        bash_impl.SparseArray_Set(sp, _Big(1), 'b')
+        self.assertEqual(True, bash_impl.SparseArray_IsDense(sp))
+
+        self.assertEqual(True,
+                         bash_impl.SparseArray_IsDense(
+                             bash_impl.SparseArray_New()))
+
+    def testCopy(self):
+        sp = bash_impl.SparseArray_FromList(['a', None, 'c'])
+        sp2 = bash_impl.SparseArray_Copy(sp)
+        bash_impl.SparseArray_Append(sp2, ['d'])
+
+        self.assertEqual(['a', 'c'], bash_impl.SparseArray_GetValues(sp))
+        self.assertEqual(['a', 'c', 'd'],
+                         bash_impl.SparseArray_GetValues(sp2))
+
+    def testCompaction(self):
+        sp = bash_impl.SparseArray_FromList([str(i) for i in xrange(100)])
+        for i in xrange(90):
+            bash_impl.SparseArray_Unset(sp, _Big(i))
+        self.assertEqual(100, len(sp.keys))
+
+        self.assertEqual(10, len(bash_impl.SparseArray_GetValues(sp)))
+        self.assertEqual(10, len(sp.keys))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -41,6 +41,7 @@ from _devbuild.gen.syntax_asdl import (CompoundWord, word_part_e, word_t,
 from _devbuild.gen.runtime_asdl import (scope_e, comp_action_e, comp_action_t)
 from _devbuild.gen.types_asdl import redir_arg_type_e
 from _devbuild.gen.value_asdl import (value, value_e)
+from core import bash_impl
 from core import error
 from core import pyos
 from core import state
@@ -51,7 +52,7 @@ from frontend import lexer
 from frontend import location
 from frontend import reader
 from mycpp import mylib
-from mycpp.mylib import print_stderr, iteritems, log
+from mycpp.mylib import print_stderr, iteritems, log, tagswitch
 from osh.string_ops import ShellQuoteB
 from osh import word_
 from pylib import os_path
@@ -83,6 +84,10 @@ if TYPE_CHECKING:
 # TODO: Also escape tabs as \t and newlines at \n?
 # SHELL_META_CHARS = r' ~`!$&|;()\"*?[]{}<>' + "'"
 
+# Each action may run this long before we stop it and use what it produced.
+# Override with $OILS_COMP_BUDGET_MS; 0 means no limit.
+DEFAULT_BUDGET_MS = 100
+
 
 class _RetryCompletion(Exception):
     """For the 'exit 124' protocol."""
@@ -309,6 +314,69 @@ class Lookup(object):
         return (a, b)
 
 
+class DirCache(object):
+    """Directory listings, keyed by path and modification time.
+
+    Listing a big directory is much slower than statting it, so repeated
+    completions in the same directory only pay for the stat().
+
+    The least recently used listings are dropped when there are more than
+    max_dirs of them, or more than max_names names in total.
+    """
+
+    def __init__(self, max_dirs=32, max_names=500000):
+        # type: (int, int) -> None
+        self.max_dirs = max_dirs
+        self.max_names = max_names
+
+        self.mtimes = {}  # type: Dict[str, int]
+        self.listings = {}  # type: Dict[str, List[str]]
+        # Keys of listings, least recently used first
+        self.order = []  # type: List[str]
+        self.num_names = 0
+
+    def _Forget(self, key):
+        # type: (str) -> None
+        self.num_names -= len(self.listings[key])
+        mylib.dict_erase(self.mtimes, key)
+        mylib.dict_erase(self.listings, key)
+        self.order.remove(key)
+
+    def Listdir(self, path):
+        # type: (str) -> List[str]
+        """Like posix.listdir(), and raises the same errors."""
+        if path.startswith('/'):
+            key = path
+        else:
+            # Relative paths depend on the current dir
+            key = os_path.join(posix.getcwd(), path)
+
+        _, mtime = pyos.MakeDirCacheKey(path)
+        if key in self.mtimes:
+            if self.mtimes[key] == mtime:
+                # Most recently used
+                self.order.remove(key)
+                self.order.append(key)
+                return self.listings[key]
+            self._Forget(key)
+
+        names = posix.listdir(path)
+
+        # mtime only has a resolution of 1 second.  If the dir was modified in
+        # this second, it may be modified again without changing mtime, so
+        # don't remember it.
+        if mtime < int(time_.time()) and len(names) <= self.max_names:
+            while (len(self.order) >= self.max_dirs or
+                   self.num_names + len(names) > self.max_names):
+                self._Forget(self.order[0])
+
+            self.mtimes[key] = mtime
+            self.listings[key] = names
+            self.order.append(key)
+            self.num_names += len(names)
+        return names
+
+
 class Api(object):
 
     def __init__(self, line, begin, end):
@@ -327,6 +395,16 @@ class Api(object):
         self.partial_argv = []  # type: List[str]
         # NOTE: COMP_WORDBREAKS is initialized in Mem().
 
+        # RootCompleter replaces these.  compgen has no time limit, and lists
+        # directories fresh each time.
+        self.budget_ms = 0  # 0 means no limit
+        self.dir_cache = None  # type: Optional[DirCache]
+
+        self.action_start = 0.0
+        self.timed_out = False
+        # stat() each candidate at most once
+        self.dirs = {}  # type: Dict[str, bool]
+
     # NOTE: to_complete could be 'cur'
     def Update(self, first, to_complete, prev, index, partial_argv):
         # type: (str, str, str, int, List[str]) -> None
@@ -340,6 +418,30 @@ class Api(object):
         if self.partial_argv is None:
             self.partial_argv = []
 
+    def StartAction(self):
+        # type: () -> None
+        """Called before each action, which gets its own time budget."""
+        self.action_start = time_.time()
+
+    def OverBudget(self):
+        # type: () -> bool
+        """Should the current action stop producing candidates?"""
+        if self.budget_ms == 0:
+            return False
+        elapsed_ms = (time_.time() - self.action_start) * 1000.0
+        if elapsed_ms > self.budget_ms:
+            self.timed_out = True
+            return True
+        return False
+
+    def IsDir(self, path):
+        # type: (str) -> bool
+        if path in self.dirs:
+            return self.dirs[path]
+        is_dir = path_stat.isdir(path)
+        self.dirs[path] = is_dir
+        return is_dir
+
     def __repr__(self):
         # type: () -> str
         """For testing."""
@@ -493,21 +595,29 @@ class FileSystemAction(CompletionAction):
             log('dirname %r' % dirname)
 
         try:
-            names = posix.listdir(to_list)
+            if comp.dir_cache is None:
+                names = posix.listdir(to_list)
+            else:
+                names = comp.dir_cache.Listdir(to_list)
         except (IOError, OSError) as e:
             return  # nothing
 
         for name in names:
+            # Cheap test first, since a directory may have many entries
+            if not name.startswith(basename):
+                continue
+
             path = os_path.join(dirname, name)
 
             if path.startswith(to_complete):
+                # Checking after each match bounds the number of stat() calls
+                if comp.OverBudget():
+                    return
+
                 if self.dirs_only:  # add_slash not used here
-                    # NOTE: There is a duplicate isdir() check later to add a trailing
-                    # slash.  Consolidate the checks for fewer stat() ops.  This is hard
-                    # because all the completion actions must obey the same interface.
-                    # We could have another type like candidate = File | Dir |
-                    # OtherString ?
-                    if path_stat.isdir(path):
+                    # Api.IsDir() remembers the result, so the trailing slash
+                    # added in RootCompleter doesn't stat() again.
+                    if comp.IsDir(path):
                         yield path
                     continue
 
@@ -517,7 +627,7 @@ class FileSystemAction(CompletionAction):
                     if not posix.access(path, X_OK):
                         continue
 
-                if self.add_slash and path_stat.isdir(path):
+                if self.add_slash and comp.IsDir(path):
                     path = path + '/'
                     yield path
                 else:
@@ -628,16 +738,25 @@ class ShellFuncAction(CompletionAction):
                          self.func.name)
             return
 
-        if val.tag() != value_e.BashArray:
-            print_stderr('osh error: COMPREPLY should be an array, got %s' %
-                         ui.ValType(val))
-            return
+        UP_val = val
+        with tagswitch(val) as case:
+            if case(value_e.BashArray):
+                val = cast(value.BashArray, UP_val)
+                strs = val.strs
+            elif case(value_e.SparseArray):
+                # e.g. after unset 'COMPREPLY[i]' on a long list
+                val = cast(value.SparseArray, UP_val)
+                strs = bash_impl.SparseArray_GetValues(val)
+            else:
+                print_stderr(
+                    'osh error: COMPREPLY should be an array, got %s' %
+                    ui.ValType(val))
+                return
 
         if 0:
             self.debug('> %r' % val)  # CRASHES in C++
 
-        array_val = cast(value.BashArray, val)
-        for s in array_val.strs:
+        for s in strs:
             #self.debug('> %r' % s)
             yield s
 
@@ -674,6 +793,47 @@ class ExportedVarsAction(CompletionAction):
             yield var_name
 
 
+class PrefixIndex(object):
+    """A sorted list of unique words, to find the ones with a prefix.
+
+    Matches() does a binary search instead of testing every word.
+    """
+
+    def __init__(self, words):
+        # type: (List[str]) -> None
+        self.words = []  # type: List[str]
+
+        sorted_words = sorted(words)
+        for w in sorted_words:
+            if len(self.words) and self.words[-1] == w:
+                continue
+            self.words.append(w)
+
+    def _LowerBound(self, prefix):
+        # type: (str) -> int
+        """Index of the first word that's >= prefix."""
+        lo = 0
+        hi = len(self.words)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mylib.str_cmp(self.words[mid], prefix) < 0:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def Matches(self, prefix):
+        # type: (str) -> Iterator[str]
+        n = len(self.words)
+        i = self._LowerBound(prefix)
+        while i < n:
+            w = self.words[i]
+            if not w.startswith(prefix):
+                break
+            yield w
+            i += 1
+
+
 class ExternalCommandAction(CompletionAction):
     """Complete commands in $PATH.
 
@@ -687,74 +847,99 @@ class ExternalCommandAction(CompletionAction):
           mem: for looking up Path
         """
         self.mem = mem
-        # Should we list everything executable in $PATH here?  And then whenever
-        # $PATH is changed, regenerated it?
-        # Or we can cache directory listings?  What if the contents of the dir
-        # changed?
-        # Can we look at the dir timestamp?
+
+        # The last value of $PATH, split
+        self.path_str = None  # type: Optional[str]
+        self.path_dirs = []  # type: List[str]
+
+        # dir -> executables in it, and the mtime they were listed at.
         #
-        # (dir, timestamp) -> list of entries perhaps?  And then every time you hit
-        # tab, do you have to check the timestamp?  It should be cached by the
-        # kernel, so yes.
-        # XXX(unused?) self.ext = []
-
-        # (dir, timestamp) -> list
-        # NOTE: This cache assumes that listing a directory is slower than statting
-        # it to get the mtime.  That may not be true on all systems?  Either way
-        # you are reading blocks of metadata.  But I guess /bin on many systems is
-        # huge, and will require lots of sys calls.
-        self.cache = {}  # type: Dict[Tuple[str, int], List[str]]
+        # NOTE: This cache assumes that listing a directory is slower than
+        # statting it to get the mtime.  /bin on many systems is huge, and
+        # checking X_OK requires a syscall per file.
+        self.mtimes = {}  # type: Dict[str, int]
+        self.dir_exes = {}  # type: Dict[str, List[str]]
+
+        # All executables in $PATH.  Rebuilt when a dir or $PATH changes.
+        self.index = PrefixIndex([])
 
     def Print(self, f):
         # type: (mylib.BufWriter) -> None
 
         f.write('ExternalCommandAction ')
 
-    def Matches(self, comp):
-        # type: (Api) -> Iterator[str]
-        """TODO: Cache is never cleared.
+    def _ListExecutables(self, d):
+        # type: (str) -> List[str]
+        dir_exes = []  # type: List[str]
+        for name in posix.listdir(d):
+            path = os_path.join(d, name)
+            # TODO: Handle exception if file gets deleted in between listing and
+            # check?
+            if not posix.access(path, X_OK):
+                continue
+            dir_exes.append(name)  # append the name, not the path
+        return dir_exes
 
-        - When we get a newer timestamp, we should clear the old one.
-        - When PATH is changed, we can remove old entries.
-        """
+    def _Refresh(self):
+        # type: () -> None
+        """Update the index if $PATH or any dir in it changed."""
         val = self.mem.GetValue('PATH')
-        if val.tag() != value_e.Str:
-            # No matches if not a string
-            return
-
-        val_s = cast(value.Str, val)
-        path_dirs = val_s.s.split(':')
-        #log('path: %s', path_dirs)
-
-        executables = []  # type: List[str]
-        for d in path_dirs:
+        if val.tag() == value_e.Str:
+            path_str = cast(value.Str, val).s
+        else:
+            path_str = ''  # No matches if not a string
+
+        changed = False
+        if path_str != self.path_str:
+            self.path_str = path_str
+            self.path_dirs = path_str.split(':') if len(path_str) else []
+            changed = True
+            #log('path: %s', self.path_dirs)
+
+        now = int(time_.time())
+        live = {}  # type: Dict[str, bool]
+        for d in self.path_dirs:
             try:
-                key = pyos.MakeDirCacheKey(d)
+                _, mtime = pyos.MakeDirCacheKey(d)
             except (IOError, OSError) as e:
                 # There could be a directory that doesn't exist in the $PATH.
                 continue
+            live[d] = True
 
-            dir_exes = self.cache.get(key)
-            if dir_exes is None:
-                entries = posix.listdir(d)
-                dir_exes = []
-                for name in entries:
-                    path = os_path.join(d, name)
-                    # TODO: Handle exception if file gets deleted in between listing and
-                    # check?
-                    if not posix.access(path, X_OK):
-                        continue
-                    dir_exes.append(name)  # append the name, not the path
+            if d in self.mtimes and self.mtimes[d] == mtime:
+                continue  # up to date
 
-                self.cache[key] = dir_exes
+            try:
+                self.dir_exes[d] = self._ListExecutables(d)
+            except (IOError, OSError) as e:
+                continue  # e.g. not readable
+            # mtime only has a resolution of 1 second, so a dir modified in this
+            # second has to be listed again.
+            self.mtimes[d] = mtime if mtime < now else -1
+            changed = True
+
+        # Evict dirs that were removed from $PATH, or no longer exist
+        for d in self.dir_exes.keys():
+            if d not in live:
+                mylib.dict_erase(self.dir_exes, d)
+                mylib.dict_erase(self.mtimes, d)
+                changed = True
+
+        if changed:
+            executables = []  # type: List[str]
+            for d in self.path_dirs:
+                if d in self.dir_exes:
+                    executables.extend(self.dir_exes[d])
+            self.index = PrefixIndex(executables)
 
-            executables.extend(dir_exes)
+    def Matches(self, comp):
+        # type: (Api) -> Iterator[str]
+        self._Refresh()
 
         # TODO: Shouldn't do the prefix / space thing ourselves.  readline does
         # that at the END of the line.
-        for word in executables:
-            if word.startswith(comp.to_complete):
-                yield word
+        for word in self.index.Matches(comp.to_complete):
+            yield word
 
 
 class _Predicate(object):
@@ -879,6 +1064,7 @@ class UserSpec(object):
 
         for a in self.actions:
             action_kind = a.ActionKind()
+            comp.StartAction()
             for match in a.Matches(comp):
                 # Special case hack to match bash for compgen -F.  It doesn't filter by
                 # to_complete!
@@ -894,12 +1080,16 @@ class UserSpec(object):
                     yield self.prefix + match + self.suffix, action_kind
                     num_matches += 1
 
+                if comp.OverBudget():
+                    break  # on to the next action
+
         # NOTE: extra_actions and else_actions don't respect -X, -P or -S, and we
         # don't have to filter by startswith(comp.to_complete).  They are all all
         # FileSystemActions, which do it already.
 
         # for -o plusdirs
         for a in self.extra_actions:
+            comp.StartAction()
             for match in a.Matches(comp):
                 # We know plusdirs is a file system action
                 yield match, comp_action_e.FileSystem
@@ -907,6 +1097,7 @@ class UserSpec(object):
         # for -o default and -o dirnames
         if num_matches == 0:
             for a in self.else_actions:
+                comp.StartAction()
                 for match in a.Matches(comp):
                     # both are FileSystemAction
                     yield match, comp_action_e.FileSystem
@@ -969,6 +1160,21 @@ class RootCompleter(object):
         self.parse_ctx = parse_ctx
         self.debug_f = debug_f
 
+        # Shared by all completions, unlike the per-request state in Api
+        self.dir_cache = DirCache()
+
+    def _BudgetMs(self):
+        # type: () -> int
+        """Time limit for each action, from $OILS_COMP_BUDGET_MS."""
+        s = state.MaybeString(self.mem, 'OILS_COMP_BUDGET_MS')
+        if s is None:
+            return DEFAULT_BUDGET_MS
+        try:
+            budget_ms = int(s)
+        except ValueError:
+            return DEFAULT_BUDGET_MS
+        return budget_ms if budget_ms > 0 else 0
+
     def Matches(self, comp):
         # type: (Api) -> Iterator[str]
         """
@@ -979,6 +1185,9 @@ class RootCompleter(object):
         Returns a list of matches relative to readline's completion_delims.
         We have to post-process the output of various completers.
         """
+        comp.budget_ms = self._BudgetMs()
+        comp.dir_cache = self.dir_cache
+
         # Pass the original line "out of band" to the completion callback.
         line_until_tab = comp.line[:comp.end]
         self.comp_ui_state.line_until_tab = line_until_tab
@@ -1166,6 +1375,7 @@ class RootCompleter(object):
                     comp.Update('', val.s, '', 0, [])
                     n = len(val.s)
                     action = FileSystemAction(False, False, True)
+                    comp.StartAction()
                     for name in action.Matches(comp):
                         yield line_until_tab + ShellQuoteB(name[n:])
                     return
@@ -1338,6 +1548,10 @@ class RootCompleter(object):
 
         # TODO: dedupe candidates?  You can get two 'echo' in bash, which is dumb.
 
+        # The last candidate, and the / or space that goes after it
+        pending = None  # type: Optional[str]
+        pending_suffix = ''
+
         i = 0
         for candidate, action_kind in user_spec.AllMatches(comp):
             # SUBTLE: dynamic_opts is part of compopt_state, which ShellFuncAction
@@ -1375,21 +1589,24 @@ class RootCompleter(object):
 
             # compopt -o filenames is for user-defined actions.  Or any
             # FileSystemAction needs it.
-            if action_kind == comp_action_e.FileSystem or opt_filenames:
-                if path_stat.isdir(candidate):
-                    s = line_until_word + ShellQuoteB(candidate) + '/'
-                    yield s
-                    continue
-
-            opt_nospace = base_opts.get('nospace', False)
-            if 'nospace' in dynamic_opts:
-                opt_nospace = dynamic_opts['nospace']
+            if ((action_kind == comp_action_e.FileSystem or opt_filenames) and
+                    comp.IsDir(candidate)):
+                cand = ShellQuoteB(candidate)
+                suffix = '/'
+            else:
+                opt_nospace = base_opts.get('nospace', False)
+                if 'nospace' in dynamic_opts:
+                    opt_nospace = dynamic_opts['nospace']
 
-            sp = '' if opt_nospace else ' '
-            cand = (candidate if action_kind == comp_action_e.BashFunc else
-                    ShellQuoteB(candidate))
+                suffix = '' if opt_nospace else ' '
+                cand = (candidate if action_kind == comp_action_e.BashFunc
+                        else ShellQuoteB(candidate))
 
-            yield line_until_word + cand + sp
+            # Hold back one candidate, so we know if it's the only one
+            if pending is not None:
+                yield pending + pending_suffix
+            pending = line_until_word + cand
+            pending_suffix = suffix
 
             # NOTE: Can't use %.2f in production build!
             i += 1
@@ -1402,10 +1619,23 @@ class RootCompleter(object):
                     '... %d match%s for %r in %d ms (Ctrl-C to cancel)' %
                     (i, plural, comp.line, elapsed_ms))
 
+        if pending is not None:
+            # If an action was stopped, there may be other matches, so a single
+            # candidate isn't unique.  Readline inserts it, but without the
+            # suffix, the word doesn't look finished.
+            if i == 1 and comp.timed_out:
+                yield pending
+            else:
+                yield pending + pending_suffix
+
         elapsed_ms = (time_.time() - start_time) * 1000.0
         plural = '' if i == 1 else 'es'
         self.debug_f.writeln('Found %d match%s for %r in %d ms' %
                              (i, plural, comp.line, elapsed_ms))
+        if comp.timed_out:
+            self.debug_f.writeln(
+                'Stopped an action after %d ms (OILS_COMP_BUDGET_MS)' %
+                comp.budget_ms)
 
 
 class ReadlineCallback(object):
@@ -133,8 +133,48 @@ class CompletionTest(unittest.TestCase):
         comp = self._CompApi([], 0, 'f')
         print(list(a.Matches(comp)))
 
-        # TODO: This should set up the file system and $PATH and assert that only
-        # executable files are accessed!
+        d1 = '/tmp/oil_comp_path1'
+        d2 = '/tmp/oil_comp_path2'
+        os.system('rm -r -f %s %s; mkdir -p %s %s' % (d1, d2, d1, d2))
+        os.system('touch %s/foo %s/fob %s/far %s/foo-data' % (d1, d1, d2, d2))
+        os.system('chmod +x %s/foo %s/fob %s/far' % (d1, d1, d2))
+        os.utime(d1, (1000, 1000))
+        os.utime(d2, (1000, 1000))
+
+        state.SetGlobalString(mem, 'PATH', '%s:/nonexistent:%s' % (d1, d2))
+        comp = self._CompApi([], 0, 'f')
+        # Sorted, and only executables
+        self.assertEqual(['far', 'fob', 'foo'], list(a.Matches(comp)))
+        comp = self._CompApi([], 0, 'fo')
+        self.assertEqual(['fob', 'foo'], list(a.Matches(comp)))
+
+        # A new file in a dir, with a new mtime
+        os.system('touch %s/fox; chmod +x %s/fox' % (d2, d2))
+        os.utime(d2, (2000, 2000))
+        self.assertEqual(['fob', 'foo', 'fox'], list(a.Matches(comp)))
+
+        # Changing $PATH evicts the dir
+        state.SetGlobalString(mem, 'PATH', d2)
+        self.assertEqual(['fox'], list(a.Matches(comp)))
+        self.assertEqual([d2], a.dir_exes.keys())
+
+        # Names in 2 dirs are completed once
+        state.SetGlobalString(mem, 'PATH', '%s:%s:%s' % (d2, d1, d2))
+        self.assertEqual(['fob', 'foo', 'fox'], list(a.Matches(comp)))
+
+    def testPrefixIndex(self):
+        index = completion.PrefixIndex(['b', 'ab', 'a', 'abc', 'b', 'c'])
+        self.assertEqual(['a', 'ab', 'abc', 'b', 'c'], index.words)
+
+        self.assertEqual(['a', 'ab', 'abc', 'b', 'c'], list(index.Matches('')))
+        self.assertEqual(['ab', 'abc'], list(index.Matches('ab')))
+        self.assertEqual(['b'], list(index.Matches('b')))
+        self.assertEqual([], list(index.Matches('bb')))
+        self.assertEqual([], list(index.Matches('d')))
+        self.assertEqual([], list(index.Matches('0')))
+
+        index = completion.PrefixIndex([])
+        self.assertEqual([], list(index.Matches('')))
 
     def testFileSystemAction(self):
         CASES = [
@@ -195,6 +235,79 @@ class CompletionTest(unittest.TestCase):
             comp = self._CompApi([], 0, prefix)
             self.assertEqual(expected, sorted(a.Matches(comp)))
 
+    def testDirCache(self):
+        d = '/tmp/oil_comp_cache_test'
+        os.system('rm -r -f %s; mkdir -p %s' % (d, d))
+        os.system('touch %s/one %s/two' % (d, d))
+        # Make the mtime old enough to cache
+        os.utime(d, (1000, 1000))
+
+        cache = completion.DirCache()
+        self.assertEqual(['one', 'two'], sorted(cache.Listdir(d)))
+
+        # A new file changes the mtime, so the listing is stale
+        os.system('touch %s/three' % d)
+        os.utime(d, (2000, 2000))
+        self.assertEqual(['one', 'three', 'two'], sorted(cache.Listdir(d)))
+
+        # Same mtime: the cached listing is returned
+        os.system('touch %s/four' % d)
+        os.utime(d, (2000, 2000))
+        self.assertEqual(['one', 'three', 'two'], sorted(cache.Listdir(d)))
+
+        self.assertRaises(OSError, cache.Listdir, d + '/nonexistent')
+
+    def testDirCacheEviction(self):
+        d = '/tmp/oil_comp_evict_test'
+        os.system('rm -r -f %s; mkdir -p %s/a %s/b %s/c' % (d, d, d, d))
+        os.system('touch %s/a/1 %s/b/1 %s/b/2 %s/c/1 %s/c/2 %s/c/3' %
+                  (d, d, d, d, d, d))
+        for name in 'abc':
+            os.utime('%s/%s' % (d, name), (1000, 1000))
+
+        cache = completion.DirCache(max_dirs=2, max_names=4)
+        cache.Listdir(d + '/a')
+        cache.Listdir(d + '/b')
+        self.assertEqual([d + '/a', d + '/b'], cache.order)
+        self.assertEqual(3, cache.num_names)
+
+        # A hit makes 'a' the most recently used, so 'b' is dropped
+        cache.Listdir(d + '/a')
+        cache.Listdir(d + '/c')
+        self.assertEqual([d + '/a', d + '/c'], cache.order)
+        self.assertEqual(4, cache.num_names)
+        self.assertEqual(2, len(cache.listings))
+        self.assertEqual(2, len(cache.mtimes))
+
+        # Too many names in total, so both are dropped
+        cache.Listdir(d + '/b')
+        self.assertEqual([d + '/b'], cache.order)
+        self.assertEqual(2, cache.num_names)
+
+        # A listing bigger than the whole cache isn't remembered
+        os.system('touch %s/c/4 %s/c/5' % (d, d))
+        os.utime(d + '/c', (2000, 2000))
+        self.assertEqual(5, len(cache.Listdir(d + '/c')))
+        self.assertEqual([d + '/b'], cache.order)
+        self.assertEqual(2, cache.num_names)
+
+    def testOverBudget(self):
+        a = completion.TestAction(['f1', 'f2', 'f3', 'f4'], delay=0.03)
+        u = completion.UserSpec([a, A1], [], [], completion.DefaultPredicate(),
+                                '', '')
+
+        comp = self._CompApi(['f'], 0, 'f')
+        matches = [m for m, _ in u.AllMatches(comp)]
+        self.assertEqual(['f1', 'f2', 'f3', 'f4', 'foo.py', 'foo'], matches)
+        self.assertEqual(False, comp.timed_out)
+
+        # The slow action is stopped, and the next one gets its own budget
+        comp = self._CompApi(['f'], 0, 'f')
+        comp.budget_ms = 45
+        matches = [m for m, _ in u.AllMatches(comp)]
+        self.assertEqual(['f1', 'f2', 'foo.py', 'foo'], matches)
+        self.assertEqual(True, comp.timed_out)
+
     def testShellFuncExecution(self):
         arena = test_lib.MakeArena('testShellFuncExecution')
         c_parser = test_lib.InitCommandParser("""\
@@ -267,6 +380,28 @@ class RootCompleterTest(unittest.TestCase):
         m = list(r.Matches(MockApi('var=$v')))
         m = list(r.Matches(MockApi('local var=$v')))
 
+    def testTimedOutCandidateIsNotFinished(self):
+        slow = completion.TestAction(['foo1', 'foo2', 'foo3'], delay=0.03)
+        u = completion.UserSpec([slow], [], [], completion.DefaultPredicate(),
+                                '', '')
+        comp_lookup = completion.Lookup()
+        comp_lookup.RegisterName('grep', BASE_OPTS, u)
+        r = _MakeRootCompleter(comp_lookup=comp_lookup)
+
+        m = list(r.Matches(MockApi('grep f')))
+        self.assertEqual(['grep foo1 ', 'grep foo2 ', 'grep foo3 '], m)
+
+        # Only one candidate before the action was stopped.  It doesn't get a
+        # space, because there may be others.
+        state.SetGlobalString(r.mem, 'OILS_COMP_BUDGET_MS', '15')
+        m = list(r.Matches(MockApi('grep f')))
+        self.assertEqual(['grep foo1'], m)
+
+        # More than one still get spaces, and readline doesn't insert any
+        state.SetGlobalString(r.mem, 'OILS_COMP_BUDGET_MS', '45')
+        m = list(r.Matches(MockApi('grep f')))
+        self.assertEqual(['grep foo1 ', 'grep foo2 '], m)
+
     def testCompletesHomeDirs(self):
         r = _MakeRootCompleter()
 
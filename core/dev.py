@@ -10,6 +10,7 @@ from _devbuild.gen.syntax_asdl import assign_op_e, Token
 from _devbuild.gen.value_asdl import (value, value_e, value_t, sh_lvalue,
                                       sh_lvalue_e, LeftName)
 
+from core import bash_impl
 from core import error
 from core import optview
 from core import num
@@ -218,6 +219,17 @@ def _PrintShValue(val, buf):
             parts.append(')')
             result = ' '.join(parts)
 
+        elif case(value_e.SparseArray):
+            val = cast(value.SparseArray, UP_val)
+            parts = ['(']
+            keys = bash_impl.SparseArray_GetKeys(val)
+            values = bash_impl.SparseArray_GetValues(val)
+            for i, key in enumerate(keys):
+                parts.append('[%s]=%s' %
+                             (key, j8_lite.MaybeShellEncode(values[i])))
+            parts.append(')')
+            result = ' '.join(parts)
+
         elif case(value_e.BashAssoc):
             val = cast(value.BashAssoc, UP_val)
             parts = ['(']
@@ -5,14 +5,16 @@ from errno import EINTR
 
 from _devbuild.gen.id_kind_asdl import Id
 from _devbuild.gen.option_asdl import builtin_i
-from _devbuild.gen.runtime_asdl import RedirValue, trace
+from _devbuild.gen.runtime_asdl import RedirValue, redirect_arg, trace
 from _devbuild.gen.syntax_asdl import (
     command,
     command_e,
     CommandSub,
-    CompoundWord,
     loc,
     loc_t,
+    redir_loc,
+    redir_loc_e,
+    Redir,
 )
 from _devbuild.gen.value_asdl import value, value_e
 from builtin import hay_ysh
@@ -27,13 +29,14 @@ from core import vm
 from display import ui
 from frontend import consts
 from frontend import lexer
+from osh import bool_stat
 from mycpp import mylib
 from mycpp.mylib import log, print_stderr, tagswitch
 from pylib import os_path
 from pylib import path_stat
 
 import posix_ as posix
-from posix_ import X_OK  # translated directly to C macro
+from posix_ import O_RDONLY, X_OK  # translated directly to C macro
 
 from typing import cast, Dict, List, Tuple, Optional, TYPE_CHECKING
 if TYPE_CHECKING:
@@ -83,6 +86,10 @@ class SearchPath(object):
         # TODO: remove exec_opts
         self.cache = {}  # type: Dict[str, str]
 
+        # PATH and its split, reused until PATH changes
+        self.path_str = None  # type: Optional[str]
+        self.path_dirs = []  # type: List[str]
+
     def _GetPath(self):
         # type: () -> List[str]
 
@@ -91,8 +98,10 @@ class SearchPath(object):
         if s is None:
             return []  # treat as empty path
 
-        # TODO: Could cache this to avoid split() allocating all the time.
-        return s.split(':')
+        if s != self.path_str:
+            self.path_dirs = s.split(':')
+            self.path_str = s
+        return self.path_dirs
 
     def LookupOne(self, name, exec_required=True):
         # type: (str, bool) -> Optional[str]
@@ -203,6 +212,9 @@ IS_LAST_CMD = 1 << 1
 NO_CALL_PROCS = 1 << 2  # command ls suppresses function lookup
 USE_DEFAULT_PATH = 1 << 3  # for command -p ls changes the path
 
+# Read $(<file) in big chunks
+_READ_FILE_SIZE = 64 * 1024
+
 # Copied from var.c in dash
 DEFAULT_PATH = [
     '/usr/local/sbin', '/usr/local/bin', '/usr/sbin', '/usr/bin', '/sbin',
@@ -317,7 +329,8 @@ class ShellExecutor(vm._Executor):
         # type: (vm._Builtin, cmd_value.Argv) -> int
 
         io_errors = []  # type: List[error.IOError_OSError]
-        with vm.ctx_FlushStdout(io_errors):
+        with vm.ctx_FlushStdout(io_errors,
+                                 self.fd_state.BufferStdout()):
             # note: could be second word, like 'builtin read'
             with ui.ctx_Location(self.errfmt, cmd_val.arg_locs[0]):
                 try:
@@ -368,6 +381,11 @@ class ShellExecutor(vm._Executor):
 
         arg0 = argv[0]
 
+        # Consecutive tests like [ -e x ] && [ -s x ] reuse the stat() result.
+        # Any other command could change the file system.
+        if arg0 != '[' and arg0 != 'test':
+            bool_stat.ClearStatCache()
+
         builtin_id = consts.LookupAssignBuiltin(arg0)
         if builtin_id != consts.NO_INDEX:
             # command readonly is disallowed, for technical reasons.  Could relax it
@@ -601,6 +619,21 @@ class ShellExecutor(vm._Executor):
 
         return p.RunProcess(self.waiter, trace.ForkWait)
 
+    def StartChildProcess(self, node, stdout_r, stdout_w):
+        # type: (command_t, int, int) -> process.Process
+        """Start a child without waiting for it, for 'forkeach'.
+
+        If stdout_w isn't -1, the child's stdout goes to that pipe.
+        """
+        p = self._MakeProcess(node, True, self.exec_opts.errtrace())
+        # Like command subs, the children stay in the shell's process group, so
+        # Ctrl-C reaches all of them.
+        if stdout_w != -1:
+            p.AddStateChange(process.StdoutToPipe(stdout_r, stdout_w))
+
+        p.StartProcess(trace.Fork)
+        return p
+
     def CaptureStdout(self, node):
         # type: (command_t) -> Tuple[int, str]
 
@@ -638,6 +671,45 @@ class ShellExecutor(vm._Executor):
 
         return status, stdout_str
 
+    def _ReadFile(self, redir):
+        # type: (Redir) -> Tuple[int, str]
+        """Return the status and contents of $(<file), like CaptureStdout()."""
+        redirects = self.cmd_ev.EvalRedirects([redir])
+        if redirects is None:
+            return 1, ''  # error already printed
+        path = cast(redirect_arg.Path, redirects[0].arg).filename
+
+        try:
+            fd = posix.open(path, O_RDONLY, 0)
+        except (IOError, OSError) as e:
+            # Same message as a failed '< file' redirect
+            self.errfmt.Print_("Can't open %r: %s" %
+                               (path, pyutil.strerror(e)),
+                               blame_loc=redir.op)
+            return 1, ''
+
+        status = 0
+        chunks = []  # type: List[str]
+        while True:
+            n, err_num = pyos.Read(fd, _READ_FILE_SIZE, chunks)
+
+            if n < 0:
+                if err_num == EINTR:
+                    pass  # retry
+                else:
+                    # e.g. EISDIR
+                    self.errfmt.Print_("Can't read %r: %s" %
+                                       (path, posix.strerror(err_num)),
+                                       blame_loc=redir.op)
+                    status = 1
+                    break
+
+            elif n == 0:  # EOF
+                break
+        posix.close(fd)
+
+        return status, ''.join(chunks).rstrip('\n')
+
     def RunCommandSub(self, cs_part):
         # type: (CommandSub) -> str
 
@@ -654,28 +726,24 @@ class ShellExecutor(vm._Executor):
 
         node = cs_part.child
 
-        # Hack for weird $(<file) construct
+        # $(<file) reads the file in this process, without forking
+        is_read_file = False
         if node.tag() == command_e.Redirect:
             redir_node = cast(command.Redirect, node)
-            # Detect '< file'
+            # Detect '< file' or '0< file', but not '3< file'
             if (len(redir_node.redirects) == 1 and
-                    redir_node.redirects[0].op.id == Id.Redir_Less and
                     redir_node.child.tag() == command_e.NoOp):
-
-                # Change it to __cat < file.
-                # TODO: could be 'internal cat' (issue #1013)
-                tok = lexer.DummyToken(Id.Lit_Chars, '__cat')
-                cat_word = CompoundWord([tok])
-
-                # Blame < because __cat has no location
-                blame_tok = redir_node.redirects[0].op
-                simple = command.Simple(blame_tok, [], [cat_word], None, None,
-                                        False)
-
-                # MUTATE redir node so it's like $(<file _cat)
-                redir_node.child = simple
-
-        status, stdout_str = self.CaptureStdout(node)
+                r = redir_node.redirects[0]
+                if (r.op.id == Id.Redir_Less and
+                        r.loc.tag() == redir_loc_e.Fd and
+                        cast(redir_loc.Fd, r.loc).fd == 0):
+                    is_read_file = True
+
+        if is_read_file:
+            status, stdout_str = self._ReadFile(redir_node.redirects[0])
+        else:
+            status, stdout_str = self.CaptureStdout(node)
+            bool_stat.ClearStatCache()  # the child may have changed files
 
         # OSH has the concept of aborting in the middle of a WORD.  We're not
         # waiting until the command is over!
@@ -753,6 +821,7 @@ class ShellExecutor(vm._Executor):
                 cs_loc)
 
         p = self._MakeProcess(cs_part.child, True, self.exec_opts.errtrace())
+        bool_stat.ClearStatCache()
 
         r, w = posix.pipe()
         #log('pipe = %d, %d', r, w)
@@ -816,6 +885,7 @@ class ShellExecutor(vm._Executor):
         # type: (List[RedirValue], List[error.IOError_OSError]) -> None
         if len(redirects) == 0:  # Optimized to avoid allocs
             return
+        bool_stat.ClearStatCache()  # > may create a file
         self.fd_state.Push(redirects, err_out)
 
     def PopRedirects(self, num_redirects, err_out):
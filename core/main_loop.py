@@ -17,6 +17,7 @@ from core import error
 from core import process
 from display import ui
 from core import util
+from core import vm
 from frontend import reader
 from osh import cmd_eval
 from mycpp import mylib
@@ -47,6 +48,7 @@ class ctx_Descriptors(object):
         self.saved2 = process.SaveFd(2)
 
         #ShowDescriptorState('BEFORE')
+        vm.FlushBufferedStdout()  # to the old stdout
         posix.dup2(fds[0], 0)
         posix.dup2(fds[1], 1)
         posix.dup2(fds[2], 2)
@@ -61,6 +63,7 @@ class ctx_Descriptors(object):
         # type: (Any, Any, Any) -> None
 
         # Restore
+        vm.FlushBufferedStdout()  # to the client's stdout
         posix.dup2(self.saved0, 0)
         posix.dup2(self.saved1, 1)
         posix.dup2(self.saved2, 2)
@@ -212,6 +215,7 @@ def Interactive(
 
         while True:  # ONLY EXECUTES ONCE
             quit = False
+            vm.FlushBufferedStdout()  # before we block on the user
             prompt_plugin.Run()
             try:
                 # may raise HistoryError or ParseError
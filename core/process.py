@@ -36,6 +36,7 @@ from core import pyos
 from core import state
 from display import ui
 from core import util
+from core import vm
 from data_lang import j8_lite
 from frontend import location
 from frontend import match
@@ -203,6 +204,29 @@ class FdState(object):
         self.waiter = waiter
         self.exec_opts = exec_opts
 
+        # For shopt -s buffer_output.  -1 means we haven't checked fds 1 and
+        # 2 since they last changed.
+        self.can_buffer = -1
+
+    def BufferStdout(self):
+        # type: () -> bool
+        """Can builtins leave their output in the stdout buffer?
+
+        If so, it's flushed when fds change, and before fork, exec, read and
+        wait.
+        """
+        if not self.exec_opts.buffer_output():
+            return False
+        if self.can_buffer == -1:
+            self.can_buffer = 1 if pyos.CanBufferStdout() else 0
+        return self.can_buffer == 1
+
+    def _FlushBeforeChange(self):
+        # type: () -> None
+        """Write buffered output to the stdout we had when it was written."""
+        vm.FlushBufferedStdout()
+        self.can_buffer = -1
+
     def Open(self, path):
         # type: (str) -> mylib.LineReader
         """Opens a path for read, but moves it out of the reserved 3-9 fd
@@ -506,6 +530,8 @@ class FdState(object):
         """Apply a group of redirects and remember to undo them."""
 
         #log('> fd_state.Push %s', redirects)
+        self._FlushBeforeChange()
+
         new_frame = _FdFrame()
         self.stack.append(new_frame)
         self.cur_frame = new_frame
@@ -539,6 +565,8 @@ class FdState(object):
 
     def Pop(self, err_out):
         # type: (List[error.IOError_OSError]) -> None
+        self._FlushBeforeChange()
+
         frame = self.stack.pop()
         #log('< Pop %s', frame)
         for rf in reversed(frame.saved):
@@ -720,6 +748,7 @@ class ExternalProgram(object):
                         #self.debug_f.log('Not hijacking %s (%r)', argv, line)
                         pass
 
+        vm.FlushBufferedStdout()  # for exec, which doesn't fork
         try:
             posix.execve(argv0_path, argv, environ)
         except (IOError, OSError) as e:
@@ -770,6 +799,11 @@ class Thunk(object):
         """Returns a status code."""
         raise NotImplementedError()
 
+    def WillExec(self):
+        # type: () -> bool
+        """Whether Run() replaces the child process with exec()."""
+        return False
+
     def UserString(self):
         # type: () -> str
         """Display for the 'jobs' list."""
@@ -800,6 +834,10 @@ class ExternalThunk(Thunk):
         tmp = [j8_lite.MaybeShellEncode(a) for a in self.cmd_val.argv]
         return '[process] %s' % ' '.join(tmp)
 
+    def WillExec(self):
+        # type: () -> bool
+        return True
+
     def Run(self):
         # type: () -> None
         """An ExternalThunk is run in parent for the exec builtin."""
@@ -1057,12 +1095,18 @@ class Process(Job):
     def StartProcess(self, why):
         # type: (trace_t) -> int
         """Start this process with fork(), handling redirects."""
+        # Otherwise the child inherits buffered output, and writes it again
+        vm.FlushBufferedStdout()
+
         pid = posix.fork()
         if pid < 0:
             # When does this happen?
             e_die('Fatal error in posix.fork()')
 
         elif pid == 0:  # child
+            # Don't let a collection copy the pages we share with the parent
+            mylib.OnFork(self.thunk.WillExec())
+
             # Note: this happens in BOTH interactive and non-interactive shells.
             # We technically don't need to do most of it in non-interactive, since we
             # did not change state in InitInteractiveShell().
@@ -1905,6 +1949,10 @@ class Waiter(object):
         | Done(int pid, int status)  -- process done
         | EINTR(bool sigint)         -- may or may not retry
         """
+        if not (waitpid_options & WNOHANG):
+            # Don't block with output from 'echo' still in our buffer
+            vm.FlushBufferedStdout()
+
         pid, status = pyos.WaitPid(waitpid_options)
         if pid == 0:  # WNOHANG passed, and no state changes
             return W1_AGAIN
@@ -5,10 +5,13 @@ Like py{error,util}.py, it won't be translated to C++.
 """
 from __future__ import print_function
 
-from errno import EINTR
+from errno import EFBIG, EINTR
+import mmap
+import os
 import pwd
 import resource
 import select
+import stat
 import sys
 import termios  # for read -n
 import time
@@ -18,7 +21,7 @@ from mycpp import mops
 from mycpp.mylib import log
 
 import posix_ as posix
-from posix_ import WUNTRACED
+from posix_ import SEEK_CUR, WUNTRACED
 
 from typing import Optional, Tuple, List, Dict, cast, Any, TYPE_CHECKING
 if TYPE_CHECKING:
@@ -45,6 +48,22 @@ def FlushStdout():
     return err
 
 
+def CanBufferStdout():
+    # type: () -> bool
+    """Whether stdout isn't a terminal, and isn't the same file as stderr.
+
+    Then only other processes can observe when builtin output is flushed.
+    """
+    if posix.isatty(1):
+        return False
+    try:
+        st1 = os.fstat(1)  # posix_ doesn't have fstat()
+        st2 = os.fstat(2)
+    except OSError:
+        return False
+    return st1.st_dev != st2.st_dev or st1.st_ino != st2.st_ino
+
+
 def WaitPid(waitpid_options):
     # type: (int) -> Tuple[int, int]
     """
@@ -218,6 +237,85 @@ def SetRLimit(res, soft, hard):
     resource.setrlimit(res, (soft.i, hard.i))
 
 
+def LSeek(fd, offset, whence):
+    # type: (int, mops.BigInt, int) -> mops.BigInt
+    """Returns the new offset.  64-bit, for files bigger than 2 GiB.
+
+    Raises OSError, e.g. ESPIPE for a pipe.
+    """
+    return mops.IntWiden(posix.lseek(fd, offset.i, whence))
+
+
+# Offsets into a ByteBuffer are ints, which are 32 bits in C++
+_MAX_BUFFER = (1 << 31) - 1
+
+
+class ByteBuffer(object):
+    """Bytes to decode, which may be a file mapped into memory.
+
+    Used by 'packle read', so that only the parts of a file it decodes are
+    read from disk.
+    """
+
+    def __init__(self, data, start):
+        # type: (Any, int) -> None
+        self.data = data  # str, or mmap.mmap of the whole file
+        self.start = start
+
+    def Length(self):
+        # type: () -> int
+        return len(self.data) - self.start
+
+    def ByteAt(self, i):
+        # type: (int) -> int
+        return ord(self.data[self.start + i])
+
+    def Slice(self, begin, end):
+        # type: (int, int) -> str
+        """Copy bytes into a new string, which is valid after Close()."""
+        return self.data[self.start + begin:self.start + end]
+
+    def Close(self):
+        # type: () -> None
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+
+def BufferFromStr(s):
+    # type: (str) -> ByteBuffer
+    return ByteBuffer(s, 0)
+
+
+def MapFile(fd):
+    # type: (int) -> Tuple[Optional[ByteBuffer], int]
+    """mmap() the rest of a regular file, read-only.
+
+    Like reading to EOF, it moves the file offset to the end.
+
+    Returns:
+      (buffer, 0) on success.  The caller must Close() it.
+      (None, 0) if fd isn't a regular file, so the caller should read() it.
+      (None, errno) on failure
+    """
+    try:
+        st = os.fstat(fd)  # posix_ doesn't have fstat()
+        if not stat.S_ISREG(st.st_mode):
+            return None, 0
+
+        offset = posix.lseek(fd, 0, SEEK_CUR)
+        if st.st_size - offset > _MAX_BUFFER:
+            return None, EFBIG
+        if offset >= st.st_size:
+            return BufferFromStr(''), 0  # mmap() of 0 bytes is an error
+
+        m = mmap.mmap(fd, st.st_size, access=mmap.ACCESS_READ)
+        posix.lseek(fd, 0, os.SEEK_END)  # posix_ doesn't have SEEK_END
+    except EnvironmentError as e:  # OSError, mmap.error
+        return None, e.errno
+
+    return ByteBuffer(m, offset), 0
+
+
 def Time():
     # type: () -> Tuple[float, float, float]
     t = time.time()  # calls gettimeofday() under the hood
@@ -274,6 +372,35 @@ def OsType():
     return posix.uname()[0].lower()
 
 
+def WaitForInput(fds, timeout_ms, ready):
+    # type: (List[int], int, List[int]) -> int
+    """Wait until some of the fds can be read without blocking.
+
+    Like Read(), it returns an error number instead of raising an exception.
+
+    Args:
+      timeout_ms: -1 to wait until an fd is ready
+      ready: the fds that are ready, or have hit EOF, are appended to it.
+             Nothing is appended on timeout.
+
+    Returns:
+      errno on failure, e.g. EINTR, or 0
+    """
+    poller = select.poll()
+    for fd in fds:
+        poller.register(fd, select.POLLIN)
+    try:
+        events = poller.poll(timeout_ms)
+    except select.error as e:
+        err_num = e.args[0]  # type: int
+        if err_num == EINTR and iolib.gSignalSafe.PollUntrappedSigInt():
+            raise KeyboardInterrupt()
+        return err_num
+    for fd, _ in events:
+        ready.append(fd)
+    return 0
+
+
 def InputAvailable(fd):
     # type: (int) -> bool
     # similar to lib/sh/input_avail.c in bash
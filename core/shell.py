@@ -702,7 +702,6 @@ def Main(
     b[builtin_i.pp] = io_ysh.Pp(expr_ev, mem, errfmt, procs, arena)
 
     # Input
-    b[builtin_i.cat] = io_osh.Cat()  # for $(<file)
     b[builtin_i.read] = read_osh.Read(splitter, mem, parse_ctx, cmd_ev, errfmt)
 
     mapfile = io_osh.MapFile(mem, errfmt, cmd_ev)
@@ -721,6 +720,7 @@ def Main(
 
     b[builtin_i.json] = json_ysh.Json(mem, errfmt, False)
     b[builtin_i.json8] = json_ysh.Json(mem, errfmt, True)
+    b[builtin_i.packle] = json_ysh.Packle(mem, errfmt)
 
     ### Process builtins
     b[builtin_i.exec_] = process_osh.Exec(mem, ext_prog, fd_state, search_path,
@@ -736,6 +736,8 @@ def Main(
     # Could be in process_ysh
     b[builtin_i.fork] = process_osh.Fork(shell_ex)
     b[builtin_i.forkwait] = process_osh.ForkWait(shell_ex)
+    b[builtin_i.forkeach] = process_osh.ForkEach(shell_ex, waiter, mem,
+                                                   errfmt)
 
     # Interactive builtins depend on readline
     b[builtin_i.bind] = readline_osh.Bind(readline, errfmt)
@@ -905,7 +907,7 @@ def Main(
     _AddBuiltinFunc(mem, 'float', func_misc.Float())
     _AddBuiltinFunc(mem, 'str', func_misc.Str_())
     _AddBuiltinFunc(mem, 'list', func_misc.List_())
-    _AddBuiltinFunc(mem, 'dict', func_misc.DictFunc())
+    _AddBuiltinFunc(mem, 'dict', func_misc.DictFunc(mem))
 
     # Dict functions
     _AddBuiltinFunc(mem, 'get', method_dict.Get())
@@ -1066,6 +1068,7 @@ def Main(
         # Same logic as interactive shell
         mut_status = IntParamBox(status)
         cmd_ev.RunTrapsOnExit(mut_status)
+        vm.FlushBufferedStdout()  # for shopt -s buffer_output
         status = mut_status.i
 
         return status
@@ -1135,6 +1138,7 @@ def Main(
 
             mut_status = IntParamBox(status)
             cmd_ev.RunTrapsOnExit(mut_status)
+            vm.FlushBufferedStdout()  # for shopt -s buffer_output
             status = mut_status.i
 
         if readline:
@@ -1217,6 +1221,7 @@ def Main(
             status = 130  # 128 + 2
     mut_status = IntParamBox(status)
     cmd_ev.RunTrapsOnExit(mut_status)
+    vm.FlushBufferedStdout()  # for shopt -s buffer_output
 
     multi_trace.WriteDumps()
 
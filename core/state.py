@@ -20,6 +20,7 @@ from _devbuild.gen.value_asdl import (value, value_e, value_t, Obj, sh_lvalue,
                                       sh_lvalue_e, sh_lvalue_t, LeftName,
                                       y_lvalue_e, regex_match, regex_match_e,
                                       regex_match_t, RegexMatch)
+from core import bash_impl
 from core import error
 from core.error import e_usage, e_die
 from core import num
@@ -659,7 +660,8 @@ def _DumpVarFrame(frame):
             if case(value_e.Undef):
                 cell_json['val'] = value.Null
 
-            elif case(value_e.Str, value_e.BashArray, value_e.BashAssoc):
+            elif case(value_e.Str, value_e.BashArray, value_e.SparseArray,
+                      value_e.BashAssoc):
                 cell_json['val'] = cell.val
 
             else:
@@ -691,20 +693,24 @@ def _AddCallToken(d, token):
 class ctx_FuncCall(object):
     """For func calls."""
 
-    def __init__(self, mem, func):
-        # type: (Mem, value.Func) -> None
-
+    def __init__(self, mem, func, frame):
+        # type: (Mem, value.Func, Dict[str, Cell]) -> None
+        """
+        Args:
+          frame: from mem.NewCallFrame(), possibly with params already bound
+        """
         self.saved_globals = mem.var_stack[0]
 
         assert func.module_frame is not None
         mem.var_stack[0] = func.module_frame
 
-        frame = NewDict()  # type: Dict[str, Cell]
         mem.var_stack.append(frame)
 
         mem.PushCall(func.name, func.parsed.name)
 
         self.mem = mem
+        self.frame = frame
+        self.num_captures = mem.num_captures
 
     def __enter__(self):
         # type: () -> None
@@ -714,8 +720,10 @@ class ctx_FuncCall(object):
         # type: (Any, Any, Any) -> None
         self.mem.PopCall()
         self.mem.var_stack.pop()
+        self.mem.FramePopped(self.frame)
 
         self.mem.var_stack[0] = self.saved_globals
+        self.mem.ReleaseCallFrame(self.frame, self.num_captures)
 
 
 class ctx_ProcCall(object):
@@ -734,7 +742,7 @@ class ctx_ProcCall(object):
         assert proc.module_frame is not None
         mem.var_stack[0] = proc.module_frame
 
-        frame = NewDict()  # type: Dict[str, Cell]
+        frame = mem.NewCallFrame()
 
         assert argv is not None
         if proc.sh_compat:
@@ -758,6 +766,8 @@ class ctx_ProcCall(object):
         self.mem = mem
         self.mutable_opts = mutable_opts
         self.sh_compat = proc.sh_compat
+        self.frame = frame
+        self.num_captures = mem.num_captures
 
     def __enter__(self):
         # type: () -> None
@@ -768,11 +778,13 @@ class ctx_ProcCall(object):
         self.mutable_opts.PopDynamicScope()
         self.mem.PopCall()
         self.mem.var_stack.pop()
+        self.mem.FramePopped(self.frame)
 
         if self.sh_compat:
             self.mem.argv_stack.pop()
 
         self.mem.var_stack[0] = self.saved_globals
+        self.mem.ReleaseCallFrame(self.frame, self.num_captures)
 
 
 class ctx_Temp(object):
@@ -873,6 +885,26 @@ class ctx_ThisDir(object):
             self.mem.this_dir.pop()
 
 
+# Bounds the memory held by Mem.frame_pool and Mem.call_pool after deep
+# recursion
+_MAX_POOLED_FRAMES = 64
+
+# Names that Mem.GetValue() computes, instead of reading a cell
+_COMPUTED_VARS = [
+    '_status', '_error', '_this_dir', 'PIPESTATUS', '_pipeline_status',
+    '_process_sub_status', 'BASH_REMATCH', 'FUNCNAME', 'BASH_SOURCE',
+    'BASH_LINENO', 'LINENO', 'BASHPID', '_', 'SECONDS'
+]
+
+
+def _HasExported(frame):
+    # type: (Dict[str, Cell]) -> bool
+    for _, cell in iteritems(frame):
+        if cell.exported:
+            return True
+    return False
+
+
 def _MakeArgvCell(argv):
     # type: (List[str]) -> Cell
     items = [value.Str(a) for a in argv]  # type: List[value_t]
@@ -888,7 +920,7 @@ class ctx_LoopFrame(object):
         self.do_new_frame = name1 == '__hack__'
 
         if self.do_new_frame:
-            to_enclose = self.mem.var_stack[-1]
+            to_enclose = self.mem.CurrentFrame()
             self.new_frame = NewDict()  # type: Dict[str, Cell]
             self.new_frame['__E__'] = Cell(False, False, False,
                                            value.Frame(to_enclose))
@@ -902,6 +934,7 @@ class ctx_LoopFrame(object):
         # type: (Any, Any, Any) -> None
         if self.do_new_frame:
             self.mem.var_stack.pop()
+            self.mem.FramePopped(self.new_frame)
 
 
 class ctx_EnclosedFrame(object):
@@ -959,6 +992,7 @@ class ctx_EnclosedFrame(object):
         # type: (Any, Any, Any) -> None
 
         if self.out_dict is not None:
+            self.mem.FlushAppend()  # the frame may have a pending s+=x
             for name, cell in iteritems(self.new_frame):
                 #log('name %r', name)
                 #log('cell %r', cell)
@@ -972,6 +1006,7 @@ class ctx_EnclosedFrame(object):
 
         # Restore
         self.mem.var_stack.pop()
+        self.mem.FramePopped(self.new_frame)
 
         if self.module_frame is not None:
             self.mem.var_stack[0] = self.saved_globals
@@ -1024,6 +1059,7 @@ class ctx_ModuleEval(object):
         # type: (Any, Any, Any) -> None
 
         assert len(self.mem.var_stack) == 1
+        self.mem.FlushAppend()  # the module may have a pending s+=x
         self.mem.var_stack[0] = self.saved_frame
 
         # Now look in __export__ for the list of names to expose
@@ -1192,9 +1228,26 @@ class Mem(object):
         # BASH_LINENO.
         self.debug_stack = debug_stack
 
+        # Frames and debug_frame.Call objects from returned calls, ready to be
+        # reused.  A frame is only pooled if nothing captured it with
+        # CurrentFrame() while it was on the stack; see ReleaseCallFrame().
+        self.frame_pool = []  # type: List[Dict[str, Cell]]
+        self.call_pool = []  # type: List[debug_frame.Call]
+        self.num_captures = 0
+
         self.env_dict = env_dict
         self.env_object = Obj(None, env_dict)  # initial state
 
+        # Cache for GetEnv(), reset by InvalidateEnv()
+        self.exported_env = None  # type: Optional[Dict[str, str]]
+        self.exported_globals = None  # type: Optional[Dict[str, Cell]]
+
+        # Pending appends to one string variable, for s+=x in a loop.  The
+        # value of append_cell is stale until FlushAppend() joins the parts.
+        self.append_cell = None  # type: Optional[Cell]
+        self.append_frame = None  # type: Optional[Dict[str, Cell]]
+        self.append_parts = []  # type: List[str]
+
         if defaults is None:  # for unit tests only
             self.defaults = NewDict()  # type: Dict[str, value_t]
         else:
@@ -1281,6 +1334,7 @@ class Mem(object):
     def Dump(self):
         # type: () -> Tuple[List[value_t], List[value_t], List[value_t]]
         """Copy state before unwinding the stack."""
+        self.FlushAppend()
         var_stack = [
             value.Dict(_DumpVarFrame(frame)) for frame in self.var_stack
         ]  # type: List[value_t]
@@ -1440,8 +1494,17 @@ class Mem(object):
                    BASH_SOURCE.
         """
         # self.token_for_line can be None?
-        self.debug_stack.append(
-            debug_frame.Call(self.token_for_line, def_tok, func_name))
+        if len(self.call_pool):
+            # The frame only holds tokens.  FUNCNAME, BASH_SOURCE, and crash
+            # dumps compute their strings from the stack when they're read, so
+            # it's safe to reuse the object.
+            frame = self.call_pool.pop()
+            frame.call_tok = self.token_for_line
+            frame.def_tok = def_tok
+            frame.func_name = func_name
+        else:
+            frame = debug_frame.Call(self.token_for_line, def_tok, func_name)
+        self.debug_stack.append(frame)
 
     def PopCall(self):
         # type: () -> None
@@ -1450,7 +1513,31 @@ class Mem(object):
           should_pop_argv_stack: Pass False if PushCall was given None for argv
           True for proc, False for func
         """
-        self.debug_stack.pop()
+        UP_frame = self.debug_stack.pop()
+        if len(self.call_pool) < _MAX_POOLED_FRAMES:
+            frame = cast(debug_frame.Call, UP_frame)
+            self.call_pool.append(frame)
+
+    def NewCallFrame(self):
+        # type: () -> Dict[str, Cell]
+        """Return an empty frame for a proc or func call."""
+        if len(self.frame_pool):
+            return self.frame_pool.pop()
+        return NewDict()
+
+    def ReleaseCallFrame(self, frame, num_captures):
+        # type: (Dict[str, Cell], int) -> None
+        """Return a frame to the pool after its call.
+
+        Args:
+          num_captures: the value of self.num_captures when the call started.
+            If it changed, a closure, Place, or getFrame() may refer to the
+            frame, so we leave it to the GC.
+        """
+        if (self.num_captures == num_captures and
+                len(self.frame_pool) < _MAX_POOLED_FRAMES):
+            frame.clear()
+            self.frame_pool.append(frame)
 
     def ShouldRunDebugTrap(self):
         # type: () -> bool
@@ -1491,13 +1578,23 @@ class Mem(object):
 
         It's affected by ctx_ModuleEval()
         """
+        self.FlushAppend()
         return self.var_stack[0]
 
     def CurrentFrame(self):
         # type: () -> Dict[str, Cell]
         """For attaching a stack frame to a value.Block"""
+        self.FlushAppend()
+        self.num_captures += 1
         return self.var_stack[-1]
 
+    def FrameAt(self, index):
+        # type: (int) -> Dict[str, Cell]
+        """For getFrame(), which may keep the frame after the call returns."""
+        self.FlushAppend()
+        self.num_captures += 1
+        return self.var_stack[index]
+
     def PushSource(self, source_name, argv):
         # type: (str, List[str]) -> None
         """ For 'source foo.sh 1 2 3' """
@@ -1527,7 +1624,8 @@ class Mem(object):
 
     def PopTemp(self):
         # type: () -> None
-        self.var_stack.pop()
+        frame = self.var_stack.pop()
+        self.FramePopped(frame)
 
     def _BindEnvObj(self):
         # type: () -> None
@@ -1647,6 +1745,17 @@ class Mem(object):
         # type: (str, scope_t) -> Tuple[Optional[Cell], Dict[str, Cell]]
         """Helper for getting and setting variable.
 
+        Returns the same thing as _LookupCell(), with the value of the cell up
+        to date.
+        """
+        cell, var_frame = self._LookupCell(name, which_scopes)
+        if cell is not None and cell is self.append_cell:
+            self.FlushAppend()
+        return cell, var_frame
+
+    def _LookupCell(self, name, which_scopes):
+        # type: (str, scope_t) -> Tuple[Optional[Cell], Dict[str, Cell]]
+        """
         Returns:
           cell: The cell corresponding to looking up 'name' with the given mode, or
             None if it's not found.
@@ -1794,10 +1903,14 @@ class Mem(object):
 
                 frame = place.frame
                 cell = frame.get(yval.name)
+                if cell is not None and cell is self.append_cell:
+                    self.FlushAppend()
                 if cell is None:
                     cell = Cell(False, False, False, val)
                     frame[yval.name] = cell
                 else:
+                    if cell.exported:
+                        self.exported_env = None
                     cell.val = val
 
             elif case(y_lvalue_e.Container):
@@ -1818,9 +1931,13 @@ class Mem(object):
         cell = var_frame.get(lval.name)
 
         if cell:
+            if cell is self.append_cell:
+                self.FlushAppend()
             if cell.readonly:
                 e_die("Can't assign to readonly value %r" % lval.name,
                       lval.blame_loc)
+            if cell.exported:
+                self.exported_env = None
             cell.val = val  # Mutate value_t
         else:
             cell = Cell(False, False, False, val)
@@ -1845,6 +1962,9 @@ class Mem(object):
                 lval.name, which_scopes)
 
         if cell:
+            if cell.exported:  # its value or flag may change
+                self.exported_env = None
+
             # Clear before checking readonly bit.
             # NOTE: Could be cell.flags &= flag_clear_mask
             if flags & ClearExport:
@@ -1866,6 +1986,7 @@ class Mem(object):
             # NOTE: Could be cell.flags |= flag_set_mask
             if flags & SetExport:
                 cell.exported = True
+                self.exported_env = None
             if flags & SetReadOnly:
                 cell.readonly = True
             if flags & SetNameref:
@@ -1879,6 +2000,8 @@ class Mem(object):
             cell = Cell(bool(flags & SetExport), bool(flags & SetReadOnly),
                         bool(flags & SetNameref), val)
             var_frame[cell_name] = cell
+            if cell.exported:
+                self.exported_env = None
 
         # Maintain invariant that only strings and undefined cells can be
         # exported.
@@ -1974,9 +2097,20 @@ class Mem(object):
                         index = lval.index
                         if index < 0:  # a[-1]++ computes this twice; could we avoid it?
                             index += n
+                            if index < 0:
+                                e_die(
+                                    "Index %d is out of bounds for array of length %d"
+                                    % (lval.index, n), left_loc)
 
-                        if 0 <= index and index < n:
+                        if index < n:
                             strs[index] = rval.s
+                        elif bash_impl.BashArray_ShouldGrowSparse(
+                                strs, index):
+                            sparse_val = bash_impl.SparseArray_FromList(strs)
+                            bash_impl.SparseArray_Set(sparse_val,
+                                                      mops.IntWiden(index),
+                                                      rval.s)
+                            cell.val = sparse_val
                         else:
                             # Fill it in with None.  It could look like this:
                             # ['1', 2, 3, None, None, '4', None]
@@ -1984,7 +2118,23 @@ class Mem(object):
                             n = index - len(strs) + 1
                             for i in xrange(n):
                                 strs.append(None)
-                            strs[lval.index] = rval.s
+                            strs[index] = rval.s
+                        return
+
+                    elif case2(value_e.SparseArray):
+                        sparse_val = cast(value.SparseArray, UP_cell_val)
+                        big_index = bash_impl.SparseArray_ResolveIndex(
+                            sparse_val, mops.IntWiden(lval.index))
+                        if mops.Greater(mops.ZERO, big_index):
+                            e_die(
+                                "Index %d is out of bounds for array of length %s"
+                                % (lval.index,
+                                   mops.ToStr(
+                                       bash_impl.SparseArray_Length(
+                                           sparse_val))), left_loc)
+
+                        bash_impl.SparseArray_Set(sparse_val, big_index,
+                                                  rval.s)
                         return
 
                 # This could be an object, eggex object, etc.  It won't be
@@ -2022,10 +2172,16 @@ class Mem(object):
     def _BindNewArrayWithEntry(self, var_frame, lval, val, flags):
         # type: (Dict[str, Cell], sh_lvalue.Indexed, value.Str, int) -> None
         """Fill 'var_frame' with a new indexed array entry."""
-        no_str = None  # type: Optional[str]
-        items = [no_str] * lval.index
-        items.append(val.s)
-        new_value = value.BashArray(items)
+        if bash_impl.BashArray_ShouldGrowSparse([], lval.index):
+            sparse_val = bash_impl.SparseArray_New()
+            bash_impl.SparseArray_Set(sparse_val, mops.IntWiden(lval.index),
+                                      val.s)
+            new_value = sparse_val  # type: value_t
+        else:
+            no_str = None  # type: Optional[str]
+            items = [no_str] * lval.index
+            items.append(val.s)
+            new_value = value.BashArray(items)
 
         # arrays can't be exported; can't have BashAssoc flag
         readonly = bool(flags & SetReadOnly)
@@ -2044,8 +2200,106 @@ class Mem(object):
         Use case: SHELLOPTS.
         """
         cell = self.var_stack[0][name]
+        if cell is self.append_cell:
+            self.FlushAppend()
+        if cell.exported:
+            self.exported_env = None
         cell.val = new_val
 
+    def AppendStr(self, name, s, which_scopes, read_scopes):
+        # type: (str, str, scope_t, scope_t) -> bool
+        """For s+=x and setvar s = s ++ x.
+
+        Appending to a string in a loop would copy it every time.  Instead,
+        we save the parts, and join them when the variable is used in any
+        other way.
+
+        Args:
+          which_scopes: where the variable is set
+          read_scopes: where the old value is read from
+
+        Returns:
+          False if the caller should read and set the variable itself, e.g.
+          because it's not a plain string.
+        """
+        cell, var_frame = self._LookupCell(name, which_scopes)
+        if cell is None:
+            return False
+
+        if read_scopes != which_scopes:
+            read_cell, _ = self._LookupCell(name, read_scopes)
+            if read_cell is not cell:
+                return False
+
+        if cell is not self.append_cell:
+            # Flags can't change while appends are pending, because that
+            # goes through _ResolveNameOnly()
+            if (cell.readonly or cell.exported or cell.nameref or
+                    cell.val.tag() != value_e.Str or name in _COMPUTED_VARS):
+                return False
+
+            self.FlushAppend()
+            self.append_cell = cell
+            self.append_frame = var_frame
+            self.append_parts.append(cast(value.Str, cell.val).s)
+
+        self.append_parts.append(s)
+        return True
+
+    def AppendArray(self, name, strs, which_scopes, read_scopes):
+        # type: (str, List[str], scope_t, scope_t) -> bool
+        """For a+=(x y).
+
+        Mutates the array in place, rather than copying it like
+        cmd_eval.PlusEquals() does.  A SparseArray with no holes left becomes
+        a BashArray again.
+
+        Returns:
+          False if the caller should read and set the variable itself, like
+          AppendStr().
+        """
+        cell, _ = self._LookupCell(name, which_scopes)
+        if cell is None:
+            return False
+
+        if read_scopes != which_scopes:
+            read_cell, _ = self._LookupCell(name, read_scopes)
+            if read_cell is not cell:
+                return False
+
+        if cell.readonly or cell.nameref or name in _COMPUTED_VARS:
+            return False
+
+        UP_val = cell.val
+        with tagswitch(UP_val) as case:
+            if case(value_e.BashArray):
+                array_val = cast(value.BashArray, UP_val)
+                array_val.strs.extend(strs)
+
+            elif case(value_e.SparseArray):
+                sparse_val = cast(value.SparseArray, UP_val)
+                bash_impl.SparseArray_Append(sparse_val, strs)
+                if bash_impl.SparseArray_IsDense(sparse_val):
+                    cell.val = value.BashArray(
+                        bash_impl.SparseArray_GetValues(sparse_val))
+
+            else:
+                return False
+
+        return True
+
+    def FlushAppend(self):
+        # type: () -> None
+        """Give the variable appended to by AppendStr() its value."""
+        cell = self.append_cell
+        if cell is None:
+            return
+
+        cell.val = value.Str(''.join(self.append_parts))
+        self.append_cell = None
+        self.append_frame = None
+        del self.append_parts[:]
+
     def GetValue(self, name, which_scopes=scope_e.Shopt):
         # type: (str, scope_t) -> value_t
         """Used by the WordEvaluator, ArithEvaluator, ExprEvaluator, etc."""
@@ -2263,6 +2517,8 @@ class Mem(object):
                 # Make variables in higher scopes visible.
                 # example: test/spec.sh builtin-vars -r 24 (ble.sh)
                 mylib.dict_erase(var_frame, cell_name)
+                if cell.exported:
+                    self.exported_env = None
 
                 # alternative that some shells use:
                 #   var_frame[cell_name].val = value.Undef
@@ -2278,31 +2534,32 @@ class Mem(object):
 
                 val = cell.val
                 UP_val = val
-                if val.tag() != value_e.BashArray:
-                    raise error.Runtime("%r isn't an array" % var_name)
-
-                val = cast(value.BashArray, UP_val)
-                strs = val.strs
-
-                n = len(strs)
-                last_index = n - 1
-                index = lval.index
-                if index < 0:
-                    index += n
-
-                if index == last_index:
-                    # Special case: The array SHORTENS if you unset from the end.  You
-                    # can tell with a+=(3 4)
-                    strs.pop()
-                elif 0 <= index and index < last_index:
-                    strs[index] = None
-                else:
-                    # If it's not found, it's not an error.  In other words, 'unset'
-                    # ensures that a value doesn't exist, regardless of whether it
-                    # existed.  It's idempotent.
-                    # (Ousterhout specifically argues that the strict behavior was a
-                    # mistake for Tcl!)
-                    pass
+                with tagswitch(val) as case2:
+                    if case2(value_e.BashArray):
+                        val = cast(value.BashArray, UP_val)
+                        strs = val.strs
+
+                        index = lval.index
+                        if index < 0:
+                            index += len(strs)
+
+                        if bash_impl.BashArray_ShouldUnsetSparse(strs, index):
+                            sparse_val = bash_impl.SparseArray_FromList(strs)
+                            bash_impl.SparseArray_Unset(
+                                sparse_val, mops.IntWiden(index))
+                            cell.val = sparse_val
+                        else:
+                            bash_impl.BashArray_Unset(strs, index)
+
+                    elif case2(value_e.SparseArray):
+                        sparse_val = cast(value.SparseArray, UP_val)
+                        big_index = bash_impl.SparseArray_ResolveIndex(
+                            sparse_val, mops.IntWiden(lval.index))
+                        # Like BashArray, a missing index isn't an error
+                        bash_impl.SparseArray_Unset(sparse_val, big_index)
+
+                    else:
+                        raise error.Runtime("%r isn't an array" % var_name)
 
             elif case(sh_lvalue_e.Keyed):  # unset 'A["K"]'
                 lval = cast(sh_lvalue.Keyed, UP_lval)
@@ -2344,6 +2601,8 @@ class Mem(object):
         cell, var_frame = self._ResolveNameOnly(name, self.ScopesForReading())
         if cell:
             if flag & ClearExport:
+                if cell.exported:
+                    self.exported_env = None
                 cell.exported = False
             if flag & ClearNameref:
                 cell.nameref = False
@@ -2351,6 +2610,19 @@ class Mem(object):
         else:
             return False
 
+    def InvalidateEnv(self):
+        # type: () -> None
+        """Called when an exported variable may have changed."""
+        self.exported_env = None
+
+    def FramePopped(self, frame):
+        # type: (Dict[str, Cell]) -> None
+        """Called after a frame leaves var_stack, e.g. FOO=bar or a proc."""
+        if frame is self.append_frame:
+            self.FlushAppend()
+        if self.exported_env is not None and _HasExported(frame):
+            self.exported_env = None
+
     def _FillWithExported(self, new_env):
         # type: (Dict[str, str]) -> None
 
@@ -2380,25 +2652,37 @@ class Mem(object):
         """
         Get the environment that should be used for launching processes.
 
-        Note: This is run on every SimpleCommand.  Should we have a dirty
-        flag?  We could notice these things:
-
-        - If an exported variable is changed
-        - If the set of exported variables changes.
+        This is run for every external command, so the exported vars are
+        cached until one of them changes, or a frame with one is popped.  The
+        result is shared, so callers must not mutate it.
         """
-        new_env = {}  # type: Dict[str, str]
+        # The ENV dict can be mutated without going through Mem, so YSH
+        # environments aren't cached.
+        if self.exec_opts.env_obj() or self.exec_opts.no_exported():
+            new_env = {}  # type: Dict[str, str]
+
+            # Note: ysh:upgrade has both of these behaviors
+
+            # OSH: Consult exported vars
+            if not self.exec_opts.no_exported():
+                self._FillWithExported(new_env)
 
-        # Note: ysh:upgrade has both of these behaviors
+            # YSH: Consult the ENV dict
+            if self.exec_opts.env_obj():
+                self._FillEnvObj(new_env, self.env_object)
 
-        # OSH: Consult exported vars
-        if not self.exec_opts.no_exported():
-            self._FillWithExported(new_env)
+            return new_env
 
-        # YSH: Consult the ENV dict
-        if self.exec_opts.env_obj():
-            self._FillEnvObj(new_env, self.env_object)
+        # OSH: Consult exported vars.  A module has different globals.
+        if (self.exported_env is not None and
+                self.exported_globals is self.var_stack[0]):
+            return self.exported_env
 
-        return new_env
+        exported = {}  # type: Dict[str, str]
+        self._FillWithExported(exported)
+        self.exported_env = exported
+        self.exported_globals = self.var_stack[0]
+        return exported
 
     def VarNames(self):
         # type: () -> List[str]
@@ -2427,6 +2711,7 @@ class Mem(object):
     def GetAllVars(self):
         # type: () -> Dict[str, str]
         """Get all variables and their values, for 'set' builtin."""
+        self.FlushAppend()
         result = {}  # type: Dict[str, str]
         for scope in self.var_stack:
             for name, cell in iteritems(scope):
@@ -2440,6 +2725,7 @@ class Mem(object):
     def GetAllCells(self, which_scopes):
         # type: (scope_t) -> Dict[str, Cell]
         """Get all variables and their values, for 'set' builtin."""
+        self.FlushAppend()
         result = {}  # type: Dict[str, Cell]
 
         if which_scopes == scope_e.Dynamic:
@@ -2572,6 +2858,8 @@ class Procs(object):
         """
         procs are defined in the local scope.
         """
+        # This may shadow an exported var with the same name
+        self.mem.InvalidateEnv()
         self.mem.var_stack[-1][name] = Cell(False, False, False, proc)
 
     def IsProc(self, name):
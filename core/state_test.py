@@ -108,6 +108,26 @@ class MemTest(unittest.TestCase):
         self.assertEqual(1, len(mem.var_stack))
         self.assertEqual('1', mem.var_stack[-1]['x'].val.s)
 
+    def testCallFramePool(self):
+        mem = _InitMem()
+
+        frame = mem.NewCallFrame()
+        frame['x'] = None
+        n = mem.num_captures
+        mem.ReleaseCallFrame(frame, n)
+
+        # Reused, and empty
+        self.assertIs(frame, mem.NewCallFrame())
+        self.assertEqual(0, len(frame))
+
+        # A captured frame isn't reused
+        n = mem.num_captures
+        mem.var_stack.append(frame)
+        unused = mem.CurrentFrame()
+        mem.var_stack.pop()
+        mem.ReleaseCallFrame(frame, n)
+        self.assertIsNot(frame, mem.NewCallFrame())
+
     def testSetVarClearFlag(self):
         mem = _InitMem()
         print(mem)
@@ -298,6 +318,83 @@ class MemTest(unittest.TestCase):
         e = mem.GetEnv()
         self.assertEqual('u', e['U'])
 
+    def testGetEnvCache(self):
+        mem = _InitMem()
+
+        mem.SetValue(location.LName('U'),
+                     value.Str('1'),
+                     scope_e.Dynamic,
+                     flags=state.SetExport)
+        e = mem.GetEnv()
+        self.assertEqual('1', e['U'])
+
+        # Unexported vars don't change it
+        mem.SetValue(location.LName('x'), value.Str('x'), scope_e.Dynamic)
+        self.assertIs(e, mem.GetEnv())
+
+        mem.SetValue(location.LName('U'), value.Str('2'), scope_e.Dynamic)
+        e = mem.GetEnv()
+        self.assertEqual('2', e['U'])
+
+        # U=temp
+        mem.PushTemp()
+        mem.SetValue(location.LName('U'),
+                     value.Str('temp'),
+                     scope_e.LocalOnly,
+                     flags=state.SetExport)
+        self.assertEqual('temp', mem.GetEnv()['U'])
+        mem.PopTemp()
+        self.assertEqual('2', mem.GetEnv()['U'])
+
+    def testAppendStr(self):
+        mem = _InitMem()
+        d = scope_e.Dynamic
+
+        # Not defined
+        self.assertEqual(False, mem.AppendStr('s', 'x', d, d))
+
+        mem.SetValue(location.LName('s'), value.Str('a'), d)
+        self.assertEqual(True, mem.AppendStr('s', 'b', d, d))
+        self.assertEqual(True, mem.AppendStr('s', 'c', d, d))
+        cell = mem.append_cell
+        self.assertEqual('a', cell.val.s)  # stale until it's read
+        self.assertEqual('abc', mem.GetValue('s').s)
+        self.assertEqual(None, mem.append_cell)
+
+        # Setting it drops the pending parts
+        self.assertEqual(True, mem.AppendStr('s', 'd', d, d))
+        mem.SetValue(location.LName('s'), value.Str('new'), d)
+        self.assertEqual('new', mem.GetValue('s').s)
+
+        # A local shadows the pending global
+        self.assertEqual(True, mem.AppendStr('s', '1', d, d))
+        mem.PushTemp()
+        mem.SetValue(location.LName('s'), value.Str('L'), scope_e.LocalOnly)
+        self.assertEqual(True, mem.AppendStr('s', '2', d, d))
+        self.assertEqual('L2', mem.GetValue('s').s)
+        mem.PopTemp()
+        self.assertEqual('new1', mem.GetValue('s').s)
+
+        # Exported and readonly vars take the slow path
+        mem.SetValue(location.LName('s'),
+                     None,
+                     d,
+                     flags=state.SetExport)
+        self.assertEqual(False, mem.AppendStr('s', 'x', d, d))
+        mem.SetValue(location.LName('r'),
+                     value.Str('r'),
+                     d,
+                     flags=state.SetReadOnly)
+        self.assertEqual(False, mem.AppendStr('r', 'x', d, d))
+
+        # Reading and writing see different cells
+        mem.SetValue(location.LName('g'), value.Str('g'), d)
+        mem.PushTemp()
+        self.assertEqual(
+            False,
+            mem.AppendStr('g', 'x', scope_e.LocalOnly, scope_e.LocalOrGlobal))
+        mem.PopTemp()
+
     def testUnset(self):
         mem = _InitMem()
         # unset a
@@ -8,7 +8,8 @@ from _devbuild.gen.syntax_asdl import Token
 from _devbuild.gen.value_asdl import value_t, Obj
 from core import error
 from core import pyos
-from mycpp.mylib import log
+from core import pyutil
+from mycpp.mylib import log, print_stderr
 
 from typing import List, Tuple, Any, TYPE_CHECKING
 if TYPE_CHECKING:
@@ -23,6 +24,7 @@ if TYPE_CHECKING:
     from osh.cmd_eval import CommandEvaluator
     from osh import prompt
     from core import dev
+    from core import process
     from core import state
 
 _ = log
@@ -198,6 +200,10 @@ class _Executor(object):
         # type: (command_t) -> int
         return 0
 
+    def StartChildProcess(self, node, stdout_r, stdout_w):
+        # type: (command_t, int, int) -> process.Process
+        return None
+
     def CaptureStdout(self, node):
         # type: (command_t) -> Tuple[int, str]
         return 0, ''
@@ -323,11 +329,31 @@ class ctx_ProcessSub(object):
         self.shell_ex.PopProcessSub(self.process_sub_status)
 
 
+def FlushBufferedStdout():
+    # type: () -> None
+    """Write output that builtins left in the stdout buffer.
+
+    For shopt -s buffer_output.  The builtin that wrote it has already
+    returned, so an error is reported here, rather than as the failure of
+    whatever runs next.
+    """
+    err = pyos.FlushStdout()
+    if err is not None:
+        print_stderr('oils I/O error writing buffered output: %s' %
+                     pyutil.strerror(err))
+
+
 class ctx_FlushStdout(object):
 
-    def __init__(self, err_out):
-        # type: (List[error.IOError_OSError]) -> None
+    def __init__(self, err_out, buffered):
+        # type: (List[error.IOError_OSError], bool) -> None
+        """
+        Args:
+          buffered: leave output in the buffer, for shopt -s buffer_output.
+            FdState.BufferStdout() says when it's safe.
+        """
         self.err_out = err_out
+        self.buffered = buffered
 
     def __enter__(self):
         # type: () -> None
@@ -335,6 +361,8 @@ class ctx_FlushStdout(object):
 
     def __exit__(self, type, value, traceback):
         # type: (Any, Any, Any) -> None
+        if self.buffered:
+            return
 
         # Can't raise exception in destructor!  So we append it to out param.
         err = pyos.FlushStdout()
@@ -92,6 +92,7 @@ def NinjaGraph(ru):
         deps=[
             '//core/value.asdl',
             '//data_lang/j8',
+            '//data_lang/packle',
             '//mycpp/runtime',
         ],
     )
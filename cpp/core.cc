@@ -5,9 +5,12 @@
 #include <ctype.h>  // ispunct()
 #include <errno.h>
 #include <float.h>
+#include <limits.h>
 #include <math.h>  // fmod()
+#include <poll.h>  // poll()
 #include <pwd.h>   // passwd
 #include <signal.h>
+#include <sys/mman.h>      // mmap()
 #include <sys/resource.h>  // getrusage
 #include <sys/select.h>    // select(), FD_ISSET, FD_SET, FD_ZERO
 #include <sys/stat.h>      // stat
@@ -19,6 +22,8 @@
 #include <time.h>          // time()
 #include <unistd.h>        // getuid(), environ
 
+#include <vector>
+
 #include "_build/detected-cpp-config.h"  // HAVE_PWENT
 #include "_gen/cpp/build_stamp.h"        // gCommitHash
 #include "_gen/frontend/consts.h"        // gVersion
@@ -101,7 +106,7 @@ Dict<BigStr*, BigStr*>* Environ() {
 }
 
 int Chdir(BigStr* dest_dir) {
-  if (chdir(dest_dir->data_) == 0) {
+  if (chdir(dest_dir->data()) == 0) {
     return 0;  // success
   } else {
     return errno;
@@ -122,7 +127,7 @@ BigStr* GetMyHomeDir() {
 
 BigStr* GetHomeDir(BigStr* user_name) {
   // Don't free this.  (May return a pointer to a static area)
-  struct passwd* entry = getpwnam(user_name->data_);
+  struct passwd* entry = getpwnam(user_name->data());
   if (entry == nullptr) {
     return nullptr;
   }
@@ -203,6 +208,74 @@ void SetRLimit(int resource, mops::BigInt soft, mops::BigInt hard) {
   }
 }
 
+mops::BigInt LSeek(int fd, mops::BigInt offset, int whence) {
+  off_t result = ::lseek(fd, offset, whence);
+  if (result < 0) {
+    throw Alloc<OSError>(errno);
+  }
+  return result;
+}
+
+BigStr* ByteBuffer::Slice(int begin, int end) {
+  DCHECK(0 <= begin && begin <= end && end <= length_);
+  return StrFromC(data_ + begin, end - begin);
+}
+
+void ByteBuffer::Close() {
+  if (map_addr_) {
+    ::munmap(map_addr_, map_length_);
+    map_addr_ = nullptr;
+    data_ = nullptr;
+    length_ = 0;
+  }
+}
+
+ByteBuffer* BufferFromStr(BigStr* s) {
+  return Alloc<ByteBuffer>(s, s->data(), len(s), nullptr, 0);
+}
+
+// Offsets into a ByteBuffer are ints
+const off_t kMaxBuffer = INT_MAX;
+
+Tuple2<ByteBuffer*, int> MapFile(int fd) {
+  struct stat st;
+  if (::fstat(fd, &st) < 0) {
+    return Tuple2<ByteBuffer*, int>(nullptr, errno);
+  }
+  if (!S_ISREG(st.st_mode)) {
+    return Tuple2<ByteBuffer*, int>(nullptr, 0);
+  }
+
+  off_t offset = ::lseek(fd, 0, SEEK_CUR);
+  if (offset < 0) {
+    return Tuple2<ByteBuffer*, int>(nullptr, errno);
+  }
+  if (st.st_size - offset > kMaxBuffer) {
+    return Tuple2<ByteBuffer*, int>(nullptr, EFBIG);
+  }
+  if (offset >= st.st_size) {  // mmap() of 0 bytes is an error
+    return Tuple2<ByteBuffer*, int>(BufferFromStr(kEmptyString), 0);
+  }
+
+  // The offset to mmap() must be a multiple of the page size, so map the
+  // whole file
+  size_t map_length = st.st_size;
+  void* addr = ::mmap(nullptr, map_length, PROT_READ, MAP_PRIVATE, fd, 0);
+  if (addr == MAP_FAILED) {
+    return Tuple2<ByteBuffer*, int>(nullptr, errno);
+  }
+  if (::lseek(fd, 0, SEEK_END) < 0) {
+    int err_num = errno;
+    ::munmap(addr, map_length);
+    return Tuple2<ByteBuffer*, int>(nullptr, err_num);
+  }
+
+  const char* data = static_cast<const char*>(addr) + offset;
+  int length = st.st_size - offset;
+  auto* buf = Alloc<ByteBuffer>(nullptr, data, length, addr, map_length);
+  return Tuple2<ByteBuffer*, int>(buf, 0);
+}
+
 Tuple3<double, double, double> Time() {
   struct timeval now;
   if (gettimeofday(&now, nullptr) < 0) {
@@ -246,6 +319,31 @@ void PrintTimes() {
   putc('\n', stdout);
 }
 
+int WaitForInput(List<int>* fds, int timeout_ms, List<int>* ready) {
+  int n = len(fds);
+  std::vector<struct pollfd> poll_fds(n);
+  for (int i = 0; i < n; ++i) {
+    poll_fds[i].fd = fds->at(i);
+    poll_fds[i].events = POLLIN;
+    poll_fds[i].revents = 0;
+  }
+
+  if (::poll(poll_fds.data(), n, timeout_ms) < 0) {
+    if (errno == EINTR && iolib::gSignalSafe->PollUntrappedSigInt()) {
+      throw Alloc<KeyboardInterrupt>();
+    }
+    return errno;
+  }
+
+  // POLLHUP without POLLIN means EOF, so read() won't block either
+  for (int i = 0; i < n; ++i) {
+    if (poll_fds[i].revents) {
+      ready->append(poll_fds[i].fd);
+    }
+  }
+  return 0;
+}
+
 bool InputAvailable(int fd) {
   fd_set fds;
   FD_ZERO(&fds);
@@ -262,6 +360,18 @@ IOError_OSError* FlushStdout() {
   return nullptr;
 }
 
+bool CanBufferStdout() {
+  if (::isatty(STDOUT_FILENO)) {
+    return false;
+  }
+  struct stat st1;
+  struct stat st2;
+  if (::fstat(STDOUT_FILENO, &st1) < 0 || ::fstat(STDERR_FILENO, &st2) < 0) {
+    return false;
+  }
+  return st1.st_dev != st2.st_dev || st1.st_ino != st2.st_ino;
+}
+
 Tuple2<BigStr*, int>* MakeDirCacheKey(BigStr* path) {
   struct stat st;
   if (::stat(path->data(), &st) == -1) {
@@ -313,7 +423,7 @@ double nan() {
 bool IsValidCharEscape(BigStr* c) {
   DCHECK(len(c) == 1);
 
-  int ch = c->data_[0];
+  int ch = c->data()[0];
 
   if (ch == '/' || ch == '.' || ch == '-') {
     return false;
@@ -328,16 +438,16 @@ BigStr* ChArrayToString(List<int>* ch_array) {
   int n = len(ch_array);
   BigStr* result = NewStr(n);
   for (int i = 0; i < n; ++i) {
-    result->data_[i] = ch_array->at(i);
+    result->data()[i] = ch_array->at(i);
   }
-  result->data_[n] = '\0';
+  result->data()[n] = '\0';
   return result;
 }
 
 BigStr* _ResourceLoader::Get(BigStr* path) {
   TextFile* t = gEmbeddedFiles;  // start of generated data
   while (t->rel_path != nullptr) {
-    if (strcmp(t->rel_path, path->data_) == 0) {
+    if (strcmp(t->rel_path, path->data()) == 0) {
       return t->contents;
     }
     t++;
@@ -365,16 +475,17 @@ void PrintVersionDetails(_ResourceLoader* loader) {
 BigStr* BackslashEscape(BigStr* s, BigStr* meta_chars) {
   int upper_bound = len(s) * 2;
   BigStr* buf = OverAllocatedStr(upper_bound);
-  char* p = buf->data_;
+  char* p = buf->data();
+  const char* src = s->data();
 
   for (int i = 0; i < len(s); ++i) {
-    char c = s->data_[i];
-    if (memchr(meta_chars->data_, c, len(meta_chars))) {
+    char c = src[i];
+    if (memchr(meta_chars->data(), c, len(meta_chars))) {
       *p++ = '\\';
     }
     *p++ = c;
   }
-  buf->MaybeShrink(p - buf->data_);
+  buf->MaybeShrink(p - buf->data());
   return buf;
 }
 
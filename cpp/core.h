@@ -74,13 +74,59 @@ Tuple2<mops::BigInt, mops::BigInt> GetRLimit(int resource);
 
 void SetRLimit(int resource, mops::BigInt soft, mops::BigInt hard);
 
+mops::BigInt LSeek(int fd, mops::BigInt offset, int whence);
+
+class ByteBuffer {
+ public:
+  ByteBuffer(BigStr* owner, const char* data, int length, void* map_addr,
+             size_t map_length)
+      : owner_(owner),
+        data_(data),
+        length_(length),
+        map_addr_(map_addr),
+        map_length_(map_length) {
+  }
+
+  int Length() {
+    return length_;
+  }
+
+  int ByteAt(int i) {
+    DCHECK(0 <= i && i < length_);
+    return static_cast<unsigned char>(data_[i]);
+  }
+
+  BigStr* Slice(int begin, int end);
+  void Close();
+
+  static constexpr ObjHeader obj_header() {
+    return ObjHeader::ClassFixed(field_mask(), sizeof(ByteBuffer));
+  }
+
+  BigStr* owner_;  // for BufferFromStr(), keeps data_ alive
+  const char* data_;
+  int length_;
+  void* map_addr_;  // for MapFile(), nullptr when not mapped
+  size_t map_length_;
+
+  static constexpr uint32_t field_mask() {
+    return maskbit(offsetof(ByteBuffer, owner_));
+  }
+};
+
+ByteBuffer* BufferFromStr(BigStr* s);
+Tuple2<ByteBuffer*, int> MapFile(int fd);
+
 Tuple3<double, double, double> Time();
 
 void PrintTimes();
 
+int WaitForInput(List<int>* fds, int timeout_ms, List<int>* ready);
+
 bool InputAvailable(int fd);
 
 IOError_OSError* FlushStdout();
+bool CanBufferStdout();
 
 Tuple2<int, void*> PushTermAttrs(int fd, int mask);
 void PopTermAttrs(int fd, int orig_local_modes, void* term_attrs);
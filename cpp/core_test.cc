@@ -2,6 +2,7 @@
 
 #include <errno.h>        // errno
 #include <fcntl.h>        // O_RDWR
+#include <inttypes.h>     // PRId64
 #include <signal.h>       // SIG*, kill()
 #include <sys/stat.h>     // stat
 #include <sys/utsname.h>  // uname
@@ -168,6 +169,106 @@ TEST pyos_read_test() {
   PASS();
 }
 
+TEST pyos_lseek_test() {
+  const char* tmp_name = "pyos_LSeek";
+  int fd = ::open(tmp_name, O_CREAT | O_RDWR, 0644);
+  ASSERT(fd > 0);
+
+  // Offsets past 2 GiB don't fit in an int.  The file stays empty.
+  mops::BigInt big = mops::BigInt(3) << 30;
+  ASSERT_EQ_FMT(big, pyos::LSeek(fd, big, SEEK_SET), "%" PRId64);
+  ASSERT_EQ_FMT(big - 5, pyos::LSeek(fd, -5, SEEK_CUR), "%" PRId64);
+  close(fd);
+
+  int fds[2];
+  ASSERT(::pipe(fds) == 0);
+  int ec = -1;
+  try {
+    pyos::LSeek(fds[0], 0, SEEK_CUR);
+  } catch (IOError_OSError* e) {
+    ec = e->errno_;
+  }
+  ASSERT_EQ(ESPIPE, ec);
+  close(fds[0]);
+  close(fds[1]);
+
+  PASS();
+}
+
+TEST pyos_map_file_test() {
+  const char* tmp_name = "pyos_MapFile";
+  int fd = ::open(tmp_name, O_CREAT | O_TRUNC | O_RDWR, 0644);
+  ASSERT(fd > 0);
+  write(fd, "PKL2n", 5);
+
+  // Map from the current offset, and move it to the end
+  ASSERT_EQ(3, ::lseek(fd, 3, SEEK_SET));
+  Tuple2<pyos::ByteBuffer*, int> tup = pyos::MapFile(fd);
+  ASSERT_EQ_FMT(0, tup.at1(), "%d");
+  pyos::ByteBuffer* buf = tup.at0();
+  ASSERT_EQ_FMT(2, buf->Length(), "%d");
+  ASSERT_EQ_FMT('2', buf->ByteAt(0), "%d");
+  ASSERT_EQ_FMT(5, static_cast<int>(::lseek(fd, 0, SEEK_CUR)), "%d");
+
+  BigStr* s = buf->Slice(0, 2);
+  buf->Close();
+  ASSERT(str_equals(StrFromC("2n"), s));
+  ASSERT_EQ_FMT(0, buf->Length(), "%d");
+
+  // Nothing left to map
+  tup = pyos::MapFile(fd);
+  ASSERT_EQ_FMT(0, tup.at1(), "%d");
+  ASSERT_EQ_FMT(0, tup.at0()->Length(), "%d");
+  close(fd);
+
+  // Not a regular file
+  int fds[2];
+  ASSERT(::pipe(fds) == 0);
+  tup = pyos::MapFile(fds[0]);
+  ASSERT(tup.at0() == nullptr);
+  ASSERT_EQ_FMT(0, tup.at1(), "%d");
+  close(fds[0]);
+  close(fds[1]);
+
+  buf = pyos::BufferFromStr(StrFromC("\xff"));
+  ASSERT_EQ_FMT(1, buf->Length(), "%d");
+  ASSERT_EQ_FMT(255, buf->ByteAt(0), "%d");
+  buf->Close();  // does nothing
+
+  PASS();
+}
+
+TEST pyos_wait_for_input_test() {
+  int a[2];
+  int b[2];
+  ASSERT(::pipe(a) == 0);
+  ASSERT(::pipe(b) == 0);
+
+  List<int>* fds = NewList<int>(std::initializer_list<int>{a[0], b[0]});
+  List<int>* ready = NewList<int>();
+
+  // Nothing to read yet
+  ASSERT_EQ(0, pyos::WaitForInput(fds, 0, ready));
+  ASSERT_EQ(0, len(ready));
+
+  write(b[1], "x", 1);
+  ASSERT_EQ(0, pyos::WaitForInput(fds, -1, ready));
+  ASSERT_EQ(1, len(ready));
+  ASSERT_EQ(b[0], ready->at(0));
+
+  // EOF counts as ready
+  ready->clear();
+  close(a[1]);
+  ASSERT_EQ(0, pyos::WaitForInput(fds, -1, ready));
+  ASSERT_EQ(2, len(ready));
+
+  close(a[0]);
+  close(b[0]);
+  close(b[1]);
+
+  PASS();
+}
+
 TEST pyos_test() {
   Tuple3<double, double, double> t = pyos::Time();
   ASSERT(t.at0() > 0.0);
@@ -344,6 +445,9 @@ int main(int argc, char** argv) {
   RUN_TEST(uname_test);
   RUN_TEST(pyos_readbyte_test);
   RUN_TEST(pyos_read_test);
+  RUN_TEST(pyos_lseek_test);
+  RUN_TEST(pyos_map_file_test);
+  RUN_TEST(pyos_wait_for_input_test);
   RUN_TEST(pyos_test);  // non-hermetic
   RUN_TEST(pyutil_test);
   RUN_TEST(strerror_test);
@@ -3,6 +3,7 @@
 #include "cpp/data_lang.h"
 
 #include "data_lang/j8.h"
+#include "data_lang/packle.h"
 #include "data_lang/utf8.h"
 
 // TODO: remove duplication
@@ -11,8 +12,8 @@
 namespace {
 
 void WriteBString(BigStr* s, mylib::BufWriter* buf, int capacity) {
-  uint8_t* in = reinterpret_cast<uint8_t*>(s->data_);
-  uint8_t* in_end = reinterpret_cast<uint8_t*>(s->data_ + len(s));
+  uint8_t* in = reinterpret_cast<uint8_t*>(s->data());
+  uint8_t* in_end = reinterpret_cast<uint8_t*>(s->data() + len(s));
 
   buf->WriteConst("b'");
 
@@ -42,8 +43,8 @@ void WriteBString(BigStr* s, mylib::BufWriter* buf, int capacity) {
 }
 
 void WriteBashDollarString(BigStr* s, mylib::BufWriter* buf, int capacity) {
-  uint8_t* in = reinterpret_cast<uint8_t*>(s->data_);
-  uint8_t* in_end = reinterpret_cast<uint8_t*>(s->data_ + len(s));
+  uint8_t* in = reinterpret_cast<uint8_t*>(s->data());
+  uint8_t* in_end = reinterpret_cast<uint8_t*>(s->data() + len(s));
 
   buf->WriteConst("$'");
 
@@ -82,8 +83,8 @@ void WriteBashDollarString(BigStr* s, mylib::BufWriter* buf, int capacity) {
 //   WriteBashDollarString()
 
 void ShellEncodeString(BigStr* s, int ysh_fallback, mylib::BufWriter* buf) {
-  uint8_t* in = reinterpret_cast<uint8_t*>(s->data_);
-  uint8_t* in_end = reinterpret_cast<uint8_t*>(s->data_ + len(s));
+  uint8_t* in = reinterpret_cast<uint8_t*>(s->data());
+  uint8_t* in_end = reinterpret_cast<uint8_t*>(s->data() + len(s));
 
   // Growth policy: Start at a fixed size max(N + 3 + 2, J8_MIN_CAPACITY)
   int capacity = len(s) + 3 + 2;     // 3 for quotes, 2 potential \" \n
@@ -144,7 +145,7 @@ void ShellEncodeString(BigStr* s, int ysh_fallback, mylib::BufWriter* buf) {
 namespace fastfunc {
 
 bool CanOmitQuotes(BigStr* s) {
-  return ::CanOmitQuotes(reinterpret_cast<unsigned char*>(s->data_), len(s));
+  return ::CanOmitQuotes(reinterpret_cast<unsigned char*>(s->data()), len(s));
 }
 
 BigStr* J8EncodeString(BigStr* s, int j8_fallback) {
@@ -178,6 +179,24 @@ Tuple2<int, int> Utf8DecodeOne(BigStr* s, int start) {
   return Tuple2<int, int>(codepoint_or_error, decode_result.bytes_read);
 }
 
+bool IsAscii(BigStr* s) {
+  return utf8_is_ascii(reinterpret_cast<unsigned char*>(s->data()), len(s));
+}
+
+BigStr* FloatToBytes(double f) {
+  BigStr* result = NewStr(PACKLE_FLOAT_SIZE);
+  packle_write_float(f, reinterpret_cast<unsigned char*>(result->data()));
+  return result;
+}
+
+double BytesToFloat(BigStr* s, int start) {
+  // The caller checks that there are enough bytes
+  DCHECK(0 <= start && start + PACKLE_FLOAT_SIZE <= len(s));
+
+  return packle_read_float(reinterpret_cast<unsigned char*>(s->data()) +
+                           start);
+}
+
 }  // namespace fastfunc
 
 namespace pyj8 {
@@ -186,7 +205,7 @@ bool PartIsUtf8(BigStr* s, int start, int end) {
   Utf8Result result;
 
   for (int i = start; i < end;) {
-    utf8_decode(reinterpret_cast<unsigned char*>(s->data_ + i), &result);
+    utf8_decode(reinterpret_cast<unsigned char*>(s->data() + i), &result);
     if (result.error) {
       return false;
     }
@@ -200,8 +219,8 @@ bool PartIsUtf8(BigStr* s, int start, int end) {
 void WriteString(BigStr* s, int options, mylib::BufWriter* buf) {
   bool j8_fallback = !(options & LOSSY_JSON);
 
-  uint8_t* in = reinterpret_cast<uint8_t*>(s->data_);
-  uint8_t* in_end = reinterpret_cast<uint8_t*>(s->data_ + len(s));
+  uint8_t* in = reinterpret_cast<uint8_t*>(s->data());
+  uint8_t* in_end = reinterpret_cast<uint8_t*>(s->data() + len(s));
 
   // Growth policy: Start at a fixed size max(N + 3 + 2, J8_MIN_CAPACITY)
   int capacity = len(s) + 3 + 2;     // 3 for quotes, 2 potential \" \n
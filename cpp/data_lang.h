@@ -15,6 +15,12 @@ BigStr* ShellEncodeString(BigStr* s, int ysh_fallback);
 
 Tuple2<int, int> Utf8DecodeOne(BigStr* s, int start);
 
+bool IsAscii(BigStr* s);
+
+BigStr* FloatToBytes(double f);
+
+double BytesToFloat(BigStr* s, int start);
+
 }  // namespace fastfunc
 
 namespace pyj8 {
@@ -1,5 +1,6 @@
 #include "cpp/data_lang.h"
 
+#include <math.h>  // INFINITY
 #include <stdio.h>
 
 #include "_gen/core/value.asdl.h"
@@ -158,6 +159,30 @@ TEST utf8_decode_one_test() {
 #undef ASSERT_DECODE
 }
 
+TEST is_ascii_test() {
+  ASSERT(fastfunc::IsAscii(kEmptyString));
+  ASSERT(fastfunc::IsAscii(StrFromC("hi \x7f")));
+  ASSERT(!fastfunc::IsAscii(StrFromC("hi \xff")));
+  ASSERT(!fastfunc::IsAscii(StrFromC("h\xE2\xA1\x80")));
+
+  PASS();
+}
+
+TEST float_bytes_test() {
+  BigStr* s = fastfunc::FloatToBytes(1.0);
+  ASSERT_EQ(8, len(s));
+  ASSERT(str_equals(StrFromC("\0\0\0\0\0\0\xf0?", 8), s));
+
+  double cases[] = {0.0, -0.0, 1.0 / 3, 0.1 + 0.2, 5e-324, -INFINITY};
+  for (double f : cases) {
+    BigStr* b = fastfunc::FloatToBytes(f);
+    double result = fastfunc::BytesToFloat(str_concat(StrFromC("xy"), b), 2);
+    ASSERT_EQ(0, memcmp(&f, &result, sizeof(f)));
+  }
+
+  PASS();
+}
+
 GREATEST_MAIN_DEFS();
 
 int main(int argc, char** argv) {
@@ -170,6 +195,8 @@ int main(int argc, char** argv) {
   RUN_TEST(compare_c_test);
   RUN_TEST(heap_id_test);
   RUN_TEST(utf8_decode_one_test);
+  RUN_TEST(is_ascii_test);
+  RUN_TEST(float_bytes_test);
 
   gHeap.CleanProcessExit();
 
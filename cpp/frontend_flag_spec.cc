@@ -200,13 +200,13 @@ flag_spec::_FlagSpec* LookupFlagSpec(BigStr* spec_name) {
       break;
     }
     if (str_equals0(name, spec_name)) {
-      // log("%s found", spec_name->data_);
+      // log("%s found", spec_name->data());
       return CreateSpec(&kFlagSpecs[i]);
     }
 
     i++;
   }
-  // log("%s not found", spec_name->data_);
+  // log("%s not found", spec_name->data());
   return nullptr;
 }
 
@@ -218,13 +218,13 @@ flag_spec::_FlagSpecAndMore* LookupFlagSpec2(BigStr* spec_name) {
       break;
     }
     if (str_equals0(name, spec_name)) {
-      // log("%s found", spec_name->data_);
+      // log("%s found", spec_name->data());
       return CreateSpec2(&kFlagSpecsAndMore[i]);
     }
 
     i++;
   }
-  // log("%s not found", spec_name->data_);
+  // log("%s not found", spec_name->data());
   return nullptr;
 }
 
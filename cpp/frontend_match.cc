@@ -19,7 +19,7 @@ Tuple2<Id_t, int> OneToken(lex_mode_t lex_mode, BigStr* line, int start_pos) {
 
   // TODO: get rid of these casts
   MatchOshToken(static_cast<int>(lex_mode),
-                reinterpret_cast<const unsigned char*>(line->data_), len(line),
+                reinterpret_cast<const unsigned char*>(line->data()), len(line),
                 start_pos, &id, &end_pos);
   return Tuple2<Id_t, int>(static_cast<Id_t>(id), end_pos);
 }
@@ -27,13 +27,13 @@ Tuple2<Id_t, int> OneToken(lex_mode_t lex_mode, BigStr* line, int start_pos) {
 Tuple2<Id_t, BigStr*> SimpleLexer::Next() {
   int id;
   int end_pos;
-  match_func_(reinterpret_cast<const unsigned char*>(s_->data_), len(s_), pos_,
+  match_func_(reinterpret_cast<const unsigned char*>(s_->data()), len(s_), pos_,
               &id, &end_pos);
 
   int len = end_pos - pos_;
   BigStr* val = NewStr(len);
-  memcpy(val->data_, s_->data_ + pos_, len);  // copy the list item
-  val->data_[len] = '\0';
+  memcpy(val->data(), s_->data() + pos_, len);  // copy the list item
+  val->data()[len] = '\0';
 
   pos_ = end_pos;
   return Tuple2<Id_t, BigStr*>(static_cast<Id_t>(id), val);
@@ -75,22 +75,22 @@ List<Tuple2<Id_t, BigStr*>*>* Ps1Tokens(BigStr* s) {
 }
 
 Id_t BracketUnary(BigStr* s) {
-  return ::BracketUnary(reinterpret_cast<const unsigned char*>(s->data_),
+  return ::BracketUnary(reinterpret_cast<const unsigned char*>(s->data()),
                         len(s));
 }
 Id_t BracketBinary(BigStr* s) {
-  return ::BracketBinary(reinterpret_cast<const unsigned char*>(s->data_),
+  return ::BracketBinary(reinterpret_cast<const unsigned char*>(s->data()),
                          len(s));
 }
 Id_t BracketOther(BigStr* s) {
-  return ::BracketOther(reinterpret_cast<const unsigned char*>(s->data_),
+  return ::BracketOther(reinterpret_cast<const unsigned char*>(s->data()),
                         len(s));
 }
 
 Tuple2<Id_t, int> MatchJ8Token(BigStr* s, int pos) {
   int id;
   int end_pos;
-  ::MatchJ8Token(reinterpret_cast<const unsigned char*>(s->data_), len(s), pos,
+  ::MatchJ8Token(reinterpret_cast<const unsigned char*>(s->data()), len(s), pos,
                  &id, &end_pos);
   return Tuple2<Id_t, int>(static_cast<Id_t>(id), end_pos);
 }
@@ -98,7 +98,7 @@ Tuple2<Id_t, int> MatchJ8Token(BigStr* s, int pos) {
 Tuple2<Id_t, int> MatchJ8LinesToken(BigStr* s, int pos) {
   int id;
   int end_pos;
-  ::MatchJ8LinesToken(reinterpret_cast<const unsigned char*>(s->data_), len(s),
+  ::MatchJ8LinesToken(reinterpret_cast<const unsigned char*>(s->data()), len(s),
                       pos, &id, &end_pos);
   return Tuple2<Id_t, int>(static_cast<Id_t>(id), end_pos);
 }
@@ -106,7 +106,7 @@ Tuple2<Id_t, int> MatchJ8LinesToken(BigStr* s, int pos) {
 Tuple2<Id_t, int> MatchJ8StrToken(BigStr* s, int pos) {
   int id;
   int end_pos;
-  ::MatchJ8StrToken(reinterpret_cast<const unsigned char*>(s->data_), len(s),
+  ::MatchJ8StrToken(reinterpret_cast<const unsigned char*>(s->data()), len(s),
                     pos, &id, &end_pos);
   return Tuple2<Id_t, int>(static_cast<Id_t>(id), end_pos);
 }
@@ -114,7 +114,7 @@ Tuple2<Id_t, int> MatchJ8StrToken(BigStr* s, int pos) {
 Tuple2<Id_t, int> MatchJsonStrToken(BigStr* s, int pos) {
   int id;
   int end_pos;
-  ::MatchJsonStrToken(reinterpret_cast<const unsigned char*>(s->data_), len(s),
+  ::MatchJsonStrToken(reinterpret_cast<const unsigned char*>(s->data()), len(s),
                       pos, &id, &end_pos);
   return Tuple2<Id_t, int>(static_cast<Id_t>(id), end_pos);
 }
@@ -122,33 +122,33 @@ Tuple2<Id_t, int> MatchJsonStrToken(BigStr* s, int pos) {
 Tuple2<Id_t, int> MatchShNumberToken(BigStr* s, int pos) {
   int id;
   int end_pos;
-  ::MatchShNumberToken(reinterpret_cast<const unsigned char*>(s->data_), len(s),
-                       pos, &id, &end_pos);
+  ::MatchShNumberToken(reinterpret_cast<const unsigned char*>(s->data()),
+                       len(s), pos, &id, &end_pos);
   return Tuple2<Id_t, int>(static_cast<Id_t>(id), end_pos);
 }
 
 bool IsValidVarName(BigStr* s) {
-  return ::IsValidVarName(reinterpret_cast<const unsigned char*>(s->data_),
+  return ::IsValidVarName(reinterpret_cast<const unsigned char*>(s->data()),
                           len(s));
 }
 
 bool ShouldHijack(BigStr* s) {
-  return ::ShouldHijack(reinterpret_cast<const unsigned char*>(s->data_),
+  return ::ShouldHijack(reinterpret_cast<const unsigned char*>(s->data()),
                         len(s));
 }
 
 bool LooksLikeInteger(BigStr* s) {
-  return ::LooksLikeInteger(reinterpret_cast<const unsigned char*>(s->data_),
+  return ::LooksLikeInteger(reinterpret_cast<const unsigned char*>(s->data()),
                             len(s));
 }
 
 bool LooksLikeYshInt(BigStr* s) {
-  return ::LooksLikeYshInt(reinterpret_cast<const unsigned char*>(s->data_),
+  return ::LooksLikeYshInt(reinterpret_cast<const unsigned char*>(s->data()),
                            len(s));
 }
 
 bool LooksLikeYshFloat(BigStr* s) {
-  return ::LooksLikeYshFloat(reinterpret_cast<const unsigned char*>(s->data_),
+  return ::LooksLikeYshFloat(reinterpret_cast<const unsigned char*>(s->data()),
                              len(s));
 }
 
@@ -147,8 +147,8 @@ BigStr* readline(BigStr* prompt) {
   // f.readline() interface.
   int len = strlen(gReadline->latest_line_);
   BigStr* s = NewStr(len + 1);
-  memcpy(s->data_, gReadline->latest_line_, len);
-  s->data_[len] = '\n';  // like Python
+  memcpy(s->data(), gReadline->latest_line_, len);
+  s->data()[len] = '\n';  // like Python
 
   free(gReadline->latest_line_);
   gReadline->latest_line_ = nullptr;
@@ -166,7 +166,7 @@ BigStr* Readline::prompt_input(BigStr* prompt) {
   if (len(ret) == 0) {
     throw Alloc<EOFError>();
   }
-  // log("LINE %d [%s]", len(ret), ret->data_);
+  // log("LINE %d [%s]", len(ret), ret->data());
   return ret;
 #else
   FAIL("Shouldn't be called");
@@ -17,22 +17,22 @@ BigStr* gethostname() {
   // Note: Fixed issue #1656 - OS X and FreeBSD don't have HOST_NAME_MAX
   // https://reviews.freebsd.org/D30062
   BigStr* result = OverAllocatedStr(_POSIX_HOST_NAME_MAX);
-  int status = ::gethostname(result->data_, _POSIX_HOST_NAME_MAX);
+  int status = ::gethostname(result->data(), _POSIX_HOST_NAME_MAX);
   if (status != 0) {
     throw Alloc<OSError>(errno);
   }
   // Important: set the length of the string!
-  result->MaybeShrink(strlen(result->data_));
+  result->MaybeShrink(strlen(result->data()));
   return result;
 }
 
 BigStr* realpath(BigStr* path) {
   BigStr* result = OverAllocatedStr(PATH_MAX);
-  char* p = ::realpath(path->data_, result->data_);
+  char* p = ::realpath(path->data(), result->data());
   if (p == nullptr) {
     throw Alloc<OSError>(errno);
   }
-  result->MaybeShrink(strlen(result->data_));
+  result->MaybeShrink(strlen(result->data()));
   return result;
 }
 
@@ -44,7 +44,7 @@ int fnmatch(BigStr* pat, BigStr* str, int flags) {
   // at parse time, not runtime
 #endif
 
-  int result = ::fnmatch(pat->data_, str->data_, flags);
+  int result = ::fnmatch(pat->data(), str->data(), flags);
   switch (result) {
   case 0:
     return 1;
@@ -63,7 +63,7 @@ List<BigStr*>* glob(BigStr* pat) {
   int flags = 0;
   // int flags = GLOB_APPEND;
   // flags |= GLOB_NOMAGIC;
-  int ret = glob(pat->data_, flags, NULL, &results);
+  int ret = glob(pat->data(), flags, NULL, &results);
 
   const char* err_str = NULL;
   switch (ret) {
@@ -109,13 +109,13 @@ List<int>* regex_search(BigStr* pattern, int cflags, BigStr* str, int eflags,
                         int pos) {
   cflags |= REG_EXTENDED;
   regex_t pat;
-  int status = regcomp(&pat, pattern->data_, cflags);
+  int status = regcomp(&pat, pattern->data(), cflags);
   if (status != 0) {
     char error_desc[50];
     regerror(status, &pat, error_desc, 50);
 
     char error_message[80];
-    snprintf(error_message, 80, "Invalid regex %s (%s)", pattern->data_,
+    snprintf(error_message, 80, "Invalid regex %s (%s)", pattern->data(),
              error_desc);
 
     throw Alloc<ValueError>(StrFromC(error_message));
@@ -127,7 +127,7 @@ List<int>* regex_search(BigStr* pattern, int cflags, BigStr* str, int eflags,
   List<int>* indices = NewList<int>();
   indices->reserve(num_groups * 2);
 
-  const char* s = str->data_;
+  const char* s = str->data();
   regmatch_t* pmatch =
       static_cast<regmatch_t*>(malloc(sizeof(regmatch_t) * num_groups));
   bool match = regexec(&pat, s + pos, num_groups, pmatch, eflags) == 0;
@@ -174,13 +174,13 @@ Tuple2<int, int>* regex_first_group_match(BigStr* pattern, BigStr* str,
   // Could have been checked by regex_parse for [[ =~ ]], but not for glob
   // patterns like ${foo/x*/y}.
 
-  if (regcomp(&pat, pattern->data_, REG_EXTENDED) != 0) {
+  if (regcomp(&pat, pattern->data(), REG_EXTENDED) != 0) {
     throw Alloc<RuntimeError>(
         StrFromC("Invalid regex syntax (func_regex_first_group_match)"));
   }
 
   // Match at offset 'pos'
-  int result = regexec(&pat, str->data_ + pos, NMATCH, m, 0 /*flags*/);
+  int result = regexec(&pat, str->data() + pos, NMATCH, m, 0 /*flags*/);
   regfree(&pat);
 
   if (result != 0) {
@@ -199,7 +199,7 @@ int wcswidth(BigStr* s) {
   // Behavior of mbstowcs() depends on LC_CTYPE
 
   // Calculate length first
-  int num_wide_chars = ::mbstowcs(NULL, s->data_, 0);
+  int num_wide_chars = ::mbstowcs(NULL, s->data(), 0);
   if (num_wide_chars == -1) {
     throw Alloc<UnicodeError>(StrFromC("mbstowcs() 1"));
   }
@@ -210,7 +210,7 @@ int wcswidth(BigStr* s) {
   DCHECK(wide_chars != nullptr);
 
   // Convert to wide chars
-  num_wide_chars = ::mbstowcs(wide_chars, s->data_, num_wide_chars);
+  num_wide_chars = ::mbstowcs(wide_chars, s->data(), num_wide_chars);
   if (num_wide_chars == -1) {
     free(wide_chars);  // cleanup
 
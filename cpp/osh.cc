@@ -2,7 +2,9 @@
 
 #include "cpp/osh.h"
 
-#include <fcntl.h>  // AT_* Constants
+#include <fcntl.h>   // AT_* Constants
+#include <limits.h>  // PATH_MAX
+#include <string.h>  // memcmp, memcpy
 #include <sys/stat.h>
 #include <unistd.h>
 
@@ -24,6 +26,37 @@ tdop::ParserSpec* kArithSpec = &kArithSpec_.obj;
 
 namespace bool_stat {
 
+// The last stat() result, like _stat_cache in bool_stat.py.  The path is
+// copied, because the GC doesn't trace this global.
+static char gStatPath[PATH_MAX];
+static int gStatPathLen = -1;  // -1 means empty
+static struct stat gStatBuf;
+static bool gStatOk;
+
+void ClearStatCache() {
+  gStatPathLen = -1;
+}
+
+// Returns false if stat() failed
+static bool CachedStat(BigStr* s, struct stat* st) {
+  int n = len(s);
+  if (n == gStatPathLen && memcmp(gStatPath, s->data(), n) == 0) {
+    *st = gStatBuf;
+    return gStatOk;
+  }
+
+  bool ok = ::stat(s->data(), st) == 0;
+  if (n < PATH_MAX) {
+    memcpy(gStatPath, s->data(), n);
+    gStatPathLen = n;
+    gStatBuf = *st;
+    gStatOk = ok;
+  } else {
+    gStatPathLen = -1;
+  }
+  return ok;
+}
+
 bool isatty(BigStr* fd_str, word_t* blame_word) {
   int fd;
   try {
@@ -38,7 +71,7 @@ bool isatty(BigStr* fd_str, word_t* blame_word) {
 }
 
 bool DoUnaryOp(Id_t op_id, BigStr* s) {
-  const char* zPath = s->data_;
+  const char* zPath = s->data();
 
   if (op_id == Id::BoolUnary_h || op_id == Id::BoolUnary_L) {
     struct stat st;
@@ -49,7 +82,7 @@ bool DoUnaryOp(Id_t op_id, BigStr* s) {
     return S_ISLNK(st.st_mode);
   } else {
     struct stat st;
-    if (stat(zPath, &st) < 0) {
+    if (!CachedStat(s, &st)) {
       return false;
     }
 
@@ -136,13 +169,15 @@ bool DoUnaryOp(Id_t op_id, BigStr* s) {
 bool DoBinaryOp(Id_t op_id, BigStr* s1, BigStr* s2) {
   int m1 = 0;
   struct stat st1;
-  if (stat(s1->data_, &st1) == 0) {
+  bool ok1 = CachedStat(s1, &st1);
+  if (ok1) {
     m1 = st1.st_mtime;
   }
 
   int m2 = 0;
   struct stat st2;
-  if (stat(s2->data_, &st2) == 0) {
+  bool ok2 = CachedStat(s2, &st2);
+  if (ok2) {
     m2 = st2.st_mtime;
   }
 
@@ -152,7 +187,7 @@ bool DoBinaryOp(Id_t op_id, BigStr* s1, BigStr* s2) {
   case Id::BoolBinary_ot:
     return m1 < m2;
   case Id::BoolBinary_ef:
-    return st1.st_dev == st2.st_dev && st1.st_ino == st2.st_ino;
+    return ok1 && ok2 && st1.st_dev == st2.st_dev && st1.st_ino == st2.st_ino;
   }
 
   FAIL(kShouldNotGetHere);
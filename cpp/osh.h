@@ -25,6 +25,7 @@ namespace bool_stat {
 
 using syntax_asdl::word_t;
 
+void ClearStatCache();
 bool isatty(BigStr* fd_str, word_t* blame_word);
 bool DoUnaryOp(Id_t op_id, BigStr* s);
 bool DoBinaryOp(Id_t op_id, BigStr* s1, BigStr* s2);
@@ -35,13 +36,13 @@ namespace sh_expr_eval {
 
 inline bool IsLower(BigStr* ch) {
   assert(len(ch) == 1);
-  uint8_t c = ch->data_[0];
+  uint8_t c = ch->data()[0];
   return ('a' <= c && c <= 'z');
 }
 
 inline bool IsUpper(BigStr* ch) {
   assert(len(ch) == 1);
-  uint8_t c = ch->data_[0];
+  uint8_t c = ch->data()[0];
   return ('A' <= c && c <= 'Z');
 }
 
@@ -15,7 +15,7 @@ BigStr* rstrip_slashes(BigStr* s) {
 
   int new_len = n;
   for (int i = n - 1; i >= 0; i--) {
-    char c = s->data_[i];
+    char c = s->data()[i];
     if (c == '/') {
       new_len--;
     } else {
@@ -29,8 +29,8 @@ BigStr* rstrip_slashes(BigStr* s) {
 
   // Truncate to new_len
   BigStr* result = NewStr(new_len);
-  memcpy(result->data_, s->data_, new_len);
-  result->data_[new_len] = '\0';
+  memcpy(result->data(), s->data(), new_len);
+  result->data()[new_len] = '\0';
   return result;
 }
 
@@ -40,7 +40,7 @@ namespace path_stat {
 
 bool exists(BigStr* path) {
   struct stat st;
-  if (::stat(path->data_, &st) < 0) {
+  if (::stat(path->data(), &st) < 0) {
     return false;
   } else {
     return true;
@@ -49,7 +49,7 @@ bool exists(BigStr* path) {
 
 bool isdir(BigStr* path) {
   struct stat st;
-  if (::stat(path->data_, &st) < 0) {
+  if (::stat(path->data(), &st) < 0) {
     return false;
   }
   return S_ISDIR(st.st_mode);
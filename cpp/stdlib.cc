@@ -60,7 +60,7 @@ mode_t umask(mode_t mask) {
 }
 
 int open(BigStr* path, int flags, int perms) {
-  int result = ::open(path->data_, flags, perms);
+  int result = ::open(path->data(), flags, perms);
   if (result < 0) {
     throw Alloc<OSError>(errno);
   }
@@ -72,9 +72,10 @@ void dup2(int oldfd, int newfd) {
     throw Alloc<OSError>(errno);
   }
 }
+
 void putenv(BigStr* name, BigStr* value) {
   int overwrite = 1;
-  int ret = ::setenv(name->data_, value->data_, overwrite);
+  int ret = ::setenv(name->data(), value->data(), overwrite);
   if (ret < 0) {
     throw Alloc<IOError>(errno);
   }
@@ -88,9 +89,9 @@ mylib::File* fdopen(int fd, BigStr* c_mode) {
   }
 
   // CPython does some fcntl() stuff with mode == 'a', which we don't support
-  DCHECK(c_mode->data_[0] != 'a');
+  DCHECK(c_mode->data()[0] != 'a');
 
-  FILE* f = ::fdopen(fd, c_mode->data_);
+  FILE* f = ::fdopen(fd, c_mode->data());
   if (f == nullptr) {
     throw Alloc<OSError>(errno);
   }
@@ -123,7 +124,7 @@ void execve(BigStr* argv0, List<BigStr*>* argv,
   // Annoying const_cast
   // https://stackoverflow.com/questions/190184/execv-and-const-ness
   for (int i = 0; i < n_args; ++i) {
-    _argv[i] = const_cast<char*>(argv->at(i)->data_);
+    _argv[i] = const_cast<char*>(argv->at(i)->data());
   }
   _argv[n_args] = nullptr;
 
@@ -138,16 +139,16 @@ void execve(BigStr* argv0, List<BigStr*>* argv,
     char* buf = combined_buf;
     int joined_len = len(k) + len(v) + 1;
     combined_buf += joined_len + 1;
-    memcpy(buf, k->data_, len(k));
+    memcpy(buf, k->data(), len(k));
     buf[len(k)] = '=';
-    memcpy(buf + len(k) + 1, v->data_, len(v));
+    memcpy(buf + len(k) + 1, v->data(), len(v));
     buf[joined_len] = '\0';
 
     envp[env_index++] = buf;
   }
   envp[n_env] = nullptr;
 
-  int ret = ::execve(argv0->data_, _argv, envp);
+  int ret = ::execve(argv0->data(), _argv, envp);
   if (ret == -1) {
     throw Alloc<OSError>(errno);
   }
@@ -238,7 +239,7 @@ BigStr* strftime(BigStr* s, time_t ts) {
 
   const int max_len = 1024;
   BigStr* result = OverAllocatedStr(max_len);
-  int n = strftime(result->data(), max_len, s->data_, loc_time);
+  int n = strftime(result->data(), max_len, s->data(), loc_time);
   if (n == 0) {
     // bash silently truncates on large format string like
     //   printf '%(%Y)T'
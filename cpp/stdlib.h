@@ -30,17 +30,17 @@ mode_t umask(mode_t mask);
 
 inline bool access(BigStr* pathname, int mode) {
   // No error case: 0 is success, -1 is error AND false.
-  return ::access(pathname->data_, mode) == 0;
+  return ::access(pathname->data(), mode) == 0;
 }
 
 inline BigStr* getcwd() {
   BigStr* result = OverAllocatedStr(PATH_MAX);
-  char* p = ::getcwd(result->data_, PATH_MAX);
+  char* p = ::getcwd(result->data(), PATH_MAX);
   if (p == nullptr) {
     throw Alloc<OSError>(errno);
   }
   // Important: set the length of the string!
-  result->MaybeShrink(strlen(result->data_));
+  result->MaybeShrink(strlen(result->data()));
   return result;
 }
 
@@ -110,7 +110,7 @@ inline void write(int fd, BigStr* s) {
   // IMPORTANT TODO: Write in a loop like posix_write() in pyext/posixmodule.c
   //
 
-  if (::write(fd, s->data_, len(s)) < 0) {
+  if (::write(fd, s->data(), len(s)) < 0) {
     throw Alloc<OSError>(errno);
   }
 }
@@ -40,6 +40,12 @@ def NinjaGraph(ru):
         headers=['data_lang/utf8.h'],
         deps=[],
     )
+    ru.cc_library(
+        '//data_lang/packle',
+        srcs=[],
+        headers=['data_lang/packle.h'],
+        deps=[],
+    )
 
     ru.cc_binary(
         'data_lang/j8_test.cc',
@@ -35,6 +35,7 @@ from _devbuild.gen.value_asdl import (value, value_e, value_t, value_str, Obj)
 from _devbuild.gen.nil8_asdl import (nvalue, nvalue_t)
 
 from asdl import format as fmt
+from core import bash_impl
 from core import error
 from data_lang import pyj8
 # dependency issue: consts.py pulls in frontend/option_def.py
@@ -372,21 +373,21 @@ class InstancePrinter(object):
             self.buf.write('{')
             self._MaybeNewline()
 
-            i = 0
-            for k, v in iteritems(val.d):
+            # In index order, like BashArray
+            keys = bash_impl.SparseArray_GetKeys(val)
+            values = bash_impl.SparseArray_GetValues(val)
+            for i, k in enumerate(keys):
                 if i != 0:
                     self.buf.write(',')
                     self._MaybeNewline()
 
                 self._ItemIndent(level + 1)
-                pyj8.WriteString(mops.ToStr(k), self.options, self.buf)
+                pyj8.WriteString(k, self.options, self.buf)
 
                 self.buf.write(':')
                 self._MaybeSpace()
 
-                pyj8.WriteString(v, self.options, self.buf)
-
-                i += 1
+                pyj8.WriteString(values[i], self.options, self.buf)
 
             self._MaybeNewline()
 
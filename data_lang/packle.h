@@ -0,0 +1,30 @@
+#ifndef DATA_LANG_PACKLE_H
+#define DATA_LANG_PACKLE_H
+
+#include <stdint.h>  // uint64_t
+#include <string.h>  // memcpy
+
+// Packle writes a Float as the 8 bytes of its IEEE 754 double, least
+// significant byte first, so it round trips exactly on any host.
+
+#define PACKLE_FLOAT_SIZE 8
+
+static inline void packle_write_float(double d, unsigned char* out) {
+  uint64_t bits;
+  memcpy(&bits, &d, sizeof(bits));
+  for (int i = 0; i < PACKLE_FLOAT_SIZE; ++i) {
+    out[i] = (bits >> (8 * i)) & 0xff;
+  }
+}
+
+static inline double packle_read_float(const unsigned char* in) {
+  uint64_t bits = 0;
+  for (int i = 0; i < PACKLE_FLOAT_SIZE; ++i) {
+    bits |= (uint64_t)in[i] << (8 * i);
+  }
+  double d;
+  memcpy(&d, &bits, sizeof(d));
+  return d;
+}
+
+#endif  // DATA_LANG_PACKLE_H
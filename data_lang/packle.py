@@ -0,0 +1,591 @@
+#!/usr/bin/env python2
+"""
+packle.py: A binary format for saving and loading YSH data
+
+Compared with JSON:
+
+- Strings are length-prefixed, so they aren't escaped, unescaped, or
+  validated.
+- Each distinct string is written once.  Later copies refer back to it, so
+  the keys of a list of records cost a few bytes each.
+- Lists and Dicts that appear more than once are written once, so sharing and
+  cycles survive a round trip.
+- Floats are written as their 8 bytes, so they survive a round trip exactly.
+
+Lists and Dicts start with the size of their items in bytes, and references
+are byte offsets into the message.  So the Decoder can skip over a List or
+Dict without decoding it, and decode any part of a message on its own.
+'packle read' uses this with a file mapped into memory:
+
+    packle read (&x, at=['users', 42]) < state.bin
+
+decodes one record.  The items before it are skipped in O(1) time each, so
+it doesn't depend on the size of the rest of the file.  Decode() still builds
+the whole value, like the JSON parser.
+
+Wire format:
+
+    message = 'PKL2' value
+
+    value   = 'n' | 't' | 'f'            # null, true, false
+            | 'i' string                 # Int, as decimal digits
+            | 'd' byte{8}                # Float, IEEE 754 little endian
+            | 's' string                 # Str
+            | 'l' count size value*      # List of 'count' items
+            | 'm' count size (string value)*
+                                         # Dict of 'count' pairs
+            | 'r' count                  # the List or Dict whose tag is at
+                                         # this offset, which was written
+                                         # earlier
+
+    string  = count bytes?               # even count: new string of length
+                                         # count/2 follows.  Odd count: the
+                                         # string whose count is at offset
+                                         # count/2, which was written earlier.
+
+    size    = byte{4}                    # number of bytes of the items, as
+                                         # an unsigned little endian int.  It
+                                         # has a fixed width, so the Encoder
+                                         # can fill it in after the items.
+
+    count   = unsigned LEB128, i.e. 7 bits per byte with the high bit set on
+              every byte but the last.  At most 5 bytes, and less than 2^31,
+              so it fits in a 32-bit int.
+
+Offsets are from the start of the message, including 'PKL2'.  They appear in
+odd string counts, so a message is less than 2^30 bytes.
+"""
+
+from _devbuild.gen.value_asdl import value, value_e, value_t
+
+from core import error
+from core import pyos
+from data_lang import j8
+from mycpp import mops
+from mycpp import mylib
+from mycpp.mylib import tagswitch, iteritems, NewDict, log
+
+import fastfunc
+
+from typing import cast, Dict, List
+
+_ = log
+
+MAGIC = 'PKL2'
+
+# The 5th byte of a count has 3 bits, so a count fits in a 32-bit int in C++
+_LAST_COUNT_SHIFT = 28
+_MAX_COUNT = (1 << 31) - 1
+
+# A string reference is (offset << 1) | 1
+_MAX_MESSAGE = (1 << 30) - 1
+
+_FLOAT_SIZE = 8
+_SIZE_SIZE = 4
+
+
+class Encoder(object):
+
+    def __init__(self, buf):
+        # type: (mylib.BufWriter) -> None
+        self.buf = buf
+
+        # We don't know the size of a List or Dict until its items are
+        # written.  So the message is a list of chunks, and the size is a
+        # chunk that's filled in later.
+        self.chunks = []  # type: List[str]
+        self.cur = mylib.BufWriter()
+        self.pos = 0  # offset of the next byte
+
+        # string -> offset of its count
+        self.strings = {}  # type: Dict[str, int]
+        # HeapValueId() of List or Dict -> offset of its tag
+        self.objects = {}  # type: Dict[int, int]
+
+    def _Write(self, s):
+        # type: (str) -> None
+        self.cur.write(s)
+        self.pos += len(s)
+
+    def _WriteCount(self, n):
+        # type: (int) -> None
+        if n > _MAX_COUNT:
+            raise error.Encode("Can't encode count %d, which is too big" % n)
+        while n >= 0x80:
+            self._Write(chr((n & 0x7f) | 0x80))
+            n >>= 7
+        self._Write(chr(n))
+
+    def _StartSize(self):
+        # type: () -> int
+        """Leave room for the size of a List or Dict, and return its chunk."""
+        self.chunks.append(self.cur.getvalue())
+        self.cur.clear()
+
+        self.chunks.append('')
+        self.pos += _SIZE_SIZE
+        return len(self.chunks) - 1
+
+    def _FinishSize(self, chunk_index, start):
+        # type: (int, int) -> None
+        size = self.pos - start
+        if size > _MAX_MESSAGE:
+            raise error.Encode("Can't encode message of more than %d bytes" %
+                               _MAX_MESSAGE)
+        self.chunks[chunk_index] = (chr(size & 0xff) +
+                                    chr((size >> 8) & 0xff) +
+                                    chr((size >> 16) & 0xff) +
+                                    chr((size >> 24) & 0xff))
+
+    def _WriteString(self, s):
+        # type: (str) -> None
+        offset = self.strings.get(s, -1)
+        if offset != -1:
+            self._WriteCount((offset << 1) | 1)
+            return
+
+        if len(s) > _MAX_COUNT >> 1:
+            raise error.Encode("Can't encode string of %d bytes" % len(s))
+
+        self.strings[s] = self.pos
+        self._WriteCount(len(s) << 1)
+        self._Write(s)
+
+    def _WriteRef(self, val):
+        # type: (value_t) -> bool
+        """Write a reference to a List or Dict if it was seen before.
+
+        Otherwise remember where it starts and return False.
+        """
+        heap_id = j8.HeapValueId(val)
+        offset = self.objects.get(heap_id, -1)
+        if offset != -1:
+            self._Write('r')
+            self._WriteCount(offset)
+            return True
+
+        self.objects[heap_id] = self.pos
+        return False
+
+    def _Encode(self, val):
+        # type: (value_t) -> None
+
+        UP_val = val
+        with tagswitch(val) as case:
+            if case(value_e.Null):
+                self._Write('n')
+
+            elif case(value_e.Bool):
+                val = cast(value.Bool, UP_val)
+                self._Write('t' if val.b else 'f')
+
+            elif case(value_e.Int):
+                val = cast(value.Int, UP_val)
+                self._Write('i')
+                self._WriteString(mops.ToStr(val.i))
+
+            elif case(value_e.Float):
+                val = cast(value.Float, UP_val)
+                self._Write('d')
+                self._Write(fastfunc.FloatToBytes(val.f))
+
+            elif case(value_e.Str):
+                val = cast(value.Str, UP_val)
+                self._Write('s')
+                self._WriteString(val.s)
+
+            elif case(value_e.List):
+                val = cast(value.List, UP_val)
+                if self._WriteRef(val):
+                    return
+
+                self._Write('l')
+                self._WriteCount(len(val.items))
+                chunk_index = self._StartSize()
+                start = self.pos
+                for item in val.items:
+                    self._Encode(item)
+                self._FinishSize(chunk_index, start)
+
+            elif case(value_e.Dict):
+                val = cast(value.Dict, UP_val)
+                if self._WriteRef(val):
+                    return
+
+                self._Write('m')
+                self._WriteCount(len(val.d))
+                chunk_index = self._StartSize()
+                start = self.pos
+                for k, v in iteritems(val.d):
+                    self._WriteString(k)
+                    self._Encode(v)
+                self._FinishSize(chunk_index, start)
+
+            else:
+                raise error.Encode("Can't serialize object of type %s" %
+                                   j8.ValType(val))
+
+    def Encode(self, val):
+        # type: (value_t) -> None
+        """Caller must handle error.Encode()"""
+        self._Write(MAGIC)
+        self._Encode(val)
+        if self.pos > _MAX_MESSAGE:
+            raise error.Encode("Can't encode message of more than %d bytes" %
+                               _MAX_MESSAGE)
+
+        self.chunks.append(self.cur.getvalue())
+        self.cur.clear()
+        for chunk in self.chunks:
+            self.buf.write(chunk)
+
+
+class Decoder(object):
+    """Decode a message in a pyos.ByteBuffer.
+
+    The caller owns the buffer.  Decoded strings are copies, so they're still
+    valid after the buffer is closed.
+    """
+
+    def __init__(self, buf):
+        # type: (pyos.ByteBuffer) -> None
+        self.buf = buf
+        self.pos = 0
+
+        # Offset of a string's count -> the string.  Only strings that are
+        # referred to are saved.
+        self.strings = {}  # type: Dict[int, str]
+        # Offset of a List or Dict's tag -> the value
+        self.objects = {}  # type: Dict[int, value_t]
+
+    def _Error(self, msg):
+        # type: (str) -> error.Decode
+        # error.Decode shows a few bytes around pos, so copy the message up
+        # to them
+        end = min(self.buf.Length(), self.pos + 4)
+        return error.Decode(msg, self.buf.Slice(0, end), self.pos, self.pos, 1)
+
+    def _ReadByte(self):
+        # type: () -> int
+        if self.pos >= self.buf.Length():
+            raise self._Error('Unexpected end of input')
+        b = self.buf.ByteAt(self.pos)
+        self.pos += 1
+        return b
+
+    def _ReadCount(self):
+        # type: () -> int
+        n = 0
+        shift = 0
+        while True:
+            b = self._ReadByte()
+            if shift == _LAST_COUNT_SHIFT and b >= 0x08:
+                raise self._Error('Count is too big')
+            n |= (b & 0x7f) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def _ReadSize(self):
+        # type: () -> int
+        """Read the size of a List or Dict's items, and check it."""
+        if self._Remaining() < _SIZE_SIZE:
+            raise self._Error('Unexpected end of input')
+        n = 0
+        for i in xrange(_SIZE_SIZE):
+            b = self.buf.ByteAt(self.pos + i)
+            if i == _SIZE_SIZE - 1 and b >= 0x80:
+                # It would overflow a 32-bit int in C++
+                raise self._Error('Size is too big')
+            n |= b << (8 * i)
+        self._CheckCount('size', n, self._Remaining() - _SIZE_SIZE)
+        self.pos += _SIZE_SIZE
+        return n
+
+    def _CheckCount(self, what, n, limit):
+        # type: (str, int, int) -> None
+        """Check a count read from the input before using it."""
+        if n < 0 or n > limit:
+            raise self._Error('Invalid %s %d' % (what, n))
+
+    def _CheckOffset(self, what, offset, ref_pos):
+        # type: (str, int, int) -> None
+        """References point back to something after the header."""
+        if offset < len(MAGIC) or offset >= ref_pos:
+            raise self._Error('Invalid %s %d' % (what, offset))
+
+    def _Remaining(self):
+        # type: () -> int
+        return self.buf.Length() - self.pos
+
+    def _StringAt(self, offset, ref_pos):
+        # type: (int, int) -> str
+        """The string that a reference at ref_pos refers to."""
+        s = self.strings.get(offset)
+        if s is not None:
+            return s
+
+        # It's decoded on its own, so it must be a new string
+        self._CheckOffset('string reference', offset, ref_pos)
+        saved = self.pos
+        self.pos = offset
+        n = self._ReadCount()
+        if n & 1:
+            raise self._Error('Expected a new string')
+        s = self._ReadBytes(n >> 1)
+        self.pos = saved
+
+        self.strings[offset] = s
+        return s
+
+    def _ReadBytes(self, length):
+        # type: (int) -> str
+        self._CheckCount('string length', length, self._Remaining())
+        end = self.pos + length
+        s = self.buf.Slice(self.pos, end)
+        self.pos = end
+        return s
+
+    def _ReadString(self):
+        # type: () -> str
+        start = self.pos
+        n = self._ReadCount()
+        if n & 1:
+            return self._StringAt(n >> 1, start)
+        return self._ReadBytes(n >> 1)
+
+    def _KeyEquals(self, key):
+        # type: (str) -> bool
+        """Read a Dict key, and say whether it's equal to the given one.
+
+        Unlike _ReadString(), it doesn't copy keys of a different length.
+        """
+        start = self.pos
+        n = self._ReadCount()
+        if n & 1:
+            return self._StringAt(n >> 1, start) == key
+
+        length = n >> 1
+        if length != len(key):
+            self._CheckCount('string length', length, self._Remaining())
+            self.pos += length
+            return False
+        return self._ReadBytes(length) == key
+
+    def _ObjectAt(self, offset, ref_pos):
+        # type: (int, int) -> value_t
+        """The List or Dict that a reference at ref_pos refers to."""
+        val = self.objects.get(offset)
+        if val is not None:
+            return val
+
+        # Decoding part of a message may skip the object, so decode it where
+        # it is.  It's registered before its items, so this terminates.
+        self._CheckOffset('reference', offset, ref_pos)
+        saved = self.pos
+        self.pos = offset
+        tag = self._ReadByte()
+        if tag != ord('l') and tag != ord('m'):
+            raise self._Error('Expected a List or Dict')
+        self.pos = offset
+        val = self._Decode()
+        self.pos = saved
+        return val
+
+    def _Decode(self):
+        # type: () -> value_t
+        start = self.pos
+        tag = self._ReadByte()
+
+        if tag == ord('n'):
+            return value.Null
+
+        if tag == ord('t'):
+            return value.Bool(True)
+
+        if tag == ord('f'):
+            return value.Bool(False)
+
+        if tag == ord('i'):
+            ok, big = mops.FromStr2(self._ReadString())
+            if not ok:
+                raise self._Error('Invalid integer')
+            return value.Int(big)
+
+        if tag == ord('d'):
+            if self._Remaining() < _FLOAT_SIZE:
+                raise self._Error('Unexpected end of input')
+            end = self.pos + _FLOAT_SIZE
+            f = fastfunc.BytesToFloat(self.buf.Slice(self.pos, end), 0)
+            self.pos = end
+            return value.Float(f)
+
+        if tag == ord('s'):
+            return value.Str(self._ReadString())
+
+        if tag == ord('l'):
+            n = self._ReadCount()
+            size = self._ReadSize()
+            # Each item is at least 1 byte
+            self._CheckCount('List length', n, size)
+            end = self.pos + size
+
+            items = []  # type: List[value_t]
+            # Register it before its items, which may refer to it
+            list_val = value.List(items)
+            self.objects[start] = list_val
+            for i in xrange(n):
+                items.append(self._Decode())
+
+            if self.pos != end:
+                raise self._Error("List items don't match its size")
+            return list_val
+
+        if tag == ord('m'):
+            n = self._ReadCount()
+            size = self._ReadSize()
+            # Each pair is at least 2 bytes
+            self._CheckCount('Dict length', n, size / 2)
+            end = self.pos + size
+
+            d = NewDict()  # type: Dict[str, value_t]
+            dict_val = value.Dict(d)
+            self.objects[start] = dict_val
+            for i in xrange(n):
+                k = self._ReadString()
+                d[k] = self._Decode()
+
+            if self.pos != end:
+                raise self._Error("Dict items don't match its size")
+            return dict_val
+
+        if tag == ord('r'):
+            return self._ObjectAt(self._ReadCount(), start)
+
+        self.pos -= 1
+        raise self._Error('Invalid tag %d' % tag)
+
+    def _Skip(self):
+        # type: () -> None
+        """Move past a value without decoding it.  It's O(1)."""
+        tag = self._ReadByte()
+
+        if tag == ord('n') or tag == ord('t') or tag == ord('f'):
+            return
+
+        if tag == ord('i') or tag == ord('s'):
+            n = self._ReadCount()
+            if n & 1:  # reference
+                return
+            length = n >> 1
+            self._CheckCount('string length', length, self._Remaining())
+            self.pos += length
+            return
+
+        if tag == ord('d'):
+            if self._Remaining() < _FLOAT_SIZE:
+                raise self._Error('Unexpected end of input')
+            self.pos += _FLOAT_SIZE
+            return
+
+        if tag == ord('l') or tag == ord('m'):
+            self._ReadCount()
+            size = self._ReadSize()
+            self.pos += size
+            return
+
+        if tag == ord('r'):
+            self._ReadCount()
+            return
+
+        self.pos -= 1
+        raise self._Error('Invalid tag %d' % tag)
+
+    def _StartContainer(self, expected_tag, type_name):
+        # type: (int, str) -> int
+        """Move to the items of a List or Dict, and return its count.
+
+        Follows a reference to one.
+        """
+        start = self.pos
+        tag = self._ReadByte()
+        if tag == ord('r'):
+            offset = self._ReadCount()
+            self._CheckOffset('reference', offset, start)
+            self.pos = offset
+            tag = self._ReadByte()
+
+        if tag != expected_tag:
+            self.pos -= 1
+            raise self._Error('Expected %s' % type_name)
+
+        n = self._ReadCount()
+        self._ReadSize()
+        return n
+
+    def _Select(self, path):
+        # type: (List[value_t]) -> None
+        """Move from a value to the part of it that path refers to.
+
+        Skips the other items of each List and Dict.
+        """
+        for part in path:
+            UP_part = part
+            with tagswitch(part) as case:
+                if case(value_e.Str):
+                    part = cast(value.Str, UP_part)
+                    n = self._StartContainer(ord('m'), 'Dict')
+                    found = False
+                    for i in xrange(n):
+                        if self._KeyEquals(part.s):
+                            found = True
+                            break
+                        self._Skip()
+                    if not found:
+                        raise self._Error('Dict has no key %r' % part.s)
+
+                elif case(value_e.Int):
+                    part = cast(value.Int, UP_part)
+                    n = self._StartContainer(ord('l'), 'List')
+                    # 0 <= index < n
+                    if (mops.Greater(mops.ZERO, part.i) or
+                            not mops.Greater(mops.IntWiden(n), part.i)):
+                        raise self._Error('List index %s is out of range' %
+                                          mops.ToStr(part.i))
+                    index = mops.BigTruncate(part.i)
+                    for i in xrange(index):
+                        self._Skip()
+
+                else:
+                    raise AssertionError()
+
+    def _CheckMagic(self):
+        # type: () -> None
+        n = len(MAGIC)
+        if self.buf.Length() < n or self.buf.Slice(0, n) != MAGIC:
+            raise self._Error('Expected %r header' % MAGIC)
+        self.pos = n
+
+    def Decode(self):
+        # type: () -> value_t
+        """Decode the whole message.
+
+        Caller must handle error.Decode()
+        """
+        self._CheckMagic()
+        val = self._Decode()
+        if self.pos != self.buf.Length():
+            raise self._Error('Unexpected trailing data')
+        return val
+
+    def DecodePart(self, path):
+        # type: (List[value_t]) -> value_t
+        """Decode the part of the message at a path of Dict keys (Str) and
+        List indices (Int).  Only the bytes along the path and the bytes of
+        the part are read and checked.
+
+        Caller must handle error.Decode()
+        """
+        self._CheckMagic()
+        self._Select(path)
+        return self._Decode()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python2
+from __future__ import print_function
+
+import unittest
+
+from _devbuild.gen.value_asdl import value
+from core import error
+from core import pyos
+from data_lang import j8
+from data_lang import packle  # module under test
+from mycpp import mops
+from mycpp import mylib
+from mycpp.mylib import NewDict
+
+
+def _Encode(val):
+    buf = mylib.BufWriter()
+    packle.Encoder(buf).Encode(val)
+    return buf.getvalue()
+
+
+def _Decode(s):
+    return packle.Decoder(pyos.BufferFromStr(s)).Decode()
+
+
+def _DecodePart(s, path):
+    return packle.Decoder(pyos.BufferFromStr(s)).DecodePart(path)
+
+
+def _Path(*parts):
+    path = []
+    for p in parts:
+        if isinstance(p, int):
+            path.append(value.Int(mops.IntWiden(p)))
+        else:
+            path.append(value.Str(p))
+    return path
+
+
+def _J8(val):
+    buf = mylib.BufWriter()
+    j8.PrintMessage(val, buf, -1)
+    return buf.getvalue()
+
+
+class PackleTest(unittest.TestCase):
+
+    def testAtoms(self):
+        self.assertEqual('PKL2n', _Encode(value.Null))
+        self.assertEqual('PKL2t', _Encode(value.Bool(True)))
+        self.assertEqual('PKL2s\x06abc', _Encode(value.Str('abc')))
+        self.assertEqual('PKL2i\x0442', _Encode(value.Int(mops.IntWiden(42))))
+
+        for val in [
+                value.Null,
+                value.Bool(False),
+                value.Int(mops.IntWiden(-123456789)),
+                value.Float(3.5),
+                value.Float(float('-inf')),
+                value.Float(float('nan')),
+                value.Str(''),
+                value.Str('\xff\x00 binary'),
+                value.Str('x' * 200),
+        ]:
+            s = _Encode(val)
+            print(repr(s))
+            self.assertEqual(_J8(val), _J8(_Decode(s)))
+
+    def testFloatsAreExact(self):
+        self.assertEqual('PKL2d\x00\x00\x00\x00\x00\x00\xf0?',
+                         _Encode(value.Float(1.0)))
+
+        # None of these can be written with 12 or 16 significant digits
+        for f in [
+                1.0 / 3, 0.1 + 0.2, -0.0, 5e-324, 2.2250738585072014e-308,
+                1.7976931348623157e308, 123456789.12345679
+        ]:
+            result = _Decode(_Encode(value.Float(f)))
+            self.assertEqual(repr(f), repr(result.f))
+
+    def testStringSharing(self):
+        records = []
+        for i in xrange(3):
+            d = NewDict()
+            d['name'] = value.Str('bob')
+            d['age'] = value.Int(mops.IntWiden(i))
+            records.append(value.Dict(d))
+        val = value.List(records)
+
+        s = _Encode(val)
+        print(repr(s))
+        self.assertEqual(1, s.count('name'))
+        self.assertEqual(1, s.count('bob'))
+        self.assertEqual(_J8(val), _J8(_Decode(s)))
+
+    def testObjectSharing(self):
+        inner = value.List([value.Str('x')])
+        d = NewDict()
+        d['a'] = inner
+        d['b'] = inner
+        outer = value.Dict(d)
+
+        result = _Decode(_Encode(outer))
+        self.assertIs(result.d['a'], result.d['b'])
+        self.assertEqual(['a', 'b'], result.d.keys())
+
+        # A cycle
+        items = [value.Null]
+        L = value.List(items)
+        items.append(L)
+        result = _Decode(_Encode(L))
+        self.assertIs(result, result.items[1])
+
+    def testEncodeError(self):
+        self.assertRaises(error.Encode, _Encode,
+                          value.List([value.Range(1, 2)]))
+
+    def testSizesAndOffsets(self):
+        val = value.List([
+            value.List([value.Int(mops.IntWiden(1)),
+                        value.Int(mops.IntWiden(2))]),
+            value.Str('x'),
+            value.Str('x'),
+        ])
+        # The outer List has 17 bytes of items, and the inner one has 6.  The
+        # second 'x' refers to the count at offset 23: (23 << 1) | 1 = 47
+        self.assertEqual(
+            'PKL2l\x03\x11\x00\x00\x00l\x02\x06\x00\x00\x00i\x021i\x022'
+            's\x02xs/', _Encode(val))
+
+    def testDecodePart(self):
+        records = []
+        for i in xrange(3):
+            d = NewDict()
+            d['name'] = value.Str('user-%d' % i)
+            d['tags'] = value.List([value.Str('a'), value.Str('b')])
+            records.append(value.Dict(d))
+        d = NewDict()
+        d['count'] = value.Int(mops.IntWiden(3))
+        d['users'] = value.List(records)
+        s = _Encode(value.Dict(d))
+
+        self.assertEqual(_J8(records[2]),
+                         _J8(_DecodePart(s, _Path('users', 2))))
+        # The key 'name' and the string 'a' refer back to the first record,
+        # which isn't decoded
+        self.assertEqual('user-1', _DecodePart(s, _Path('users', 1, 'name')).s)
+        self.assertEqual('a', _DecodePart(s, _Path('users', 2, 'tags', 0)).s)
+        self.assertEqual(_J8(value.Dict(d)), _J8(_DecodePart(s, [])))
+
+        for path in [
+                _Path('nope'),
+                _Path('users', 3),
+                _Path('users', -1),
+                _Path(0),  # not a List
+                _Path('count', 'x'),  # not a Dict
+        ]:
+            try:
+                _DecodePart(s, path)
+            except error.Decode as e:
+                print('%s => %s' % (_J8(value.List(path)), e.Message()))
+            else:
+                self.fail('Expected error decoding part %s' % path)
+
+        # Other parts are skipped without being checked
+        s = 'PKL2l\x02\x08\x00\x00\x00i\x04zzs\x04ok'
+        self.assertEqual('ok', _DecodePart(s, _Path(1)).s)
+        self.assertRaises(error.Decode, _Decode, s)
+
+    def testDecodePartSharing(self):
+        inner = value.List([value.Str('x')])
+        d = NewDict()
+        d['a'] = inner
+        d['b'] = inner
+        s = _Encode(value.Dict(d))
+
+        # 'b' refers to 'a', which is decoded where it is
+        self.assertEqual('x', _DecodePart(s, _Path('b', 0)).s)
+        result = _DecodePart(s, _Path('b'))
+        self.assertEqual(['x'], [item.s for item in result.items])
+
+        # A cycle
+        items = [value.Null]
+        L = value.List(items)
+        items.append(L)
+        result = _DecodePart(_Encode(L), _Path(1, 1))
+        self.assertIs(result, result.items[1])
+
+    def testDecodeErrors(self):
+        for s in [
+                '',
+                'JSON',
+                'PKL2',
+                'PKL2x',
+                'PKL2s\x08abc',  # too short
+                'PKL2s\x03',  # string reference into the header
+                'PKL2i\x04zz',  # bad int
+                'PKL2d\x00\x00\x00',  # float too short
+                'PKL2nn',  # trailing data
+                'PKL2s\xff\xff\xff\xff\xff\x01',  # 6 byte count
+                # A count over 2^31 - 1 would overflow a 32-bit int in C++,
+                # and a negative index or length would pass a "too big" check.
+                'PKL2s\xff\xff\xff\xff\x0f',
+                'PKL2s\x80\x80\x80\x80\x08',
+                # Counts and sizes can't be more than the remaining bytes
+                'PKL2s\xfe\xff\xff\xff\x07',
+                'PKL2l\x01\x05\x00\x00\x00n',
+                'PKL2l\x01\x00\x00\x00\x80n',
+                'PKL2l\x02\x01\x00\x00\x00nn',  # 2 items in 1 byte
+                'PKL2m\x02\x03\x00\x00\x00\x02an',  # 2 pairs in 3 bytes
+                # Items that don't match the size
+                'PKL2l\x01\x02\x00\x00\x00nn',
+                'PKL2l\x01\x01\x00\x00\x00s\x02a',
+                'PKL2m\x01\x02\x00\x00\x00\x02an',
+                # References must point back to a List or Dict
+                'PKL2r\x00',
+                'PKL2l\x01\x02\x00\x00\x00r\x0b',  # forward
+                'PKL2l\x01\x02\x00\x00\x00r\x05',  # not a List
+                # A string reference must point to a new string
+                'PKL2l\x02\x05\x00\x00\x00s\x02as\x15',
+        ]:
+            try:
+                _Decode(s)
+            except error.Decode as e:
+                print('%r => %s' % (s, e.Message()))
+            else:
+                self.fail('Expected error decoding %r' % s)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -167,4 +167,17 @@ static inline void utf8_decode(const unsigned char *input,
   return;
 }
 
+/**
+ * Returns 1 if every byte is ASCII, so byte offsets are also codepoint
+ * offsets.
+ */
+static inline int utf8_is_ascii(const unsigned char *input, size_t len) {
+  for (size_t i = 0; i < len; ++i) {
+    if (input[i] & 0x80) {
+      return 0;
+    }
+  }
+  return 1;
+}
+
 #endif  // DATA_LANG_UTF8_H
@@ -24,6 +24,20 @@ class SimpleCommand(gdb.Command):
 SimpleCommand()
 
 
+def _StrData(s):
+    """Return a char* to the bytes of a BigStr, like BigStr::data().
+
+    A view has a StrView in place of data_, which points into its parent.
+    """
+    data_ = s['data_']
+    char_ptr = gdb.lookup_type('char').pointer()
+    if int(s['is_view_']):
+        view_ptr = gdb.lookup_type('StrView').pointer()
+        view = data_.address.cast(view_ptr).dereference()
+        return _StrData(view['parent_'].dereference()) + int(view['offset_'])
+    return data_.address.cast(char_ptr)
+
+
 # Following:
 # https://access.redhat.com/documentation/en-us/red_hat_enterprise_linux/6/html/developer_guide/debuggingprettyprinters
 
@@ -37,7 +51,7 @@ class StrPrinter:
         len_ = self.val['len_']
 
         # This is a gdb.Value object
-        data_ = self.val['data_']
+        data_ = _StrData(self.val)
         
         # Make a lazystring out of it
         # https://sourceware.org/gdb/current/onlinedocs/gdb/Values-From-Inferior.html
@@ -56,12 +70,11 @@ class GcStrPrinter:
         len_ = self.val['obj_len_'] - 12 - 1
 
         # This is a gdb.Value object
-        data_ = self.val['data_']
-        
+        data_ = _StrData(self.val.dereference())
+
         # This only prints until first NUL, since we don't have the length.
         # note: lazy_string() only prints the first char!
-        t = gdb.lookup_type('char').pointer()
-        return data_.reinterpret_cast(t)
+        return data_
 
 
 class AsdlPrinter(object):
@@ -9,6 +9,7 @@ import math
 
 from _devbuild.gen.pretty_asdl import (doc, Measure, MeasuredDoc)
 from _devbuild.gen.value_asdl import Obj, value, value_e, value_t, value_str
+from core import bash_impl
 from data_lang import j8
 from data_lang import j8_lite
 from display.pretty import (_Break, _Concat, _Flat, _Group, _IfFlat, _Indent,
@@ -379,13 +380,15 @@ class ValueEncoder:
         if len(val.d) == 0:
             return _Concat([UText("("), type_name, UText(")")])
         mdocs = []  # type: List[MeasuredDoc]
-        for k2, v2 in iteritems(val.d):
+        keys = bash_impl.SparseArray_GetKeys(val)
+        values = bash_impl.SparseArray_GetValues(val)
+        for i, k2 in enumerate(keys):
             mdocs.append(
                 _Concat([
                     UText("["),
-                    self._Styled(self.int_style, UText(mops.ToStr(k2))),
+                    self._Styled(self.int_style, UText(k2)),
                     UText("]="),
-                    self._BashStringLiteral(v2)
+                    self._BashStringLiteral(values[i])
                 ]))
         return self._SurroundedAndPrefixed("(", type_name, " ",
                                            self._Join(mdocs, "", " "), ")")
@@ -50,14 +50,14 @@ _NORMAL_BUILTINS = [
     # YSH
     #
     'append',
-    'write', 'json', 'json8', 'pp',
+    'write', 'json', 'json8', 'packle', 'pp',
     'hay', 'haynode',
     'use',
     'error', 'failed',
 
     # take a block
     # push-registers added below
-    'fork', 'forkwait',
+    'fork', 'forkwait', 'forkeach',
     'redir', 'fopen',  # fopen is for backward compat
     'shvar',
     'ctx',
@@ -142,10 +142,6 @@ def _Init(b):
     b.Add('source-guard', enum_name='source_guard')
     b.Add('is-main', enum_name='is_main')
 
-    # Implementation detail of $(<file)
-    # TODO: change to 'internal cat' (issue 1013)
-    b.Add('__cat', enum_name='cat')
-
 
 _BUILTIN_DEF = _BuiltinDef()
 
@@ -76,7 +76,7 @@ def GenStringLookup(type_name, func_name, pairs, f):
   int length = len(s);
   if (length == 0) return 0;  // consts.NO_INDEX
 
-  const char* data = s->data_;
+  const char* data = s->data();
   switch (data[0]) {
 """ % (type_name, func_name))
 
@@ -137,7 +137,7 @@ bool %s(BigStr* s) {
   int length = len(s);
   if (length == 0) return false;
 
-  const char* data = s->data_;
+  const char* data = s->data();
   switch (data[0]) {
 """ % func_name)
 
@@ -186,7 +186,7 @@ def GenCharLookup(func_name, lookup, f, required=False):
 BigStr* %s(BigStr* c) {
   assert(len(c) == 1);
 
-  char ch = c->data_[0];
+  char ch = c->data()[0];
 
   // TODO-intern: return value
   switch (ch) {
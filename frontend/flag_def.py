@@ -134,6 +134,9 @@ READ_SPEC.LongFlag('--with-eol')
 
 MAPFILE_SPEC = FlagSpec('mapfile')
 MAPFILE_SPEC.ShortFlag('-t')
+MAPFILE_SPEC.ShortFlag('-d', args.String)
+MAPFILE_SPEC.ShortFlag('-n', args.Int)  # max lines to copy
+MAPFILE_SPEC.ShortFlag('-s', args.Int)  # lines to skip
 
 CD_SPEC = FlagSpec('cd')
 CD_SPEC.ShortFlag('-L')
@@ -461,6 +464,10 @@ PP_SPEC = FlagSpec('pp')
 FORK_SPEC = FlagSpec('fork')
 FORKWAIT_SPEC = FlagSpec('forkwait')
 
+FORKEACH_SPEC = FlagSpec('forkeach')
+FORKEACH_SPEC.ShortFlag('-j', args.Int)  # max processes at once, 0 is no limit
+FORKEACH_SPEC.ShortFlag('-k')  # keep output in arg order
+
 # Might want --list at some point
 SOURCE_GUARD_SPEC = FlagSpec('source-guard')
 USE_SPEC = FlagSpec('use')
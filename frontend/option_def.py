@@ -286,6 +286,9 @@ def _Init(opt_def):
     opt_def.Add('extglob')
     opt_def.Add('nocasematch')
 
+    # let builtins leave output in the stdout buffer
+    opt_def.Add('buffer_output')
+
     # recursive parsing and evaluation - for compatibility, ble.sh, etc.
     opt_def.Add('eval_unsafe_arith')
 
@@ -31,7 +31,7 @@ int GetNumber(BigStr* sig_spec) {
     return NO_SIGNAL;
   }
 
-  const char* data = sig_spec->data_;
+  const char* data = sig_spec->data();
 
 """)
     for abbrev, _ in signal_def._BY_NUMBER:
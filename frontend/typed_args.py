@@ -476,6 +476,13 @@ class Reader(object):
         val = self.PosValue()
         return self._ToPlace(val)
 
+    def OptionalPlace(self):
+        # type: () -> Optional[value.Place]
+        val = self.OptionalValue()
+        if val is None:
+            return None
+        return self._ToPlace(val)
+
     def PosEggex(self):
         # type: () -> value.Eggex
         val = self.PosValue()
@@ -49,6 +49,8 @@ class BumpLeakHeap {
 #endif
     return -1;  // no collection attempted
   }
+  void OnFork(bool will_exec) {
+  }
 
   void PrintStats(int fd);
 
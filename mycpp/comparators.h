@@ -78,7 +78,7 @@ inline int str_cmp(BigStr* a, BigStr* b) {
   if (min == 0) {
     return int_cmp(len_a, len_b);
   }
-  int comp = memcmp(a->data_, b->data_, min);
+  int comp = memcmp(a->data(), b->data(), min);
   if (comp == 0) {
     return int_cmp(len_a, len_b);  // tiebreaker
   }
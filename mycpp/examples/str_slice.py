@@ -0,0 +1,83 @@
+#!/usr/bin/env python2
+"""
+str_slice.py: Consume big strings from the front, like a lexer or a parser of
+'key:value' records.  In C++, long suffixes share the bytes of the original
+string.
+"""
+from __future__ import print_function
+
+import os
+
+from mycpp import mylib
+from mycpp.mylib import log
+
+
+def MakeRecords(n):
+    # type: (int) -> str
+    f = mylib.BufWriter()
+    for i in xrange(n):
+        f.write('key%d:  value %d\n' % (i, i))
+    return f.getvalue()
+
+
+def run_tests():
+    # type: () -> None
+
+    s = MakeRecords(100)
+    log('len(s) = %d', len(s))
+
+    # Short and long suffixes
+    log('s[1663:] = %s', s[1663:].strip())
+    log('len(s[10:]) = %d', len(s[10:]))
+    log('len(s[10:][10:]) = %d', len(s[10:][10:]))
+    log('s[:4] = %s', s[:4])
+
+    parts = s.split(':', 1)
+    log('parts[0] = %s', parts[0])
+    log('len(parts[1]) = %d', len(parts[1]))
+
+    rest = parts[1].lstrip()
+    log('rest[:7] = %s', rest[:7])
+    log('len(rest) = %d', len(rest))
+
+    # Consume every record
+    num_records = 0
+    while len(s):
+        pos = s.find('\n')
+        if num_records % 25 == 0:
+            log('record = %s', s[:pos])
+        s = s[pos + 1:]
+        num_records += 1
+    log('num_records = %d', num_records)
+
+
+def run_benchmarks():
+    # type: () -> None
+
+    # About 500 KB.  Copying every suffix would make this quadratic.
+    s = MakeRecords(25000)
+    log('len(s) = %d', len(s))
+
+    num_records = 0
+    total = 0
+    while len(s):
+        parts = s.split(':', 1)
+        s = parts[1].lstrip()
+
+        pos = s.find('\n')
+        total += pos
+        s = s[pos + 1:]
+
+        num_records += 1
+        mylib.MaybeCollect()
+
+    log('num_records = %d', num_records)
+    log('total = %d', total)
+
+
+if __name__ == '__main__':
+    if os.getenv('BENCHMARK'):
+        log('Benchmarking...')
+        run_benchmarks()
+    else:
+        run_tests()
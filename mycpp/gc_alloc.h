@@ -104,6 +104,13 @@ class StackRoots {
 //
 // Variadic templates:
 // https://eli.thegreenplace.net/2014/variadic-templates-in-c/
+// The name of T for OILS_GC_PROFILE, without RTTI.  GCC and Clang return
+// something like "const char* GcTypeName() [with T = syntax_asdl::Token]".
+template <typename T>
+const char* GcTypeName() {
+  return __PRETTY_FUNCTION__;
+}
+
 template <typename T, typename... Args>
 T* Alloc(Args&&... args) {
   // Alloc() allocates space for both a header and object and guarantees that
@@ -125,16 +132,14 @@ T* Alloc(Args&&... args) {
 #if MARK_SWEEP
   int obj_id;
   int pool_id;
-  void* place = gHeap.Allocate(num_bytes, &obj_id, &pool_id);
+  void* place = gHeap.Allocate(num_bytes, &obj_id, &pool_id, GcTypeName<T>());
 #else
   void* place = gHeap.Allocate(num_bytes);
 #endif
   ObjHeader* header = new (place) ObjHeader(T::obj_header());
 #if MARK_SWEEP
   header->obj_id = obj_id;
-  #ifndef NO_POOL_ALLOC
   header->pool_id = pool_id;
-  #endif
 #endif
   void* obj = header->ObjectAddress();
   // Now that mycpp generates code to initialize every field, we should
@@ -172,12 +177,11 @@ inline BigStr* NewStr(int len) {
   s->len_ = len;
   s->hash_ = 0;
   s->is_hashed_ = 0;
+  s->is_view_ = 0;
 
 #if MARK_SWEEP
   header->obj_id = obj_id;
-  #ifndef NO_POOL_ALLOC
   header->pool_id = pool_id;
-  #endif
 #endif
   return s;
 }
@@ -199,12 +203,48 @@ inline BigStr* OverAllocatedStr(int len) {
   auto s = new (header->ObjectAddress()) BigStr();
   s->hash_ = 0;
   s->is_hashed_ = 0;
+  s->is_view_ = 0;
+
+#if MARK_SWEEP
+  header->obj_id = obj_id;
+  header->pool_id = pool_id;
+#endif
+  return s;
+}
+
+// Return a string that shares the bytes of parent[offset:], instead of
+// copying them.  Only suffixes can be shared, because they're NUL terminated.
+inline BigStr* NewStrView(BigStr* parent, int offset) {
+  if (parent->is_view_) {  // point to the original, not a chain of views
+    offset += parent->view()->offset_;
+    parent = parent->view()->parent_;
+  }
+  DCHECK(0 <= offset && offset <= len(parent));
+
+  int obj_len = kStrHeaderSize + sizeof(StrView);
+  const size_t num_bytes = sizeof(ObjHeader) + obj_len;
+#if MARK_SWEEP
+  int obj_id;
+  int pool_id;
+  void* place = gHeap.Allocate(num_bytes, &obj_id, &pool_id);
+#else
+  void* place = gHeap.Allocate(num_bytes);
+#endif
+  ObjHeader* header = new (place) ObjHeader(BigStr::view_header());
+
+  auto s = new (header->ObjectAddress()) BigStr();
+  s->len_ = len(parent) - offset;
+  s->hash_ = 0;
+  s->is_hashed_ = 0;
+  s->is_view_ = 1;
+
+  StrView* view = s->view();
+  view->parent_ = parent;
+  view->offset_ = offset;
 
 #if MARK_SWEEP
   header->obj_id = obj_id;
-  #ifndef NO_POOL_ALLOC
   header->pool_id = pool_id;
-  #endif
 #endif
   return s;
 }
@@ -248,9 +288,7 @@ inline Slab<T>* NewSlab(int len) {
   auto slab = new (obj) Slab<T>(len);
 #if MARK_SWEEP
   header->obj_id = obj_id;
-  #ifndef NO_POOL_ALLOC
   header->pool_id = pool_id;
-  #endif
 #endif
   return slab;
 }
@@ -11,7 +11,7 @@
 
 // Translation of Python's print().
 void print(BigStr* s) {
-  fputs(s->data_, stdout);  // print until first NUL
+  fputs(s->data(), stdout);  // print until first NUL
   fputc('\n', stdout);
 }
 
@@ -87,15 +87,16 @@ BigStr* repr(BigStr* s) {
 
   // Single quote by default.
   char quote = '\'';
-  if (memchr(s->data_, '\'', n) && !memchr(s->data_, '"', n)) {
+  if (memchr(s->data(), '\'', n) && !memchr(s->data(), '"', n)) {
     quote = '"';
   }
-  char* p = result->data_;
+  char* p = result->data();
 
   // From PyString_Repr()
   *p++ = quote;
+  const char* src = s->data();
   for (int i = 0; i < n; ++i) {
-    unsigned char c = static_cast<unsigned char>(s->data_[i]);
+    unsigned char c = static_cast<unsigned char>(src[i]);
     if (c == quote || c == '\\') {
       *p++ = '\\';
       *p++ = c;
@@ -121,7 +122,7 @@ BigStr* repr(BigStr* s) {
   *p++ = quote;
   *p = '\0';
 
-  int length = p - result->data_;
+  int length = p - result->data();
   result->MaybeShrink(length);
   return result;
 }
@@ -217,7 +218,7 @@ bool StringToInt64(const char* s, int length, int base, int64_t* result) {
 
 int to_int(BigStr* s, int base) {
   int i;
-  if (StringToInt(s->data_, len(s), base, &i)) {
+  if (StringToInt(s->data(), len(s), base, &i)) {
     return i;  // truncated to int
   } else {
     throw Alloc<ValueError>();
@@ -228,14 +229,14 @@ BigStr* chr(int i) {
   // NOTE: i should be less than 256, in which we could return an object from
   // GLOBAL_STR() pool, like StrIter
   auto result = NewStr(1);
-  result->data_[0] = i;
+  result->data()[0] = i;
   return result;
 }
 
 int ord(BigStr* s) {
   assert(len(s) == 1);
   // signed to unsigned conversion, so we don't get values like -127
-  uint8_t c = static_cast<uint8_t>(s->data_[0]);
+  uint8_t c = static_cast<uint8_t>(s->data()[0]);
   return c;
 }
 
@@ -248,7 +249,7 @@ double to_float(int i) {
 }
 
 double to_float(BigStr* s) {
-  char* begin = s->data_;
+  char* begin = s->data();
   char* end = begin + len(s);
 
   errno = 0;
@@ -276,7 +277,7 @@ double to_float(BigStr* s) {
 bool str_contains(BigStr* haystack, BigStr* needle) {
   // Common case
   if (len(needle) == 1) {
-    return memchr(haystack->data_, needle->data_[0], len(haystack));
+    return memchr(haystack->data(), needle->data()[0], len(haystack));
   }
 
   if (len(needle) > len(haystack)) {
@@ -285,12 +286,12 @@ bool str_contains(BigStr* haystack, BigStr* needle) {
 
   // General case. TODO: We could use a smarter substring algorithm.
 
-  const char* end = haystack->data_ + len(haystack);
+  const char* end = haystack->data() + len(haystack);
   const char* last_possible = end - len(needle);
-  const char* p = haystack->data_;
+  const char* p = haystack->data();
 
   while (p <= last_possible) {
-    if (memcmp(p, needle->data_, len(needle)) == 0) {
+    if (memcmp(p, needle->data(), len(needle)) == 0) {
       return true;
     }
     p++;
@@ -307,9 +308,9 @@ BigStr* str_repeat(BigStr* s, int times) {
   int new_len = len_ * times;
   BigStr* result = NewStr(new_len);
 
-  char* dest = result->data_;
+  char* dest = result->data();
   for (int i = 0; i < times; i++) {
-    memcpy(dest, s->data_, len_);
+    memcpy(dest, s->data(), len_);
     dest += len_;
   }
   return result;
@@ -324,17 +325,17 @@ BigStr* str_concat3(BigStr* a, BigStr* b, BigStr* c) {
 
   int new_len = a_len + b_len + c_len;
   BigStr* result = NewStr(new_len);
-  char* pos = result->data_;
+  char* pos = result->data();
 
-  memcpy(pos, a->data_, a_len);
+  memcpy(pos, a->data(), a_len);
   pos += a_len;
 
-  memcpy(pos, b->data_, b_len);
+  memcpy(pos, b->data(), b_len);
   pos += b_len;
 
-  memcpy(pos, c->data_, c_len);
+  memcpy(pos, c->data(), c_len);
 
-  assert(pos + c_len == result->data_ + new_len);
+  assert(pos + c_len == result->data() + new_len);
 
   return result;
 }
@@ -344,10 +345,10 @@ BigStr* str_concat(BigStr* a, BigStr* b) {
   int b_len = len(b);
   int new_len = a_len + b_len;
   BigStr* result = NewStr(new_len);
-  char* buf = result->data_;
+  char* buf = result->data();
 
-  memcpy(buf, a->data_, a_len);
-  memcpy(buf + a_len, b->data_, b_len);
+  memcpy(buf, a->data(), a_len);
+  memcpy(buf + a_len, b->data(), b_len);
 
   return result;
 }
@@ -374,7 +375,7 @@ bool str_equals(BigStr* left, BigStr* right) {
     return false;
   }
 
-  return memcmp(left->data_, right->data_, left->len_) == 0;
+  return memcmp(left->data(), right->data(), left->len_) == 0;
 }
 
 bool maybe_str_equals(BigStr* left, BigStr* right) {
@@ -416,7 +417,7 @@ bool keys_equal(Tuple2<BigStr*, int>* t1, Tuple2<BigStr*, int>* t2) {
 bool str_equals_c(BigStr* s, const char* c_string, int c_len) {
   // Needs SmallStr change
   if (len(s) == c_len) {
-    return memcmp(s->data_, c_string, c_len) == 0;
+    return memcmp(s->data(), c_string, c_len) == 0;
   } else {
     return false;
   }
@@ -425,7 +426,7 @@ bool str_equals_c(BigStr* s, const char* c_string, int c_len) {
 bool str_equals0(const char* c_string, BigStr* s) {
   int n = strlen(c_string);
   if (len(s) == n) {
-    return memcmp(s->data_, c_string, n) == 0;
+    return memcmp(s->data(), c_string, n) == 0;
   } else {
     return false;
   }
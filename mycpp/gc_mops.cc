@@ -49,7 +49,7 @@ BigStr* ToHexLower(BigInt b) {
 // Copied from gc_builtins - to_int()
 BigInt FromStr(BigStr* s, int base) {
   int64_t i;
-  if (StringToInt64(s->data_, len(s), base, &i)) {
+  if (StringToInt64(s->data(), len(s), base, &i)) {
     return i;
   } else {
     throw Alloc<ValueError>();
@@ -58,7 +58,7 @@ BigInt FromStr(BigStr* s, int base) {
 
 Tuple2<bool, BigInt> FromStr2(BigStr* s, int base) {
   int64_t i;
-  if (StringToInt64(s->data_, len(s), base, &i)) {
+  if (StringToInt64(s->data(), len(s), base, &i)) {
     return Tuple2<bool, BigInt>(true, i);
   } else {
     return Tuple2<bool, BigInt>(false, MINUS_ONE);
@@ -12,13 +12,13 @@ void InitCppOnly() {
   // We don't seem need this now that we have ctx_FlushStdout().
   // setvbuf(stdout, 0, _IONBF, 0);
 
-  // Arbitrary threshold of 50K objects based on eyeballing
-  // benchmarks/osh-runtime 10K or 100K aren't too bad either.
-  gHeap.Init(50000);
+  // Collect based on bytes, so a few big strings trigger a collection, and
+  // many small objects don't trigger too many.  8 MiB is arbitrary.
+  gHeap.Init(-1, MiB(8));
 }
 
 void print_stderr(BigStr* s) {
-  fputs(s->data_, stderr);  // prints until first NUL
+  fputs(s->data(), stderr);  // prints until first NUL
   fputc('\n', stderr);
 }
 
@@ -27,7 +27,7 @@ void writeln(BigStr* s, int fd) {
   // TODO: handle errors and write in a loop, like posix::write().  If possible,
   // use posix::write directly, but that introduces some dependency problems.
 
-  if (write(fd, s->data_, len(s)) < 0) {
+  if (write(fd, s->data(), len(s)) < 0) {
     assert(0);
   }
   if (write(fd, "\n", 1) < 0) {
@@ -40,7 +40,7 @@ BigStr* JoinBytes(List<int>* byte_list) {
   int n = len(byte_list);
   BigStr* result = NewStr(n);
   for (int i = 0; i < n; ++i) {
-    result->data_[i] = byte_list->at(i);
+    result->data()[i] = byte_list->at(i);
   }
   return result;
 }
@@ -64,8 +64,8 @@ MutableStr* NewMutableStr(int n) {
 Tuple2<BigStr*, BigStr*> split_once(BigStr* s, BigStr* delim) {
   DCHECK(len(delim) == 1);
 
-  const char* start = s->data_;  // note: this pointer may move
-  char c = delim->data_[0];
+  const char* start = s->data();  // note: this pointer may move
+  char c = delim->data()[0];
   int length = len(s);
 
   const char* p = static_cast<const char*>(memchr(start, c, length));
@@ -80,8 +80,8 @@ Tuple2<BigStr*, BigStr*> split_once(BigStr* s, BigStr* delim) {
     s1 = NewStr(len1);
     s2 = NewStr(len2);
 
-    memcpy(s1->data_, s->data_, len1);
-    memcpy(s2->data_, s->data_ + len1 + 1, len2);
+    memcpy(s1->data(), s->data(), len1);
+    memcpy(s2->data(), s->data() + len1 + 1, len2);
 
     return Tuple2<BigStr*, BigStr*>(s1, s2);
   } else {
@@ -93,7 +93,7 @@ LineReader* gStdin;
 
 LineReader* open(BigStr* path) {
   // TODO: Don't use C I/O; use POSIX I/O!
-  FILE* f = fopen(path->data_, "r");
+  FILE* f = fopen(path->data(), "r");
   if (f == nullptr) {
     throw Alloc<IOError>(errno);
   }
@@ -152,11 +152,11 @@ BigStr* BufLineReader::readline() {
   }
 
   int orig_pos = pos_;
-  const char* p = strchr(s_->data_ + pos_, '\n');
+  const char* p = strchr(s_->data() + pos_, '\n');
   // log("pos_ = %s", pos_);
   int line_len;
   if (p) {
-    int new_pos = p - s_->data_;
+    int new_pos = p - s_->data();
     line_len = new_pos - pos_ + 1;  // past newline char
     pos_ = new_pos + 1;
   } else {             // leftover line
@@ -170,8 +170,8 @@ BigStr* BufLineReader::readline() {
   }
 
   line = NewStr(line_len);
-  memcpy(line->data_, s_->data_ + orig_pos, line_len);
-  DCHECK(line->data_[line_len] == '\0');
+  memcpy(line->data(), s_->data() + orig_pos, line_len);
+  DCHECK(line->data()[line_len] == '\0');
   return line;
 }
 
@@ -185,7 +185,7 @@ Writer* gStderr;
 void CFile::write(BigStr* s) {
   // Writes can be short!
   int n = len(s);
-  int num_written = ::fwrite(s->data_, sizeof(char), n, f_);
+  int num_written = ::fwrite(s->data(), sizeof(char), n, f_);
   // Similar to CPython fileobject.c
   if (num_written != n) {
     throw Alloc<IOError>(errno);
@@ -223,24 +223,24 @@ void BufWriter::EnsureMoreSpace(int n) {
 
   if (current_cap < new_cap) {
     auto* s = NewMutableStr(std::max(current_cap * 2, new_cap));
-    memcpy(s->data_, str_->data_, len_);
-    s->data_[len_] = '\0';
+    memcpy(s->data(), str_->data(), len_);
+    s->data()[len_] = '\0';
     str_ = s;
   }
 }
 
 uint8_t* BufWriter::LengthPointer() {
   // start + len
-  return reinterpret_cast<uint8_t*>(str_->data_) + len_;
+  return reinterpret_cast<uint8_t*>(str_->data()) + len_;
 }
 
 uint8_t* BufWriter::CapacityPointer() {
   // start + capacity
-  return reinterpret_cast<uint8_t*>(str_->data_) + str_->len_;
+  return reinterpret_cast<uint8_t*>(str_->data()) + str_->len_;
 }
 
 void BufWriter::SetLengthFrom(uint8_t* length_ptr) {
-  uint8_t* begin = reinterpret_cast<uint8_t*>(str_->data_);
+  uint8_t* begin = reinterpret_cast<uint8_t*>(str_->data());
   DCHECK(length_ptr >= begin);  // we should have written some data
 
   // Set the length, e.g. so we know where to resume writing from
@@ -263,9 +263,9 @@ void BufWriter::WriteRaw(char* s, int n) {
   EnsureMoreSpace(n);
 
   // Append the contents to the buffer
-  memcpy(str_->data_ + len_, s, n);
+  memcpy(str_->data() + len_, s, n);
   len_ += n;
-  str_->data_[len_] = '\0';
+  str_->data()[len_] = '\0';
 }
 
 void BufWriter::WriteConst(const char* c_string) {
@@ -274,7 +274,7 @@ void BufWriter::WriteConst(const char* c_string) {
 }
 
 void BufWriter::write(BigStr* s) {
-  WriteRaw(s->data_, len(s));
+  WriteRaw(s->data(), len(s));
 }
 
 void BufWriter::write_spaces(int n) {
@@ -285,12 +285,12 @@ void BufWriter::write_spaces(int n) {
 
   EnsureMoreSpace(n);
 
-  char* dest = str_->data_ + len_;
+  char* dest = str_->data() + len_;
   for (int i = 0; i < n; ++i) {
     dest[i] = ' ';
   }
   len_ += n;
-  str_->data_[len_] = '\0';
+  str_->data()[len_] = '\0';
 }
 
 BigStr* BufWriter::getvalue() {
@@ -31,13 +31,17 @@ inline void MaybeCollect() {
   gHeap.MaybeCollect();
 }
 
+inline void OnFork(bool will_exec) {
+  gHeap.OnFork(will_exec);
+}
+
 void print_stderr(BigStr* s);
 
 inline int ByteAt(BigStr* s, int i) {
   DCHECK(0 <= i);
   DCHECK(i <= len(s));
 
-  return static_cast<unsigned char>(s->data_[i]);
+  return static_cast<unsigned char>(s->data()[i]);
 }
 
 inline int ByteEquals(int byte, BigStr* ch) {
@@ -46,7 +50,7 @@ inline int ByteEquals(int byte, BigStr* ch) {
 
   DCHECK(len(ch) == 1);
 
-  return byte == static_cast<unsigned char>(ch->data_[0]);
+  return byte == static_cast<unsigned char>(ch->data()[0]);
 }
 
 inline int ByteInSet(int byte, BigStr* byte_set) {
@@ -55,7 +59,7 @@ inline int ByteInSet(int byte, BigStr* byte_set) {
 
   int n = len(byte_set);
   for (int i = 0; i < n; ++i) {
-    int b = static_cast<unsigned char>(byte_set->data_[i]);
+    int b = static_cast<unsigned char>(byte_set->data()[i]);
     if (byte == b) {
       return true;
     }
@@ -31,8 +31,9 @@ const int kInPool = 1;
 
 const unsigned kZeroMask = 0;  // for types with no pointers
 
-const int kMaxObjId = (1 << 28) - 1;  // 28 bits means 512 Mi objects per pool
+const int kMaxObjId = (1 << 27) - 1;  // 27 bits means 128 Mi objects per pool
 const int kIsGlobal = kMaxObjId;      // for debugging, not strictly needed
+const int kMaxPoolId = (1 << 3) - 1;  // ObjHeader::pool_id is 3 bits
 
 const int kUndefinedId = 0;  // Uninitialized object ID
 
@@ -45,8 +46,8 @@ struct ObjHeader {
   unsigned u_mask_npointers : 24;
 
   unsigned heap_tag : 2;  // HeapTag::Opaque, etc.
-  unsigned pool_id : 2;   // 0 for malloc(), or 1 2 3 for fixed sized pools
-  unsigned obj_id : 28;   // 1 Gi unique objects
+  unsigned pool_id : 3;   // 0 for malloc(), or 1 to 7 for pools
+  unsigned obj_id : 27;   // 128 Mi unique objects per pool
 
   // Returns the address of the GC managed object associated with this header.
   // Note: this relies on there being no padding between the header and the
@@ -113,8 +114,8 @@ struct ObjHeader {
 inline int ObjectId(void* obj) {
   ObjHeader* h = ObjHeader::FromObject(obj);
 
-  // pool_id is 2 bits, so shift the 28 bit obj_id past it.
-  return (h->obj_id << 2) + h->pool_id;
+  // pool_id is 3 bits, so shift the 27 bit obj_id past it.
+  return (h->obj_id << 3) + h->pool_id;
 }
 
 #define FIELD_MASK(header) (header).u_mask_npointers
@@ -26,13 +26,13 @@ int BigStr::find(BigStr* needle, int start, int end) {
   }
 
   if (needle_len == 1) {
-    char c = needle->data_[0];
+    char c = needle->data()[0];
     // For 'aaa'.find('a', 0, 1)
-    // end = 1, needle_len = 1, last_start = 1 which means we go through once
-    for (int i = start; i < end; ++i) {
-      if (data_[i] == c) {
-        return i;
-      }
+    // end = 1, needle_len = 1, so we search 1 byte
+    // memchr() is vectorized, which matters for mapfile on big files
+    void* p = memchr(data() + start, c, end - start);
+    if (p) {
+      return static_cast<char*>(p) - data();
     }
   } else {
     // Note: this works for finding the empty string.  Empty string is found in
@@ -42,9 +42,11 @@ int BigStr::find(BigStr* needle, int start, int end) {
     // end = 2, needle_len = 2, last_start = 1 which means we go through once
 
     int last_start = end - needle_len + 1;
+    const char* p = data();
+    const char* needle_data = needle->data();
     // could use a smarter substring search algorithm
     for (int i = start; i < last_start; ++i) {
-      if (memcmp(data_ + i, needle->data_, needle_len) == 0) {
+      if (memcmp(p + i, needle_data, needle_len) == 0) {
         return i;
       }
     }
@@ -55,9 +57,10 @@ int BigStr::find(BigStr* needle, int start, int end) {
 int BigStr::rfind(BigStr* needle) {
   int length = len(this);
   DCHECK(len(needle) == 1);  // Oils usage
-  char c = needle->data_[0];
+  char c = needle->data()[0];
+  const char* p = data();
   for (int i = length - 1; i >= 0; --i) {
-    if (data_[i] == c) {
+    if (p[i] == c) {
       return i;
     }
   }
@@ -69,8 +72,9 @@ bool BigStr::isdigit() {
   if (n == 0) {
     return false;  // special case
   }
+  const char* p = data();
   for (int i = 0; i < n; ++i) {
-    if (!::isdigit(data_[i])) {
+    if (!::isdigit(p[i])) {
       return false;
     }
   }
@@ -82,8 +86,9 @@ bool BigStr::isalpha() {
   if (n == 0) {
     return false;  // special case
   }
+  const char* p = data();
   for (int i = 0; i < n; ++i) {
-    if (!::isalpha(data_[i])) {
+    if (!::isalpha(p[i])) {
       return false;
     }
   }
@@ -96,8 +101,9 @@ bool BigStr::isupper() {
   if (n == 0) {
     return false;  // special case
   }
+  const char* p = data();
   for (int i = 0; i < n; ++i) {
-    if (!::isupper(data_[i])) {
+    if (!::isupper(p[i])) {
       return false;
     }
   }
@@ -109,7 +115,7 @@ bool BigStr::startswith(BigStr* s) {
   if (n > len(this)) {
     return false;
   }
-  return memcmp(data_, s->data_, n) == 0;
+  return memcmp(data(), s->data(), n) == 0;
 }
 
 bool BigStr::endswith(BigStr* s) {
@@ -118,8 +124,8 @@ bool BigStr::endswith(BigStr* s) {
   if (len_s > len_this) {
     return false;
   }
-  const char* start = data_ + len_this - len_s;
-  return memcmp(start, s->data_, len_s) == 0;
+  const char* start = data() + len_this - len_s;
+  return memcmp(start, s->data(), len_s) == 0;
 }
 
 // Get a string with one character
@@ -132,7 +138,28 @@ BigStr* BigStr::at(int i) {
   DCHECK(i < length);  // had a problem here!
 
   BigStr* result = NewStr(1);
-  result->data_[0] = data_[i];
+  result->data()[0] = data()[i];
+  return result;
+}
+
+// Returns s[begin:end].  A long suffix is a view that shares the bytes of s,
+// unless that would keep a much bigger string alive.
+static BigStr* Substring(BigStr* s, int begin, int end) {
+  int length = len(s);
+  if (begin == 0 && end == length) {
+    return s;
+  }
+
+  int new_len = end - begin;
+  if (end == length && new_len >= kMinViewLen) {
+    BigStr* orig = s->is_view_ ? s->view()->parent_ : s;
+    if (new_len >= len(orig) / 2) {
+      return NewStrView(s, begin);
+    }
+  }
+
+  BigStr* result = NewStr(new_len);  // has kEmptyString optimization
+  memcpy(result->data(), s->data() + begin, new_len);
   return result;
 }
 
@@ -149,13 +176,9 @@ BigStr* BigStr::slice(int begin, int end) {
   DCHECK(0 <= begin && begin <= length);
   DCHECK(0 <= end && end <= length);
 
-  int new_len = end - begin;
-  DCHECK(0 <= new_len && new_len <= length);
-
-  BigStr* result = NewStr(new_len);  // has kEmptyString optimization
-  memcpy(result->data_, data_ + begin, new_len);
+  DCHECK(0 <= end - begin && end - begin <= length);
 
-  return result;
+  return Substring(this, begin, end);
 }
 
 // Used by 'help' builtin and --help, neither of which translate yet.
@@ -169,8 +192,9 @@ BigStr* BigStr::upper() {
   int length = len(this);
   BigStr* result = NewStr(length);
   char* buffer = result->data();
+  const char* p = data();
   for (int char_index = 0; char_index < length; ++char_index) {
-    buffer[char_index] = toupper(data_[char_index]);
+    buffer[char_index] = toupper(p[char_index]);
   }
   return result;
 }
@@ -179,8 +203,9 @@ BigStr* BigStr::lower() {
   int length = len(this);
   BigStr* result = NewStr(length);
   char* buffer = result->data();
+  const char* p = data();
   for (int char_index = 0; char_index < length; ++char_index) {
-    buffer[char_index] = tolower(data_[char_index]);
+    buffer[char_index] = tolower(p[char_index]);
   }
   return result;
 }
@@ -194,10 +219,11 @@ BigStr* BigStr::ljust(int width, BigStr* fillchar) {
     return this;
   } else {
     BigStr* result = NewStr(width);
-    char c = fillchar->data_[0];
-    memcpy(result->data_, data_, length);
+    char c = fillchar->data()[0];
+    char* p = result->data();
+    memcpy(p, data(), length);
     for (int i = length; i < width; ++i) {
-      result->data_[i] = c;
+      p[i] = c;
     }
     return result;
   }
@@ -212,11 +238,12 @@ BigStr* BigStr::rjust(int width, BigStr* fillchar) {
     return this;
   } else {
     BigStr* result = NewStr(width);
-    char c = fillchar->data_[0];
+    char c = fillchar->data()[0];
+    char* p = result->data();
     for (int i = 0; i < num_fill; ++i) {
-      result->data_[i] = c;
+      p[i] = c;
     }
-    memcpy(result->data_ + num_fill, data_, length);
+    memcpy(p + num_fill, data(), length);
     return result;
   }
 }
@@ -227,15 +254,16 @@ BigStr* BigStr::replace(BigStr* old, BigStr* new_str) {
 }
 
 BigStr* BigStr::replace(BigStr* old, BigStr* new_str, int count) {
-  // log("replacing %s with %s", old_data, new_str->data_);
-  const char* old_data = old->data_;
+  // log("replacing %s with %s", old_data, new_str->data());
+  const char* old_data = old->data();
 
   int this_len = len(this);
   int old_len = len(old);
 
-  const char* last_possible = data_ + this_len - old_len;
+  const char* this_data = data();
+  const char* last_possible = this_data + this_len - old_len;
 
-  const char* p_this = data_;  // advances through 'this'
+  const char* p_this = this_data;  // advances through 'this'
 
   // First pass: Calculate number of replacements, and hence new length
   int replace_count = 0;
@@ -268,12 +296,12 @@ BigStr* BigStr::replace(BigStr* old, BigStr* new_str, int count) {
 
   BigStr* result = NewStr(result_len);
 
-  const char* new_data = new_str->data_;
+  const char* new_data = new_str->data();
   const size_t new_len = new_str_len;
 
   // Second pass: Copy pieces into 'result'
-  p_this = data_;                  // back to beginning
-  char* p_result = result->data_;  // advances through 'result'
+  p_this = this_data;              // back to beginning
+  char* p_result = result->data();  // advances through 'result'
   replace_count = 0;
 
   if (old_len == 0) {
@@ -295,7 +323,7 @@ BigStr* BigStr::replace(BigStr* old, BigStr* new_str, int count) {
       memcpy(p_result, new_data, new_len);
     } else if (p_this <= last_possible) {
       // Write the last part of string
-      memcpy(p_result, p_this, data_ + this_len - p_this);
+      memcpy(p_result, p_this, this_data + this_len - p_this);
     }
   } else {
     while (p_this <= last_possible) {
@@ -312,7 +340,8 @@ BigStr* BigStr::replace(BigStr* old, BigStr* new_str, int count) {
         p_this++;
       }
     }
-    memcpy(p_result, p_this, data_ + this_len - p_this);  // last part of string
+    // last part of string
+    memcpy(p_result, p_this, this_data + this_len - p_this);
   }
 
   return result;
@@ -378,11 +407,7 @@ BigStr* StripAny(BigStr* s, StripWhere where, int what) {
     return s;
   }
 
-  // Note: makes a copy in leaky version, and will in GC version too
-  int new_len = j - i;
-  BigStr* result = NewStr(new_len);
-  memcpy(result->data(), s->data() + i, new_len);
-  return result;
+  return Substring(s, i, j);
 }
 
 BigStr* BigStr::strip() {
@@ -392,7 +417,7 @@ BigStr* BigStr::strip() {
 // Used for CommandSub in osh/cmd_exec.py
 BigStr* BigStr::rstrip(BigStr* chars) {
   DCHECK(len(chars) == 1);
-  int c = chars->data_[0];
+  int c = chars->data()[0];
   return StripAny(this, StripWhere::Right, c);
 }
 
@@ -402,7 +427,7 @@ BigStr* BigStr::rstrip() {
 
 BigStr* BigStr::lstrip(BigStr* chars) {
   DCHECK(len(chars) == 1);
-  int c = chars->data_[0];
+  int c = chars->data()[0];
   return StripAny(this, StripWhere::Left, c);
 }
 
@@ -434,19 +459,19 @@ BigStr* BigStr::join(List<BigStr*>* items) {
   length += this_len * (num_parts - 1);
 
   BigStr* result = NewStr(length);
-  char* p_result = result->data_;  // advances through
+  char* p_result = result->data();  // advances through
 
   for (int i = 0; i < num_parts; ++i) {
     // log("i %d", i);
-    if (i != 0 && this_len) {             // optimize common case of ''.join()
-      memcpy(p_result, data_, this_len);  // copy the separator
+    if (i != 0 && this_len) {              // optimize common case of ''.join()
+      memcpy(p_result, data(), this_len);  // copy the separator
       p_result += this_len;
       // log("this_len %d", this_len);
     }
 
     int n = len(items->at(i));
     // log("n: %d", n);
-    memcpy(p_result, items->at(i)->data_, n);  // copy the list item
+    memcpy(p_result, items->at(i)->data(), n);  // copy the list item
     p_result += n;
   }
 
@@ -454,15 +479,7 @@ BigStr* BigStr::join(List<BigStr*>* items) {
 }
 
 static void AppendPart(List<BigStr*>* result, BigStr* s, int left, int right) {
-  int new_len = right - left;
-  BigStr* part;
-  if (new_len == 0) {
-    part = kEmptyString;
-  } else {
-    part = NewStr(new_len);
-    memcpy(part->data_, s->data_ + left, new_len);
-  }
-  result->append(part);
+  result->append(Substring(s, left, right));
 }
 
 // Split BigStr into List<BigStr*> of parts separated by 'sep'.
@@ -470,7 +487,7 @@ static void AppendPart(List<BigStr*>* result, BigStr* s, int left, int right) {
 List<BigStr*>* BigStr::split(BigStr* sep, int max_split) {
   DCHECK(sep != nullptr);
   DCHECK(len(sep) == 1);  // we can only split one char
-  char sep_char = sep->data_[0];
+  char sep_char = sep->data()[0];
 
   int str_len = len(this);
   if (str_len == 0) {
@@ -483,10 +500,11 @@ List<BigStr*>* BigStr::split(BigStr* sep, int max_split) {
   int right = 0;
   int num_parts = 0;  // 3 splits results in 4 parts
 
+  const char* p = data();
   while (right < str_len && num_parts < max_split) {
     // search for separator
     for (; right < str_len; right++) {
-      if (data_[right] == sep_char) {
+      if (p[right] == sep_char) {
         AppendPart(result, this, left, right);
         right++;
         left = right;
@@ -510,7 +528,7 @@ List<BigStr*>* BigStr::split(BigStr* sep) {
 
 unsigned BigStr::hash(HashFunc h) {
   if (!is_hashed_) {
-    hash_ = h(data_, len(this)) >> 1;
+    hash_ = h(data(), len(this)) >> 2;
     is_hashed_ = 1;
   }
   return hash_;
@@ -623,8 +641,8 @@ static inline BigStr* _StrFormat(const char* fmt, int fmt_len, va_list args) {
 
 BigStr* StrIter::Value() {  // similar to at()
   BigStr* result = NewStr(1);
-  result->data_[0] = s_->data_[i_];
-  DCHECK(result->data_[1] == '\0');
+  result->data()[0] = s_->data()[i_];
+  DCHECK(result->data()[1] == '\0');
   return result;
 }
 
@@ -8,13 +8,29 @@
 template <typename T>
 class List;
 
+class BigStr;
+
+// A view shares the bytes of a long suffix of another string, instead of
+// copying them.  It's a BigStr with is_view_ set, and this struct in place of
+// data_.  Only suffixes are shared, so data() is still NUL terminated.
+//
+// The parent is never a view itself, and the GC keeps it alive.
+struct StrView {
+  BigStr* parent_;
+  int offset_;
+};
+
 class BigStr {
  public:
   // Don't call this directly.  Call NewStr() instead, which calls this.
   BigStr() {
   }
 
+  // Use this instead of data_, which isn't valid for views
   char* data() {
+    if (is_view_) {
+      return view()->parent_->data() + view()->offset_;
+    }
     return data_;
   }
 
@@ -78,11 +94,20 @@ class BigStr {
     return ObjHeader::BigStr();
   }
 
+  // The header of a view, which has a pointer to trace
+  static constexpr ObjHeader view_header();
+
   unsigned hash(HashFunc h);
 
+  StrView* view() {
+    DCHECK(is_view_);
+    return reinterpret_cast<StrView*>(data_);
+  }
+
   int len_;
-  unsigned hash_ : 31;
+  unsigned hash_ : 30;
   unsigned is_hashed_ : 1;
+  unsigned is_view_ : 1;
   char data_[1];  // flexible array
 
  private:
@@ -94,8 +119,18 @@ class BigStr {
 
 constexpr int kStrHeaderSize = offsetof(BigStr, data_);
 
+constexpr ObjHeader BigStr::view_header() {
+  return {TypeTag::BigStr, maskbit(kStrHeaderSize), HeapTag::FixedSize,
+          kNotInPool, kUndefinedId};
+}
+
+// Substrings shorter than this are copied.  Longer suffixes are views, as
+// long as they don't keep a much bigger parent alive.
+const int kMinViewLen = 256;
+
 // Note: for SmallStr, we might copy into the VALUE
 inline void BigStr::MaybeShrink(int str_len) {
+  DCHECK(!is_view_);
   len_ = str_len;
   data_[len_] = '\0';  // NUL terminate
 }
@@ -146,8 +181,9 @@ class GlobalStr {
   // a buffer of size N).  For initializing global constant instances.
  public:
   int len_;
-  unsigned hash_ : 31;
+  unsigned hash_ : 30;
   unsigned is_hashed_ : 1;
+  unsigned is_view_ : 1;
   const char data_[N];
 
   DISALLOW_COPY_AND_ASSIGN(GlobalStr)
@@ -198,14 +234,16 @@ inline int len(const Str s) {
 #define GLOBAL_STR(name, val)                                                \
   GcGlobal<GlobalStr<sizeof(val)>> _##name = {                               \
       ObjHeader::Global(TypeTag::BigStr),                                    \
-      {.len_ = sizeof(val) - 1, .hash_ = 0, .is_hashed_ = 0, .data_ = val}}; \
+      {.len_ = sizeof(val) - 1, .hash_ = 0, .is_hashed_ = 0, .is_view_ = 0,  \
+       .data_ = val}};                                                       \
   BigStr* name = reinterpret_cast<BigStr*>(&_##name.obj);
 
 // New style for SmallStr compatibility
 #define GLOBAL_STR2(name, val)                                               \
   GcGlobal<GlobalStr<sizeof(val)>> _##name = {                               \
       ObjHeader::Global(TypeTag::BigStr),                                    \
-      {.len_ = sizeof(val) - 1, .hash_ = 0, .is_hashed_ = 0, .data_ = val}}; \
+      {.len_ = sizeof(val) - 1, .hash_ = 0, .is_hashed_ = 0, .is_view_ = 0,  \
+       .data_ = val}};                                                       \
   Str name(reinterpret_cast<BigStr*>(&_##name.obj));
 
 // Helper function that's consistent with JSON definition of ASCII whitespace,
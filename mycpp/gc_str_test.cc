@@ -743,6 +743,79 @@ TEST test_str_slice() {
   PASS();
 }
 
+TEST test_str_view() {
+  BigStr* big = nullptr;
+  BigStr* view = nullptr;
+  BigStr* view2 = nullptr;
+  StackRoots _roots({&big, &view, &view2});
+
+  big = NewStr(1000);
+  for (int i = 0; i < 1000; ++i) {
+    big->data()[i] = 'a' + i % 26;
+  }
+
+  // Short slices are copied
+  BigStr* s = big->slice(990);
+  ASSERT(!s->is_view_);
+  ASSERT_EQ_FMT(HeapTag::Opaque, ObjHeader::FromObject(s)->heap_tag, "%d");
+
+  // So are slices that don't go to the end, which wouldn't be NUL terminated
+  s = big->slice(10, 900);
+  ASSERT(!s->is_view_);
+
+  // Long suffixes share the bytes of the parent
+  view = big->slice(100);
+  ASSERT(view->is_view_);
+  ASSERT_EQ_FMT(HeapTag::FixedSize, ObjHeader::FromObject(view)->heap_tag,
+                "%d");
+  ASSERT_EQ_FMT(900, len(view), "%d");
+  ASSERT_EQ(big->data() + 100, view->data());
+  ASSERT_EQ('\0', view->data()[900]);
+  ASSERT(str_equals(view, big->slice(100, 1000)));
+
+  // A view of a view points to the original string
+  view2 = view->slice(300);
+  ASSERT(view2->is_view_);
+  ASSERT_EQ(big, view2->view()->parent_);
+  ASSERT_EQ_FMT(400, view2->view()->offset_, "%d");
+
+  // Unless it would keep a much bigger string alive
+  s = view->slice(600);
+  ASSERT(!s->is_view_);
+
+  // The last part of split() and lstrip() can be views too
+  big->data()[1] = ' ';
+  List<BigStr*>* parts = big->split(StrFromC(" "), 1);
+  ASSERT(parts->at(1)->is_view_);
+  ASSERT_EQ_FMT(998, len(parts->at(1)), "%d");
+
+  big->data()[0] = ' ';
+  ASSERT(big->lstrip()->is_view_);
+  ASSERT(big->strip()->is_view_);  // nothing is stripped from the end
+
+  // Views hash and compare like other strings
+  BigStr* copy = StrFromC(view2->data(), len(view2));
+  ASSERT(str_equals(copy, view2));
+  ASSERT_EQ(hash(copy), hash(view2));
+
+  // Views keep their parent alive
+  big = nullptr;
+  view = nullptr;
+  gHeap.Collect();
+  int num_live = gHeap.num_live();
+
+  ASSERT_EQ_FMT(600, len(view2), "%d");
+  for (int i = 0; i < 600; ++i) {
+    ASSERT_EQ('a' + (400 + i) % 26, view2->data()[i]);
+  }
+
+  view2 = nullptr;
+  gHeap.Collect();
+  ASSERT_EQ_FMT(num_live - 2, gHeap.num_live(), "%d");  // view2 and big
+
+  PASS();
+}
+
 TEST test_str_concat() {
   printf("\n");
 
@@ -1526,6 +1599,7 @@ int main(int argc, char** argv) {
   RUN_TEST(test_str_replace);
   RUN_TEST(test_str_just);
   RUN_TEST(test_str_slice);
+  RUN_TEST(test_str_view);
 
   // Free functions
   RUN_TEST(test_str_concat);
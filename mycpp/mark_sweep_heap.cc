@@ -1,12 +1,22 @@
 #include "mycpp/mark_sweep_heap.h"
 
+#include <fcntl.h>     // open()
 #include <inttypes.h>  // PRId64
+#include <signal.h>    // sigaction()
 #include <stdlib.h>    // getenv()
 #include <string.h>    // strlen()
+#include <sys/mman.h>  // mmap()
 #include <sys/time.h>  // gettimeofday()
-#include <time.h>      // clock_gettime(), CLOCK_PROCESS_CPUTIME_ID
+#include <time.h>      // clock_gettime(), CLOCK_MONOTONIC
 #include <unistd.h>    // STDERR_FILENO
 
+#include <algorithm>  // std::max()
+#include <atomic>
+#include <condition_variable>
+#include <mutex>
+#include <system_error>
+#include <thread>
+
 #include "_build/detected-cpp-config.h"  // for GC_TIMING
 #include "mycpp/gc_builtins.h"           // StringToInt()
 #include "mycpp/gc_slab.h"
@@ -14,20 +24,106 @@
 // TODO: Remove this guard when we have separate binaries
 #if MARK_SWEEP
 
+// Upper bound on OILS_GC_THREADS
+const int kMaxGcThreads = 64;
+
+// Below this many objects, starting threads costs more than it saves
+const int kMinParallelObjs = 100000;
+
+// Allocate() sweeps this many objects while a sweep is underway
+const int kSweepSlice = 32;
+
+// Collect() checks the pause target after sweeping this many objects
+const int kEagerSweepSlice = 4096;
+
+// Set by SIGUSR2 when OILS_GC_PROFILE is set, and checked at GC points
+static volatile sig_atomic_t gProfileRequested = 0;
+
+static void ProfileSignalHandler(int sig_num) {
+  gProfileRequested = 1;
+}
+
+// Start of the executable's mapping, so call sites can be passed to addr2line
+extern char __executable_start;
+
+static double NowMillis() {
+  struct timespec ts;
+  if (clock_gettime(CLOCK_MONOTONIC, &ts) < 0) {
+    FAIL("clock_gettime failed");
+  }
+  return ts.tv_sec * 1000.0 + ts.tv_nsec / 1e6;
+}
+
 void MarkSweepHeap::Init() {
   Init(1000);  // collect at 1000 objects in tests
 }
 
 void MarkSweepHeap::Init(int gc_threshold) {
+  Init(gc_threshold, -1);
+}
+
+// A threshold of -1 isn't used.
+void MarkSweepHeap::Init(int gc_threshold, int64_t gc_bytes_threshold) {
   gc_threshold_ = gc_threshold;
+  gc_bytes_threshold_ = gc_bytes_threshold;
 
   char* e;
   e = getenv("OILS_GC_THRESHOLD");
   if (e) {
     int result;
     if (StringToInt(e, strlen(e), 10, &result)) {
-      // Override collection threshold
+      // Override collection threshold, and only count objects
       gc_threshold_ = result;
+      gc_bytes_threshold_ = -1;
+    }
+  }
+
+  e = getenv("OILS_GC_MAX_HEAP");
+  if (e) {
+    int64_t result;
+    if (StringToInt64(e, strlen(e), 10, &result) && result > 0) {
+      max_heap_bytes_ = result;
+      heap_limit_ = result;
+    }
+  }
+
+  e = getenv("OILS_GC_THREADS");
+  if (e) {
+    int result;
+    if (StringToInt(e, strlen(e), 10, &result) && result >= 1) {
+      gc_threads_ = std::min(result, kMaxGcThreads);
+    }
+  }
+
+  e = getenv("OILS_GC_MAX_PAUSE");
+  if (e) {
+    int result;
+    if (StringToInt(e, strlen(e), 10, &result) && result >= 0) {
+      gc_max_pause_ = result;
+    }
+  }
+
+  e = getenv("OILS_GC_PROFILE");
+  if (e && strlen(e)) {
+    profile_path_ = e;
+
+    // Only take SIGUSR2 if nothing else wants it.  If it was ignored with
+    // trap '' USR2, keep ignoring it.  A later 'trap ... USR2' replaces this
+    // handler, and then the profile is only written at exit.
+    struct sigaction old;
+    if (sigaction(SIGUSR2, nullptr, &old) == 0 && old.sa_handler == SIG_DFL) {
+      struct sigaction act = {};
+      act.sa_handler = ProfileSignalHandler;
+      act.sa_flags = SA_RESTART;
+      sigaction(SIGUSR2, &act, nullptr);
+    }
+  }
+
+  e = getenv("OILS_GC_PROFILE_SAMPLE");
+  if (e) {
+    int result;
+    if (StringToInt(e, strlen(e), 10, &result) && result >= 1) {
+      profile_sample_ = result;
     }
   }
 
@@ -41,14 +137,34 @@ void MarkSweepHeap::Init(int gc_threshold) {
   roots_.reserve(KiB(1));  // prevent resizing in common case
 }
 
+bool MarkSweepHeap::OverThreshold() {
+  if (gc_threshold_ != -1 && num_live() > gc_threshold_) {
+    return true;
+  }
+  int64_t bytes = bytes_live();
+  if (gc_bytes_threshold_ != -1 && bytes > gc_bytes_threshold_) {
+    return true;
+  }
+  return heap_limit_ != -1 && bytes > heap_limit_;
+}
+
 int MarkSweepHeap::MaybeCollect() {
+  if (gProfileRequested) {
+    gProfileRequested = 0;
+    WriteProfile(profile_path_);
+  }
+
   // Maybe collect BEFORE allocation, because the new object won't be rooted
   #if GC_ALWAYS
   int result = Collect();
   #else
   int result = -1;
-  if (num_live() > gc_threshold_) {
-    result = Collect();
+  if (OverThreshold()) {
+    // Dead objects that haven't been swept still count, so sweep them first
+    FinishSweep();
+    if (OverThreshold()) {
+      result = Collect();
+    }
   }
   #endif
 
@@ -56,6 +172,97 @@ int MarkSweepHeap::MaybeCollect() {
   return result;
 }
 
+void* LargeObjectSpace::Allocate(size_t num_bytes, int* obj_id) {
+  static size_t page_size = sysconf(_SC_PAGESIZE);
+  size_t len = (num_bytes + page_size - 1) / page_size * page_size;
+
+  void* result =
+      mmap(nullptr, len, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS,
+           -1, 0);
+  if (result == MAP_FAILED) {
+    FAIL("mmap failed");
+  }
+
+  if (free_ids_.empty()) {
+    *obj_id = objs_.size();
+    CHECK(*obj_id <= kMaxObjId);
+    objs_.push_back({result, len});
+  } else {
+    *obj_id = free_ids_.back();
+    free_ids_.pop_back();
+    objs_[*obj_id] = {result, len};
+  }
+
+  num_live_++;
+  bytes_live_ += len;
+  num_allocated_++;
+  bytes_allocated_ += len;
+  return result;
+}
+
+// Return the pages of unmarked objects to the OS
+void LargeObjectSpace::Sweep() {
+  int n = objs_.size();
+  for (int obj_id = 0; obj_id < n; ++obj_id) {
+    Mapping& m = objs_[obj_id];
+    if (m.addr == nullptr || mark_set_.IsMarked(obj_id)) {
+      continue;
+    }
+    munmap(m.addr, m.len);
+    num_live_--;
+    bytes_live_ -= m.len;
+    m.addr = nullptr;
+    free_ids_.push_back(obj_id);
+  }
+}
+
+void LargeObjectSpace::Free() {
+  for (Mapping& m : objs_) {
+    if (m.addr) {
+      munmap(m.addr, m.len);
+    }
+  }
+  objs_.clear();
+  free_ids_.clear();
+  num_live_ = 0;
+  bytes_live_ = 0;
+}
+
+// The child shares the parent's heap pages until it writes to them.  Mark bits
+// are in MarkSet, so marking only reads objects, but sweeping writes to dead
+// objects.  Collecting also takes time, and many children exit soon.
+//
+// So a child that will exec() never collects, and other children wait until
+// their heap doubles.  The child also stops the parent's lazy sweep: objects
+// from malloc() are swept at its next collection (see AllocateObj), and the
+// pools' unswept Blocks are left alone.
+void MarkSweepHeap::OnFork(bool will_exec) {
+  forked_ = true;
+
+  #ifndef NO_POOL_ALLOC
+  for (PoolBase* pool : pools_) {
+    pool->AbandonSweep();
+  }
+  #endif
+
+  if (will_exec) {
+    gc_threshold_ = -1;
+    gc_bytes_threshold_ = -1;
+    heap_limit_ = -1;
+    return;
+  }
+
+  if (gc_threshold_ != -1) {
+    gc_threshold_ = std::max(gc_threshold_, num_live() * 2);
+  }
+  if (gc_bytes_threshold_ != -1) {
+    gc_bytes_threshold_ = std::max(gc_bytes_threshold_, bytes_live() * 2);
+  }
+  if (heap_limit_ != -1) {
+    heap_limit_ = std::max(heap_limit_, bytes_live() * 2);
+  }
+}
+
   #if defined(BUMP_SMALL)
     #include "mycpp/bump_leak_heap.h"
 
@@ -64,19 +271,39 @@ BumpLeakHeap gBumpLeak;
 
 // Allocate and update stats
 // TODO: Make this interface nicer.
-void* MarkSweepHeap::Allocate(size_t num_bytes, int* obj_id, int* pool_id) {
+void* MarkSweepHeap::Allocate(size_t num_bytes, int* obj_id, int* pool_id,
+                              const char* type_name) {
+  void* result = AllocateObj(num_bytes, obj_id, pool_id);
+  if (profile_path_) {
+    SetTypeName((*obj_id << 3) + *pool_id, type_name);
+  }
+  if (profile_sample_) {
+    // Alloc<T>() is inlined, so this is the code that allocated the object
+    SampleSite((*obj_id << 3) + *pool_id, __builtin_return_address(0));
+  }
+  return result;
+}
+
+void* MarkSweepHeap::AllocateObj(size_t num_bytes, int* obj_id, int* pool_id) {
   // log("Allocate %d", num_bytes);
+  if (sweeping_ && !forked_) {
+    SweepSome(kSweepSlice);
+  }
+
   #ifndef NO_POOL_ALLOC
-  if (num_bytes <= pool1_.kMaxObjSize) {
-    *pool_id = 1;
-    return pool1_.Allocate(obj_id);
+  for (int i = 0; i < kNumPools; ++i) {
+    if (num_bytes <= pools_[i]->cell_size()) {
+      *pool_id = i + 1;
+      return pools_[i]->Allocate(obj_id);
+    }
   }
-  if (num_bytes <= pool2_.kMaxObjSize) {
-    *pool_id = 2;
-    return pool2_.Allocate(obj_id);
+  #endif
+
+  if (num_bytes >= kLargeObjSize) {
+    *pool_id = kLargeObjPoolId;
+    return large_objs_.Allocate(num_bytes, obj_id);
   }
   *pool_id = 0;  // malloc(), not a pool
-  #endif
 
   // Does the pool allocator approximate a bump allocator?  Use pool2_
   // threshold of 48 bytes.
@@ -94,6 +321,8 @@ void* MarkSweepHeap::Allocate(size_t num_bytes, int* obj_id, int* pool_id) {
 
     // This check is ON in release mode
     CHECK(greatest_obj_id_ <= kMaxObjId);
+
+    obj_sizes_.push_back(num_bytes);
   } else {
     ObjHeader* dead = to_free_.back();
     to_free_.pop_back();
@@ -101,6 +330,8 @@ void* MarkSweepHeap::Allocate(size_t num_bytes, int* obj_id, int* pool_id) {
     *obj_id = dead->obj_id;  // reuse the dead object's ID
 
     free(dead);
+
+    obj_sizes_[*obj_id] = num_bytes;
   }
 
   void* result = malloc(num_bytes);
@@ -109,6 +340,7 @@ void* MarkSweepHeap::Allocate(size_t num_bytes, int* obj_id, int* pool_id) {
   live_objs_.push_back(static_cast<ObjHeader*>(result));
 
   num_live_++;
+  bytes_live_ += num_bytes;
   num_allocated_++;
   bytes_allocated_ += num_bytes;
 
@@ -137,17 +369,20 @@ void MarkSweepHeap::MaybeMarkAndPush(RawObject* obj) {
   }
 
   int obj_id = header->obj_id;
-  #ifndef NO_POOL_ALLOC
-  if (header->pool_id == 1) {
-    if (pool1_.IsMarked(obj_id)) {
+  int pool_id = header->pool_id;
+  if (pool_id == kLargeObjPoolId) {
+    if (large_objs_.IsMarked(obj_id)) {
       return;
     }
-    pool1_.Mark(obj_id);
-  } else if (header->pool_id == 2) {
-    if (pool2_.IsMarked(obj_id)) {
+    large_objs_.Mark(obj_id);
+  } else
+  #ifndef NO_POOL_ALLOC
+      if (pool_id != 0) {
+    PoolBase* pool = pools_[pool_id - 1];
+    if (pool->IsMarked(obj_id)) {
       return;
     }
-    pool2_.Mark(obj_id);
+    pool->Mark(obj_id);
   } else
   #endif
   {
@@ -157,6 +392,23 @@ void MarkSweepHeap::MaybeMarkAndPush(RawObject* obj) {
     mark_set_.Mark(obj_id);
   }
 
+  if (profiling_) {
+    ProfileRow& row = type_profile_[TypeName(header)];
+    row.heap_tag = header->heap_tag;
+    row.type_tag = header->type_tag;
+    row.num_objs++;
+    row.num_bytes += ObjectBytes(header);
+
+    if (!sampled_sites_.empty()) {
+      auto it = sampled_sites_.find(ObjectId(header->ObjectAddress()));
+      if (it != sampled_sites_.end()) {
+        ProfileRow& site = site_profile_[it->second];
+        site.num_objs++;
+        site.num_bytes += ObjectBytes(header);
+      }
+    }
+  }
+
   switch (header->heap_tag) {
   case HeapTag::Opaque:  // e.g. strings have no children
     break;
@@ -171,83 +423,279 @@ void MarkSweepHeap::MaybeMarkAndPush(RawObject* obj) {
   }
 }
 
+// Call f(child) on each non-null child of a FixedSize or Scanned object.
+template <typename F>
+static inline void ForEachChild(ObjHeader* header, F f) {
+  switch (header->heap_tag) {
+  case HeapTag::FixedSize: {
+    auto fixed = reinterpret_cast<LayoutFixed*>(header->ObjectAddress());
+    int mask = FIELD_MASK(*header);
+
+    for (int i = 0; i < kFieldMaskBits; ++i) {
+      if (mask & (1 << i)) {
+        RawObject* child = fixed->children_[i];
+        if (child) {
+          f(child);
+        }
+      }
+    }
+    break;
+  }
+
+  case HeapTag::Scanned: {
+    auto slab = reinterpret_cast<Slab<RawObject*>*>(header->ObjectAddress());
+
+    int n = NUM_POINTERS(*header);
+    for (int i = 0; i < n; ++i) {
+      RawObject* child = slab->items_[i];
+      if (child) {
+        f(child);
+      }
+    }
+    break;
+  }
+  default:
+    // Only FixedSize and Scanned are pushed
+    FAIL(kShouldNotGetHere);
+  }
+}
+
 void MarkSweepHeap::TraceChildren() {
   while (!gray_stack_.empty()) {
     ObjHeader* header = gray_stack_.back();
     gray_stack_.pop_back();
 
-    switch (header->heap_tag) {
-    case HeapTag::FixedSize: {
-      auto fixed = reinterpret_cast<LayoutFixed*>(header->ObjectAddress());
-      int mask = FIELD_MASK(*header);
+    ForEachChild(header, [this](RawObject* child) { MaybeMarkAndPush(child); });
+  }
+}
 
-      for (int i = 0; i < kFieldMaskBits; ++i) {
-        if (mask & (1 << i)) {
-          RawObject* child = fixed->children_[i];
-          if (child) {
-            MaybeMarkAndPush(child);
-          }
-        }
+ObjHeader* MarkSweepHeap::TryMarkAtomic(RawObject* obj) {
+  ObjHeader* header = ObjHeader::FromObject(obj);
+  if (header->heap_tag == HeapTag::Global) {  // don't mark or push
+    return nullptr;
+  }
+
+  int obj_id = header->obj_id;
+  int pool_id = header->pool_id;
+  bool marked;
+  if (pool_id == kLargeObjPoolId) {
+    marked = large_objs_.TryMarkAtomic(obj_id);
+  } else
+  #ifndef NO_POOL_ALLOC
+      if (pool_id != 0) {
+    marked = pools_[pool_id - 1]->TryMarkAtomic(obj_id);
+  } else
+  #endif
+  {
+    marked = mark_set_.TryMarkAtomic(obj_id);
+  }
+
+  if (!marked || header->heap_tag == HeapTag::Opaque) {
+    return nullptr;
+  }
+  DCHECK(header->heap_tag == HeapTag::FixedSize ||
+         header->heap_tag == HeapTag::Scanned);
+  return header;
+}
+
+// Traces the graph from the gray stack with several threads.  Each thread has
+// its own gray stack, and when others are out of work, it moves half of its
+// stack to a shared one they take from.  Marking is done when every thread is
+// waiting for work and the shared stack is empty.
+//
+// The threads only live for one collection, so there's nothing to do when the
+// shell forks.
+class ParallelMarker {
+ public:
+  ParallelMarker(MarkSweepHeap* heap, int num_threads)
+      : heap_(heap), num_threads_(num_threads), num_idle_(0) {
+  }
+
+  void Run(std::vector<ObjHeader*>* gray_stack) {
+    shared_.swap(*gray_stack);
+
+    std::vector<std::thread> threads;
+    for (int i = 1; i < num_threads_; ++i) {
+      try {
+        threads.emplace_back(&ParallelMarker::Work, this);
+      } catch (const std::system_error&) {
+        // Couldn't start a thread, so mark with the ones we have
+        std::lock_guard<std::mutex> lock(mu_);
+        num_threads_ = i;
+        break;
       }
-      break;
     }
+    cv_.notify_all();  // in case num_threads_ changed
+    Work();  // the main thread marks too
 
-    case HeapTag::Scanned: {
-      auto slab = reinterpret_cast<Slab<RawObject*>*>(header->ObjectAddress());
+    for (auto& t : threads) {
+      t.join();
+    }
+  }
 
-      int n = NUM_POINTERS(*header);
-      for (int i = 0; i < n; ++i) {
-        RawObject* child = slab->items_[i];
-        if (child) {
-          MaybeMarkAndPush(child);
+ private:
+  // Threads don't share anything smaller than this
+  static const size_t kMinShare = 64;
+
+  void Work() {
+    std::vector<ObjHeader*> stack;
+    while (Take(&stack)) {
+      while (!stack.empty()) {
+        ObjHeader* header = stack.back();
+        stack.pop_back();
+
+        ForEachChild(header, [this, &stack](RawObject* child) {
+          ObjHeader* h = heap_->TryMarkAtomic(child);
+          if (h) {
+            stack.push_back(h);
+          }
+        });
+
+        if (stack.size() >= kMinShare &&
+            num_idle_.load(std::memory_order_relaxed) > 0) {
+          Share(&stack);
         }
       }
-      break;
     }
-    default:
-      // Only FixedSize and Scanned are pushed
-      FAIL(kShouldNotGetHere);
+  }
+
+  // Move the top half of a thread's stack to the shared one
+  void Share(std::vector<ObjHeader*>* stack) {
+    size_t half = stack->size() / 2;
+    {
+      std::lock_guard<std::mutex> lock(mu_);
+      shared_.insert(shared_.end(), stack->begin() + half, stack->end());
+    }
+    stack->resize(half);
+    cv_.notify_all();
+  }
+
+  // Wait for work on the shared stack.  Returns false when marking is done.
+  bool Take(std::vector<ObjHeader*>* stack) {
+    std::unique_lock<std::mutex> lock(mu_);
+    num_idle_++;
+    while (shared_.empty() && num_idle_ < num_threads_) {
+      cv_.wait(lock);
+    }
+    if (shared_.empty()) {  // every thread is idle
+      cv_.notify_all();
+      return false;
     }
+    num_idle_--;
+
+    size_t n = std::max<size_t>(1, shared_.size() / num_threads_);
+    stack->insert(stack->end(), shared_.end() - n, shared_.end());
+    shared_.resize(shared_.size() - n);
+    return true;
   }
+
+  MarkSweepHeap* heap_;
+  int num_threads_;  // guarded by mu_ after threads start
+
+  std::mutex mu_;
+  std::condition_variable cv_;
+  std::vector<ObjHeader*> shared_;  // guarded by mu_
+  std::atomic<int> num_idle_;       // written with mu_ held
+
+  DISALLOW_COPY_AND_ASSIGN(ParallelMarker);
+};
+
+void MarkSweepHeap::ParallelTraceChildren() {
+  ParallelMarker marker(this, gc_threads_);
+  marker.Run(&gray_stack_);
+  DCHECK(gray_stack_.empty());
 }
 
-void MarkSweepHeap::Sweep() {
+// Called after marking.  Counting the mark bits gives the number of live
+// objects right away; finding the dead ones is left to SweepSome().
+void MarkSweepHeap::StartSweep() {
   #ifndef NO_POOL_ALLOC
-  pool1_.Sweep();
-  pool2_.Sweep();
+  for (PoolBase* pool : pools_) {
+    pool->StartSweep();
+  }
   #endif
+  large_objs_.Sweep();
 
-  int last_live_index = 0;
-  int num_objs = live_objs_.size();
-  for (int i = 0; i < num_objs; ++i) {
-    ObjHeader* obj = live_objs_[i];
-    DCHECK(obj);  // malloc() shouldn't have returned nullptr
+  num_live_ = mark_set_.NumMarked();
+  sweeping_ = true;
+  sweep_read_ = 0;
+  sweep_write_ = 0;
+  sweep_end_ = live_objs_.size();
+
+  num_collections_++;
+  max_survived_ = std::max(max_survived_, num_live());
+}
+
+// Sweep up to max_objs objects in live_objs_.  Returns true if there are more.
+bool MarkSweepHeap::SweepSome(int max_objs) {
+  if (!sweeping_) {
+    return false;
+  }
 
-    bool is_live = mark_set_.IsMarked(obj->obj_id);
+  int end = sweep_end_ - sweep_read_ > max_objs ? sweep_read_ + max_objs
+                                                 : sweep_end_;
+  for (; sweep_read_ < end; ++sweep_read_) {
+    ObjHeader* obj = live_objs_[sweep_read_];
+    DCHECK(obj);  // malloc() shouldn't have returned nullptr
 
     // Compact live_objs_ and populate to_free_.  Note: doing the reverse could
     // be more efficient when many objects are dead.
-    if (is_live) {
-      live_objs_[last_live_index++] = obj;
+    if (mark_set_.IsMarked(obj->obj_id)) {
+      live_objs_[sweep_write_++] = obj;
     } else {
       to_free_.push_back(obj);
-      // free(obj);
-      num_live_--;
+      bytes_live_ -= obj_sizes_[obj->obj_id];
     }
   }
-  live_objs_.resize(last_live_index);  // remove dangling objects
 
-  num_collections_++;
-  max_survived_ = std::max(max_survived_, num_live());
+  if (sweep_read_ == sweep_end_) {
+    // Close the gap before the objects allocated while sweeping
+    live_objs_.erase(live_objs_.begin() + sweep_write_,
+                     live_objs_.begin() + sweep_end_);
+    sweeping_ = false;
+
+    GrowBytesThreshold();
+  }
+  return sweeping_;
 }
 
-int MarkSweepHeap::Collect() {
-  #ifdef GC_TIMING
-  struct timespec start, end;
-  if (clock_gettime(CLOCK_PROCESS_CPUTIME_ID, &start) < 0) {
-    FAIL("clock_gettime failed");
+// Now that we know how many bytes survived, grow the byte threshold like
+// the object threshold in Collect().
+void MarkSweepHeap::GrowBytesThreshold() {
+  int64_t bytes = bytes_live();
+  max_bytes_survived_ = std::max(max_bytes_survived_, bytes);
+
+  if (max_heap_bytes_ != -1) {
+    // If the survivors are over the soft limit, leave room to allocate, so we
+    // don't collect at every GC point
+    heap_limit_ = std::max(max_heap_bytes_, bytes + bytes / 4);
+  }
+
+  if (gc_bytes_threshold_ != -1 && bytes > gc_bytes_threshold_ / 4 * 3) {
+    gc_bytes_threshold_ = bytes * 2;
+    num_growths_++;
+    if (gc_verbose_) {
+      log("    %" PRId64 " bytes survived; gc_bytes_threshold set to %" PRId64,
+          bytes, gc_bytes_threshold_);
+    }
+  }
+}
+
+void MarkSweepHeap::FinishSweep() {
+  SweepSome(sweep_end_ - sweep_read_);
+  #ifndef NO_POOL_ALLOC
+  for (PoolBase* pool : pools_) {
+    pool->FinishSweep();
   }
   #endif
+}
+
+int MarkSweepHeap::Collect() {
+  double start_millis = NowMillis();
+  forked_ = false;
+
+  // The last collection may not be swept yet
+  FinishSweep();
 
   int num_roots = roots_.size();
   int num_globals = global_roots_.size();
@@ -261,9 +709,11 @@ int MarkSweepHeap::Collect() {
   // Resize it
   mark_set_.ReInit(greatest_obj_id_);
   #ifndef NO_POOL_ALLOC
-  pool1_.PrepareForGc();
-  pool2_.PrepareForGc();
+  for (PoolBase* pool : pools_) {
+    pool->PrepareForGc();
+  }
   #endif
+  large_objs_.PrepareForGc();
 
   // Mark roots.
   // Note: It might be nice to get rid of double pointers
@@ -282,12 +732,32 @@ int MarkSweepHeap::Collect() {
   }
 
   // Traverse object graph.
-  TraceChildren();
+  if (gc_threads_ > 1 && num_live() >= kMinParallelObjs && !profiling_) {
+    ParallelTraceChildren();
+  } else {
+    TraceChildren();
+  }
 
-  Sweep();
+  StartSweep();
+
+  // Sweep until we reach the pause target.  Allocate() sweeps the rest.
+  while (NowMillis() - start_millis < gc_max_pause_) {
+    bool more = SweepSome(kEagerSweepSlice);
+  #ifndef NO_POOL_ALLOC
+    for (PoolBase* pool : pools_) {
+      if (pool->gc_underway()) {
+        pool->SweepBlock();
+        more = true;
+      }
+    }
+  #endif
+    if (!more) {
+      break;
+    }
+  }
 
   if (gc_verbose_) {
-    log("    %d live after sweep", num_live());
+    log("    %d live after marking", num_live());
   }
 
   // We know how many are live.  If the number of objects is close to the
@@ -296,7 +766,7 @@ int MarkSweepHeap::Collect() {
   // -- being at 99% of the threshold and doing FUTILE mark and sweep.
 
   int water_mark = (gc_threshold_ * 3) / 4;
-  if (num_live() > water_mark) {
+  if (gc_threshold_ != -1 && num_live() > water_mark) {
     gc_threshold_ = num_live() * 2;
     num_growths_++;
     if (gc_verbose_) {
@@ -306,13 +776,7 @@ int MarkSweepHeap::Collect() {
   }
 
   #ifdef GC_TIMING
-  if (clock_gettime(CLOCK_PROCESS_CPUTIME_ID, &end) < 0) {
-    FAIL("clock_gettime failed");
-  }
-
-  double start_secs = start.tv_sec + start.tv_nsec / 1e9;
-  double end_secs = end.tv_sec + end.tv_nsec / 1e9;
-  double gc_millis = (end_secs - start_secs) * 1000.0;
+  double gc_millis = NowMillis() - start_millis;
 
   if (gc_verbose_) {
     log("    %.1f ms GC", gc_millis);
@@ -322,6 +786,7 @@ int MarkSweepHeap::Collect() {
   if (gc_millis > max_gc_millis_) {
     max_gc_millis_ = gc_millis;
   }
+  pause_millis_.push_back(gc_millis);
   #endif
 
   return num_live();  // for unit tests only
@@ -333,33 +798,58 @@ void MarkSweepHeap::PrintStats(int fd) {
   dprintf(fd, "  max survived     = %10d\n", max_survived_);
   dprintf(fd, "\n");
 
+  int num_allocated = num_allocated_ + large_objs_.num_allocated();
+  int64_t bytes_allocated = bytes_allocated_ + large_objs_.bytes_allocated();
   #ifndef NO_POOL_ALLOC
-  dprintf(fd, "  num allocated    = %10d\n",
-          num_allocated_ + pool1_.num_allocated() + pool2_.num_allocated());
-  dprintf(fd, "  num in heap      = %10d\n", num_allocated_);
-  #else
-  dprintf(fd, "  num allocated    = %10d\n", num_allocated_);
+  for (PoolBase* pool : pools_) {
+    num_allocated += pool->num_allocated();
+    bytes_allocated += pool->bytes_allocated();
+  }
   #endif
 
+  dprintf(fd, "  num allocated    = %10d\n", num_allocated);
+  dprintf(fd, "  num in heap      = %10d\n", num_allocated_);
   #ifndef NO_POOL_ALLOC
-  dprintf(fd, "  num in pool 1    = %10d\n", pool1_.num_allocated());
-  dprintf(fd, "  num in pool 2    = %10d\n", pool2_.num_allocated());
-  dprintf(
-      fd, "bytes allocated    = %10" PRId64 "\n",
-      bytes_allocated_ + pool1_.bytes_allocated() + pool2_.bytes_allocated());
-  #else
-  dprintf(fd, "bytes allocated    = %10" PRId64 "\n", bytes_allocated_);
+  for (int i = 0; i < kNumPools; ++i) {
+    dprintf(fd, "  num in pool %d    = %10d\n", i + 1,
+            pools_[i]->num_allocated());
+  }
   #endif
+  dprintf(fd, "  num large        = %10d\n", large_objs_.num_allocated());
+  dprintf(fd, "bytes allocated    = %10" PRId64 "\n", bytes_allocated);
 
   dprintf(fd, "\n");
   dprintf(fd, "  num gc points    = %10d\n", num_gc_points_);
   dprintf(fd, "  num collections  = %10d\n", num_collections_);
   dprintf(fd, "\n");
+  dprintf(fd, "bytes live         = %10" PRId64 "\n", bytes_live());
+  dprintf(fd, "max bytes survived = %10" PRId64 "\n", max_bytes_survived_);
+  dprintf(fd, "\n");
   dprintf(fd, "   gc threshold    = %10d\n", gc_threshold_);
+  dprintf(fd, "gc bytes threshold = %10" PRId64 "\n", gc_bytes_threshold_);
+  dprintf(fd, "  max heap bytes   = %10" PRId64 "\n", max_heap_bytes_);
   dprintf(fd, "  num growths      = %10d\n", num_growths_);
   dprintf(fd, "\n");
   dprintf(fd, "  max gc millis    = %10.1f\n", max_gc_millis_);
   dprintf(fd, "total gc millis    = %10.1f\n", total_gc_millis_);
+  dprintf(fd, " mean gc millis    = %10.1f\n",
+          num_collections_ ? total_gc_millis_ / num_collections_ : 0.0);
+
+  std::vector<double> pauses(pause_millis_);
+  std::sort(pauses.begin(), pauses.end());
+  int n = pauses.size();
+  dprintf(fd, "  p50 gc millis    = %10.1f\n", n ? pauses[n / 2] : 0.0);
+  dprintf(fd, "  p99 gc millis    = %10.1f\n", n ? pauses[n * 99 / 100] : 0.0);
+
+  int histogram[4] = {};  // < 1 ms, < 10 ms, < 100 ms, and more
+  for (double millis : pauses) {
+    histogram[millis < 1.0 ? 0 : millis < 10.0 ? 1 : millis < 100.0 ? 2 : 3]++;
+  }
+  dprintf(fd, "  pauses < 1 ms    = %10d\n", histogram[0]);
+  dprintf(fd, "  pauses < 10 ms   = %10d\n", histogram[1]);
+  dprintf(fd, "  pauses < 100 ms  = %10d\n", histogram[2]);
+  dprintf(fd, "  pauses >= 100 ms = %10d\n", histogram[3]);
+  dprintf(fd, "  gc threads       = %10d\n", gc_threads_);
   dprintf(fd, "\n");
   dprintf(fd, "roots capacity     = %10d\n",
           static_cast<int>(roots_.capacity()));
@@ -367,6 +857,149 @@ void MarkSweepHeap::PrintStats(int fd) {
           static_cast<int>(live_objs_.capacity()));
 }
 
+// Size of a marked object.  Pool objects count as the size of their cell.
+int64_t MarkSweepHeap::ObjectBytes(ObjHeader* header) {
+  int pool_id = header->pool_id;
+  if (pool_id == kLargeObjPoolId) {
+    return large_objs_.obj_size(header->obj_id);
+  }
+  #ifndef NO_POOL_ALLOC
+  if (pool_id != 0) {
+    return pools_[pool_id - 1]->cell_size();
+  }
+  #endif
+  return obj_sizes_[header->obj_id];
+}
+
+// Remember where every Nth object was allocated.  Objects that aren't sampled
+// may reuse the ID of a sampled object that died.
+void MarkSweepHeap::SampleSite(int obj_key, void* site) {
+  if (++num_since_sample_ >= profile_sample_) {
+    num_since_sample_ = 0;
+    sampled_sites_[obj_key] = site;
+  } else if (!sampled_sites_.empty()) {
+    sampled_sites_.erase(obj_key);
+  }
+}
+
+// Remember the type of every object, replacing the type of a dead object with
+// the same ID.  NewStr() and NewSlab() pass nullptr, and their type tags are
+// enough.
+void MarkSweepHeap::SetTypeName(int obj_key, const char* type_name) {
+  if (obj_key >= static_cast<int>(obj_types_.size())) {
+    int n = static_cast<int>(obj_types_.size());
+    obj_types_.resize(std::max(obj_key + 1, 2 * n));
+  }
+  obj_types_[obj_key] = type_name;
+}
+
+static const char* HeapTagName(int heap_tag) {
+  switch (heap_tag) {
+  case HeapTag::Opaque:
+    return "Opaque";
+  case HeapTag::FixedSize:
+    return "FixedSize";
+  case HeapTag::Scanned:
+    return "Scanned";
+  default:
+    return "Global";
+  }
+}
+
+// For objects that Alloc<T>() didn't make
+static const char* TypeTagName(int type_tag) {
+  switch (type_tag) {
+  case TypeTag::OtherClass:
+    return "OtherClass";
+  case TypeTag::BigStr:
+    return "BigStr";
+  case TypeTag::Slab:
+    return "Slab";
+  case TypeTag::Tuple:
+    return "Tuple";
+  case TypeTag::List:
+    return "List";
+  case TypeTag::Dict:
+    return "Dict";
+  default:
+    return "unknown";
+  }
+}
+
+const char* MarkSweepHeap::TypeName(ObjHeader* header) {
+  int obj_key = ObjectId(header->ObjectAddress());
+  if (obj_key < static_cast<int>(obj_types_.size()) && obj_types_[obj_key]) {
+    return obj_types_[obj_key];
+  }
+  return TypeTagName(header->type_tag);
+}
+
+// Turns GcTypeName<T>() into the name of T, e.g. syntax_asdl::Token
+static std::string ShortTypeName(const char* name) {
+  const char* start = strstr(name, "T = ");
+  if (start == nullptr) {
+    return name;  // from TypeTagName()
+  }
+  start += 4;
+  const char* end = strrchr(start, ']');
+  return end ? std::string(start, end - start) : std::string(start);
+}
+
+// Two GcTypeName<T>() strings for the same T aren't guaranteed to have the
+// same address, so merge rows with the same name.
+void MarkSweepHeap::ProfileByName(std::map<std::string, ProfileRow>* rows) {
+  for (auto& it : type_profile_) {
+    ProfileRow& row = (*rows)[ShortTypeName(it.first)];
+    row.heap_tag = it.second.heap_tag;
+    row.type_tag = it.second.type_tag;
+    row.num_objs += it.second.num_objs;
+    row.num_bytes += it.second.num_bytes;
+  }
+}
+
+// Writes one row per kind of live object, and with OILS_GC_PROFILE_SAMPLE,
+// one row per call site.  Site rows are scaled up by the sampling rate, and
+// the site is an offset for addr2line -e.
+void MarkSweepHeap::WriteProfile(const char* path) {
+  type_profile_.clear();
+  site_profile_.clear();
+
+  profiling_ = true;
+  Collect();
+  profiling_ = false;
+
+  int fd = open(path, O_WRONLY | O_CREAT | O_TRUNC, 0644);
+  if (fd < 0) {
+    log("Couldn't open GC profile %s", path);
+    return;
+  }
+
+  dprintf(fd,
+          "kind\theap_tag\ttype_tag\ttype_name\tsite\tnum_objs\tnum_bytes\n");
+  std::map<std::string, ProfileRow> rows;
+  ProfileByName(&rows);
+  for (auto& it : rows) {
+    ProfileRow& row = it.second;
+    dprintf(fd, "type\t%s\t%d\t%s\t-\t%d\t%" PRId64 "\n",
+            HeapTagName(row.heap_tag), row.type_tag, it.first.c_str(),
+            row.num_objs, row.num_bytes);
+  }
+  for (auto& it : site_profile_) {
+    uintptr_t offset = reinterpret_cast<uintptr_t>(it.first) -
+                       reinterpret_cast<uintptr_t>(&__executable_start);
+    dprintf(fd, "site\t-\t-\t-\t0x%" PRIxPTR "\t%d\t%" PRId64 "\n", offset,
+            it.second.num_objs * profile_sample_,
+            it.second.num_bytes * profile_sample_);
+  }
+  close(fd);
+}
+
+void MarkSweepHeap::MaybeWriteProfile() {
+  if (profile_path_) {
+    WriteProfile(profile_path_);
+  }
+}
+
 // Cleanup at the end of main() to remain ASAN-safe
 void MarkSweepHeap::MaybePrintStats() {
   int stats_fd = -1;
@@ -396,18 +1029,23 @@ void MarkSweepHeap::FreeEverything() {
   global_roots_.clear();
 
   Collect();
+  FinishSweep();
 
-  // Collect() told us what to free()
+  // Sweeping told us what to free()
   for (auto obj : to_free_) {
     free(obj);
   }
   #ifndef NO_POOL_ALLOC
-  pool1_.Free();
-  pool2_.Free();
+  for (PoolBase* pool : pools_) {
+    pool->Free();
+  }
   #endif
+  large_objs_.Free();
 }
 
 void MarkSweepHeap::CleanProcessExit() {
+  MaybeWriteProfile();
+
   char* e = getenv("OILS_GC_ON_EXIT");
   // collect by default; OILS_GC_ON_EXIT=0 overrides
   if (e && strcmp(e, "0") == 0) {
@@ -420,6 +1058,8 @@ void MarkSweepHeap::CleanProcessExit() {
 
 // for the main binary
 void MarkSweepHeap::ProcessExit() {
+  MaybeWriteProfile();
+
   #ifdef CLEAN_PROCESS_EXIT
   FreeEverything();
   #else
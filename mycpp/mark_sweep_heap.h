@@ -3,6 +3,9 @@
 
 #include <stdlib.h>
 
+#include <map>
+#include <string>
+#include <unordered_map>
 #include <vector>
 
 #include "mycpp/common.h"
@@ -34,6 +37,17 @@ class MarkSet {
     bits_[byte_index] |= (1 << bit_index);
   }
 
+  // Like Mark(), but can be called by several marking threads at once.
+  // Returns true if this call set the bit, so exactly one thread traces each
+  // object.
+  bool TryMarkAtomic(int obj_id) {
+    DCHECK(obj_id >= 0);
+    int byte_index = obj_id >> 3;
+    uint8_t bit = 1 << (obj_id & 0b111);
+    uint8_t old = __atomic_fetch_or(&bits_[byte_index], bit, __ATOMIC_RELAXED);
+    return (old & bit) == 0;
+  }
+
   // Called by Sweep()
   bool IsMarked(int obj_id) {
     DCHECK(obj_id >= 0);
@@ -42,6 +56,14 @@ class MarkSet {
     return bits_[byte_index] & (1 << bit_index);
   }
 
+  int NumMarked() {
+    int n = 0;
+    for (uint8_t byte : bits_) {
+      n += __builtin_popcount(byte);
+    }
+    return n;
+  }
+
   void Debug() {
     int n = bits_.size();
     dprintf(2, "[ ");
@@ -70,28 +92,40 @@ class MarkSet {
 // Note: within the context of the Pool allocator we refer to object IDs as cell
 // IDs because in addition to identifying an object they're also used to index
 // into the Cell storage.
-template <int CellsPerBlock, size_t CellSize>
-class Pool {
+//
+// PoolBase has the code, and Pool<> below gives it a size.  The heap keeps
+// an array of PoolBase*, so it can treat all of its size classes the same.
+class PoolBase {
  public:
-  static constexpr size_t kMaxObjSize = CellSize;
-  static constexpr int kBlockSize = CellSize * CellsPerBlock;
-
-  Pool() = default;
+  PoolBase(int cells_per_block, size_t cell_size)
+      : cells_per_block_(cells_per_block), cell_size_(cell_size) {
+  }
 
   void* Allocate(int* obj_id) {
     num_allocated_++;
 
+    // Sweep blocks lazily, until one of them has a free cell
+    while (!free_list_ && gc_underway_) {
+      SweepBlock();
+    }
+
     if (!free_list_) {
+      // Every cell ID must fit in ObjHeader::obj_id.  This check is ON in
+      // release mode.
+      CHECK(static_cast<int64_t>(blocks_.size() + 1) * cells_per_block_ - 1 <=
+            kMaxObjId);
+
       // Allocate a new Block and add every new Cell to the free list.
-      Block* block = static_cast<Block*>(malloc(sizeof(Block)));
+      uint8_t* block =
+          static_cast<uint8_t*>(malloc(cells_per_block_ * cell_size_));
       blocks_.push_back(block);
-      bytes_allocated_ += kBlockSize;
-      num_free_ += CellsPerBlock;
+      bytes_allocated_ += cells_per_block_ * cell_size_;
+      num_free_ += cells_per_block_;
 
       // The starting cell_id for Cells in this block.
-      int cell_id = (blocks_.size() - 1) * CellsPerBlock;
-      for (Cell& cell : block->cells) {
-        FreeCell* free_cell = reinterpret_cast<FreeCell*>(cell);
+      int cell_id = (blocks_.size() - 1) * cells_per_block_;
+      for (int i = 0; i < cells_per_block_; ++i) {
+        FreeCell* free_cell = reinterpret_cast<FreeCell*>(block + i * cell_size_);
         free_cell->id = cell_id++;
         free_cell->next = free_list_;
         free_list_ = free_cell;
@@ -108,7 +142,7 @@ class Pool {
   void PrepareForGc() {
     DCHECK(!gc_underway_);
     gc_underway_ = true;
-    mark_set_.ReInit(blocks_.size() * CellsPerBlock);
+    mark_set_.ReInit(blocks_.size() * cells_per_block_);
   }
 
   bool IsMarked(int cell_id) {
@@ -121,34 +155,88 @@ class Pool {
     mark_set_.Mark(cell_id);
   }
 
-  void Sweep() {
+  bool TryMarkAtomic(int cell_id) {
+    DCHECK(gc_underway_);
+    return mark_set_.TryMarkAtomic(cell_id);
+  }
+
+  // Called after marking.  num_live() is exact right away, but cells are only
+  // added to the free list by SweepBlock().
+  void StartSweep() {
     DCHECK(gc_underway_);
-    // Iterate over every Cell linking the free ones into a new free list.
-    num_free_ = 0;
     free_list_ = nullptr;
-    int cell_id = 0;
-    for (Block* block : blocks_) {
-      for (Cell& cell : block->cells) {
-        if (!mark_set_.IsMarked(cell_id)) {
-          num_free_++;
-          FreeCell* free_cell = reinterpret_cast<FreeCell*>(cell);
-          free_cell->id = cell_id;
-          free_cell->next = free_list_;
-          free_list_ = free_cell;
-        }
-        cell_id++;
+    num_free_ = blocks_.size() * cells_per_block_ - mark_set_.NumMarked();
+    sweep_block_ = 0;
+    if (blocks_.empty()) {
+      gc_underway_ = false;
+    }
+  }
+
+  // Link the unmarked Cells of the next Block into the free list.
+  void SweepBlock() {
+    DCHECK(gc_underway_);
+    uint8_t* block = blocks_[sweep_block_];
+    int cell_id = sweep_block_ * cells_per_block_;
+    for (int i = 0; i < cells_per_block_; ++i) {
+      if (!mark_set_.IsMarked(cell_id)) {
+        FreeCell* free_cell = reinterpret_cast<FreeCell*>(block + i * cell_size_);
+        free_cell->id = cell_id;
+        free_cell->next = free_list_;
+        free_list_ = free_cell;
+      }
+      cell_id++;
+    }
+
+    sweep_block_++;
+    if (sweep_block_ == static_cast<int>(blocks_.size())) {
+      gc_underway_ = false;
+    }
+  }
+
+  void FinishSweep() {
+    while (gc_underway_) {
+      SweepBlock();
+    }
+  }
+
+  // Stop sweeping without writing to the Blocks that are left, e.g. in a
+  // forked child.  Their dead Cells aren't reused until the next collection,
+  // which sweeps every Block again.
+  void AbandonSweep() {
+    if (!gc_underway_) {
+      return;
+    }
+    int n = blocks_.size() * cells_per_block_;
+    for (int cell_id = sweep_block_ * cells_per_block_; cell_id < n;
+         ++cell_id) {
+      if (!mark_set_.IsMarked(cell_id)) {
+        num_free_--;  // it was counted by StartSweep()
       }
     }
     gc_underway_ = false;
   }
 
+  void Sweep() {
+    StartSweep();
+    FinishSweep();
+  }
+
+  // Whether we're marking, or there are Blocks left to sweep
+  bool gc_underway() {
+    return gc_underway_;
+  }
+
   void Free() {
-    for (Block* block : blocks_) {
+    for (uint8_t* block : blocks_) {
       free(block);
     }
     blocks_.clear();
   }
 
+  size_t cell_size() {
+    return cell_size_;
+  }
+
   int num_allocated() {
     return num_allocated_;
   }
@@ -158,45 +246,156 @@ class Pool {
   }
 
   int num_live() {
-    return blocks_.size() * CellsPerBlock - num_free_;
+    return blocks_.size() * cells_per_block_ - num_free_;
   }
 
- private:
-  using Cell = uint8_t[CellSize];
-
-  struct Block {
-    Cell cells[CellsPerBlock];
-  };
-
+ protected:
   // Unused/free cells are tracked via a linked list of FreeCells. The FreeCells
   // are stored in the unused Cells, so it takes no extra memory to track them.
   struct FreeCell {
     int id;
     FreeCell* next;
   };
-  static_assert(CellSize >= sizeof(FreeCell), "CellSize is too small");
 
-  // Whether a GC is underway, for asserting that calls are in order.
+ private:
+  int cells_per_block_;
+  size_t cell_size_;
+
+  // Whether a GC is underway, i.e. marking or sweeping.  Also for asserting
+  // that calls are in order.
   bool gc_underway_ = false;
 
   FreeCell* free_list_ = nullptr;
-  int num_free_ = 0;
+  int num_free_ = 0;     // includes cells in Blocks that aren't swept yet
+  int sweep_block_ = 0;  // index of the next Block to sweep
   int num_allocated_ = 0;
   int64_t bytes_allocated_ = 0;
-  std::vector<Block*> blocks_;
+  std::vector<uint8_t*> blocks_;
   MarkSet mark_set_;
 
+  DISALLOW_COPY_AND_ASSIGN(PoolBase);
+};
+
+template <int CellsPerBlock, size_t CellSize>
+class Pool : public PoolBase {
+ public:
+  static constexpr size_t kMaxObjSize = CellSize;
+  static constexpr int kBlockSize = CellSize * CellsPerBlock;
+
+  Pool() : PoolBase(CellsPerBlock, CellSize) {
+  }
+
+ private:
+  static_assert(CellSize >= sizeof(FreeCell), "CellSize is too small");
+  static_assert(CellSize % sizeof(void*) == 0, "Cells must be aligned");
+
   DISALLOW_COPY_AND_ASSIGN(Pool<CellsPerBlock COMMA CellSize>);
 };
 
+// Objects of at least kLargeObjSize bytes get their own pages from mmap(), and
+// the pages are returned to the OS with munmap() as soon as they're swept.
+// Unlike memory freed with free(), this shrinks the process.
+const size_t kLargeObjSize = KiB(64);
+
+class LargeObjectSpace {
+ public:
+  LargeObjectSpace() = default;
+
+  void* Allocate(size_t num_bytes, int* obj_id);
+
+  void PrepareForGc() {
+    mark_set_.ReInit(objs_.size());
+  }
+
+  bool IsMarked(int obj_id) {
+    return mark_set_.IsMarked(obj_id);
+  }
+
+  void Mark(int obj_id) {
+    mark_set_.Mark(obj_id);
+  }
+
+  bool TryMarkAtomic(int obj_id) {
+    return mark_set_.TryMarkAtomic(obj_id);
+  }
+
+  // There are few large objects, so sweeping them all at once is cheap
+  void Sweep();
+  void Free();
+
+  int num_allocated() {
+    return num_allocated_;
+  }
+
+  int64_t bytes_allocated() {
+    return bytes_allocated_;
+  }
+
+  int num_live() {
+    return num_live_;
+  }
+
+  int64_t bytes_live() {
+    return bytes_live_;
+  }
+
+  size_t obj_size(int obj_id) {
+    return objs_[obj_id].len;
+  }
+
+ private:
+  struct Mapping {
+    void* addr;  // nullptr if the ID is free
+    size_t len;  // a multiple of the page size
+  };
+
+  std::vector<Mapping> objs_;  // indexed by obj_id
+  std::vector<int> free_ids_;
+  MarkSet mark_set_;
+
+  int num_live_ = 0;
+  int64_t bytes_live_ = 0;
+  int num_allocated_ = 0;
+  int64_t bytes_allocated_ = 0;
+
+  DISALLOW_COPY_AND_ASSIGN(LargeObjectSpace);
+};
+
+// pool_id in ObjHeader is 0 for malloc(), 1 to kNumPools for the pools, and
+// kLargeObjPoolId for LargeObjectSpace
+const int kNumPools = 6;
+const int kLargeObjPoolId = 7;
+
+static_assert(kNumPools < kLargeObjPoolId,
+              "Pool IDs overlap the large object space");
+static_assert(kLargeObjPoolId <= kMaxPoolId,
+              "pool_id doesn't fit in ObjHeader");
+
+// A row of the OILS_GC_PROFILE output
+struct ProfileRow {
+  int heap_tag;
+  int type_tag;
+  int num_objs;
+  int64_t num_bytes;
+};
+
 class MarkSweepHeap {
  public:
   // reserve 32 frames to start
   MarkSweepHeap() {
+#ifndef NO_POOL_ALLOC
+    pools_[0] = &pool1_;
+    pools_[1] = &pool2_;
+    pools_[2] = &pool3_;
+    pools_[3] = &pool4_;
+    pools_[4] = &pool5_;
+    pools_[5] = &pool6_;
+#endif
   }
 
   void Init();  // use default threshold
   void Init(int gc_threshold);
+  void Init(int gc_threshold, int64_t gc_bytes_threshold);
 
   void PushRoot(RawObject** p) {
     roots_.push_back(p);
@@ -210,50 +409,111 @@ class MarkSweepHeap {
     global_roots_.push_back(reinterpret_cast<RawObject*>(root));
   }
 
-  void* Allocate(size_t num_bytes, int* obj_id, int* pool_id);
+  // type_name is GcTypeName<T>() from Alloc<T>(), or nullptr
+  void* Allocate(size_t num_bytes, int* obj_id, int* pool_id,
+                 const char* type_name = nullptr);
+  void* AllocateObj(size_t num_bytes, int* obj_id, int* pool_id);
 
 #if 0
   void* Reallocate(void* p, size_t num_bytes);
 #endif
+  bool OverThreshold();
   int MaybeCollect();
   int Collect();
 
+  // Called in the child process after fork()
+  void OnFork(bool will_exec);
+
   void MaybeMarkAndPush(RawObject* obj);
   void TraceChildren();
 
-  void Sweep();
+  // Used by marking threads.  Returns the header of obj if this thread marked
+  // it and it has children to trace, and nullptr otherwise.
+  ObjHeader* TryMarkAtomic(RawObject* obj);
+  void ParallelTraceChildren();
+
+  void StartSweep();
+  bool SweepSome(int max_objs);
+  void FinishSweep();
+  void GrowBytesThreshold();
 
   void PrintStats(int fd);  // public for testing
 
+  // Collect, counting the live objects by type, and write them to a TSV file
+  void WriteProfile(const char* path);
+  void MaybeWriteProfile();
+  void SampleSite(int obj_key, void* site);
+  void SetTypeName(int obj_key, const char* type_name);
+  const char* TypeName(ObjHeader* header);
+  int64_t ObjectBytes(ObjHeader* header);
+  // The rows counted by the last WriteProfile(), by type name
+  void ProfileByName(std::map<std::string, ProfileRow>* rows);
+
   void CleanProcessExit();  // do one last GC, used in unit tests
   void ProcessExit();       // main() lets OS clean up, except ASAN variant
 
   int num_live() {
-    return num_live_
+    int n = num_live_ + large_objs_.num_live();
 #ifndef NO_POOL_ALLOC
-           + pool1_.num_live() + pool2_.num_live()
+    for (PoolBase* pool : pools_) {
+      n += pool->num_live();
+    }
 #endif
-        ;
+    return n;
+  }
+
+  // Includes objects that are dead but not swept yet.  Pool objects count as
+  // the size of their cell.
+  int64_t bytes_live() {
+    int64_t n = bytes_live_ + large_objs_.bytes_live();
+#ifndef NO_POOL_ALLOC
+    for (PoolBase* pool : pools_) {
+      n += static_cast<int64_t>(pool->num_live()) * pool->cell_size();
+    }
+#endif
+    return n;
   }
 
   bool is_initialized_ = true;  // mark/sweep doesn't need to be initialized
 
   // Runtime params
 
-  // Threshold is a number of live objects, since we aren't keeping track of
-  // total bytes
+  // Collect when there are more live objects than gc_threshold_, or more
+  // bytes than gc_bytes_threshold_.  Both grow with the survivors, and -1
+  // means a threshold isn't used.
   int gc_threshold_;
+  int64_t gc_bytes_threshold_ = -1;
+
+  // OILS_GC_MAX_HEAP: a soft limit on live bytes.  We collect when we're over
+  // heap_limit_, which is usually the same.
+  int64_t max_heap_bytes_ = -1;
+  int64_t heap_limit_ = -1;
 
   // Show debug logging
   bool gc_verbose_ = false;
 
+  // Number of threads that trace the object graph, including the main thread.
+  // With more than 1, big heaps are marked in parallel; sweeping is still
+  // serial.
+  int gc_threads_ = 1;
+
+  // Collect() sweeps until its pause reaches this many milliseconds, and
+  // Allocate() sweeps the rest in small slices
+  int gc_max_pause_ = 1;
+
+  // OILS_GC_PROFILE: write live objects to this file on exit, or at the next
+  // GC point after SIGUSR2
+  const char* profile_path_ = nullptr;
+  // OILS_GC_PROFILE_SAMPLE: remember the call site of every Nth allocation
+  int profile_sample_ = 0;
+
   // Current stats
   int num_live_ = 0;
-  // Should we keep track of sizes?
-  // int64_t bytes_live_ = 0;
+  int64_t bytes_live_ = 0;  // not including pools
 
   // Cumulative stats
   int max_survived_ = 0;  // max # live after a collection
+  int64_t max_bytes_survived_ = 0;
   int num_allocated_ = 0;
   int64_t bytes_allocated_ = 0;  // avoid overflow
   int num_gc_points_ = 0;        // manual collection points
@@ -261,6 +521,7 @@ class MarkSweepHeap {
   int num_growths_;
   double max_gc_millis_ = 0.0;
   double total_gc_millis_ = 0.0;
+  std::vector<double> pause_millis_;  // one per collection
 
 #ifndef NO_POOL_ALLOC
   // 16,384 / 24 bytes = 682 cells (rounded), 16,368 bytes
@@ -269,19 +530,59 @@ class MarkSweepHeap {
   // differences
   Pool<682, 24> pool1_;
   Pool<341, 48> pool2_;
+  // Bigger strings, slabs, and ASDL nodes.  Blocks are also under 16 Ki.
+  Pool<255, 64> pool3_;
+  Pool<170, 96> pool4_;
+  Pool<127, 128> pool5_;
+  Pool<63, 256> pool6_;
+
+  // Smallest first.  The pool_id of an object is its index + 1.
+  PoolBase* pools_[kNumPools];
 #endif
 
+  LargeObjectSpace large_objs_;  // pool_id is kLargeObjPoolId
+
   std::vector<RawObject**> roots_;
   std::vector<RawObject*> global_roots_;
 
-  // Allocate() appends live objects, and Sweep() compacts it
+  // Objects from malloc(), which are between the pool sizes and
+  // kLargeObjSize.  Allocate() appends live objects, and SweepSome() compacts
+  // it.
   std::vector<ObjHeader*> live_objs_;
-  // Allocate lazily frees these, and Sweep() replenishes it
+  // Allocate lazily frees these, and SweepSome() replenishes it
   std::vector<ObjHeader*> to_free_;
+  // Size of each object in live_objs_, indexed by obj_id
+  std::vector<size_t> obj_sizes_;
+
+  // While sweeping, live_objs_[sweep_read_, sweep_end_) hasn't been swept,
+  // and the survivors before it were moved to [0, sweep_write_).  Objects
+  // allocated while sweeping are appended after sweep_end_.
+  bool sweeping_ = false;
+  // After fork(), Allocate() doesn't sweep, because that would copy pages
+  // shared with the parent.  The next Collect() clears it.
+  bool forked_ = false;
+  int sweep_read_ = 0;
+  int sweep_write_ = 0;
+  int sweep_end_ = 0;
 
   std::vector<ObjHeader*> gray_stack_;
   MarkSet mark_set_;
 
+  // With OILS_GC_PROFILE, ObjectId() -> GcTypeName<T>() of each object made
+  // by Alloc<T>().  ASDL type tags aren't unique across sum types, so this is
+  // how the profile tells them apart.
+  std::vector<const char*> obj_types_;
+
+  // While WriteProfile() collects, MaybeMarkAndPush() counts every object in
+  // type_profile_, keyed by TypeName()
+  bool profiling_ = false;
+  std::unordered_map<const char*, ProfileRow> type_profile_;
+  // Sampled objects -> the return address of Allocate().  The key is
+  // ObjectId(), which is unique among live objects.
+  std::unordered_map<int, void*> sampled_sites_;
+  int num_since_sample_ = 0;
+  std::unordered_map<void*, ProfileRow> site_profile_;
+
   int greatest_obj_id_ = 0;
 
  private:
@@ -1,5 +1,9 @@
 #include "mycpp/mark_sweep_heap.h"
 
+#include <signal.h>    // sigaction
+#include <sys/wait.h>  // waitpid
+#include <unistd.h>    // fork
+
 #include "mycpp/gc_alloc.h"  // gHeap
 #include "mycpp/gc_list.h"
 #include "vendor/greatest.h"
@@ -46,6 +50,12 @@ TEST mark_set_test() {
   mark_set.Mark(big);
   ASSERT_EQ(true, mark_set.IsMarked(big));
 
+  // Only the first call reports that it set the bit
+  ASSERT_EQ(true, mark_set.TryMarkAtomic(big - 1));
+  ASSERT_EQ(false, mark_set.TryMarkAtomic(big - 1));
+  ASSERT_EQ(true, mark_set.IsMarked(big - 1));
+  ASSERT_EQ(false, mark_set.TryMarkAtomic(big));
+
   // ASAN will detect buffer overflow
   // mark_set.Mark(13220);
 
@@ -171,6 +181,382 @@ TEST cycle_collection_test() {
   PASS();
 }
 
+TEST parallel_mark_test() {
+  List<List<BigStr *> *> *outer = nullptr;
+  StackRoots _roots({&outer});
+
+  // Big enough to be marked in parallel
+  outer = NewList<List<BigStr *> *>();
+  for (int i = 0; i < 300; ++i) {
+    List<BigStr *> *inner = NewList<BigStr *>();
+    outer->append(inner);
+    for (int j = 0; j < 500; ++j) {
+      inner->append(str(j));
+    }
+  }
+
+  ASSERT_EQ(1, gHeap.gc_threads_);
+  int serial_live = gHeap.Collect();
+
+  gHeap.gc_threads_ = 4;
+  for (int i = 0; i < 150000; ++i) {
+    StrFromC("garbage");
+  }
+  int parallel_live = gHeap.Collect();
+  gHeap.gc_threads_ = 1;
+
+  log("serial %d, parallel %d live", serial_live, parallel_live);
+  ASSERT_EQ_FMT(serial_live, parallel_live, "%d");
+
+  // Everything reachable survived
+  for (int i = 0; i < 300; ++i) {
+    List<BigStr *> *inner = outer->at(i);
+    ASSERT_EQ(500, len(inner));
+    ASSERT(str_equals(str(499), inner->at(499)));
+  }
+
+  outer = nullptr;
+  ASSERT(gHeap.Collect() < serial_live);
+
+  PASS();
+}
+
+TEST lazy_sweep_test() {
+  List<BigStr *> *strs = nullptr;
+  StackRoots _roots({&strs});
+
+  gHeap.gc_max_pause_ = 0;  // Collect() doesn't sweep
+  gHeap.Collect();
+  gHeap.FinishSweep();
+
+  // Strings this long aren't in a pool
+  char big[300];
+  memset(big, 'x', sizeof(big) - 1);
+  big[sizeof(big) - 1] = '\0';
+  strs = NewList<BigStr *>();
+  for (int i = 0; i < 1000; ++i) {
+    strs->append(StrFromC(big));
+    StrFromC(big);  // garbage
+  }
+
+  int num_free = gHeap.to_free_.size();
+  int num_live = gHeap.Collect();
+  ASSERT(gHeap.sweeping_);
+  ASSERT_EQ_FMT(num_free, static_cast<int>(gHeap.to_free_.size()), "%d");
+  // Counted from the mark bits
+  ASSERT(num_live >= 1000 && num_live < 2000);
+
+  // Allocations sweep the rest
+  int n = 0;
+  while (gHeap.sweeping_) {
+    StrFromC(big);
+    n++;
+  }
+  log("swept in %d allocations", n);
+  ASSERT(n <= 2000);
+  ASSERT(static_cast<int>(gHeap.to_free_.size()) > num_free - n);
+  ASSERT_EQ_FMT(num_live + n, gHeap.num_live(), "%d");
+
+  for (int i = 0; i < 1000; ++i) {
+    ASSERT(str_equals0(big, strs->at(i)));
+  }
+  gHeap.gc_max_pause_ = 1;
+
+  PASS();
+}
+
+TEST bytes_threshold_test() {
+  BigStr *big = nullptr;
+  StackRoots _roots({&big});
+
+  int saved_threshold = gHeap.gc_threshold_;
+  gHeap.gc_threshold_ = -1;
+  gHeap.gc_bytes_threshold_ = MiB(1);
+  gHeap.Collect();
+  gHeap.FinishSweep();
+  int64_t before = gHeap.bytes_live();
+
+  // A few big strings trigger a collection
+  for (int i = 0; i < 3; ++i) {
+    NewStr(KiB(400));
+  }
+  ASSERT(gHeap.bytes_live() >= before + 3 * KiB(400));
+  ASSERT(gHeap.MaybeCollect() != -1);
+  gHeap.FinishSweep();
+  ASSERT(gHeap.bytes_live() < before + KiB(400));
+
+  // The soft limit forces a collection under the byte threshold
+  gHeap.gc_bytes_threshold_ = MiB(100);
+  gHeap.max_heap_bytes_ = before + KiB(300);
+  gHeap.heap_limit_ = gHeap.max_heap_bytes_;
+  NewStr(KiB(400));
+  ASSERT(gHeap.MaybeCollect() != -1);
+  gHeap.FinishSweep();
+
+  // When the survivors are over the limit, we still leave room to allocate
+  big = NewStr(KiB(400));
+  gHeap.Collect();
+  gHeap.FinishSweep();
+  log("bytes live %ld, limit %ld", gHeap.bytes_live(), gHeap.heap_limit_);
+  ASSERT(gHeap.heap_limit_ > gHeap.bytes_live());
+#ifndef GC_ALWAYS
+  ASSERT_EQ(-1, gHeap.MaybeCollect());
+#endif
+
+  gHeap.gc_threshold_ = saved_threshold;
+  gHeap.gc_bytes_threshold_ = -1;
+  gHeap.max_heap_bytes_ = -1;
+  gHeap.heap_limit_ = -1;
+
+  PASS();
+}
+
+TEST fork_policy_test() {
+  int saved_threshold = gHeap.gc_threshold_;
+  gHeap.gc_max_pause_ = 0;  // leave objects to sweep
+  for (int i = 0; i < 1000; ++i) {
+    StrFromC("garbage");
+  }
+  gHeap.Collect();
+  ASSERT(gHeap.sweeping_);
+
+  // Like a child that's about to exec()
+  gHeap.OnFork(true);
+  ASSERT_EQ(-1, gHeap.gc_threshold_);
+  int num_free = gHeap.to_free_.size();
+  for (int i = 0; i < 2000; ++i) {
+    StrFromC("garbage");
+  }
+  // Allocating didn't sweep
+  ASSERT(gHeap.sweeping_);
+  ASSERT_EQ_FMT(num_free, static_cast<int>(gHeap.to_free_.size()), "%d");
+#ifndef GC_ALWAYS
+  ASSERT_EQ(-1, gHeap.MaybeCollect());
+#endif
+
+  // Other children wait until the heap doubles
+  gHeap.gc_threshold_ = 100;
+  gHeap.OnFork(false);
+  ASSERT_EQ_FMT(gHeap.num_live() * 2, gHeap.gc_threshold_, "%d");
+
+  gHeap.Collect();
+  ASSERT(!gHeap.forked_);
+  gHeap.FinishSweep();
+
+  gHeap.gc_threshold_ = saved_threshold;
+  gHeap.gc_max_pause_ = 1;
+
+  PASS();
+}
+
+// Pool cells are swept lazily by Allocate().  A forked child must not do that,
+// because it writes free list links into pages shared with the parent.
+TEST fork_during_pool_sweep_test() {
+  const int n = 1000;
+  BigStr *garbage[n];  // not rooted
+  gHeap.Collect();
+  gHeap.FinishSweep();
+  for (int i = 0; i < n; ++i) {
+    garbage[i] = StrFromC("garbage");
+  }
+  gHeap.gc_max_pause_ = 0;
+  gHeap.Collect();
+  bool sweeping = false;
+  for (PoolBase *pool : gHeap.pools_) {
+    sweeping = sweeping || pool->gc_underway();
+  }
+  ASSERT(sweeping);
+
+  pid_t pid = fork();
+  ASSERT(pid != -1);
+  if (pid == 0) {
+    gHeap.OnFork(false);
+    int num_live = gHeap.num_live();
+    for (int i = 0; i < 2 * n; ++i) {
+      StrFromC("new");
+    }
+    // No dead cell was swept and reused
+    int status = 0;
+    for (int i = 0; i < n; ++i) {
+      if (!str_equals0("garbage", garbage[i])) {
+        status = 1;
+      }
+    }
+    for (PoolBase *pool : gHeap.pools_) {
+      if (pool->gc_underway()) {
+        status = 2;
+      }
+    }
+    if (gHeap.num_live() != num_live + 2 * n) {
+      status = 3;
+    }
+    // The next collection reclaims them
+    gHeap.Collect();
+    gHeap.FinishSweep();
+    if (gHeap.num_live() >= num_live) {
+      status = 4;
+    }
+    _exit(status);
+  }
+
+  int wait_status;
+  ASSERT_EQ(pid, waitpid(pid, &wait_status, 0));
+  ASSERT(WIFEXITED(wait_status));
+  ASSERT_EQ_FMT(0, WEXITSTATUS(wait_status), "%d");
+
+  gHeap.FinishSweep();
+  gHeap.gc_max_pause_ = 1;
+
+  PASS();
+}
+
+TEST large_object_test() {
+  BigStr *big = nullptr;
+  StackRoots _roots({&big});
+
+  gHeap.Collect();
+  gHeap.FinishSweep();
+  int num_large = gHeap.large_objs_.num_live();
+
+  big = NewStr(KiB(100));
+  ASSERT_EQ(kLargeObjPoolId,
+            static_cast<int>(ObjHeader::FromObject(big)->pool_id));
+  memset(big->data_, 'x', KiB(100));
+  for (int i = 0; i < 10; ++i) {
+    NewStr(KiB(200));  // garbage
+  }
+  ASSERT_EQ_FMT(num_large + 11, gHeap.large_objs_.num_live(), "%d");
+
+  // The garbage is unmapped right after marking
+  gHeap.Collect();
+  ASSERT_EQ_FMT(num_large + 1, gHeap.large_objs_.num_live(), "%d");
+  ASSERT(gHeap.large_objs_.bytes_live() >= KiB(100));
+  ASSERT_EQ('x', big->data_[KiB(100) - 1]);
+
+  // IDs are reused
+  NewStr(KiB(200));
+  ASSERT_EQ_FMT(num_large + 2, gHeap.large_objs_.num_live(), "%d");
+
+  PASS();
+}
+
+// Like two ASDL variants of different sum types, with the same type tag
+class ProfiledA {
+ public:
+  static constexpr ObjHeader obj_header() {
+    return ObjHeader::AsdlClass(1, 0);
+  }
+  int x;
+};
+
+class ProfiledB {
+ public:
+  static constexpr ObjHeader obj_header() {
+    return ObjHeader::AsdlClass(1, 0);
+  }
+  int y;
+};
+
+TEST profile_test() {
+  List<BigStr *> *strs = nullptr;
+  ProfiledA *a1 = nullptr;
+  ProfiledA *a2 = nullptr;
+  ProfiledB *b = nullptr;
+  StackRoots _roots({&strs, &a1, &a2, &b});
+
+  const char *path = "_tmp/mark_sweep_heap_test.profile.tsv";
+  gHeap.profile_path_ = path;
+  gHeap.profile_sample_ = 1;
+  strs = NewList<BigStr *>();
+  for (int i = 0; i < 100; ++i) {
+    strs->append(StrFromC("profiled"));
+  }
+  a1 = Alloc<ProfiledA>();
+  a2 = Alloc<ProfiledA>();
+  b = Alloc<ProfiledB>();
+
+  gHeap.WriteProfile(path);
+  gHeap.profile_path_ = nullptr;
+  gHeap.profile_sample_ = 0;
+
+  std::map<std::string, ProfileRow> rows;
+  gHeap.ProfileByName(&rows);
+  for (auto &it : rows) {
+    log("%s %d", it.first.c_str(), it.second.num_objs);
+  }
+
+  ProfileRow &row = rows["BigStr"];
+  ASSERT(row.num_objs >= 100);
+  ASSERT(row.num_bytes >= 100 * static_cast<int>(sizeof(BigStr)));
+  ASSERT_EQ(HeapTag::Opaque, row.heap_tag);
+  // List<T> is a plain class, and its items are in a Slab
+  ASSERT(rows["List<BigStr*>"].num_objs >= 1);
+  ASSERT_EQ(TypeTag::OtherClass, rows["List<BigStr*>"].type_tag);
+  ASSERT(rows["Slab"].num_objs >= 1);
+
+  // The same type tag, but counted by name
+  ASSERT_EQ(2, rows["ProfiledA"].num_objs);
+  ASSERT_EQ(1, rows["ProfiledB"].num_objs);
+  ASSERT_EQ(1, rows["ProfiledB"].type_tag);
+  ASSERT_EQ(0, rows.count("unknown"));
+
+  // All 100 strings came from StrFromC(), plus the list and its slab
+  int num_sampled = 0;
+  for (auto &it : gHeap.site_profile_) {
+    num_sampled += it.second.num_objs;
+  }
+  ASSERT(num_sampled >= 100);
+
+  FILE *f = fopen(path, "r");
+  ASSERT(f != nullptr);
+  char line[256];
+  int num_lines = 0;
+  bool found = false;
+  while (fgets(line, sizeof(line), f)) {
+    if (strstr(line, "\tScanned\t1\tProfiledA\t-\t2\t")) {
+      found = true;
+    }
+    num_lines++;
+  }
+  fclose(f);
+  ASSERT(found);
+  ASSERT(num_lines > 2);
+
+  gHeap.sampled_sites_.clear();
+
+  PASS();
+}
+
+static sighandler_t Usr2Handler() {
+  struct sigaction act;
+  sigaction(SIGUSR2, nullptr, &act);
+  return act.sa_handler;
+}
+
+TEST profile_signal_test() {
+  setenv("OILS_GC_PROFILE", "_tmp/mark_sweep_heap_test.unused.tsv", 1);
+
+  // trap '' USR2 in the parent is kept
+  signal(SIGUSR2, SIG_IGN);
+  MarkSweepHeap *heap = new MarkSweepHeap();
+  heap->Init();
+  ASSERT_EQ(SIG_IGN, Usr2Handler());
+  delete heap;
+
+  // Otherwise the profiler takes it
+  signal(SIGUSR2, SIG_DFL);
+  heap = new MarkSweepHeap();
+  heap->Init();
+  ASSERT(Usr2Handler() != SIG_DFL);
+  ASSERT(Usr2Handler() != SIG_IGN);
+  delete heap;
+
+  signal(SIGUSR2, SIG_DFL);
+  unsetenv("OILS_GC_PROFILE");
+
+  PASS();
+}
+
 TEST pool_sanity_check() {
   Pool<2, 32> p;
 
@@ -197,6 +583,25 @@ TEST pool_sanity_check() {
   PASS();
 }
 
+// Object IDs that don't fit in ObjHeader must fail loudly, not wrap around
+TEST pool_obj_id_overflow() {
+  pid_t pid = fork();
+  if (pid == 0) {
+    // A block would need cell IDs past kMaxObjId
+    PoolBase p(kMaxObjId + 2, 32);
+    int obj_id;
+    p.Allocate(&obj_id);
+    _exit(0);  // not reached
+  }
+
+  int status;
+  ASSERT_EQ(pid, waitpid(pid, &status, 0));
+  ASSERT(WIFSIGNALED(status));
+  ASSERT_EQ(SIGABRT, WTERMSIG(status));
+
+  PASS();
+}
+
 TEST pool_sweep() {
   Pool<2, 32> p;
 
@@ -221,6 +626,39 @@ TEST pool_sweep() {
   PASS();
 }
 
+TEST pool_lazy_sweep() {
+  Pool<2, 32> p;
+
+  int obj_id;
+  int keep_id;
+  p.Allocate(&obj_id);
+  p.Allocate(&obj_id);
+  p.Allocate(&keep_id);  // second block
+  p.PrepareForGc();
+  p.Mark(keep_id);
+  p.StartSweep();
+
+  // Known before any block is swept
+  ASSERT_EQ(1, p.num_live());
+  ASSERT(p.gc_underway());
+
+  // Sweeps the first block, which has 2 free cells
+  p.Allocate(&obj_id);
+  ASSERT(p.gc_underway());
+  p.Allocate(&obj_id);
+  ASSERT(p.gc_underway());
+
+  // Sweeps the second block
+  p.Allocate(&obj_id);
+  ASSERT(obj_id != keep_id);
+  ASSERT(!p.gc_underway());
+  ASSERT_EQ(4, p.num_live());
+  ASSERT_EQ(p.bytes_allocated(), 128);
+
+  p.Free();
+  PASS();
+}
+
 TEST pool_marked_objs_are_kept_alive() {
   Pool<1, 32> p;
 
@@ -237,6 +675,35 @@ TEST pool_marked_objs_are_kept_alive() {
   PASS();
 }
 
+TEST pool_size_classes() {
+#ifndef NO_POOL_ALLOC
+  MarkSweepHeap heap;
+  int obj_id;
+  int pool_id;
+  size_t sizes[] = {24, 48, 64, 96, 128, 256};
+  for (int i = 0; i < kNumPools; ++i) {
+    void *p = heap.Allocate(sizes[i], &obj_id, &pool_id);
+    ASSERT_EQ(i + 1, pool_id);
+    ASSERT_EQ(0, reinterpret_cast<uintptr_t>(p) % sizeof(void *));
+  }
+
+  // Between the pools and the large object space
+  void *p = heap.Allocate(sizes[kNumPools - 1] + 1, &obj_id, &pool_id);
+  ASSERT_EQ(0, pool_id);
+  free(p);
+
+  heap.Allocate(kLargeObjSize, &obj_id, &pool_id);
+  ASSERT_EQ(kLargeObjPoolId, pool_id);
+
+  for (PoolBase *pool : heap.pools_) {
+    pool->Free();
+  }
+  heap.large_objs_.Free();
+#endif
+
+  PASS();
+}
+
 TEST pool_size() {
   MarkSweepHeap heap;
   log("pool1 kMaxObjSize %d", heap.pool1_.kMaxObjSize);
@@ -266,9 +733,12 @@ TEST pool_size() {
 
 SUITE(pool_alloc) {
   RUN_TEST(pool_sanity_check);
+  RUN_TEST(pool_obj_id_overflow);
   RUN_TEST(pool_sweep);
+  RUN_TEST(pool_lazy_sweep);
   RUN_TEST(pool_marked_objs_are_kept_alive);
   RUN_TEST(pool_size);
+  RUN_TEST(pool_size_classes);
 }
 
 int f(BigStr *s, List<int> *mylist) {
@@ -357,6 +827,14 @@ int main(int argc, char **argv) {
   RUN_TEST(string_collection_test);
   RUN_TEST(list_collection_test);
   RUN_TEST(cycle_collection_test);
+  RUN_TEST(parallel_mark_test);
+  RUN_TEST(lazy_sweep_test);
+  RUN_TEST(bytes_threshold_test);
+  RUN_TEST(fork_policy_test);
+  RUN_TEST(fork_during_pool_sweep_test);
+  RUN_TEST(large_object_test);
+  RUN_TEST(profile_test);
+  RUN_TEST(profile_signal_test);
 
   RUN_SUITE(pool_alloc);
 
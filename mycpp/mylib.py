@@ -40,6 +40,11 @@ def MaybeCollect():
     pass
 
 
+def OnFork(will_exec):
+    # type: (bool) -> None
+    pass
+
+
 def NewDict():
     # type: () -> Dict[str, Any]
     """Make dictionaries ordered in Python, e.g. for JSON.
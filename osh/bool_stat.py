@@ -13,6 +13,33 @@ from _devbuild.gen.syntax_asdl import word_t, loc
 from core.error import e_die
 from display import ui
 
+from typing import Dict, Optional
+
+# The last stat() result, so [ -e x ] && [ -r x ] && [ -s x ] only calls stat()
+# once.  None means it failed.  The evaluator calls ClearStatCache() before
+# any command other than test/[, since it could change the file system.
+_stat_cache = {}  # type: Dict[str, Optional[posix.stat_result]]
+
+
+def ClearStatCache():
+    # type: () -> None
+    _stat_cache.clear()
+
+
+def _Stat(path):
+    # type: (str) -> Optional[posix.stat_result]
+    if path in _stat_cache:
+        return _stat_cache[path]
+
+    try:
+        st = posix.stat(path)  # type: Optional[posix.stat_result]
+    except OSError:
+        st = None
+
+    _stat_cache.clear()  # hold at most one entry
+    _stat_cache[path] = st
+    return st
+
 
 def isatty(fd_str, blame_word):
     # type: (str, word_t) -> bool
@@ -42,9 +69,8 @@ def DoUnaryOp(op_id, s):
 
         return stat.S_ISLNK(mode)
 
-    try:
-        st = posix.stat(s)
-    except OSError as e:
+    st = _Stat(s)
+    if st is None:
         # TODO: simple_test_builtin should this as status=2.
         # Problem: we really need errno, because test -f / is bad argument,
         # while test -f /nonexistent is a good argument but failed.  Gah.
@@ -107,14 +133,8 @@ def DoUnaryOp(op_id, s):
 
 def DoBinaryOp(op_id, s1, s2):
     # type: (Id_t, str, str) -> bool
-    try:
-        st1 = posix.stat(s1)
-    except OSError:
-        st1 = None
-    try:
-        st2 = posix.stat(s2)
-    except OSError:
-        st2 = None
+    st1 = _Stat(s1)
+    st2 = _Stat(s2)
 
     if op_id in (Id.BoolBinary_nt, Id.BoolBinary_ot):
         # pretend it's a very old file
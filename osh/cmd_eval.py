@@ -40,7 +40,15 @@ from _devbuild.gen.syntax_asdl import (
     Proc,
     Func,
     assign_op_e,
+    expr,
+    expr_e,
     expr_t,
+    y_lhs_e,
+    sh_lhs,
+    sh_lhs_e,
+    word_part_e,
+    BracedVarSub,
+    DoubleQuoted,
     proc_sig,
     proc_sig_e,
     redir_param,
@@ -67,6 +75,7 @@ from _devbuild.gen.types_asdl import redir_arg_type_e
 from _devbuild.gen.value_asdl import (value, value_e, value_t, y_lvalue,
                                       y_lvalue_e, y_lvalue_t, LeftName, Obj)
 
+from core import bash_impl
 from core import dev
 from core import error
 from core import executor
@@ -82,6 +91,7 @@ from frontend import consts
 from frontend import lexer
 from frontend import location
 from frontend import typed_args
+from osh import bool_stat
 from osh import braces
 from osh import sh_expr_eval
 from osh import word_eval
@@ -102,7 +112,7 @@ from typing import List, Dict, Tuple, Optional, Any, cast, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from _devbuild.gen.option_asdl import builtin_t
-    from _devbuild.gen.runtime_asdl import cmd_value_t
+    from _devbuild.gen.runtime_asdl import cmd_value_t, scope_t
     from _devbuild.gen.syntax_asdl import Redir, EnvPair
     from core.alloc import Arena
     from core import optview
@@ -220,7 +230,8 @@ def PlusEquals(old_val, val):
                 old_val = cast(value.BashArray, UP_old_val)
                 to_append = cast(value.BashArray, UP_val)
 
-                # TODO: MUTATE the existing value for efficiency?
+                # Copy, since old_val may be in another scope.
+                # Mem.AppendArray() mutates it when it's safe.
                 strs = []  # type: List[str]
                 strs.extend(old_val.strs)
                 strs.extend(to_append.strs)
@@ -229,6 +240,25 @@ def PlusEquals(old_val, val):
             else:
                 raise AssertionError()  # parsing should prevent this
 
+        elif case(value_e.SparseArray):
+            if tag == value_e.Str:
+                e_die("Can't append string to array")
+
+            elif tag == value_e.BashArray:
+                sparse_val = bash_impl.SparseArray_Copy(
+                    cast(value.SparseArray, UP_old_val))
+                to_append = cast(value.BashArray, UP_val)
+
+                bash_impl.SparseArray_Append(sparse_val, to_append.strs)
+                if bash_impl.SparseArray_IsDense(sparse_val):
+                    val = value.BashArray(
+                        bash_impl.SparseArray_GetValues(sparse_val))
+                else:
+                    val = sparse_val
+
+            else:
+                raise AssertionError()  # parsing should prevent this
+
         elif case(value_e.BashAssoc):
             # TODO: Could try to match bash, it will append to ${A[0]}
             pass
@@ -239,6 +269,42 @@ def PlusEquals(old_val, val):
     return val
 
 
+def _IsPureStrExpr(node):
+    # type: (expr_t) -> bool
+    """Can evaluating this YSH expression change any variables?
+
+    Used for the fast path of setvar s = s ++ x, which evaluates x before
+    looking at s.
+    """
+    UP_node = node
+    with tagswitch(node) as case:
+        if case(expr_e.Var, expr_e.Const, expr_e.SingleQuoted,
+                expr_e.SimpleVarSub):
+            return True
+
+        elif case(expr_e.DoubleQuoted):
+            node = cast(DoubleQuoted, UP_node)
+            for part in node.parts:
+                UP_part = part
+                with tagswitch(part) as case2:
+                    if case2(word_part_e.Literal, word_part_e.EscapedLiteral,
+                             word_part_e.SimpleVarSub):
+                        pass
+                    elif case2(word_part_e.BracedVarSub):
+                        # Not ${x:=default} or ${!ref}
+                        part = cast(BracedVarSub, UP_part)
+                        if (part.prefix_op is not None or
+                                part.bracket_op is not None or
+                                part.suffix_op is not None):
+                            return False
+                    else:
+                        return False
+            return True
+
+        else:
+            return False
+
+
 class ctx_LoopLevel(object):
     """For checking for invalid control flow."""
 
@@ -307,6 +373,14 @@ class CommandEvaluator(object):
         self.signal_safe = signal_safe
 
         self.loop_level = 0  # for detecting bad top-level break/continue
+
+        # break, continue, and return unwind by setting these, and returning
+        # from each _Execute() call.  C++ exceptions are too slow for that.
+        # vm.IntControlFlow and vm.ValueControlFlow are still raised out of
+        # builtins like 'eval' and 'source'.
+        self.flow_token = None  # type: Optional[Token]
+        self.flow_arg = 0  # exit code to 'return', or levels to break
+        self.flow_value = None  # type: Optional[value_t]
         self.check_command_sub_status = False  # a hack.  Modified by ShellExecutor
 
         self.status_array_pool = []  # type: List[StatusArray]
@@ -332,7 +406,7 @@ class CommandEvaluator(object):
                   cmd_val.arg_locs[0])
 
         io_errors = []  # type: List[error.IOError_OSError]
-        with vm.ctx_FlushStdout(io_errors):
+        with vm.ctx_FlushStdout(io_errors, False):
             with ui.ctx_Location(self.errfmt, cmd_val.arg_locs[0]):
                 try:
                     status = builtin_func.Run(cmd_val)
@@ -702,6 +776,43 @@ class CommandEvaluator(object):
 
         return 0
 
+    def _MaybeAppendStr(self, node, which_scopes):
+        # type: (command.Mutation, scope_t) -> bool
+        """Fast path for setvar s = s ++ x, like s+=x in OSH.
+
+        Returns False if the assignment should be evaluated normally.
+        """
+        if len(node.lhs) != 1 or node.lhs[0].tag() != y_lhs_e.Var:
+            return False
+        lhs_tok = cast(Token, node.lhs[0])
+
+        # s ++ a ++ b is parsed as (s ++ a) ++ b
+        to_append = []  # type: List[expr_t]
+        left = node.rhs
+        while left.tag() == expr_e.Binary:
+            b = cast(expr.Binary, left)
+            if b.op.id != Id.Arith_DPlus or not _IsPureStrExpr(b.right):
+                return False
+            to_append.append(b.right)
+            left = b.left
+
+        if len(to_append) == 0 or left.tag() != expr_e.Var:
+            return False
+        name = lexer.LazyStr(lhs_tok)
+        if cast(expr.Var, left).name != name:
+            return False
+
+        parts = []  # type: List[str]
+        for i in xrange(len(to_append) - 1, -1, -1):
+            val = self.expr_ev.EvalExpr(to_append[i], loc.Missing)
+            if val.tag() != value_e.Str:
+                return False  # the slow path reports the error
+            parts.append(cast(value.Str, val).s)
+
+        # Like expr_eval.LookupVar()
+        return self.mem.AppendStr(name, ''.join(parts), which_scopes,
+                                  scope_e.LocalOrGlobal)
+
     def _DoMutation(self, node):
         # type: (command.Mutation) -> None
 
@@ -714,6 +825,9 @@ class CommandEvaluator(object):
                 raise AssertionError(node.keyword.id)
 
         if node.op.id == Id.Arith_Equal:
+            if self._MaybeAppendStr(node, which_scopes):
+                return
+
             right_val = self.expr_ev.EvalExpr(node.rhs, loc.Missing)
 
             lvals = None  # type: List[y_lvalue_t]
@@ -820,13 +934,21 @@ class CommandEvaluator(object):
 
         words = braces.BraceExpandWords(node.words)
 
-        # Note: Individual WORDS can fail
-        # - $() and <() can have failures.  This can happen in DBracket,
-        #   DParen, etc. too
-        # - Tracing: this can start processes for proc sub and here docs!
-        cmd_val = self.word_ev.EvalWordSequence2(words,
-                                                 node.is_last_cmd,
-                                                 allow_assign=True)
+        if node.static_argv is not None:
+            # Fast path: every word is a literal, so the parser already
+            # computed argv.  Copy it, because builtins like [ mutate argv.
+            argv = []  # type: List[str]
+            argv.extend(node.static_argv)
+            cmd_val = cmd_value.Argv(argv, words, node.is_last_cmd, None,
+                                     None)  # type: cmd_value_t
+        else:
+            # Note: Individual WORDS can fail
+            # - $() and <() can have failures.  This can happen in DBracket,
+            #   DParen, etc. too
+            # - Tracing: this can start processes for proc sub and here docs!
+            cmd_val = self.word_ev.EvalWordSequence2(words,
+                                                     node.is_last_cmd,
+                                                     allow_assign=True)
 
         UP_cmd_val = cmd_val
         if UP_cmd_val.tag() == cmd_value_e.Argv:
@@ -839,9 +961,7 @@ class CommandEvaluator(object):
 
             if node.typed_args or node.block:  # guard to avoid allocs
                 cmd_val.proc_args = ProcArgs(node.typed_args, None, None, None)
-                func_proc.EvalTypedArgsToProc(self.expr_ev,
-                                              self.mem.CurrentFrame(),
-                                              self.mem.GlobalFrame(),
+                func_proc.EvalTypedArgsToProc(self.expr_ev, self.mem,
                                               self.mutable_opts, node,
                                               cmd_val.proc_args)
         else:
@@ -947,6 +1067,24 @@ class CommandEvaluator(object):
                 assert pair.rhs, pair.rhs  # I don't think a+= is valid?
                 rhs = self.word_ev.EvalRhsWord(pair.rhs)
 
+                # Fast path for s+=x and a+=(x) in a loop.  xtrace shows the
+                # whole value, so it takes the slow path.
+                if (pair.lhs.tag() == sh_lhs_e.Name and
+                        not self.exec_opts.xtrace()):
+                    lhs_name = cast(sh_lhs.Name, pair.lhs)
+                    if rhs.tag() == value_e.Str:
+                        rhs_str = cast(value.Str, rhs)
+                        if self.mem.AppendStr(lhs_name.name, rhs_str.s,
+                                              which_scopes,
+                                              self.mem.ScopesForReading()):
+                            continue
+                    elif rhs.tag() == value_e.BashArray:
+                        rhs_array = cast(value.BashArray, rhs)
+                        if self.mem.AppendArray(lhs_name.name, rhs_array.strs,
+                                                which_scopes,
+                                                self.mem.ScopesForReading()):
+                            continue
+
                 lval = self.arith_ev.EvalShellLhs(pair.lhs, which_scopes)
                 # do not respect set -u
                 old_val = sh_expr_eval.OldValue(lval, self.mem, None)
@@ -997,7 +1135,7 @@ class CommandEvaluator(object):
 
         if node.keyword.id == Id.Lit_Equals:  # = f(x)
             io_errors = []  # type: List[error.IOError_OSError]
-            with vm.ctx_FlushStdout(io_errors):
+            with vm.ctx_FlushStdout(io_errors, False):
                 try:
                     ui.PrettyPrintValue('', val, mylib.Stdout())
                 except (IOError, OSError) as e:
@@ -1075,8 +1213,48 @@ class CommandEvaluator(object):
         if keyword.id == Id.ControlFlow_Exit:
             # handled differently than other control flow
             raise util.UserExit(arg)
-        else:
-            raise vm.IntControlFlow(keyword, arg)
+
+        self.flow_token = keyword
+        self.flow_arg = arg
+        return 0  # ignored by _Execute()
+
+    def _HandleLoopFlow(self):
+        # type: () -> flow_t
+        """Like vm.IntControlFlow.HandleLoop(), for pending control flow."""
+        id_ = self.flow_token.id
+        if id_ == Id.ControlFlow_Break:
+            self.flow_arg -= 1
+            if self.flow_arg == 0:
+                self.flow_token = None
+                return flow_e.Break  # caller should break out of loop
+
+        elif id_ == Id.ControlFlow_Continue:
+            self.flow_arg -= 1
+            if self.flow_arg == 0:
+                self.flow_token = None
+                return flow_e.Nothing  # do nothing to continue
+
+        # return / break 2 / continue 2 need to pop up more
+        return flow_e.Raise
+
+    def _RaisePendingFlow(self):
+        # type: () -> None
+        """Turn pending control flow into an exception.
+
+        For code that runs commands outside of the _Execute() recursion, like
+        traps and blocks passed to builtins.
+        """
+        tok = self.flow_token
+        if tok is None:
+            return
+        self.flow_token = None
+
+        if self.flow_value is not None:
+            val = self.flow_value
+            self.flow_value = None
+            raise vm.ValueControlFlow(tok, val)
+
+        raise vm.IntControlFlow(tok, self.flow_arg)
 
     def _DoAndOr(self, node, cmd_st):
         # type: (command.AndOr, CommandStatus) -> int
@@ -1089,6 +1267,8 @@ class CommandEvaluator(object):
         self._StrictErrExit(left)
         with state.ctx_ErrExit(self.mutable_opts, False, node.ops[0]):
             status = self._Execute(left)
+        if self.flow_token is not None:
+            return status
 
         i = 1
         n = len(node.children)
@@ -1115,6 +1295,8 @@ class CommandEvaluator(object):
                 self._StrictErrExit(child)
                 with state.ctx_ErrExit(self.mutable_opts, False, op):
                     status = self._Execute(child)
+                if self.flow_token is not None:
+                    break
 
             i += 1
 
@@ -1128,11 +1310,12 @@ class CommandEvaluator(object):
                 try:
                     # blame while/until spid
                     b = self._EvalCondition(node.cond, node.keyword)
-                    if node.keyword.id == Id.KW_Until:
-                        b = not b
-                    if not b:
-                        break
-                    status = self._Execute(node.body)  # last one wins
+                    if self.flow_token is None:
+                        if node.keyword.id == Id.KW_Until:
+                            b = not b
+                        if not b:
+                            break
+                        status = self._Execute(node.body)  # last one wins
 
                 except vm.IntControlFlow as e:
                     status = 0
@@ -1142,6 +1325,12 @@ class CommandEvaluator(object):
                     elif action == flow_e.Raise:
                         raise
 
+                if self.flow_token is not None:
+                    status = 0
+                    action = self._HandleLoopFlow()
+                    if action != flow_e.Nothing:
+                        break  # flow_e.Raise leaves it pending
+
         return status
 
     def _DoForEach(self, node):
@@ -1304,6 +1493,12 @@ class CommandEvaluator(object):
                         elif action == flow_e.Raise:
                             raise
 
+                    if self.flow_token is not None:
+                        status = 0
+                        action = self._HandleLoopFlow()
+                        if action != flow_e.Nothing:
+                            break  # flow_e.Raise leaves it pending
+
         return status
 
     def _DoForExpr(self, node):
@@ -1334,6 +1529,12 @@ class CommandEvaluator(object):
                     elif action == flow_e.Raise:
                         raise
 
+                if self.flow_token is not None:
+                    status = 0
+                    action = self._HandleLoopFlow()
+                    if action != flow_e.Nothing:
+                        break  # flow_e.Raise leaves it pending
+
                 self.arith_ev.Eval(update)
 
         return status
@@ -1382,6 +1583,8 @@ class CommandEvaluator(object):
         done = False
         for if_arm in node.arms:
             b = self._EvalCondition(if_arm.cond, if_arm.keyword)
+            if self.flow_token is not None:  # if break; then ...
+                return 0
             if b:
                 status = self._ExecuteList(if_arm.action)
                 done = True
@@ -1406,7 +1609,20 @@ class CommandEvaluator(object):
         # For &; terminator - not just case fallthrough, but IGNORE the condition!
         ignore_next_cond = False
 
-        for case_arm in node.arms:
+        # Look up the string in the table of literal arms, and then either
+        # skip to that arm, or past all of them
+        start = 0
+        if (node.literal_arms is not None and fnmatch_flags == 0 and
+                to_match.tag() == value_e.Str):
+            s = cast(value.Str, to_match).s
+            start = node.literal_arms.get(s, -1)
+            if start == -1:
+                start = node.num_literal_arms
+            else:
+                ignore_next_cond = True  # it's a match
+
+        for i in xrange(start, len(node.arms)):
+            case_arm = node.arms[i]
             with tagswitch(case_arm.pattern) as case:
                 if case(pat_e.Words):
                     if to_match.tag() != value_e.Str:
@@ -1419,6 +1635,13 @@ class CommandEvaluator(object):
                     if ignore_next_cond:  # Special handling for ;&
                         this_arm_matches = True
                         ignore_next_cond = False
+                    elif pat_words.fnmatch_pats is not None:
+                        # Evaluated at parse time
+                        for pat_str in pat_words.fnmatch_pats:
+                            if libc.fnmatch(pat_str, to_match_str.s,
+                                            fnmatch_flags):
+                                this_arm_matches = True
+                                break  # Stop at first pattern
                     else:
                         for pat_word in pat_words.words:
                             word_val = self.word_ev.EvalWordToString(
@@ -1432,6 +1655,8 @@ class CommandEvaluator(object):
                     if this_arm_matches:
                         status = self._ExecuteList(case_arm.action)
                         done = True
+                        if self.flow_token is not None:
+                            break  # don't fall through
 
                         # ;& and ;;& only apply to shell-style case
                         if case_arm.right:
@@ -1496,14 +1721,15 @@ class CommandEvaluator(object):
 
         return status
 
-    def _DoRedirect(self, node, cmd_st):
-        # type: (command.Redirect, CommandStatus) -> int
+    def EvalRedirects(self, redirs):
+        # type: (List[Redir]) -> Optional[List[RedirValue]]
+        """Evaluate redirect words.
 
-        status = 0
+        On error, print it and return None.  Also used for $(<file).
+        """
         redirects = []  # type: List[RedirValue]
-
         try:
-            for redir in node.redirects:
+            for redir in redirs:
                 redirects.append(self._EvalRedirect(redir))
         except error.RedirectEval as e:
             self.errfmt.PrettyPrintError(e)
@@ -1513,6 +1739,13 @@ class CommandEvaluator(object):
                 e.location = self.mem.GetFallbackLocation()
             self.errfmt.PrettyPrintError(e, prefix='failglob: ')
             redirects = None
+        return redirects
+
+    def _DoRedirect(self, node, cmd_st):
+        # type: (command.Redirect, CommandStatus) -> int
+
+        status = 0
+        redirects = self.EvalRedirects(node.redirects)
 
         if redirects is None:
             # Error evaluating redirect words
@@ -1540,7 +1773,8 @@ class CommandEvaluator(object):
         if status == 0:
             with vm.ctx_Redirect(self.shell_ex, len(redirects), io_errors):
                 status = self._Execute(node.child)
-            if len(io_errors):
+            # Like unwinding with an exception, control flow skips this check
+            if len(io_errors) and self.flow_token is None:
                 # It would be better to point to the right redirect
                 # operator, but we don't track it specifically
                 e_die("Fatal error popping redirect: %s" %
@@ -1579,6 +1813,11 @@ class CommandEvaluator(object):
         probe('cmd_eval', '_Dispatch', node.tag())
         self.check_command_sub_status = False
 
+        # Only [ -e x ] && [ -s x ] can share a stat().  Other commands could
+        # change the file system; RunSimpleCommand() handles the leaves.
+        if node.tag() != command_e.Simple:
+            bool_stat.ClearStatCache()
+
         UP_node = node
         with tagswitch(node) as case:
             if case(command_e.Simple):  # LEAF command
@@ -1649,7 +1888,7 @@ class CommandEvaluator(object):
                 self._MaybeRunDebugTrap()
 
                 status = self._DoControlFlow(node)
-                # Omit _LeafTick() since we likely raise an exception above
+                # Omit _LeafTick(), like we did when this raised an exception
 
             elif case(command_e.NoOp):  # LEAF
                 status = 0  # make it true
@@ -1689,7 +1928,9 @@ class CommandEvaluator(object):
                 val = self.expr_ev.EvalExpr(node.val, node.keyword)
                 self._LeafTick()
 
-                raise vm.ValueControlFlow(node.keyword, val)
+                self.flow_token = node.keyword
+                self.flow_value = val
+                status = 0  # ignored by _Execute()
 
             #
             # More commands that involve recursive calls
@@ -1820,6 +2061,7 @@ class CommandEvaluator(object):
                         with dev.ctx_Tracer(self.tracer, 'trap', None):
                             # Note: exit status is lost
                             self._Execute(trap_node)
+                            self._RaisePendingFlow()
 
     def RunPendingTrapsAndCatch(self):
         # type: () -> None
@@ -1867,6 +2109,13 @@ class CommandEvaluator(object):
 
         # Now we've waited for process subs
 
+        if self.flow_token is not None:
+            # break, continue, or return.  Skip $? and errexit, as if an
+            # exception unwound the stack.
+            if process_sub_st.codes is None:
+                self.status_array_pool.append(process_sub_st)
+            return status
+
         # If it was a real pipeline, compute status from ${PIPESTATUS[@]} aka
         # @_pipeline_status
         pipe_status = cmd_st.pipe_status
@@ -1922,7 +2171,7 @@ class CommandEvaluator(object):
         # - function def (however this always exits 0 anyway)
         # - assignment - its result should be the result of the RHS?
         #   - e.g. arith sub, command sub?  I don't want arith sub.
-        # - ControlFlow: always raises, it has no status.
+        # - ControlFlow: it has no status, and returns early above.
         if cmd_st.check_errexit:
             #log('cmd_st %s', cmd_st)
             self._CheckStatus(status, cmd_st, node, errexit_loc)
@@ -1935,6 +2184,8 @@ class CommandEvaluator(object):
         for child in children:
             # last status wins
             status = self._Execute(child)
+            if self.flow_token is not None:
+                break
         return status
 
     def LastStatus(self):
@@ -2051,6 +2302,10 @@ class CommandEvaluator(object):
         err = None  # type: error.FatalRuntime
         status = -1  # uninitialized
 
+        # In case an exception interrupted unwinding, e.g. Ctrl-C
+        self.flow_token = None
+        self.flow_value = None
+
         try:
             options = []  # type: List[int]
             if cmd_flags & NoDebugTrap:
@@ -2059,6 +2314,7 @@ class CommandEvaluator(object):
                 options.append(option_i._no_err_trap)
             with state.ctx_Option(self.mutable_opts, options, True):
                 status = self._Execute(node)
+            self._RaisePendingFlow()  # handled right below
         except vm.IntControlFlow as e:
             if cmd_flags & RaiseControlFlow:
                 raise  # 'eval break' and 'source return.sh', etc.
@@ -2132,7 +2388,9 @@ class CommandEvaluator(object):
 
         (Should those be more like eval 'mystring'?)
         """
-        return self._Execute(frag)  # can raise FatalRuntimeError, etc.
+        status = self._Execute(frag)  # can raise FatalRuntimeError, etc.
+        self._RaisePendingFlow()  # e.g. 'return' in a block
+        return status
 
     if 0:
 
@@ -2197,6 +2455,7 @@ class CommandEvaluator(object):
                 with state.ctx_DebugTrap(self.mem):
                     # Don't catch util.UserExit, etc.
                     self._Execute(node)
+                    self._RaisePendingFlow()
 
     def _MaybeRunErrTrap(self):
         # type: () -> None
@@ -2233,6 +2492,7 @@ class CommandEvaluator(object):
             #with state.ctx_Registers(self.mem):  # prevent setting $? etc.
             with state.ctx_ErrTrap(self.mem):
                 self._Execute(node)
+                self._RaisePendingFlow()
 
     def RunProc(self, proc, cmd_val):
         # type: (value.Proc, cmd_value.Argv) -> int
@@ -2255,6 +2515,13 @@ class CommandEvaluator(object):
             # Here doc causes a pipe and Process(SubProgramThunk).
             try:
                 status = self._Execute(proc.body)
+                if self.flow_token is not None:
+                    if self.flow_token.id == Id.ControlFlow_Return:
+                        self.flow_token = None
+                        # All shells except dash do this truncation.
+                        status = self.flow_arg & 0xff
+                    else:
+                        self._RaisePendingFlow()  # for the error below
             except vm.IntControlFlow as e:
                 if e.IsReturn():
                     status = e.StatusCode()
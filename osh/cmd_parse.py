@@ -29,6 +29,7 @@ from _devbuild.gen.syntax_asdl import (
     case_arg,
     IfArm,
     pat,
+    pat_e,
     pat_t,
     Redir,
     redir_param,
@@ -381,9 +382,74 @@ def _MakeSimpleCommand(
     more_env = []  # type: List[EnvPair]
     _AppendMoreEnv(preparsed_list, more_env)
 
+    # Words like printf '%s\n' foo don't need to be evaluated at runtime
+    static_argv = word_.StaticArgv(words3)
+
     # is_last_cmd is False by default
     return command.Simple(blame_tok, more_env, words3, typed_args, block,
-                          False)
+                          False, static_argv)
+
+
+# A table for fewer arms isn't worth its memory
+_MIN_LITERAL_ARMS = 4
+
+
+def _CompileCase(node):
+    # type: (command.Case) -> None
+    """Evaluate constant case patterns at parse time.
+
+    Each pat.Words with only constant words gets its fnmatch() patterns.
+
+    If the first arms only have literal patterns, like
+    'build|test) ... ;; clean) ... ;;', their patterns also go in a dict.  When
+    the string isn't in it, none of those arms can match, so _DoCase() starts
+    at the first arm after them.
+    """
+    literal_arms = {}  # type: Dict[str, int]
+    num_literal_arms = -1  # not done yet
+
+    i = 0
+    for arm in node.arms:
+        UP_pattern = arm.pattern
+        if arm.pattern.tag() != pat_e.Words:
+            if num_literal_arms == -1:
+                num_literal_arms = i
+            i += 1
+            continue
+
+        pattern = cast(pat.Words, UP_pattern)
+        fnmatch_pats = []  # type: List[str]
+        literals = []  # type: List[str]
+        for w in pattern.words:
+            pat_str, lit_str = word_.StaticCasePattern(w)
+            if pat_str is None:
+                fnmatch_pats = None
+                literals = None
+                break
+            fnmatch_pats.append(pat_str)
+            if literals is not None:
+                if lit_str is None:
+                    literals = None
+                else:
+                    literals.append(lit_str)
+
+        pattern.fnmatch_pats = fnmatch_pats
+
+        if num_literal_arms == -1:
+            if literals is None:
+                num_literal_arms = i
+            else:
+                for s in literals:
+                    if s not in literal_arms:  # the first arm wins
+                        literal_arms[s] = i
+        i += 1
+
+    if num_literal_arms == -1:
+        num_literal_arms = len(node.arms)
+
+    if num_literal_arms >= _MIN_LITERAL_ARMS:
+        node.literal_arms = literal_arms
+        node.num_literal_arms = num_literal_arms
 
 
 class VarChecker(object):
@@ -1732,7 +1798,7 @@ class CommandParser(object):
 
         self._NewlineOk()
 
-        return CaseArm(left_tok, pat.Words(pat_words), middle_tok,
+        return CaseArm(left_tok, pat.Words(pat_words, None), middle_tok,
                        action_children, dsemi_tok)
 
     def ParseYshCaseArm(self, discriminant):
@@ -1784,7 +1850,7 @@ class CommandParser(object):
                     self._NewlineOk()
                 else:
                     break
-            pattern = pat.Words(pat_words)
+            pattern = pat.Words(pat_words, None)
 
         self._NewlineOk()
         action = self.ParseBraceGroup()
@@ -1823,7 +1889,10 @@ class CommandParser(object):
         arms_end = word_.AsOperatorToken(ate)
         arms_end.id = Id.Lit_RBrace
 
-        return command.Case(case_kw, to_match, arms_start, arms, arms_end)
+        node = command.Case(case_kw, to_match, arms_start, arms, arms_end,
+                            None, 0)
+        _CompileCase(node)
+        return node
 
     def ParseOldCase(self, case_kw):
         # type: (Token) -> command.Case
@@ -1874,7 +1943,10 @@ class CommandParser(object):
         arms_end = word_.AsKeywordToken(ate)
 
         # no redirects yet
-        return command.Case(case_kw, to_match, arms_start, arms, arms_end)
+        node = command.Case(case_kw, to_match, arms_start, arms, arms_end,
+                            None, 0)
+        _CompileCase(node)
+        return node
 
     def ParseCase(self):
         # type: () -> command.Case
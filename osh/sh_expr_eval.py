@@ -45,6 +45,7 @@ from _devbuild.gen.value_asdl import (
     RegexMatch,
 )
 from core import alloc
+from core import bash_impl
 from core import error
 from core.error import e_die, e_die_status, e_strict, e_usage
 from core import num
@@ -138,19 +139,20 @@ def OldValue(lval, mem, exec_opts):
         elif case(sh_lvalue_e.Indexed):
             lval = cast(sh_lvalue.Indexed, UP_lval)
 
-            array_val = None  # type: value.BashArray
+            s = None  # type: Optional[str]
             with tagswitch(val) as case2:
                 if case2(value_e.Undef):
-                    array_val = value.BashArray([])
+                    pass
                 elif case2(value_e.BashArray):
-                    tmp = cast(value.BashArray, UP_val)
-                    # mycpp rewrite: add tmp.  cast() creates a new var in inner scope
-                    array_val = tmp
+                    array_val = cast(value.BashArray, UP_val)
+                    s = word_eval.GetArrayItem(array_val.strs, lval.index)
+                elif case2(value_e.SparseArray):
+                    sparse_val = cast(value.SparseArray, UP_val)
+                    s = bash_impl.SparseArray_Get(sparse_val,
+                                                  mops.IntWiden(lval.index))
                 else:
                     e_die("Can't use [] on value of type %s" % ui.ValType(val))
 
-            s = word_eval.GetArrayItem(array_val.strs, lval.index)
-
             if s is None:
                 val = value.Str('')  # NOTE: Other logic is value.Undef?  0?
             else:
@@ -510,11 +512,12 @@ class ArithEvaluator(object):
         val = OldValue(lval, self.mem, self.exec_opts)
 
         # BASH_LINENO, arr (array name without strict_array), etc.
-        if (val.tag() in (value_e.BashArray, value_e.BashAssoc) and
+        if (val.tag() in (value_e.BashArray, value_e.SparseArray,
+                          value_e.BashAssoc) and
                 lval.tag() == sh_lvalue_e.Var):
             named_lval = cast(LeftName, lval)
             if word_eval.ShouldArrayDecay(named_lval.name, self.exec_opts):
-                if val.tag() == value_e.BashArray:
+                if val.tag() in (value_e.BashArray, value_e.SparseArray):
                     lval = sh_lvalue.Indexed(named_lval.name, 0, loc.Missing)
                 elif val.tag() == value_e.BashAssoc:
                     lval = sh_lvalue.Keyed(named_lval.name, '0', loc.Missing)
@@ -541,7 +544,8 @@ class ArithEvaluator(object):
         val = self.Eval(node)
 
         # BASH_LINENO, arr (array name without strict_array), etc.
-        if (val.tag() in (value_e.BashArray, value_e.BashAssoc) and
+        if (val.tag() in (value_e.BashArray, value_e.SparseArray,
+                          value_e.BashAssoc) and
                 node.tag() == arith_expr_e.VarSub):
             vsub = cast(Token, node)
             if word_eval.ShouldArrayDecay(lexer.LazyStr(vsub), self.exec_opts):
@@ -732,6 +736,11 @@ class ArithEvaluator(object):
                                 self.EvalToBigInt(node.right))
                             s = word_eval.GetArrayItem(array_val.strs, small_i)
 
+                        elif case(value_e.SparseArray):
+                            sparse_val = cast(value.SparseArray, UP_left)
+                            big_i = self.EvalToBigInt(node.right)
+                            s = bash_impl.SparseArray_Get(sparse_val, big_i)
+
                         elif case(value_e.BashAssoc):
                             left = cast(value.BashAssoc, UP_left)
                             key = self.EvalWordToString(node.right)
@@ -1038,6 +1047,25 @@ class BoolEvaluator(ArithEvaluator):
                 # out of range
                 return False
 
+            elif case(value_e.SparseArray):
+                sparse_val = cast(value.SparseArray, UP_val)
+
+                ok, big_index = mops.FromStr2(index_str)
+                if not ok:
+                    if self.exec_opts.strict_word_eval():
+                        e_die(
+                            '-v got BashArray and invalid index %r' %
+                            index_str, blame_loc)
+                    return False
+
+                if mops.Greater(mops.ZERO, big_index):
+                    if self.exec_opts.strict_word_eval():
+                        e_die('-v got invalid negative index %s' % index_str,
+                              blame_loc)
+                    return False
+
+                return big_index in sparse_val.d
+
             elif case(value_e.BashAssoc):
                 val = cast(value.BashAssoc, UP_val)
                 return index_str in val.d
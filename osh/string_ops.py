@@ -198,6 +198,126 @@ def AdvanceUtf8Chars(s, num_chars, byte_offset):
     return i
 
 
+# Utf8Index stores the byte offset of every Nth character
+_INDEX_STRIDE = 32
+
+# Strings this short are decoded from the start each time
+_MIN_INDEXED_BYTES = 64
+
+# How many strings Utf8Index remembers
+_INDEX_CACHE_SIZE = 4
+
+
+class _Utf8Offsets(object):
+    """Character offsets in one string, decoded lazily."""
+
+    def __init__(self, s):
+        # type: (str) -> None
+        self.s = s
+
+        # offsets[k] is the byte offset of character k * _INDEX_STRIDE
+        self.offsets = [0]  # type: List[int]
+
+        # The first num_chars characters, up to byte offset pos, are valid.  If
+        # num_chars == pos, they're all ASCII.
+        self.num_chars = 0
+        self.pos = 0
+
+    def Decode(self, num_chars):
+        # type: (int) -> None
+        """Validate characters up to num_chars, or the end of the string."""
+        s = self.s
+        num_bytes = len(s)
+        while self.num_chars < num_chars and self.pos < num_bytes:
+            self.pos = NextUtf8Char(s, self.pos)
+            self.num_chars += 1
+            if self.num_chars % _INDEX_STRIDE == 0:
+                self.offsets.append(self.pos)
+
+    def CountChars(self):
+        # type: () -> int
+        s = self.s
+        # Only scan for ASCII if the decoded prefix is ASCII
+        if self.num_chars == self.pos and fastfunc.IsAscii(s):
+            # Every character is 1 byte, so offsets aren't needed
+            self.num_chars = len(s)
+            self.pos = len(s)
+        else:
+            self.Decode(len(s))  # there are at most len(s) characters
+        return self.num_chars
+
+    def CharOffset(self, num_chars):
+        # type: (int) -> int
+        self.Decode(num_chars)
+        if num_chars >= self.num_chars:
+            return self.pos
+
+        if self.num_chars == self.pos:  # ASCII so far
+            return num_chars
+
+        # These characters were already validated
+        i = self.offsets[num_chars // _INDEX_STRIDE]
+        for _ in xrange(num_chars % _INDEX_STRIDE):
+            i = NextUtf8Char(self.s, i)
+        return i
+
+
+class Utf8Index(object):
+    """Character offsets of the last few long strings it was asked about.
+
+    Strings are immutable, so a loop over ${s:i:1} and ${#s} can reuse them,
+    instead of decoding from the start of the string each time.  Lengths are
+    O(1) after the first one, and indexing decodes at most _INDEX_STRIDE
+    characters.  Indexing only decodes the prefix it needs.
+
+    Short strings aren't remembered, so ${#c} of each character in a loop
+    doesn't push out the string it came from.
+
+    Characters are decoded lazily, so invalid UTF-8 is reported in the same
+    cases as CountUtf8Chars() and AdvanceUtf8Chars().
+    """
+
+    def __init__(self):
+        # type: () -> None
+        # Least recently used first
+        self.entries = []  # type: List[_Utf8Offsets]
+
+    def _Get(self, s):
+        # type: (str) -> _Utf8Offsets
+        n = len(self.entries)
+        for i in xrange(n):
+            entry = self.entries[i]
+            if entry.s is s:
+                if i != n - 1:  # make it the most recently used
+                    self.entries.pop(i)
+                    self.entries.append(entry)
+                return entry
+
+        if n == _INDEX_CACHE_SIZE:
+            self.entries.pop(0)
+        entry = _Utf8Offsets(s)
+        self.entries.append(entry)
+        return entry
+
+    def CountChars(self, s):
+        # type: (str) -> int
+        """Like CountUtf8Chars(s)"""
+        if len(s) < _MIN_INDEXED_BYTES:
+            return CountUtf8Chars(s)
+        return self._Get(s).CountChars()
+
+    def CharOffset(self, s, num_chars):
+        # type: (str, int) -> int
+        """Like AdvanceUtf8Chars(s, num_chars, 0)
+
+        Returns the byte offset of the character at num_chars, or len(s) if
+        it's past the end.
+        """
+        if len(s) < _MIN_INDEXED_BYTES:
+            return AdvanceUtf8Chars(s, num_chars, 0)
+        return self._Get(s).CharOffset(num_chars)
+
+
 # Limited Unicode codepoints for whitespace characters.
 # Oils intentionally does not include characters from <USP>, as that set
 # depends on the version of the Unicode standard used.
@@ -110,6 +110,71 @@ class LibStrTest(unittest.TestCase):
                     break
             self.assertEqual(expected_indexes, actual_indexes)
 
+    def test_Utf8Index(self):
+        index = string_ops.Utf8Index()
+
+        ascii_str = 'abcdef' * 20
+        self.assertEqual(120, index.CountChars(ascii_str))
+        self.assertEqual(2, index.CharOffset(ascii_str, 2))
+        self.assertEqual(120, index.CharOffset(ascii_str, 999))
+
+        # Compare against the functions that decode from the start
+        for s in [
+                '\x24\xC2\xA2\xE0\xA4\xB9\xF0\x90\x8D\x88',
+                '\xCE\xBC' * 100 + 'x' + '\xE2\x82\xAC' * 70,
+                'x' * 40 + '\xCE\xBC' * 100,
+        ]:
+            n = string_ops.CountUtf8Chars(s)
+            for i in [0, 1, 2, 31, 32, 33, 41, 64, 99, 100, 101, n, n + 5]:
+                self.assertEqual(string_ops.AdvanceUtf8Chars(s, i, 0),
+                                 index.CharOffset(s, i))
+            self.assertEqual(n, index.CountChars(s))
+
+        # Errors are only reported when decoding up to a bad byte
+        bad = 'ab\xffcd' * 20
+        self.assertEqual(2, index.CharOffset(bad, 2))
+        self.assertRaises(error.Strict, index.CharOffset, bad, 3)
+        self.assertRaises(error.Strict, index.CountChars, bad)
+        self.assertEqual(1, index.CharOffset(bad, 1))
+
+    def test_Utf8IndexOnlyDecodesPrefix(self):
+        index = string_ops.Utf8Index()
+
+        s = 'x' * 10000 + '\xCE\xBC'
+        self.assertEqual(5, index.CharOffset(s, 5))
+        entry = index.entries[-1]
+        self.assertEqual(5, entry.pos)  # the rest wasn't scanned
+
+        self.assertEqual(10001, index.CountChars(s))
+        self.assertEqual(9000, index.CharOffset(s, 9000))
+        self.assertEqual(10000, index.CharOffset(s, 10000))
+
+    def test_Utf8IndexCache(self):
+        index = string_ops.Utf8Index()
+        s = '\xCE\xBC' * 100
+
+        # Like c=${s:i:1}; n=${#c}.  The short strings don't replace s.
+        for i in xrange(100):
+            begin = index.CharOffset(s, i)
+            end = index.CharOffset(s, i + 1)
+            c = s[begin:end]
+            self.assertEqual(1, index.CountChars(c))
+        self.assertEqual(1, len(index.entries))
+
+        # Other long strings push out the least recently used one
+        others = [str(i) * 100 for i in xrange(4)]
+        index.CountChars(others[0])
+        index.CountChars(s)
+        for t in others[1:]:
+            index.CountChars(t)
+        # others[0] was used before s
+        self.assertEqual([s] + others[1:], [e.s for e in index.entries])
+
+        index.CountChars(others[1])
+        index.CountChars('y' * 100)
+        self.assertEqual(others[2:] + [others[1], 'y' * 100],
+                         [e.s for e in index.entries])
+
     # The UTF-8 encoding of all the characters from string_ops.SPACES.
     # See comments there about why that set of characters was chosen.
     #
@@ -3,6 +3,7 @@ word.py - Utility functions for words, e.g. treating them as "tokens".
 """
 
 from _devbuild.gen.id_kind_asdl import Id, Kind, Id_t, Kind_t
+from _devbuild.gen.option_asdl import builtin_i
 from _devbuild.gen.syntax_asdl import (
     Token,
     CompoundWord,
@@ -20,6 +21,7 @@ from _devbuild.gen.syntax_asdl import (
 from frontend import consts
 from frontend import lexer
 from mycpp import mylib
+from osh import glob_
 from mycpp.mylib import tagswitch, log
 
 from typing import Tuple, Optional, List, Any, cast, TYPE_CHECKING
@@ -157,6 +159,75 @@ def FastStrEval(w):
             return None
 
 
+def StaticArgv(words):
+    # type: (List[word_t]) -> Optional[List[str]]
+    """Evaluate the words of a command.Simple at PARSE TIME.
+
+    Returns None unless FastStrEval() handles every word, i.e. there are no
+    substitutions, globs, tildes, or braces.
+
+    Also returns None for assignment builtins like 'local x' and 'builtin
+    local x', because they have different word evaluation rules.
+    """
+    strs = []  # type: List[str]
+    for w in words:
+        if w.tag() != word_e.Compound:  # e.g. BracedTree
+            return None
+        s = FastStrEval(cast(CompoundWord, w))
+        if s is None:
+            return None
+        strs.append(s)
+
+    # Mirrors the meta_offset logic in EvalWordSequence2()
+    for s in strs:
+        if consts.LookupAssignBuiltin(s) != consts.NO_INDEX:
+            return None
+        if consts.LookupNormalBuiltin(s) not in (builtin_i.builtin,
+                                                 builtin_i.command):
+            break
+
+    return strs
+
+
+def StaticCasePattern(UP_w):
+    # type: (word_t) -> Tuple[Optional[str], Optional[str]]
+    """Evaluate a case pattern at PARSE TIME.
+
+    Returns:
+      2-tuple of
+        pattern: what EvalWordToString() with QUOTE_FNMATCH returns, or None
+          if the word has substitutions, tildes, or extended globs
+        literal: the only string the pattern matches, or None if it has glob
+          chars
+    """
+    if UP_w.tag() != word_e.Compound:
+        return None, None
+    w = cast(CompoundWord, UP_w)
+
+    pat_parts = []  # type: List[str]
+    lit_parts = []  # type: List[str]
+    is_literal = True
+    for part in w.parts:
+        ok, s, quoted = _EvalWordPart(part)
+        if not ok:
+            return None, None
+
+        if quoted:
+            pat_parts.append(glob_.GlobEscape(s))
+        else:
+            # Be conservative: [ is only special with a matching ], and ( only
+            # after an extglob operator
+            if '*' in s or '?' in s or '[' in s or '(' in s or '\\' in s:
+                is_literal = False
+            pat_parts.append(s)
+        lit_parts.append(s)
+
+    pattern = ''.join(pat_parts)
+    if is_literal:
+        return pattern, ''.join(lit_parts)
+    return pattern, None
+
+
 def StaticEval(UP_w):
     # type: (word_t) -> Tuple[bool, str, bool]
     """Evaluate a Compound at PARSE TIME."""
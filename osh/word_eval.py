@@ -48,6 +48,7 @@ from _devbuild.gen.value_asdl import (
     sh_lvalue,
     sh_lvalue_t,
 )
+from core import bash_impl
 from core import error
 from core import pyos
 from core import pyutil
@@ -111,6 +112,9 @@ def DecayArray(val):
     if val.tag() == value_e.BashArray:
         array_val = cast(value.BashArray, val)
         s = array_val.strs[0] if len(array_val.strs) else None
+    elif val.tag() == value_e.SparseArray:
+        sparse_val = cast(value.SparseArray, val)
+        s = bash_impl.SparseArray_Get(sparse_val, mops.ZERO)
     elif val.tag() == value_e.BashAssoc:
         assoc_val = cast(value.BashAssoc, val)
         s = assoc_val.d['0'] if '0' in assoc_val.d else None
@@ -228,6 +232,10 @@ def _ValueToPartValue(val, quoted, part_loc):
             val = cast(value.BashArray, UP_val)
             return part_value.Array(val.strs)
 
+        elif case(value_e.SparseArray):
+            val = cast(value.SparseArray, UP_val)
+            return part_value.Array(bash_impl.SparseArray_GetValues(val))
+
         elif case(value_e.BashAssoc):
             val = cast(value.BashAssoc, UP_val)
             # bash behavior: splice values!
@@ -344,6 +352,7 @@ def _PerformSlice(
         has_length,  # type: bool
         part,  # type: BracedVarSub
         arg0_val,  # type: value.Str
+        utf8_index,  # type: string_ops.Utf8Index
 ):
     # type: (...) -> value_t
     UP_val = val
@@ -359,7 +368,7 @@ def _PerformSlice(
                 for _ in xrange(num_iters):
                     byte_begin = string_ops.PreviousUtf8Char(s, byte_begin)
             else:
-                byte_begin = string_ops.AdvanceUtf8Chars(s, begin, 0)
+                byte_begin = utf8_index.CharOffset(s, begin)
 
             if has_length:
                 if length < 0:  # Compute offset with unicode
@@ -368,6 +377,8 @@ def _PerformSlice(
                     num_iters = -length
                     for _ in xrange(num_iters):
                         byte_end = string_ops.PreviousUtf8Char(s, byte_end)
+                elif begin >= 0:
+                    byte_end = utf8_index.CharOffset(s, begin + length)
                 else:
                     byte_end = string_ops.AdvanceUtf8Chars(
                         s, length, byte_begin)
@@ -395,6 +406,8 @@ def _PerformSlice(
             n = len(orig)
             if begin < 0:
                 i = n + begin  # ${@:-3} starts counts from the end
+                if i < 0:
+                    i = n  # like bash, a start before 0 is empty
             else:
                 i = begin
             strs = []  # type: List[str]
@@ -410,6 +423,24 @@ def _PerformSlice(
 
             result = value.BashArray(strs)
 
+        elif case(value_e.SparseArray):
+            sparse_val = cast(value.SparseArray, UP_val)
+            if has_length and length < 0:
+                e_die("Array slice can't have negative length: %d" % length,
+                      loc.WordPart(part))
+
+            if not has_length:
+                length = -1  # no limit
+
+            start = bash_impl.SparseArray_ResolveIndex(sparse_val,
+                                                       mops.IntWiden(begin))
+            if mops.Greater(mops.ZERO, start):  # like bash, start < 0 is empty
+                strs = []
+            else:
+                strs = bash_impl.SparseArray_SliceCount(
+                    sparse_val, start, length)
+            result = value.BashArray(strs)
+
         elif case(value_e.BashAssoc):
             e_die("Can't slice associative arrays", loc.WordPart(part))
 
@@ -536,6 +567,8 @@ class AbstractWordEvaluator(StringWordEvaluator):
         self.errfmt = errfmt
 
         self.globber = glob_.Globber(exec_opts)
+        # For ${#s} and ${s:i:n} on the same string in a loop
+        self.utf8_index = string_ops.Utf8Index()
 
     def CheckCircularDeps(self):
         # type: () -> None
@@ -643,6 +676,10 @@ class AbstractWordEvaluator(StringWordEvaluator):
                 # TODO: allow undefined
                 is_falsey = len(val.strs) == 0
 
+            elif case(value_e.SparseArray):
+                val = cast(value.SparseArray, UP_val)
+                is_falsey = bash_impl.SparseArray_Count(val) == 0
+
             elif case(value_e.BashAssoc):
                 val = cast(value.BashAssoc, UP_val)
                 is_falsey = len(val.d) == 0
@@ -772,7 +809,7 @@ class AbstractWordEvaluator(StringWordEvaluator):
 
                 # https://stackoverflow.com/questions/17368067/length-of-string-in-bash
                 try:
-                    length = string_ops.CountUtf8Chars(val.s)
+                    length = self.utf8_index.CountChars(val.s)
                 except error.Strict as e:
                     # Add this here so we don't have to add it so far down the stack.
                     # TODO: It's better to show BOTH this CODE an the actual DATA
@@ -790,10 +827,11 @@ class AbstractWordEvaluator(StringWordEvaluator):
             elif case(value_e.BashArray):
                 val = cast(value.BashArray, UP_val)
                 # There can be empty placeholder values in the array.
-                length = 0
-                for s in val.strs:
-                    if s is not None:
-                        length += 1
+                length = bash_impl.BashArray_Count(val.strs)
+
+            elif case(value_e.SparseArray):
+                val = cast(value.SparseArray, UP_val)
+                length = bash_impl.SparseArray_Count(val)
 
             elif case(value_e.BashAssoc):
                 val = cast(value.BashAssoc, UP_val)
@@ -813,13 +851,11 @@ class AbstractWordEvaluator(StringWordEvaluator):
         with tagswitch(val) as case:
             if case(value_e.BashArray):
                 val = cast(value.BashArray, UP_val)
-                # translation issue: tuple indices not supported in list comprehensions
-                #indices = [str(i) for i, s in enumerate(val.strs) if s is not None]
-                indices = []  # type: List[str]
-                for i, s in enumerate(val.strs):
-                    if s is not None:
-                        indices.append(str(i))
-                return value.BashArray(indices)
+                return value.BashArray(bash_impl.BashArray_GetKeys(val.strs))
+
+            elif case(value_e.SparseArray):
+                val = cast(value.SparseArray, UP_val)
+                return value.BashArray(bash_impl.SparseArray_GetKeys(val))
 
             elif case(value_e.BashAssoc):
                 val = cast(value.BashAssoc, UP_val)
@@ -849,7 +885,8 @@ class AbstractWordEvaluator(StringWordEvaluator):
                 return self._VarRefValue(bvs_part, quoted, vsub_state,
                                          vtest_place)
 
-            elif case(value_e.BashArray):  # caught earlier but OK
+            elif case(value_e.BashArray,
+                      value_e.SparseArray):  # caught earlier but OK
                 e_die('Indirect expansion of array')
 
             elif case(value_e.BashAssoc):  # caught earlier but OK
@@ -891,6 +928,15 @@ class AbstractWordEvaluator(StringWordEvaluator):
                                     s, op.op, arg_val.s, has_extglob))
                     new_val = value.BashArray(strs)
 
+                elif case(value_e.SparseArray):
+                    val = cast(value.SparseArray, UP_val)
+                    strs = []
+                    for s in bash_impl.SparseArray_GetValues(val):
+                        strs.append(
+                            string_ops.DoUnarySuffixOp(s, op.op, arg_val.s,
+                                                       has_extglob))
+                    new_val = value.BashArray(strs)
+
                 elif case(value_e.BashAssoc):
                     val = cast(value.BashAssoc, UP_val)
                     strs = []
@@ -953,6 +999,13 @@ class AbstractWordEvaluator(StringWordEvaluator):
                         strs.append(replacer.Replace(s, op))
                 val = value.BashArray(strs)
 
+            elif case2(value_e.SparseArray):
+                sparse_val = cast(value.SparseArray, val)
+                strs = []
+                for s in bash_impl.SparseArray_GetValues(sparse_val):
+                    strs.append(replacer.Replace(s, op))
+                val = value.BashArray(strs)
+
             elif case2(value_e.BashAssoc):
                 assoc_val = cast(value.BashAssoc, val)
                 strs = []
@@ -984,7 +1037,8 @@ class AbstractWordEvaluator(StringWordEvaluator):
             arg0_val = None  # type: value.Str
             if var_name is None:  # $* or $@
                 arg0_val = self.mem.GetArg0()
-            val = _PerformSlice(val, begin, length, has_length, part, arg0_val)
+            val = _PerformSlice(val, begin, length, has_length, part, arg0_val,
+                                self.utf8_index)
         except error.Strict as e:
             if self.exec_opts.strict_word_eval():
                 raise
@@ -993,7 +1047,7 @@ class AbstractWordEvaluator(StringWordEvaluator):
                 with tagswitch(val) as case2:
                     if case2(value_e.Str):
                         val = value.Str('')
-                    elif case2(value_e.BashArray):
+                    elif case2(value_e.BashArray, value_e.SparseArray):
                         val = value.BashArray([])
                     else:
                         raise NotImplementedError()
@@ -1030,6 +1084,13 @@ class AbstractWordEvaluator(StringWordEvaluator):
                     # TODO: should use fastfunc.ShellEncode
                     tmp = [j8_lite.MaybeShellEncode(s) for s in array_val.strs]
                     result = value.Str(' '.join(tmp))
+                elif case(value_e.SparseArray):
+                    sparse_val = cast(value.SparseArray, UP_val)
+                    tmp = [
+                        j8_lite.MaybeShellEncode(s)
+                        for s in bash_impl.SparseArray_GetValues(sparse_val)
+                    ]
+                    result = value.Str(' '.join(tmp))
                 else:
                     e_die("Can't use @Q on %s" % ui.ValType(val), op)
 
@@ -1038,7 +1099,7 @@ class AbstractWordEvaluator(StringWordEvaluator):
             # spec/ble-idioms.test.sh.
             chars = []  # type: List[str]
             with tagswitch(val) as case:
-                if case(value_e.BashArray):
+                if case(value_e.BashArray, value_e.SparseArray):
                     chars.append('a')
                 elif case(value_e.BashAssoc):
                     chars.append('A')
@@ -1074,7 +1135,7 @@ class AbstractWordEvaluator(StringWordEvaluator):
                 elif case2(value_e.Str):
                     if self.exec_opts.strict_array():
                         e_die("Can't index string with @", loc.WordPart(part))
-                elif case2(value_e.BashArray):
+                elif case2(value_e.BashArray, value_e.SparseArray):
                     pass  # no-op
 
         elif op_id == Id.Arith_Star:
@@ -1087,7 +1148,7 @@ class AbstractWordEvaluator(StringWordEvaluator):
                 elif case2(value_e.Str):
                     if self.exec_opts.strict_array():
                         e_die("Can't index string with *", loc.WordPart(part))
-                elif case2(value_e.BashArray):
+                elif case2(value_e.BashArray, value_e.SparseArray):
                     pass  # no-op
 
         else:
@@ -1123,6 +1184,18 @@ class AbstractWordEvaluator(StringWordEvaluator):
                 else:
                     val = value.Str(s)
 
+            elif case2(value_e.SparseArray):
+                sparse_val = cast(value.SparseArray, UP_val)
+                big_index = self.arith_ev.EvalToBigInt(anode)
+                vtest_place.index = a_index.Int(mops.BigTruncate(big_index))
+
+                s = bash_impl.SparseArray_Get(sparse_val, big_index)
+
+                if s is None:
+                    val = value.Undef
+                else:
+                    val = value.Str(s)
+
             elif case2(value_e.BashAssoc):
                 assoc_val = cast(value.BashAssoc, UP_val)
                 # Location could also be attached to bracket_op?  But
@@ -1226,9 +1299,9 @@ class AbstractWordEvaluator(StringWordEvaluator):
 
         else:  # no bracket op
             var_name = vtest_place.name
-            if (var_name is not None and
-                    val.tag() in (value_e.BashArray, value_e.BashAssoc) and
-                    not vsub_state.is_type_query):
+            if (var_name is not None and val.tag()
+                    in (value_e.BashArray, value_e.SparseArray,
+                        value_e.BashAssoc) and not vsub_state.is_type_query):
                 if ShouldArrayDecay(var_name, self.exec_opts,
                                     not (part.prefix_op or part.suffix_op)):
                     # for ${BASH_SOURCE}, etc.
@@ -1460,6 +1533,14 @@ class AbstractWordEvaluator(StringWordEvaluator):
                 val = self._DecayArray(array_val)
             else:
                 val = array_val
+        elif val.tag() == value_e.SparseArray:
+            sparse_val = cast(value.SparseArray, UP_val)
+            if vsub_state.join_array:
+                val = self._DecayArray(
+                    value.BashArray(
+                        bash_impl.SparseArray_GetValues(sparse_val)))
+            else:
+                val = sparse_val
 
         # For example, ${a} evaluates to value.Str(), but we want a
         # Piece().
@@ -1519,7 +1600,8 @@ class AbstractWordEvaluator(StringWordEvaluator):
             var_name = lexer.LazyStr(token)
             # TODO: Special case for LINENO
             val = self.mem.GetValue(var_name)
-            if val.tag() in (value_e.BashArray, value_e.BashAssoc):
+            if val.tag() in (value_e.BashArray, value_e.SparseArray,
+                             value_e.BashAssoc):
                 if ShouldArrayDecay(var_name, self.exec_opts):
                     # for $BASH_SOURCE, etc.
                     val = DecayArray(val)
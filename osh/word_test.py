@@ -171,6 +171,47 @@ class WordTest(unittest.TestCase):
         self.assertEqual('b', word_.FastStrEval(node.words[3]))
         self.assertEqual(']', word_.FastStrEval(node.words[4]))
 
+    def testStaticArgv(self):
+        node = assertParseSimpleCommand(self, "printf '%s\\n' foo bar")
+        self.assertEqual(['printf', '%s\\n', 'foo', 'bar'], node.static_argv)
+
+        node = assertParseSimpleCommand(self, '[ a -lt b ]')
+        self.assertEqual(['[', 'a', '-lt', 'b', ']'], node.static_argv)
+
+        node = assertParseSimpleCommand(self, 'builtin echo hi')
+        self.assertEqual(['builtin', 'echo', 'hi'], node.static_argv)
+
+        # Substitutions, globs, tildes, and braces are evaluated at runtime
+        for code_str in [
+                'echo $x', 'echo *.py', 'echo ~', 'echo {a,b}', 'echo "hi"'
+        ]:
+            node = assertParseSimpleCommand(self, code_str)
+            self.assertEqual(None, node.static_argv, code_str)
+
+        # Assignment builtins have different evaluation rules
+        for code_str in ['local x', 'builtin local x', 'command export x']:
+            node = assertParseSimpleCommand(self, code_str)
+            self.assertEqual(None, node.static_argv, code_str)
+
+    def testStaticCasePattern(self):
+        node = assertParseSimpleCommand(
+            self, """echo foo "d e" 'x*' \\! *.sh f[ab] $x ~""")
+        w = node.words
+
+        # (pattern, literal)
+        self.assertEqual(('foo', 'foo'), word_.StaticCasePattern(w[1]))
+        self.assertEqual(('d e', 'd e'), word_.StaticCasePattern(w[2]))
+        self.assertEqual(('x\\*', 'x*'), word_.StaticCasePattern(w[3]))
+        self.assertEqual(('\\!', '!'), word_.StaticCasePattern(w[4]))
+
+        # Globs
+        self.assertEqual(('*.sh', None), word_.StaticCasePattern(w[5]))
+        self.assertEqual(('f[ab]', None), word_.StaticCasePattern(w[6]))
+
+        # Evaluated at runtime
+        self.assertEqual((None, None), word_.StaticCasePattern(w[7]))
+        self.assertEqual((None, None), word_.StaticCasePattern(w[8]))
+
 
 if __name__ == '__main__':
     unittest.main()
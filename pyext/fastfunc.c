@@ -7,6 +7,7 @@
 
 #include "data_lang/j8.h"  // CanOmitQuotes
 #include "data_lang/j8_libc.h"
+#include "data_lang/packle.h"
 #include "data_lang/utf8.h"
 
 #include <Python.h>
@@ -108,6 +109,41 @@ func_Utf8DecodeOne(PyObject *self, PyObject *args) {
   return ret_val;
 }
 
+static PyObject *
+func_IsAscii(PyObject *self, PyObject *args) {
+  j8_buf_t in;
+  if (!PyArg_ParseTuple(args, "s#", &(in.data), &(in.len))) {
+    return NULL;
+  }
+  int result = utf8_is_ascii(in.data, in.len);
+  return PyBool_FromLong(result);
+}
+
+static PyObject *
+func_FloatToBytes(PyObject *self, PyObject *args) {
+  double d;
+  if (!PyArg_ParseTuple(args, "d", &d)) {
+    return NULL;
+  }
+  unsigned char out[PACKLE_FLOAT_SIZE];
+  packle_write_float(d, out);
+  return PyString_FromStringAndSize((const char*)out, PACKLE_FLOAT_SIZE);
+}
+
+static PyObject *
+func_BytesToFloat(PyObject *self, PyObject *args) {
+  j8_buf_t in;
+  int start;
+  if (!PyArg_ParseTuple(args, "s#i", &(in.data), &(in.len), &start)) {
+    return NULL;
+  }
+  if (start < 0 || start + PACKLE_FLOAT_SIZE > in.len) {
+    PyErr_SetString(PyExc_ValueError, "Not enough bytes for a float");
+    return NULL;
+  }
+  return PyFloat_FromDouble(packle_read_float(in.data + start));
+}
+
 static PyObject *
 func_CanOmitQuotes(PyObject *self, PyObject *args) {
   j8_buf_t in;
@@ -123,6 +159,9 @@ static PyMethodDef methods[] = {
   {"ShellEncodeString", func_ShellEncodeString, METH_VARARGS, ""},
   {"PartIsUtf8", func_PartIsUtf8, METH_VARARGS, ""},
   {"Utf8DecodeOne", func_Utf8DecodeOne, METH_VARARGS, ""},
+  {"IsAscii", func_IsAscii, METH_VARARGS, ""},
+  {"FloatToBytes", func_FloatToBytes, METH_VARARGS, ""},
+  {"BytesToFloat", func_BytesToFloat, METH_VARARGS, ""},
   {"CanOmitQuotes", func_CanOmitQuotes, METH_VARARGS, ""},
 
   {NULL, NULL},
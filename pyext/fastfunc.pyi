@@ -8,4 +8,10 @@ def PartIsUtf8(s: str, start: int, end: int) -> bool: ...
 
 def Utf8DecodeOne(s: str, start: int) -> Tuple[int, int]: ...
 
+def IsAscii(s: str) -> bool: ...
+
+def FloatToBytes(f: float) -> str: ...
+
+def BytesToFloat(s: str, start: int) -> float: ...
+
 def CanOmitQuotes(s: str) -> bool: ...
@@ -39,6 +39,20 @@ class FastfuncTest(unittest.TestCase):
     self.assertEqual(True, fastfunc.PartIsUtf8(s, 0, 3))
     self.assertEqual(False, fastfunc.PartIsUtf8(s, 3, 4))
 
+  def testIsAscii(self):
+    self.assertEqual(True, fastfunc.IsAscii(''))
+    self.assertEqual(True, fastfunc.IsAscii('hi \x7f'))
+    self.assertEqual(False, fastfunc.IsAscii('hi \xff'))
+    self.assertEqual(False, fastfunc.IsAscii(u'\u03bc'.encode('utf-8')))
+
+  def testFloatBytes(self):
+    self.assertEqual('\x00\x00\x00\x00\x00\x00\xf0?', fastfunc.FloatToBytes(1.0))
+    for f in [0.0, -0.0, 1.0 / 3, 0.1 + 0.2, 5e-324, 1.7976931348623157e308,
+              float('-inf')]:
+      s = 'xy' + fastfunc.FloatToBytes(f)
+      self.assertEqual(repr(f), repr(fastfunc.BytesToFloat(s, 2)))
+    self.assertRaises(ValueError, fastfunc.BytesToFloat, 'x' * 8, 1)
+
   def testUtf8Decode(self):
     # interface is:
     #  def Utf8DecodeOne(s: str, start: int) -> (codepoint_or_error: int, bytes_read: int)
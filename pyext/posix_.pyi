@@ -49,6 +49,7 @@ O_SYNC = ...  # type: int
 O_TRUNC = ...  # type: int
 O_WRONLY = ...  # type: int
 R_OK = ...  # type: int
+SEEK_CUR = ...  # type: int
 TMP_MAX = ...  # type: int
 WCONTINUED = ...  # type: int
 WNOHANG = ...  # type: int
@@ -150,7 +151,7 @@ def lchown(path: unicode, uid: int, gid: int) -> None: ...
 def link(source: unicode, link_name: str) -> None: ...
 _T = TypeVar("_T")
 def listdir(path: _T) -> List[_T]: ...
-def lseek(fd: int, pos: int, how: int) -> None: ...
+def lseek(fd: int, pos: int, how: int) -> int: ...
 def lstat(path: unicode) -> stat_result: ...
 def major(device: int) -> int: ...
 def makedev(major: int, minor: int) -> int: ...
@@ -59,6 +59,7 @@ FUNCS = [
     "open",
     "close",
     "dup2",
+    "lseek",
     "read",
     "write",
     "fdopen",
@@ -75,6 +76,8 @@ FUNCS = [
     'R_OK',
     'W_OK',
 
+    'SEEK_CUR',
+
     'O_APPEND',
     'O_CREAT',
     'O_RDONLY',
@@ -166,6 +166,33 @@ s1+='d'
 echo $s1 $s2
 ## stdout: abcd abc
 
+#### Append in a loop, then use the string in other ways
+s=x
+for i in 1 2 3; do
+  s+=$i
+done
+echo $s ${#s}
+
+f() {
+  s+=f        # dynamic scope
+  local s=L
+  s+=l
+  echo local=$s
+}
+f
+echo global=$s
+
+( s+=sub; echo sub=$s )
+s+=y
+echo $s
+## STDOUT:
+x123 4
+local=Ll
+global=x123f
+sub=x123fsub
+x123fy
+## END
+
 #### typeset s+= 
 
 typeset s+=foo
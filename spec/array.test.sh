@@ -801,3 +801,83 @@ two=1
 ## N-I mksh status: 1
 ## N-I mksh STDOUT:
 ## END
+
+#### Assigning far past the end, then unset, slice, keys, and append
+a=(0 1 2)
+a[1000000]=x
+a[500]=y
+argv.py "${#a[@]}" "${!a[@]}"
+argv.py "${a[@]:2:2}" "${a[@]:3}" "${a[@]:1000000}" "${a[@]:1000001}"
+argv.py "${a[@]: -1}" "${a[@]: -2000000}"
+
+unset 'a[1000000]'
+a+=(z)
+argv.py "${!a[@]}" "${a[@]}"
+argv.py "${a[1]}" "${a[-1]}" "${a[502]-unset}"
+## STDOUT:
+['5', '0', '1', '2', '500', '1000000']
+['2', 'y', 'y', 'x', 'x']
+['x']
+['0', '1', '2', '500', '501', '0', '1', '2', 'y', 'z']
+['1', 'z', 'unset']
+## END
+## N-I mksh status: 1
+## N-I mksh STDOUT:
+## END
+
+#### Unset items in the middle of a long array
+a=( $(seq 30) )
+for i in 2 3 10 20; do
+  unset "a[$i]"
+done
+echo "${#a[@]}"
+echo "${!a[@]}"
+echo "${a[@]:8:4}"
+
+a[2]=two
+a+=(31 32)
+echo "${a[@]}"
+
+unset 'a[-1]'
+echo "${a[@]: -2}"
+## STDOUT:
+26
+0 1 4 5 6 7 8 9 11 12 13 14 15 16 17 18 19 21 22 23 24 25 26 27 28 29
+9 10 12 13
+1 2 two 5 6 7 8 9 10 12 13 14 15 16 17 18 19 20 22 23 24 25 26 27 28 29 30 31 32
+30 31
+## END
+## N-I mksh status: 1
+## N-I mksh STDOUT:
+26
+0 1 4 5 6 7 8 9 11 12 13 14 15 16 17 18 19 21 22 23 24 25 26 27 28 29
+## END
+
+#### declare -p, ${a[@]/x/y}, [[ -v ]], and (( )) on an array with a big hole
+a[5]=five
+a[100000]=x
+declare -p a
+echo "${a[@]/x/X}" "${a[@]%e}" "${a[*]}"
+
+[[ -v a[100000] ]]; echo $?
+[[ -v a[99999] ]]; echo $?
+
+(( a[200000] = a[5] + 1 )) || true
+echo "${a[200000]}" "${#a[@]}"
+## STDOUT:
+declare -a a=([5]="five" [100000]="x")
+five X fiv x five x
+0
+1
+1 3
+## END
+## OK osh STDOUT:
+declare -a a=(); a[5]=five a[100000]=x
+five X fiv x five x
+0
+1
+1 3
+## END
+## N-I mksh status: 1
+## N-I mksh STDOUT:
+## END
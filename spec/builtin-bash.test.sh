@@ -1,4 +1,4 @@
-## oils_failures_allowed: 4
+## oils_failures_allowed: 1
 ## compare_shells: bash
 
 
@@ -179,6 +179,44 @@ n=3
 ## N-I dash/mksh/zsh/ash STDOUT:
 ## END
 
+#### mapfile -n leaves the rest of the input for the next command
+type mapfile >/dev/null 2>&1 || exit 0
+seq 5 > $TMP/seq.txt
+{ mapfile -n 2 -t arr; echo "${arr[@]}"; cat; } < $TMP/seq.txt
+echo --
+seq 5 | { mapfile -n 2 -t arr; echo "${arr[@]}"; cat; }
+## STDOUT:
+1 2
+3
+4
+5
+--
+1 2
+3
+4
+5
+## END
+## N-I dash/mksh/zsh/ash STDOUT:
+## END
+
+#### mapfile -t with empty lines and no trailing newline
+type mapfile >/dev/null 2>&1 || exit 0
+printf 'a\n\nb\n\nc' | {
+  mapfile -t arr
+  echo "n=${#arr[@]}"
+  printf '[%s]\n' "${arr[@]}"
+}
+## STDOUT:
+n=5
+[a]
+[]
+[b]
+[]
+[c]
+## END
+## N-I dash/mksh/zsh/ash STDOUT:
+## END
+
 #### mapfile / readarray stdin  TODO: Fix me.
 shopt -s lastpipe  # for bash
 
@@ -367,6 +367,25 @@ status=1
 status=0
 ## END
 
+#### file tests see changes made between them
+f=$TMP/stat-changes
+rm -f $f
+[ -e $f ] && [ -s $f ] || echo 'missing'
+echo hi > $f
+[ -e $f ] && [ -s $f ] && echo 'nonempty'
+[ -e $f ] && [ -e $(rm $f; echo $f) ] || echo 'removed'
+: > $f
+while [ -e $f ]; do
+  [ -f $f ] && rm $f
+done
+[ -e $f ] || echo 'loop'
+## STDOUT:
+missing
+nonempty
+removed
+loop
+## END
+
 #### test -b -c -S (block, character, socket)
 # NOTE: we do not have the "true" case
 
@@ -568,6 +568,46 @@ compgen -A builtin g
 getopts
 ## END
 
+#### compgen -A command, builtin and keyword with prefixes
+dir=$TMP/compgen-prefix
+mkdir -p $dir
+for name in zap zebra zed-1 zed-2 zen zip zoo; do
+  touch $dir/$name
+  chmod +x $dir/$name
+done
+
+PATH=$dir compgen -A command ze | sort
+echo --
+PATH=$dir compgen -A command zo
+echo --
+compgen -A builtin ty
+echo --
+compgen -A builtin un
+echo --
+compgen -A keyword do
+echo --
+compgen -A keyword zz
+echo status=$?
+## STDOUT:
+zebra
+zed-1
+zed-2
+zen
+--
+zoo
+--
+type
+typeset
+--
+unalias
+unset
+--
+do
+done
+--
+status=1
+## END
+
 #### complete -C vs. compgen -C
 
 f() { echo foo; echo bar; }
@@ -190,6 +190,34 @@ new=$PATH
 test "$old" = "$new" && echo "not changed"
 ## stdout: not changed
 
+#### Environment is up to date after each change
+export E=1
+printenv.py E
+E=2
+printenv.py E
+E=temp printenv.py E
+printenv.py E
+f() { local E=3; export E; printenv.py E; }
+f
+printenv.py E
+unset E
+printenv.py E
+E=4
+printenv.py E
+export E
+printenv.py E
+## STDOUT:
+1
+2
+temp
+2
+3
+2
+None
+None
+4
+## END
+
 #### can't export array (strict_array)
 shopt -s strict_array
 
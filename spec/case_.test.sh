@@ -242,3 +242,32 @@ in esac
 ## OK mksh status: 1
 ## OK zsh status: 127
 
+
+#### case with many literal arms
+f() {
+  case "$1" in
+    build|test) echo "1 $1" ;;
+    clean) echo "2 $1" ;;
+    'a*'|"d e") echo "3 $1" ;;
+    \!|install) echo "4 $1" ;;
+    test) echo "never" ;;
+    *.sh) echo "5 $1" ;;
+    clean) echo "never" ;;
+    *) echo "6 $1" ;;
+  esac
+}
+for w in build test clean 'a*' 'd e' '!' install ab x.sh other; do
+  f "$w"
+done
+## STDOUT:
+1 build
+1 test
+2 clean
+3 a*
+3 d e
+4 !
+4 install
+6 ab
+5 x.sh
+6 other
+## END
@@ -471,4 +471,43 @@ done
 2 a
 ## END
 
- 
+#### break and continue in conditions, && || and case
+for i in 1 2 3 4; do
+  case $i in
+    1) continue ;;
+  esac
+  test $i = 2 && continue
+  if test $i = 4 || break; then
+    echo no
+  fi
+  echo i=$i
+done
+echo ---
+i=0
+while test $i -gt 1 && break; true; do
+  i=$((i + 1))
+  echo i=$i
+done
+echo done=$i
+## STDOUT:
+---
+i=1
+i=2
+done=2
+## END
+
+#### return from nested loops skips the rest of the function
+f() {
+  for i in 1 2; do
+    while true; do
+      { return 42; } > /dev/null
+      echo no
+    done
+  done
+  echo no
+}
+f
+echo status=$?
+## STDOUT:
+status=42
+## END
@@ -74,6 +74,50 @@ FOO
 ## END
 
 
+#### $(< file) strips trailing newlines, and fails on a missing file
+
+printf 'a\n\nb\n\n\n' > myfile
+for i in 1 2; do
+  foo=$(< myfile)
+  echo "[$foo]"
+done
+
+foo=$(< nonexistent)
+echo status=$? "[$foo]"
+
+## STDOUT:
+[a
+
+b]
+[a
+
+b]
+status=1 []
+## END
+
+## N-I dash STDOUT:
+[]
+[]
+status=2 []
+## END
+
+#### $(0< file) reads the file, but $(3< file) doesn't
+
+echo hello > myfile
+echo "[$(0< myfile)]"
+echo "[$(3< myfile)]"
+
+## STDOUT:
+[hello]
+[]
+## END
+
+## N-I dash STDOUT:
+[]
+[]
+## END
+
+
 #### < file in pipeline and subshell doesn't work
 echo FOO > file2
 
@@ -98,6 +98,30 @@ echo ${foo:1:3}
 ## stdout: -μ-
 ## BUG mksh stdout: -μ
 
+#### Slice each character of a long UTF-8 string
+s=
+for i in $(seq 30); do
+  s+='μéß'
+done
+echo ${#s}
+
+out=
+for (( i = 0; i < ${#s}; i += 20 )); do
+  out+="${s:i:2} "
+done
+echo "$out"
+echo ${s:84}
+## STDOUT:
+90
+μé ßμ éß μé ßμ 
+μéßμéß
+## END
+## BUG mksh STDOUT:
+180
+μ é ß μ é ß μ é ß 
+μéßμéßμéßμéßμéßμéßμéßμéßμéßμéßμéßμéßμéßμéßμéßμéß
+## END
+
 #### Slice string with invalid UTF-8 results in empty string and warning
 s=$(echo -e "\xFF")bcdef
 echo -${s:1:3}-
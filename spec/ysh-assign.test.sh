@@ -239,6 +239,38 @@ json write (d)
 }
 ## END
 
+#### setvar s = s ++ x in a loop
+var s = 'x'
+for i in (1 ..= 3) {
+  setvar s = s ++ "$i" ++ '-'
+}
+echo $s $[len(s)]
+
+var f = vm.getFrame(0)
+setvar s = s ++ s
+echo $[dict(f).s]
+
+proc p {
+  var s = 'L'
+  setvar s = s ++ ${s}
+  setglobal s = s ++ 'g'  # reads the local
+  echo local=$s
+}
+p
+echo global=$s
+
+try {
+  setvar s = s ++ 42
+}
+echo status=$[_error.code]
+## STDOUT:
+x1-2-3- 7
+x1-2-3-x1-2-3-
+local=LL
+global=LLg
+status=3
+## END
+
 #### setvar d.key = 42
 shopt -s ysh:all
 
@@ -83,3 +83,112 @@ hi
 status=42
 ok
 ## END
+
+#### forkeach usage errors
+shopt --set ysh:upgrade
+shopt --unset errexit
+
+forkeach a b
+echo status=$?
+
+forkeach a b (42) {
+  echo hi
+}
+echo status=$?
+
+## status: 3
+## STDOUT:
+status=2
+## END
+
+#### forkeach runs the block with each arg as $1
+shopt --set ysh:upgrade
+
+x=outer
+forkeach -j 1 a b c {
+  setvar x = $1
+  echo "start $1"
+  sleep 0.01
+  echo "end $1"
+}
+echo status=$? x=$x
+
+forkeach -j 2 {
+  echo 'no args'
+}
+echo status=$?
+
+## STDOUT:
+start a
+end a
+start b
+end b
+start c
+end c
+status=0 x=outer
+status=0
+## END
+
+#### forkeach -k keeps output in arg order
+shopt --set ysh:upgrade
+
+forkeach -j 3 -k 0.2 0.1 0 {
+  sleep $1
+  echo "slept $1"
+}
+echo status=$?
+
+## STDOUT:
+slept 0.2
+slept 0.1
+slept 0
+status=0
+## END
+
+#### forkeach collects statuses in arg order
+shopt --set ysh:upgrade
+shopt --unset errexit
+
+forkeach -j 0 3 0 5 (&statuses) {
+  sleep 0.0$1
+  exit $1
+}
+echo status=$?
+pp test_ (statuses)
+
+## STDOUT:
+status=3
+(List)   [3,0,5]
+## END
+
+#### forkeach -k reports errors writing output
+shopt --set ysh:upgrade
+shopt --unset errexit
+
+forkeach -k a b {
+  echo $1
+} > /dev/full 2> $TMP/forkeach-err.txt
+echo status=$?
+grep -o 'I/O error writing output' $TMP/forkeach-err.txt
+
+## STDOUT:
+status=2
+I/O error writing output
+## END
+
+#### forkeach -k children don't get the pipes of other children
+shopt --set ysh:upgrade
+
+if ! test -d /proc/self/fd; then
+  echo 4  # not Linux
+  exit
+fi
+
+# ls is exec'd, and sees the descriptors it inherited
+forkeach -j 0 -k a b c d {
+  ls /proc/self/fd | wc -l
+} | uniq -c | awk '{ print $1 }'
+
+## STDOUT:
+4
+## END
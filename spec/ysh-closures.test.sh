@@ -177,3 +177,67 @@ global expr!
 global block!
 ## END
 
+
+#### Captured frames aren't reused by later calls
+shopt --set ysh:upgrade
+
+func makeExpr(x) {
+  return (^[x])
+}
+
+proc makeBlock(x; out) {
+  call out->setValue(^(echo $x))
+}
+
+func getLocal(x) {
+  return (vm.getFrame(-1))
+}
+
+func id(y) {
+  return (y)
+}
+
+var e1 = makeExpr('a')
+var e2 = makeExpr('b')
+makeBlock c (&b1)
+var fr = getLocal('d')
+
+# These calls would overwrite the frames if they were pooled
+for i in (0 ..< 3) {
+  call id(i)
+  makeBlock z (&unused)
+}
+
+echo $[io->evalExpr(e1)] $[io->evalExpr(e2)]
+call io->eval(b1)
+echo $[dict(fr).x]
+
+## STDOUT:
+a b
+c
+d
+## END
+
+#### Pending s ++ x appends are visible in io->evalToDict() and modules
+shopt --set ysh:upgrade
+
+var cmd = ^(
+  var t = 'x'
+  setvar t = t ++ 'y'
+  setvar t = t ++ 'z'
+)
+var d = io->evalToDict(cmd)
+echo $[d.t]
+
+echo '
+const __provide__ = :| s |
+var s = "a"
+for i in (1 ..= 3) { setvar s = s ++ "$i" }
+' > $[ENV.TMP]/appender.ysh
+use $[ENV.TMP]/appender.ysh
+echo $[appender.s]
+
+## STDOUT:
+xyz
+a123
+## END
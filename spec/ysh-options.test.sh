@@ -762,3 +762,65 @@ echo status=$?
 status=0
 status=0
 ## END
+
+#### buffer_output keeps output in order
+shopt -s buffer_output
+f=$TMP/buffer-output.txt
+{
+  echo 1
+  /bin/echo 2  # fork and exec
+  echo 3
+  ( echo 4 )
+  echo 5 > $TMP/buffer-output-2.txt
+  cat $TMP/buffer-output-2.txt
+  x=$(echo 6; /bin/echo 7)
+  echo $x
+  printf '%s\n' 8 | { read -r y; echo $y; }
+} > $f
+cat $f
+
+# stdout is the same file as stderr
+{ echo a; set -o __nonexistent__; echo c; } 2>&1 | sed -n '1p;$p'
+
+$SH -O buffer_output -c 'echo exit; exit 42' | cat
+## STDOUT:
+1
+2
+3
+4
+5
+6 7
+8
+a
+c
+exit
+## END
+
+#### buffer_output is flushed before wait
+shopt -s buffer_output
+f=$TMP/buffer-wait.txt
+{
+  { sleep 0.1; cat $f > $TMP/buffer-wait-seen.txt; } &
+  echo before
+  wait
+} > $f
+cat $TMP/buffer-wait-seen.txt
+## STDOUT:
+before
+## END
+
+#### buffer_output flush error isn't a redirect error
+shopt -s buffer_output
+{
+  echo hi
+  true > /dev/null
+  echo status=$? >&2
+} > /dev/full 2> $TMP/buffer-err.txt
+grep -o 'writing buffered output' $TMP/buffer-err.txt
+grep -c 'applying redirect' $TMP/buffer-err.txt
+cat $TMP/buffer-err.txt | grep status
+## STDOUT:
+writing buffered output
+0
+status=0
+## END
@@ -0,0 +1,172 @@
+## our_shell: ysh
+## tags: dev-minimal
+
+#### usage errors
+
+try {
+  packle read zz
+}
+echo status=$[_error.code]
+
+packle write
+
+## status: 3
+## STDOUT:
+status=2
+## END
+
+#### packle write then read round trips data
+var d = {name: 'bob', age: 42, ratio: 0.5, ok: true, none: null,
+         list: [1, 'two', [], {}], bytes: b'\yff\y00'}
+
+packle write (d) > $[ENV.TMP]/d.bin
+packle read (&x) < $[ENV.TMP]/d.bin
+json8 write (x)
+
+# default place
+packle read < $[ENV.TMP]/d.bin
+echo $[_reply.name] $[_reply.age]
+
+## STDOUT:
+{
+  "name": "bob",
+  "age": 42,
+  "ratio": 0.5,
+  "ok": true,
+  "none": null,
+  "list": [
+    1,
+    "two",
+    [],
+    {}
+  ],
+  "bytes": b'\yff\u{0}'
+}
+bob 42
+## END
+
+#### packle preserves shared and cyclic containers
+var shared = [1, 2]
+var d = {a: shared, b: shared}
+
+packle write (d) | packle read (&x)
+call x.a->append(3)
+echo @[x.b]
+
+var cycle = {}
+setvar cycle.self = cycle
+packle write (cycle) | packle read (&y)
+setvar y.self.self.marker = 42
+echo $[y.marker]
+
+## STDOUT:
+1 2 3
+42
+## END
+
+#### packle floats round trip exactly
+# JSON loses the last digits of these
+for f in (0.1 + 0.2, 1 / 3, 5e-324, 1.7976931348623157e308) {
+  packle write (f) | packle read (&g)
+  echo $[g - f]
+}
+## STDOUT:
+0.0
+0.0
+0.0
+0.0
+## END
+
+#### packle writes each string once
+var records = []
+for i in (0 ..< 100) {
+  call records->append({name: 'name-not-repeated', index: i})
+}
+packle write (records) > $[ENV.TMP]/r.bin
+grep -a -o 'name-not-repeated' $[ENV.TMP]/r.bin
+## STDOUT:
+name-not-repeated
+## END
+
+#### packle write error
+try {
+  packle write (len)
+}
+echo status=$[_error.code]
+
+try {
+  packle write ([1, len])
+}
+echo status=$[_error.code]
+## STDOUT:
+status=1
+status=1
+## END
+
+#### packle read error
+try {
+  echo '{"json": 1}' | packle read (&x)
+}
+echo status=$[_error.code]
+
+try {
+  printf 'PKL2l\x02\x01\x00\x00\x00n' | packle read (&x)
+}
+echo status=$[_error.code]
+## STDOUT:
+status=1
+status=1
+## END
+
+#### packle read at= decodes part of a file
+var users = []
+for i in (0 ..< 3) {
+  call users->append({name: "user-$i", tags: ['a', 'b']})
+}
+packle write ({count: 3, users}) > $[ENV.TMP]/u.bin
+
+packle read (&x, at=['users', 2]) < $[ENV.TMP]/u.bin
+json write (x)
+
+# from a pipe, and with the default place
+cat $[ENV.TMP]/u.bin | packle read (at=['users', 0, 'tags', 1])
+echo $[_reply]
+
+# after a line of the same file
+{ echo header; packle write ({count: 3, users}) } > $[ENV.TMP]/h.bin
+{ read -r line; packle read (&y, at=['count']) } < $[ENV.TMP]/h.bin
+echo $line $[y]
+## STDOUT:
+{
+  "name": "user-2",
+  "tags": [
+    "a",
+    "b"
+  ]
+}
+b
+header 3
+## END
+
+#### packle read at= errors
+packle write ({a: [1, 2]}) > $[ENV.TMP]/a.bin
+
+for path in (['b'], ['a', 2], ['a', -1], ['a', 'x'], [0]) {
+  try {
+    packle read (&x, at=path) < $[ENV.TMP]/a.bin
+  }
+  echo status=$[_error.code]
+}
+
+try {
+  packle read (&x, at=[1.5]) < $[ENV.TMP]/a.bin
+}
+echo status=$[_error.code]
+## STDOUT:
+status=1
+status=1
+status=1
+status=1
+status=1
+status=3
+## END
@@ -22,12 +22,12 @@ import parser
 def _name(glob):
 	return asdl.expr.PathTest(
 		asdl.pathAccessor_e.Filename,
-		asdl.predicate.GlobMatch(glob)
+		asdl.predicate.GlobMatch(glob, False)
 	)
 def _iname(glob):
 	return asdl.expr.PathTest(
 		asdl.pathAccessor_e.Filename,
-		asdl.predicate.GlobMatch(glob, ignoreCase=True)
+		asdl.predicate.GlobMatch(glob, True)
 	)
 def _lname(glob):
 	assert False
@@ -36,37 +36,37 @@ def _ilname(glob):
 def _path(glob):
 	return asdl.expr.PathTest(
 		asdl.pathAccessor_e.FullPath,
-		asdl.predicate.GlobMatch(glob)
+		asdl.predicate.GlobMatch(glob, False)
 	)
 def _ipath(glob):
 	return asdl.expr.PathTest(
 		asdl.pathAccessor_e.FullPath,
-		asdl.predicate.GlobMatch(glob, ignoreCase=True)
+		asdl.predicate.GlobMatch(glob, True)
 	)
 def _regex(re):
 	return asdl.expr.PathTest(
 		asdl.pathAccessor_e.FullPath,
-		asdl.predicate.RegexMatch(re)
+		asdl.predicate.RegexMatch(re, False)
 	)
 def _iregex(re):
 	return asdl.expr.PathTest(
 		asdl.pathAccessor_e.FullPath,
-		asdl.predicate.RegexMatch(re, ignoreCase=True)
+		asdl.predicate.RegexMatch(re, True)
 	)
 def _readable():
 	return asdl.expr.PathTest(
 		asdl.pathAccessor_e.FullPath,
-		asdl.predicate.Readable()
+		asdl.predicate.Readable
 	)
 def _writable():
 	return asdl.expr.PathTest(
 		asdl.pathAccessor_e.FullPath,
-		asdl.predicate.Writable()
+		asdl.predicate.Writable
 	)
 def _executable():
 	return asdl.expr.PathTest(
 		asdl.pathAccessor_e.FullPath,
-		asdl.predicate.Executable()
+		asdl.predicate.Executable
 	)
 #
 # stat tests
@@ -159,12 +159,12 @@ def _gid(gid_str):
 def _user(user):
 	return asdl.expr.StatTest(
 		asdl.statAccessor_e.Username,
-		asdl.predicate.StringMatch(user)
+		asdl.predicate.StringMatch(user, False)
 	)
 def _group(group):
 	return asdl.expr.StatTest(
 		asdl.statAccessor_e.Groupname,
-		asdl.predicate.StringMatch(group)
+		asdl.predicate.StringMatch(group, False)
 	)
 def _nouser():
 	assert False
@@ -176,23 +176,23 @@ def _fstype(fsType):
 # actions
 #
 def _print():
-	return asdl.expr.PrintAction()
+	return asdl.expr.PrintAction(None, None)
 def _print0():
 	# TODO verify fmt
-	return asdl.expr.PrintAction(format="%P\0")
+	return asdl.expr.PrintAction(None, "%P\0")
 def _printf(fmt):
-	return asdl.expr.PrintAction(format=fmt)
+	return asdl.expr.PrintAction(None, fmt)
 def _fprint(f):
-	return asdl.expr.PrintAction(file=f)
+	return asdl.expr.PrintAction(f, None)
 def _fprint0(f):
 	# TODO verify fmt
-	return asdl.expr.PrintAction(file=f, format="%P\0")
+	return asdl.expr.PrintAction(f, "%P\0")
 def _fprintf(f, fmt):
-	return asdl.expr.PrintAction(file=f, format=fmt)
+	return asdl.expr.PrintAction(f, fmt)
 def _ls():
-	return asdl.expr.LsAction()
+	return asdl.expr.LsAction(None)
 def _fls(f):
-	return asdl.expr.LsAction(file=f)
+	return asdl.expr.LsAction(f)
 def _exec(*argv):
 	argv = list(argv)
 	batch = True if argv[-1] == '+' else False if argv[-1] == ';' else None
@@ -218,16 +218,16 @@ def _okdir(*argv):
 		assert False
 	return asdl.expr.ExecAction(batch=batch, dir=True, ok=True, argv=argv[:-1])
 def _delete():
-	return asdl.expr.DeleteAction()
+	return asdl.expr.DeleteAction
 def _prune():
-	return asdl.expr.PruneAction()
+	return asdl.expr.PruneAction
 def _quit():
-	return asdl.expr.QuitAction()
+	return asdl.expr.QuitAction
 
 exprMap = {
 	# atoms
-	tokenizer.TRUE		: asdl.expr.True_,
-	tokenizer.FALSE	: asdl.expr.False_,
+	tokenizer.TRUE		: lambda: asdl.expr.True_,
+	tokenizer.FALSE	: lambda: asdl.expr.False_,
 	# path tests
 	tokenizer.NAME		: _name,
 	tokenizer.INAME	: _iname,
@@ -6,80 +6,108 @@
 #   http://www.apache.org/licenses/LICENSE-2.0
 """
 eval.py: evaluator for find.
+
+Compile() turns the expression into nested closures once, and Walk() calls
+the result on every file.  Name tests never stat(), and with scandir(), -type
+uses the d_type of the directory entry.
+
+Limitation: Python 2 has no scandir(), and this tool isn't translated to C++.
+So without the scandir backport, the walk uses os.listdir() and lstat()s every
+entry to find out if it's a directory, even for -name.
 """
 
 from __future__ import print_function
 
 import fnmatch
 import os
+import re
 import stat
 import sys
+import threading
+
+try:
+	from os import scandir
+except ImportError:
+	try:
+		from scandir import scandir  # backport for Python 2
+	except ImportError:
+		scandir = None
+
+try:
+	import Queue as queue
+except ImportError:
+	import queue
 
 from _devbuild.gen import find_asdl as asdl
 
 def _path(v):
 	return v.path
 def _basename(v):
-	return os.path.basename(v.path)
+	return v.name
 
 pathAccMap = {
-	asdl.pathAccessor_e.FullPath.enum_id : _path,
-	asdl.pathAccessor_e.Filename.enum_id : _basename,
+	asdl.pathAccessor_e.FullPath : _path,
+	asdl.pathAccessor_e.Filename : _basename,
 }
 
 def _accessTime(v):
 	assert False
-	return stat.ST_ATIME(v.stat.st_mode)
+	return v.stat.st_atime
 def _creationTime(v):
 	assert False
-	return stat.ST_CTIME(v.stat.st_mode)
+	return v.stat.st_ctime
 def _modificationTime(v):
 	assert False
-	return stat.ST_MTIME(v.stat.st_mode)
+	return v.stat.st_mtime
 def _filesystem(v):
 	assert False
-	return stat.ST_DEV(v.stat.st_mode) # ???
+	return v.stat.st_dev
 def _inode(v):
-	return stat.ST_INO(v.stat.st_mode)
+	return v.stat.st_ino
 def _linkCount(v):
-	return stat.ST_NLINK(v.stat.st_mode)
+	return v.stat.st_nlink
 def _mode(v):
 	return stat.S_IMODE(v.stat.st_mode)
 def _filetype(v):
-	return stat.S_IFMT(v.stat.st_mode)
+	return v.filetype()
 def _uid(v):
-	return stat.ST_UID(v.stat.st_mode)
+	return v.stat.st_uid
 def _gid(v):
-	return stat.ST_GID(v.stat.st_mode)
+	return v.stat.st_gid
 def _username(v):
 	assert False
 def _groupname(v):
 	assert False
 def _size(v):
-	return stat.ST_SIZE(v.stat.st_mode)
+	return v.stat.st_size
 
 statAccMap = {
-	asdl.statAccessor_e.AccessTime.enum_id		: _accessTime,
-	asdl.statAccessor_e.CreationTime.enum_id	: _creationTime,
-	asdl.statAccessor_e.ModificationTime.enum_id	: _modificationTime,
-	asdl.statAccessor_e.Filesystem.enum_id	: _filesystem,
-	asdl.statAccessor_e.Inode.enum_id		: _inode,
-#	asdl.statAccessor_e.LinkCount.enum_id	: _linkCount,
-	asdl.statAccessor_e.Mode.enum_id		: _mode,
-	asdl.statAccessor_e.Filetype.enum_id	: _filetype,
-	asdl.statAccessor_e.Uid.enum_id		: _uid,
-	asdl.statAccessor_e.Gid.enum_id		: _gid,
-	asdl.statAccessor_e.Username.enum_id	: _username,
-	asdl.statAccessor_e.Groupname.enum_id	: _groupname,
-	asdl.statAccessor_e.Size.enum_id		: _size,
+	asdl.statAccessor_e.AccessTime		: _accessTime,
+	asdl.statAccessor_e.CreationTime	: _creationTime,
+	asdl.statAccessor_e.ModificationTime	: _modificationTime,
+	asdl.statAccessor_e.Filesystem	: _filesystem,
+	asdl.statAccessor_e.Inode		: _inode,
+#	asdl.statAccessor_e.LinkCount	: _linkCount,
+	asdl.statAccessor_e.Mode		: _mode,
+	asdl.statAccessor_e.Filetype	: _filetype,
+	asdl.statAccessor_e.Uid		: _uid,
+	asdl.statAccessor_e.Gid		: _gid,
+	asdl.statAccessor_e.Username	: _username,
+	asdl.statAccessor_e.Groupname	: _groupname,
+	asdl.statAccessor_e.Size		: _size,
 }
 
 def _stringMatch(acc, test):
 	string = test.p.str
+	if test.p.ignoreCase:
+		string = string.lower()
+		return lambda x: acc(x).lower() == string
 	return lambda x: acc(x) == string
 def _globMatch(acc, test):
-	glob = test.p.glob
-	return lambda x: fnmatch.fnmatch(acc(x), glob)
+	# Translate the glob once, instead of on every call to fnmatch()
+	flags = re.IGNORECASE if test.p.ignoreCase else 0
+	match = re.compile(fnmatch.translate(test.p.glob), flags).match
+	return lambda x: match(acc(x)) is not None
 def _regexMatch(acc, test):
 	assert False
 def _eq(acc, test):
@@ -115,20 +143,34 @@ def _true(_):
 def _false(_):
 	return lambda _: False
 def _concatenation(test):
-	return lambda x: [EvalExpr(e)(x) for e in test.exprs][-1]
+	preds = [Compile(e) for e in test.exprs]
+	def __concatenation(x):
+		for pred in preds:
+			result = pred(x)
+		return result
+	return __concatenation
 def _disjunction(test):
-	return lambda x: any(EvalExpr(e)(x) for e in test.exprs)
+	preds = [Compile(e) for e in test.exprs]
+	if len(preds) == 2:
+		a, b = preds
+		return lambda x: a(x) or b(x)
+	return lambda x: any(pred(x) for pred in preds)
 def _conjunction(test):
-	return lambda x: all(EvalExpr(e)(x) for e in test.exprs)
+	preds = [Compile(e) for e in test.exprs]
+	if len(preds) == 2:
+		a, b = preds
+		return lambda x: a(x) and b(x)
+	return lambda x: all(pred(x) for pred in preds)
 def _negation(test):
-	return lambda x: not EvalExpr(test.expr)(x)
+	pred = Compile(test.expr)
+	return lambda x: not pred(x)
 def _pathTest(test):
-	pred = predicateMap[test.p.tag]
-	acc = pathAccMap[test.a.enum_id]
+	pred = predicateMap[test.p.tag()]
+	acc = pathAccMap[test.a]
 	return pred(acc, test)
 def _statTest(test):
-	pred = predicateMap[test.p.tag]
-	acc = statAccMap[test.a.enum_id]
+	pred = predicateMap[test.p.tag()]
+	acc = statAccMap[test.a]
 	return pred(acc, test)
 def _delete(_):
 	def __delete(v):
@@ -148,15 +190,16 @@ def _quit(_):
 def _print(action):
 	# TODO handle output-file
 	# TODO handle format
+	write = sys.stdout.write
 	def __print(v):
-		print(v.path)
+		write(v.path + '\n')
 		return True
 	return __print
 def _ls(action):
-	return _true
+	return _true(action)
 def _exec(action):
 	# TODO return exit status
-	return _true
+	return _true(action)
 
 exprMap = {
 	asdl.expr_e.True_	: _true,
@@ -175,20 +218,139 @@ exprMap = {
 	asdl.expr_e.ExecAction	: _exec,
 }
 
-def EvalExpr(ast):
-	return exprMap[ast.tag](ast)
+def Compile(ast):
+	"""Returns a function that evaluates the expression on a Thing."""
+	return exprMap[ast.tag()](ast)
 
-class Thing:
-	def __init__(self, path, stat=None):
+class Thing(object):
+	__slots__ = ('path', 'name', '_entry', '_stat', 'prune', 'quit')
+	def __init__(self, path, name, entry=None):
 		self.path = path
-		self._stat = stat
+		self.name = name
+		self._entry = entry  # from scandir(), or None
+		self._stat = None
 		self.prune = False
 		self.quit = False
 	@property
 	def stat(self):
 		if self._stat is None:
-			# TODO stat for tests that require it?
-			self._stat = os.lstat(self.path)
+			if self._entry is None:
+				self._stat = os.lstat(self.path)
+			else:
+				self._stat = self._entry.stat(follow_symlinks=False)
 		return self._stat
+	def filetype(self):
+		"""S_IFMT of the file, without stat() if the entry has a d_type."""
+		e = self._entry
+		if e is not None and self._stat is None:
+			if e.is_symlink():
+				return stat.S_IFLNK
+			if e.is_dir(follow_symlinks=False):
+				return stat.S_IFDIR
+			if e.is_file(follow_symlinks=False):
+				return stat.S_IFREG
+		return stat.S_IFMT(self.stat.st_mode)
+	def is_dir(self):
+		return self.filetype() == stat.S_IFDIR
 	def __repr__(self):
 		return self.path
+
+class Walker(object):
+	"""Calls a predicate on each file, in the same order as GNU find."""
+	def __init__(self, pred):
+		self.pred = pred
+		self.status = 0
+	def _ListDir(self, path):
+		# Without scandir(), there's no d_type, so is_dir() costs an lstat() for
+		# each entry.  See the limitation in the module docstring.
+		try:
+			if scandir is not None:
+				return [Thing(e.path, e.name, e) for e in scandir(path)]
+			return [
+				Thing(os.path.join(path, name), name)
+				for name in os.listdir(path)
+			]
+		except OSError as e:
+			print("find: '%s': %s" % (path, e.strerror), file=sys.stderr)
+			self.status = 1
+			return []
+	def _Listing(self, path):
+		return self._ListDir(path)
+	def Walk(self, paths):
+		"""Returns the exit status."""
+		for path in paths:
+			t = Thing(path, os.path.basename(path.rstrip('/')) or path)
+			try:
+				t.stat
+			except OSError as e:
+				print("find: '%s': %s" % (path, e.strerror), file=sys.stderr)
+				self.status = 1
+				continue
+			if self._Visit(t):
+				break
+		return self.status
+	def _Visit(self, root):
+		"""Returns True for -quit."""
+		self.pred(root)
+		if root.quit:
+			return True
+		if root.prune or not root.is_dir():
+			return False
+		# An explicit stack, so deep trees don't hit the recursion limit
+		stack = [iter(self._Listing(root.path))]
+		while stack:
+			for t in stack[-1]:
+				self.pred(t)
+				if t.quit:
+					return True
+				if not t.prune and t.is_dir():
+					stack.append(iter(self._Listing(t.path)))
+					break
+			else:
+				stack.pop()
+		return False
+
+class _Slot(object):
+	__slots__ = ('done', 'listing')
+	def __init__(self):
+		self.done = threading.Event()
+		self.listing = None
+
+class ParallelWalker(Walker):
+	"""Lists directories ahead of the walk, with a pool of threads.
+
+	The predicate is still called on one thread, in the same order as Walker,
+	so the output doesn't change.  Only the directory reads and stat() calls
+	overlap, which helps on big trees and network file systems.
+	"""
+	def __init__(self, pred, num_threads):
+		Walker.__init__(self, pred)
+		self.requests = queue.Queue()
+		self.slots = {}  # path -> _Slot, for listings not taken yet
+		for _ in range(num_threads):
+			th = threading.Thread(target=self._Work)
+			th.daemon = True
+			th.start()
+	def _Work(self):
+		while True:
+			path, slot = self.requests.get()
+			listing = self._ListDir(path)
+			for t in listing:
+				t.is_dir()  # stat() here, not on the main thread
+			slot.listing = listing
+			slot.done.set()
+	def _Listing(self, path):
+		slot = self.slots.pop(path, None)
+		if slot is None:
+			listing = self._ListDir(path)
+		else:
+			slot.done.wait()
+			listing = slot.listing
+		# Read the subdirectories while the caller visits this one.  If they're
+		# pruned, the work is wasted.
+		for t in listing:
+			if t.is_dir():
+				slot = _Slot()
+				self.slots[t.path] = slot
+				self.requests.put((t.path, slot))
+		return listing
@@ -22,8 +22,7 @@ import tokenizer
 import parser
 from _devbuild.gen import find_nt
 from ast import AST
-from eval import EvalExpr, Thing
-import eval
+from eval import Compile, Walker, ParallelWalker
 
 def printTree(pnode, nametable, f=sys.stderr, indentChars="\t"):
 	def _printTree(pnode, nametable, f, i, depth, indentChars):
@@ -48,33 +47,43 @@ def contains_print_blocker(node):
 	]
 	return node.typ in XYZActions or (node.children and any(contains_print_blocker(c) for c in node.children))
 
-# find
-#	for root, dirs, files in os.walk('.', topdown=True):
-#		print(root, *(os.path.join(root, f) for f in files), sep='\n')
-# find -depth
-#	for root, dirs, files in os.walk('.', topdown=False):
-#		print(*(os.path.join(root, f) for f in files), root, sep='\n')
+# Leading options, before the paths:
+#   -j N     list directories with N threads (ParallelWalker)
+#   -D tree  print the parse tree and AST to stderr
 def main(argv):
+	num_threads = 1
+	debug_tree = False
 	i = 1
+	while i + 1 < len(argv) and argv[i] in ('-j', '-D'):
+		if argv[i] == '-j':
+			num_threads = int(argv[i+1])
+		elif argv[i+1] == 'tree':
+			debug_tree = True
+		i += 2
+
+	start = i
 	while i < len(argv) and argv[i][0] not in ('!', '(', '-'):
 		i += 1
 
-	paths = argv[1:i]
+	paths = argv[start:i]
 	if not paths:
 		paths.append('.')
 
-	tokens = tokenizer.tokenize(argv[i:])
+	# Like GNU find, no expression means -print
+	tokens = tokenizer.tokenize(argv[i:] or ['-true'])
 
 	parse_root = parser.ParseTree(tokens)
 
-	names = tokenizer.tok_name.copy()
-	names.update(parser.nt_name)
-	printTree(parse_root, names)
+	if debug_tree:
+		names = tokenizer.tok_name.copy()
+		names.update(parser.nt_name)
+		printTree(parse_root, names)
 
 	ast_root = AST(parse_root)
 
-	ast_root.PrettyPrint(f=sys.stderr)
-	print(file=sys.stderr)
+	if debug_tree:
+		ast_root.PrettyPrint(f=sys.stderr)
+		print(file=sys.stderr)
 
 	# if ast contains no actions other than -prune or -print:
 	# ast_root = Conjunction(ast_root, -print)
@@ -83,32 +92,22 @@ def main(argv):
 #		print("adding '-a -print'", file=sys.stderr)
 		from _devbuild.gen import find_asdl as asdl
 		if parse_root.children[0].typ == find_nt.conjunction:
-			ast_root.exprs.append(asdl.expr.PrintAction())
+			ast_root.exprs.append(asdl.expr.PrintAction(None, None))
 		else:
-			ast_root = asdl.expr.Conjunction([ast_root, asdl.expr.PrintAction()])
-
-	expr = EvalExpr(ast_root)
-	for path in paths:
-		for root, dirs, files in os.walk(path):
-			t = Thing(root)
-			b = expr(t)
-			if t.quit:
-				break
-			if t.prune:
-				del dirs[:]
-				continue
-			for fname in files:
-				t = Thing(os.path.join(root,fname))
-				expr(t)
-				# -prune should be ignored for files
-		else:
-			continue
-		# TODO run -exec ... {} +
-		break
+			ast_root = asdl.expr.Conjunction([ast_root, asdl.expr.PrintAction(None, None)])
+
+	# Compile once, then evaluate on every file
+	pred = Compile(ast_root)
+	if num_threads > 1:
+		walker = ParallelWalker(pred, num_threads)
+	else:
+		walker = Walker(pred)
+	# TODO run -exec ... {} +
+	return walker.Walk(paths)
 
 if __name__ == '__main__':
 	try:
-		main(sys.argv)
+		sys.exit(main(sys.argv))
 	except RuntimeError as e:
 		print('FATAL: %s' % e, file=sys.stderr)
 		sys.exit(1)
@@ -8,21 +8,27 @@
 
 import pgen2.driver, pgen2.pgen, pgen2.parse
 
-from oil_lang.expr_parse import NoSingletonAction
-
 from tokenizer import TokenDef, opmap, tok_name
 
 with open('tools/find/find.pgen2') as f:
 	_grammar = pgen2.pgen.MakeGrammar(f, tok_def=TokenDef())
-_parser = pgen2.parse.Parser(_grammar, convert=NoSingletonAction)
+_parser = pgen2.parse.Parser(_grammar)
 
 nt_name = _grammar.number2symbol.copy()
 
+def _NoSingletons(pnode):
+	"""Replace nodes with one child by the child, as ast.py expects."""
+	while pnode.children and len(pnode.children) == 1:
+		pnode = pnode.children[0]
+	if pnode.children:
+		pnode.children = [_NoSingletons(c) for c in pnode.children]
+	return pnode
+
 def ParseTree(tokens):
-	return pgen2.driver.PushTokens(
+	return _NoSingletons(pgen2.driver.PushTokens(
 		_parser,
 		tokens,
 		_grammar,
 		start_symbol='start',
 		opmap=opmap
-	)
+	))
@@ -51,4 +51,57 @@ unit-tests() {
   find-demo '!' -name '*.py'
 }
 
+#
+# Benchmark
+#
+
+readonly BIG_TREE=_tmp/find-big-tree
+
+make-big-tree() {
+  ### 1000 dirs of 1000 files each, a million files in total
+
+  local num_dirs=${1:-1000}
+  local files_per_dir=${2:-1000}
+
+  rm -r -f $BIG_TREE
+  for i in $(seq $num_dirs); do
+    local dir=$BIG_TREE/d$((i % 10))/d$i
+    mkdir -p $dir
+    # touch is one process per directory
+    (cd $dir && seq -f 'f%g.txt' $files_per_dir | xargs touch)
+  done
+}
+
+compare-gnu() {
+  ### Time GNU find and this one on the same expressions
+
+  test -d $BIG_TREE || make-big-tree
+
+  local -a exprs=(
+    '-name f1.txt'
+    '-type d'
+    '-type f -name f1*'
+  )
+  local find_py=$REPO_ROOT/tools/find/find.py
+
+  # Without scandir(), find.py lstat()s every file, so the timings differ a lot
+  if python2 -c 'import scandir' 2>/dev/null; then
+    echo 'find.py: using the scandir backport'
+  else
+    echo 'find.py: no scandir, so listdir() and lstat() every file'
+  fi
+
+  for expr in "${exprs[@]}"; do
+    echo "--- $expr"
+    # word splitting is intended; glob chars are quoted by set -f
+    set -f
+    time find $BIG_TREE $expr | wc -l
+    time PYTHONPATH="$REPO_ROOT:$REPO_ROOT/vendor" \
+      $find_py $BIG_TREE $expr | wc -l
+    time PYTHONPATH="$REPO_ROOT:$REPO_ROOT/vendor" \
+      $find_py -j 4 $BIG_TREE $expr | wc -l
+    set +f
+  done
+}
+
 "$@"
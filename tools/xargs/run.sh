@@ -0,0 +1,43 @@
+#!/usr/bin/env bash
+#
+# Usage:
+#   tools/xargs/run.sh <function name>
+
+set -o nounset
+set -o pipefail
+set -o errexit
+
+readonly REPO_ROOT=$(cd $(dirname $0)/../.. && pwd)
+
+readonly XARGS_PY=$REPO_ROOT/tools/xargs/xargs.py
+
+throughput() {
+  ### Time GNU xargs and this one spawning many tiny commands
+
+  local n=${1:-100000}
+  local procs=${2:-8}
+
+  echo "--- $n commands, -P $procs"
+  time seq $n | xargs -n 1 -P $procs true
+  time seq $n | $XARGS_PY -n 1 -P $procs true
+
+  echo "--- $n commands, one at a time"
+  time seq $n | xargs -n 1 true
+  time seq $n | $XARGS_PY -n 1 true
+}
+
+packing() {
+  ### Count the command lines needed for many args
+
+  local n=${1:-1000000}
+
+  echo "--- $n args, whitespace"
+  time seq $n | xargs echo | wc -l
+  time seq $n | $XARGS_PY echo | wc -l
+
+  echo "--- $n args, -0"
+  time seq $n | tr '\n' '\0' | xargs -0 echo | wc -l
+  time seq $n | tr '\n' '\0' | $XARGS_PY -0 echo | wc -l
+}
+
+"$@"
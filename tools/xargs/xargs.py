@@ -10,6 +10,7 @@ from __future__ import print_function
 
 import argparse
 import collections
+import errno
 import itertools
 import os
 # TODO docs.python.org suggests https://pypi.org/project/subprocess32/
@@ -94,11 +95,28 @@ def read_lines_eof(eof_str, input):
 	"""Read lines from input until a line equals eof_str or EOF is reached"""
 	return iter(input.next, eof_str + '\n')
 
+# Read -0 and -d input in blocks of this size
+BLOCK_SIZE = 64 * 1024
+
+# Besides the strings, exec() copies a pointer to each one
+POINTER_SIZE = 8
+
+# What -P 0 means
+MAX_PROCS = 1024
+
 def str_memsize(*strings):
 	# type: (*str) -> int
 	"""Calculate the amount of memory required to store the strings in an argv."""
 	return sum(len(s) + 1 for s in strings)
 
+def arg_max_budget():
+	# type: () -> int
+	"""Bytes of argv that exec() accepts, after the environment and some headroom."""
+	env_size = sum(
+		len(k) + len(v) + 2 + POINTER_SIZE for k, v in os.environ.items()
+	)
+	return os.sysconf('SC_ARG_MAX') - env_size - 2048
+
 def is_complete_line(line):
 	# type: (str) -> bool
 	return len(line) > 1 and line[-2] not in (' ', '\t')
@@ -107,22 +125,32 @@ def argsplit_ws(lines):
 	# type: (Iterable[str]) -> Iterator[str]
 	"""Split lines into arguments and append metainfo to each argument."""
 	for line in lines:
-		# TODO this might require some more testing
-		for arg in shlex.split(line):
-			yield arg
-
-def argsplit_delim(delim, lines):
-	# type: (str, Iterable[str]) -> Iterator[str]
-	"""Split lines into arguments and append metainfo to each argument."""
-	buf = []
-	for c in itertools.chain.from_iterable(lines):
-		if c == delim:
-			yield "".join(buf)
-			buf = []
+		# shlex is slow, and only needed for quotes and backslashes
+		if '"' in line or "'" in line or '\\' in line:
+			for arg in shlex.split(line):
+				yield arg
 		else:
-			buf.append(c)
-	if buf:
-		yield "".join(buf)
+			for arg in line.split():
+				yield arg
+
+def argsplit_delim(delim, input):
+	# type: (str, IO[str]) -> Iterator[str]
+	"""
+	Split the input into arguments at delim.  It's read in blocks, and
+	arguments are yielded as soon as a block ends them.
+	"""
+	fd = input.fileno()
+	rest = ''
+	while True:
+		block = os.read(fd, BLOCK_SIZE)
+		if not block:
+			break
+		parts = (rest + block).split(delim)
+		rest = parts.pop()
+		for arg in parts:
+			yield arg
+	if rest:
+		yield rest
 
 def read_n_xargs_lines(linec, line_iter):
 	# type: (int, Iterator[str]) -> Iterator[str]
@@ -132,18 +160,6 @@ def read_n_xargs_lines(linec, line_iter):
 		if is_complete_line(line):
 			linec -= 1
 
-def take_chars(charc, iterator):
-	# type: (int, Iterator[str]) -> Iterator[str]
-	charc -= str_memsize(iterator.peek())
-	while charc >= 0:
-		yield next(iterator)
-		charc -= str_memsize(iterator.peek())
-
-def take(n, iterator):
-	# type: (int, Iterator[Any]) -> Iterator[Any]
-	for _ in range(n):
-		yield next(iterator)
-
 def group_args_lines(max_lines, input):
 	# type: (int, Iterator[str]) -> Iterator[List[str]]
 	while True:
@@ -152,16 +168,26 @@ def group_args_lines(max_lines, input):
 		buf.extend(it)
 		yield buf
 
-def group_args(max_chars, max_args, arg_iter):
-	# type: (Optional[int], Optional[int], Iterator[str]) -> Iterator[List[str]]
-	arg_iter = PeekableIterator(arg_iter)
-	while arg_iter.peek() or True: # raise StopIteration if iterator is empty
-		it = arg_iter
-		if max_chars:
-			it = take_chars(max_chars, it)
-		if max_args:
-			it = take(max_args, it)
-		yield list(it)
+def group_args(max_chars, max_args, arg_iter, overhead=1):
+	# type: (Optional[int], Optional[int], Iterator[str], int) -> Iterator[List[str]]
+	"""
+	Pack as many arguments into each group as max_chars and max_args allow.
+	Each argument takes its length plus overhead bytes.
+	"""
+	buf = []
+	size = 0
+	for arg in arg_iter:
+		n = len(arg) + overhead
+		if buf and (
+				(max_args and len(buf) >= max_args) or
+				(max_chars and size + n > max_chars)):
+			yield buf
+			buf = []
+			size = 0
+		buf.append(arg)
+		size += n
+	if buf:
+		yield buf
 
 def replace_args(initial_arguments, replace_str, additional_arguments):
 	# type: (Sequence[str], str, Iterable[str]) -> Iterator[str]
@@ -226,15 +252,6 @@ def prompt_user(cmdline_iter):
 				continue
 			yield cmdline
 
-def wait_open_slot(processes):
-	# type: (List[Optional[Any]])-> int
-	while processes:
-		for i, p in enumerate(processes):
-			# process doesn't yet exist or has finished
-			if p is None or p.poll() is not None:
-				return i
-		_pid, _err = os.wait()
-
 def map_errcode(rc):
 	# type: int -> int
 	"""map the returncode of a child-process to the returncode of the main process."""
@@ -248,13 +265,73 @@ def map_errcode(rc):
 		return 125
 	return 1
 
+def run_cmdlines(cmdline_iter, max_procs, cmd_input, slot_var):
+	# type: (Iterator[List[str]], int, IO[str], Optional[str]) -> int
+	"""
+	Run each cmdline, with at most max_procs at a time.  Like GNU xargs, keep
+	going when a command fails with 1-125, and stop on 255, a signal, or a
+	command that can't be run.
+	"""
+	running = {}  # pid -> (slot, Popen)
+	free_slots = list(reversed(range(max_procs)))
+	environ = os.environ.copy() if slot_var else None
+	status = 0
+	stop = False
+
+	def reap():
+		# type: () -> int
+		pid, wait_status = os.wait()
+		slot, p = running.pop(pid)
+		free_slots.append(slot)
+		if os.WIFSIGNALED(wait_status):
+			rc = -os.WTERMSIG(wait_status)
+		else:
+			rc = os.WEXITSTATUS(wait_status)
+		# We reaped it, so Popen must not wait() for it later
+		p.returncode = rc
+		return rc
+
+	cmdline_iter = iter(cmdline_iter)
+	while True:
+		if not free_slots or stop:
+			if not running:
+				break
+			rc = reap()
+		else:
+			try:
+				cmdline = next(cmdline_iter)
+			except StopIteration:
+				stop = True
+				continue
+			slot = free_slots.pop()
+			if slot_var:
+				environ[slot_var] = str(slot)
+			try:
+				p = subprocess.Popen(cmdline, stdin=cmd_input, env=environ)
+			except OSError as e:
+				print('xargs: %s: %s' % (cmdline[0], e.strerror), file=sys.stderr)
+				status = 127 if e.errno == errno.ENOENT else 126
+				stop = True
+				continue
+			running[p.pid] = (slot, p)
+			continue
+
+		if rc != 0:
+			code = map_errcode(rc)
+			if code == 123:
+				status = max(status, 123)
+			else:
+				status = code
+				stop = True
+	return status
+
 def main(xargs_args):
 	# phase 1: read input
 	if xargs_args.arg_file == '-':
 		xargs_input = sys.stdin
 		cmd_input = open(os.devnull, 'r')
 	else:
-		xargs_input = xargs_args.arg_file
+		xargs_input = open(xargs_args.arg_file[0], 'r')
 		cmd_input = sys.stdin
 	
 	if xargs_args.eof_str:
@@ -271,11 +348,15 @@ def main(xargs_args):
 			arg_iter = argsplit_delim(xargs_args.delimiter, xargs_input)
 		else:
 			arg_iter = argsplit_ws(xargs_input)
+		if xargs_args.replace_str:
+			# -I ignores blank lines
+			arg_iter = (arg for arg in arg_iter if arg)
 		# if exit is True, max_chars is checked later
 		arggroup_iter = group_args(
 			xargs_args.max_chars if not xargs_args.exit else None,
 			xargs_args.max_args,
-			arg_iter
+			arg_iter,
+			xargs_args.arg_overhead
 		)
 
 	arggroup_iter = PeekableIterator(arggroup_iter)
@@ -328,23 +409,15 @@ def main(xargs_args):
 		cmdline_iter = tee_cmdline(cmdline_iter)
 
 	# phase 4: execute command-lines
-	if xargs_args.max_procs > 1:
-		ps = [None] * xargs_args.max_procs
-		environ = os.environ.copy()
-		for cmdline in cmdline_iter:
-			i = wait_open_slot(ps)
-			if ps[i] is not None and ps[i].returncode:
-				break
-			if xargs_args.process_slot_var:
-				environ[xargs_args.process_slot_var] = str(i)
-			ps[i] = subprocess.Popen(cmdline, stdin=cmd_input, env=environ)
-		return max(map_errcode(p.wait()) for p in ps if p is not None)
-	else:
-		for cmdline in cmdline_iter:
-			p = subprocess.Popen(cmdline, stdin=cmd_input)
-			if p.wait():
-				return map_errcode(p.returncode)
-	return 0
+	max_procs = xargs_args.max_procs
+	if max_procs == 0:  # as many as possible
+		max_procs = MAX_PROCS
+	return run_cmdlines(
+		cmdline_iter,
+		max_procs,
+		cmd_input,
+		xargs_args.process_slot_var
+	)
 
 if __name__ == "__main__":
 	xargs_args = xargs.parse_args()
@@ -354,6 +427,12 @@ if __name__ == "__main__":
 		if len(xargs_args.delimiter) > 1:
 			# TODO error
 			sys.exit(1)
+	# Without -s, fill the command line up to ARG_MAX, which also counts the
+	# pointers in argv
+	xargs_args.arg_overhead = 1
+	if xargs_args.max_chars is None and not xargs_args.exit:
+		xargs_args.max_chars = arg_max_budget()
+		xargs_args.arg_overhead = 1 + POINTER_SIZE
 	if xargs_args.max_chars and not xargs_args.replace_str:
 		base = str_memsize(xargs_args.command, *xargs_args.initial_arguments)
 		if base > xargs_args.max_chars:
@@ -883,7 +883,17 @@ class ExprEvaluator(object):
 
         # Eval args first
         with tagswitch(func) as case:
-            if case(value_e.Func, value_e.BuiltinFunc):
+            if case(value_e.Func):
+                user_func = cast(value.Func, UP_func)
+                if func_proc.CanBindArgsDirectly(user_func, node.args):
+                    return func_proc.CallUserFuncDirect(
+                        user_func, node.args, self, self.mem, self.cmd_ev)
+
+                to_call = func
+                pos_args, named_args = func_proc._EvalArgList(self, node.args)
+                rd = typed_args.Reader(pos_args, named_args, None, node.args)
+
+            elif case(value_e.BuiltinFunc):
                 to_call = func
                 pos_args, named_args = func_proc._EvalArgList(self, node.args)
                 rd = typed_args.Reader(pos_args, named_args, None, node.args)
@@ -209,14 +209,17 @@ def _EvalArgList(
 
 def EvalTypedArgsToProc(
         expr_ev,  # type: expr_eval.ExprEvaluator
-        current_frame,  # type: Dict[str, Cell]
-        module_frame,  # type: Dict[str, Cell]
+        mem,  # type: state.Mem
         mutable_opts,  # type: state.MutableOpts
         node,  # type: command.Simple
         proc_args,  # type: ProcArgs
 ):
     # type: (...) -> None
-    """Evaluate word, typed, named, and block args for a proc."""
+    """Evaluate word, typed, named, and block args for a proc.
+
+    Only deferred args and blocks capture mem.CurrentFrame(), so the caller's
+    frame can still be reused after 'p (x)'.
+    """
     proc_args.typed_args = node.typed_args
 
     # We only got here if the call looks like
@@ -230,6 +233,8 @@ def EvalTypedArgsToProc(
     if ty:
         if ty.left.id == Id.Op_LBracket:  # assert [42 === x]
             # Defer evaluation by wrapping in value.Expr
+            current_frame = mem.CurrentFrame()
+            module_frame = mem.GlobalFrame()
 
             for exp in ty.pos_args:
                 proc_args.pos_args.append(
@@ -265,8 +270,8 @@ def EvalTypedArgsToProc(
     # p { echo hi } is an unevaluated block
     if node.block:
         # Attach current frame to command fragment
-        proc_args.block_arg = value.Command(node.block, current_frame,
-                                            module_frame)
+        proc_args.block_arg = value.Command(node.block, mem.CurrentFrame(),
+                                            mem.GlobalFrame())
 
         # Add location info so the cmd_val looks the same for both:
         #   cd /tmp (; ; ^(echo hi))
@@ -567,6 +572,28 @@ def BindProcArgs(proc, cmd_val, mem):
                 blame_loc)
 
 
+def _RunFuncBody(func, cmd_ev):
+    # type: (value.Func, cmd_eval.CommandEvaluator) -> value_t
+    """Run the body of a func whose frame is already pushed."""
+    try:
+        cmd_ev._Execute(func.parsed.body)
+
+        # 'return (x)' is pending, rather than raised
+        val = cmd_ev.flow_value
+        if val is not None:
+            cmd_ev.flow_token = None
+            cmd_ev.flow_value = None
+            return val
+        if cmd_ev.flow_token is not None:
+            raise AssertionError('IntControlFlow in func')
+
+        return value.Null  # implicit return
+    except vm.ValueControlFlow as e:
+        return e.value
+    except vm.IntControlFlow as e:
+        raise AssertionError('IntControlFlow in func')
+
+
 def CallUserFunc(
         func,  # type: value.Func
         rd,  # type: typed_args.Reader
@@ -579,17 +606,68 @@ def CallUserFunc(
 
     # TODO: ctx_Eval() can replace io with DummyIO type!  It can possibly
     # implement __getattr__ and __get_mutating__?
-    with state.ctx_FuncCall(mem, func):
+    with state.ctx_FuncCall(mem, func, mem.NewCallFrame()):
         _BindFuncArgs(func, rd, mem)
+        return _RunFuncBody(func, cmd_ev)
+
+    raise AssertionError('unreachable')
 
-        try:
-            cmd_ev._Execute(func.parsed.body)
 
-            return value.Null  # implicit return
-        except vm.ValueControlFlow as e:
-            return e.value
-        except vm.IntControlFlow as e:
-            raise AssertionError('IntControlFlow in func')
+def CanBindArgsDirectly(func, args):
+    # type: (value.Func, ArgList) -> bool
+    """Is f(x, y) a plain call that CallUserFuncDirect() can handle?
+
+    That is, the func has no named params or ...rest param, and the call
+    passes exactly one positional arg per param, with no spread.
+    """
+    node = func.parsed
+    if node.named is not None:
+        return False
+    if args.named_args is not None and len(args.named_args) != 0:
+        return False
+    if args.block_expr is not None:
+        return False
+
+    num_params = 0
+    if node.positional:
+        if node.positional.rest_of:
+            return False
+        num_params = len(node.positional.params)
+
+    if len(args.pos_args) != num_params:
+        return False
+    for e in args.pos_args:
+        if e.tag() == expr_e.Spread:
+            return False
+    return True
+
+
+def CallUserFuncDirect(
+        func,  # type: value.Func
+        args,  # type: ArgList
+        expr_ev,  # type: expr_eval.ExprEvaluator
+        mem,  # type: state.Mem
+        cmd_ev,  # type: cmd_eval.CommandEvaluator
+):
+    # type: (...) -> value_t
+    """Call a func, evaluating each arg straight into its param's Cell.
+
+    Unlike CallUserFunc(), this doesn't build the List and Reader of args, or
+    a LeftName per param.  The caller checks CanBindArgsDirectly() first.
+    """
+    frame = mem.NewCallFrame()
+
+    # Args are evaluated in the caller's scope, before the frame is pushed
+    group = func.parsed.positional
+    if group:
+        i = 0
+        for p in group.params:
+            val = expr_ev._EvalExpr(args.pos_args[i])
+            frame[p.name] = Cell(False, False, False, val)
+            i += 1
+
+    with state.ctx_FuncCall(mem, func, frame):
+        return _RunFuncBody(func, cmd_ev)
 
     raise AssertionError('unreachable')
 
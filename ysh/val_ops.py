@@ -6,12 +6,13 @@ from _devbuild.gen.syntax_asdl import loc, loc_t, command_t
 from _devbuild.gen.value_asdl import (value, value_e, value_t, eggex_ops,
                                       eggex_ops_t, regex_match, RegexMatch,
                                       Obj)
+from core import bash_impl
 from core import error
 from core.error import e_die
 from display import ui
 from mycpp import mops
 from mycpp import mylib
-from mycpp.mylib import tagswitch, log
+from mycpp.mylib import tagswitch, iteritems, log
 from ysh import regex_translate
 
 from typing import TYPE_CHECKING, cast, Dict, List, Optional
@@ -178,6 +179,10 @@ def ToShellArray(val, blame_loc, prefix=''):
             val = cast(value.BashArray, UP_val)
             strs = val.strs
 
+        elif case2(value_e.SparseArray):
+            val = cast(value.SparseArray, UP_val)
+            strs = bash_impl.SparseArray_GetValues(val)
+
         else:
             raise error.TypeErr(val, "%sexpected List" % prefix, blame_loc)
 
@@ -353,6 +358,10 @@ def ToBool(val):
             val = cast(value.BashArray, UP_val)
             return len(val.strs) != 0
 
+        elif case(value_e.SparseArray):
+            val = cast(value.SparseArray, UP_val)
+            return bash_impl.SparseArray_Count(val) != 0
+
         elif case(value_e.BashAssoc):
             val = cast(value.BashAssoc, UP_val)
             return len(val.d) != 0
@@ -430,6 +439,19 @@ def ExactlyEqual(left, right, blame_loc):
 
             return True
 
+        elif case(value_e.SparseArray):
+            left = cast(value.SparseArray, UP_left)
+            right = cast(value.SparseArray, UP_right)
+            if len(left.d) != len(right.d):
+                return False
+
+            for index, s in iteritems(left.d):
+                s2 = right.d.get(index)
+                if s2 is None or s2 != s:
+                    return False
+
+            return True
+
         elif case(value_e.List):
             left = cast(value.List, UP_left)
             right = cast(value.List, UP_right)